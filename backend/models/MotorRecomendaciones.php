@@ -205,6 +205,12 @@ class MotorRecomendaciones {
      * Buscar cursos relevantes para un área específica
      */
     private function buscarCursosParaArea($areaNombre, $sector, $etapa, $prioridad) {
+        // Listas precalculadas por recommendation_precompute.py
+        $cursos = $this->buscarCursosPrecalculados($areaNombre, $sector, $etapa, $prioridad);
+        if ($cursos !== null) {
+            return $cursos;
+        }
+
         // Mapeo de áreas a palabras clave de búsqueda en cursos
         $palabrasClave = [
             'Gestión Empresarial' => ['gestión', 'administración', 'liderazgo', 'planificación', 'estrategia'],
@@ -280,7 +286,52 @@ class MotorRecomendaciones {
         
         return $cursos;
     }
-    
+
+    /**
+     * Cursos recomendados desde la tabla recomendaciones_cursos_precalculadas
+     *
+     * @return array|null null si la tabla no existe o no tiene la combinación
+     *                    (se usa la búsqueda en vivo)
+     */
+    private function buscarCursosPrecalculados($areaNombre, $sector, $etapa, $prioridad) {
+        // Mismas columnas que la búsqueda en vivo
+        $query = "SELECT
+            c.id_curso,
+            c.titulo,
+            c.descripcion_corta,
+            c.nivel as nivel_dificultad,
+            c.duracion_horas,
+            c.precio,
+            c.imagen_portada,
+            c.calificacion_promedio,
+            (SELECT COUNT(*) FROM modulos WHERE id_curso = c.id_curso) as total_modulos
+        FROM recomendaciones_cursos_precalculadas r
+        INNER JOIN cursos c ON c.id_curso = r.id_curso
+        WHERE r.area = ? AND r.sector = ? AND r.etapa = ? AND r.prioridad = ?
+        AND c.estado = 'publicado'
+        ORDER BY r.posicion
+        LIMIT 5";
+
+        // Sector o etapa sin lista propia: la lista general del área
+        $claves = [[$sector ?? '', $etapa ?? '']];
+        if ($claves[0] !== ['', '']) {
+            $claves[] = ['', ''];
+        }
+
+        try {
+            foreach ($claves as [$claveSector, $claveEtapa]) {
+                $cursos = $this->db->fetchAll($query, [$areaNombre, $claveSector, $claveEtapa, $prioridad]);
+                if (!empty($cursos)) {
+                    return $cursos;
+                }
+            }
+        } catch (Exception $e) {
+            Logger::error("Sin recomendaciones precalculadas: " . $e->getMessage());
+        }
+
+        return null;
+    }
+
     /**
      * Generar mensaje personalizado por área
      */
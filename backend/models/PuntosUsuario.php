@@ -190,8 +190,42 @@ class PuntosUsuario {
     
     /**
      * Obtener ranking de usuarios
+     * Lee el ranking materializado por leaderboard_refresh.py; si no está
+     * construido, usa la vista ranking_usuarios
      */
     public function getRanking($limite = 100, $offset = 0) {
+        try {
+            // Grupo de puntaje donde empieza la página: solo se saltan filas dentro de ese grupo
+            $grupo = $this->db->fetchOne(
+                "SELECT puntos_totales, nivel, posicion FROM ranking_puntos_grupos
+                 WHERE posicion <= ? ORDER BY posicion DESC LIMIT 1",
+                [$offset + 1]
+            );
+            
+            if ($grupo) {
+                $query = "SELECT 
+                    u.id_usuario, u.nombre, u.apellido, u.foto_perfil,
+                    r.puntos_totales, r.nivel, r.experiencia,
+                    g.posicion as posicion_global
+                FROM ranking_puntos r
+                INNER JOIN ranking_puntos_grupos g ON g.puntos_totales = r.puntos_totales AND g.nivel = r.nivel
+                INNER JOIN usuarios u ON u.id_usuario = r.id_usuario
+                WHERE r.puntos_totales < ? OR (r.puntos_totales = ? AND r.nivel <= ?)
+                ORDER BY r.puntos_totales DESC, r.nivel DESC, r.id_usuario DESC
+                LIMIT ? OFFSET ?";
+                
+                return $this->db->fetchAll($query, [
+                    $grupo['puntos_totales'],
+                    $grupo['puntos_totales'],
+                    $grupo['nivel'],
+                    $limite,
+                    $offset + 1 - $grupo['posicion']
+                ]);
+            }
+        } catch (Exception $e) {
+            Logger::error("Ranking materializado no disponible: " . $e->getMessage());
+        }
+        
         $query = "SELECT * FROM ranking_usuarios 
                  LIMIT ? OFFSET ?";
         
@@ -202,6 +236,22 @@ class PuntosUsuario {
      * Obtener posición de usuario en ranking
      */
     public function getPosicionRanking($idUsuario) {
+        try {
+            $resultado = $this->db->fetchOne(
+                "SELECT g.posicion FROM ranking_puntos r
+                 INNER JOIN ranking_puntos_grupos g ON g.puntos_totales = r.puntos_totales AND g.nivel = r.nivel
+                 WHERE r.id_usuario = ?",
+                [$idUsuario]
+            );
+            
+            if ($resultado) {
+                return $resultado['posicion'];
+            }
+        } catch (Exception $e) {
+            Logger::error("Ranking materializado no disponible: " . $e->getMessage());
+        }
+        
+        // Usuario aún no materializado (o ranking sin construir)
         $query = "SELECT posicion_global FROM ranking_usuarios 
                  WHERE id_usuario = ?";
         
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda: LIKE '%término%' vs MATCH ... AGAINST
+
+Para cada búsqueda de FULLTEXT_INDEXES que hoy usa LIKE (recursos, cursos,
+productos) crea en un MySQL local una tabla con las mismas columnas de
+texto, la llena con texto sintético en español hasta cada tamaño de --rows
+(10k, 100k, 1M) y reproduce un corpus de términos de búsqueda con:
+
+  - like:     (col1 LIKE %s OR col2 LIKE %s ...) como en los modelos PHP
+  - natural:  MATCH(...) AGAINST(término IN NATURAL LANGUAGE MODE)
+  - boolean:  MATCH(...) AGAINST(boolean_query(término) IN BOOLEAN MODE),
+              todas las palabras significativas como prefijo
+
+Reporta latencia p50/p95 por modo, tiempo de creación del índice y el
+solapamiento de resultados contra LIKE (recall: qué parte de lo que
+encuentra LIKE encuentra también MATCH; jaccard: parecido de los conjuntos).
+LIKE encuentra subcadenas ("venta" dentro de "preventa") y MATCH palabras
+completas o prefijos, así que el recall no llega a 1 por diseño.
+
+El corpus por defecto son búsquedas típicas del catálogo; con --terms se
+reproduce un archivo con un término por línea (p. ej. extraído de los logs).
+
+Ejecutar (requiere un MySQL local de pruebas, NUNCA contra producción):
+    python bench_fulltext.py --user root --password secret
+    python bench_fulltext.py --rows 10000,100000,1000000 --terms busquedas.txt --report fulltext.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import db_pool
+from bench_queries import percentile
+from fulltext_migration import FULLTEXT_INDEXES, SPANISH_STOPWORDS, boolean_query, ensure_stopwords
+from schema_model import load_model
+
+BENCH_DATABASE = 'bench_fulltext'
+MODES = ('like', 'natural', 'boolean')
+INSERT_CHUNK = 2000
+
+DEFAULT_TERMS = (
+    'marketing digital', 'plan de negocios', 'finanzas', 'ventas', 'excel', 'liderazgo', 'contabilidad',
+    'emprendimiento', 'redes sociales', 'inventario', 'precios', 'atención al cliente',
+    'facturación electrónica', 'crédito', 'exportación', 'logística', 'recursos humanos', 'nómina',
+    'productividad', 'flujo de efectivo', 'impuestos', 'branding', 'comercio electrónico', 'costos',
+    'negociación', 'estrategia', 'presupuesto', 'proveedores', 'calidad', 'innovación',
+)
+
+# Vocabulario del texto sintético (las primeras palabras son las más frecuentes)
+VOCABULARY = (
+    'negocio', 'empresa', 'clientes', 'ventas', 'gestión', 'marketing', 'digital', 'estrategia', 'plan',
+    'finanzas', 'costos', 'precios', 'producto', 'servicio', 'mercado', 'equipo', 'liderazgo', 'proceso',
+    'calidad', 'proveedores', 'inventario', 'contabilidad', 'impuestos', 'crédito', 'presupuesto', 'flujo',
+    'efectivo', 'redes', 'sociales', 'comercio', 'electrónico', 'logística', 'exportación', 'nómina',
+    'recursos', 'humanos', 'productividad', 'innovación', 'negociación', 'branding', 'atención', 'excel',
+    'emprendimiento', 'facturación', 'electrónica', 'crecimiento', 'análisis', 'indicadores', 'ventaja',
+    'competitiva', 'canales', 'distribución', 'pequeña', 'mediana', 'pyme', 'financiamiento', 'inversión',
+    'rentabilidad', 'margen', 'utilidad', 'capacitación', 'herramientas', 'plantilla', 'guía', 'curso',
+    'taller', 'práctico', 'básico', 'avanzado', 'modelo', 'canvas', 'propuesta', 'valor', 'segmento',
+    'campaña', 'publicidad', 'contenido', 'tienda', 'línea', 'pagos', 'preventa', 'posventa', 'cobranza',
+    'riesgo', 'legal', 'contrato', 'fiscal', 'sat', 'cooperativa', 'artesanal', 'agrícola', 'turismo',
+)
+
+
+def bench_indexes():
+    """Índices que reemplazan un LIKE, uno por tabla"""
+    return [index for index in FULLTEXT_INDEXES if index.like]
+
+
+def column_types(model, index):
+    """Tipos de columna del modelo compilado; TEXT si la tabla no está en el dump base"""
+    columns = model['tables'].get(index.table, {}).get('columns', {})
+    return [columns[c]['type'] if c in columns else ('varchar(200)' if n == 0 else 'text')
+            for n, c in enumerate(index.columns)]
+
+
+def text_limit(column_type):
+    if column_type.lower().startswith('varchar('):
+        return int(column_type[8:-1])
+    return 4000
+
+
+class TextGenerator:
+    """Texto en español con frecuencias tipo Zipf y los términos del corpus insertados"""
+
+    def __init__(self, terms, seed):
+        self.rng = random.Random(seed)
+        self.words = list(VOCABULARY)
+        self.weights = [1.0 / (rank + 1) for rank in range(len(self.words))]
+        self.stopwords = [w for w in SPANISH_STOPWORDS if len(w) <= 3]
+        self.terms = list(terms)
+
+    def text(self, min_words, max_words, limit):
+        words = []
+        for _ in range(self.rng.randint(min_words, max_words)):
+            roll = self.rng.random()
+            if roll < 0.25:
+                words.append(self.rng.choice(self.stopwords))
+            elif roll < 0.28:
+                words.append(self.rng.choice(self.terms))
+            else:
+                words.append(self.rng.choices(self.words, self.weights)[0])
+        return ' '.join(words)[:limit]
+
+
+def create_table(cursor, index, types):
+    columns = ',\n'.join(f"  `{c}` {t}" for c, t in zip(index.columns, types))
+    cursor.execute(f"DROP TABLE IF EXISTS `{index.table}`")
+    cursor.execute(f"""
+        CREATE TABLE `{index.table}` (
+          `id` INT AUTO_INCREMENT PRIMARY KEY,
+        {columns}
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+
+def fill(conn, index, types, generator, count):
+    """Agrega count filas de texto sintético"""
+    shapes = [(3, 8) if n == 0 else (15, 40) if text_limit(t) <= 500 else (40, 150)
+              for n, t in enumerate(types)]
+    marks = ', '.join(['%s'] * len(index.columns))
+    columns = ', '.join(f"`{c}`" for c in index.columns)
+    with conn.cursor() as cursor:
+        for start in range(0, count, INSERT_CHUNK):
+            rows = [tuple(generator.text(lo, hi, text_limit(t)) for (lo, hi), t in zip(shapes, types))
+                    for _ in range(min(INSERT_CHUNK, count - start))]
+            cursor.executemany(f"INSERT INTO `{index.table}` ({columns}) VALUES ({marks})", rows)
+            conn.commit()
+
+
+def mode_query(index, mode):
+    table = f"`{index.table}`"
+    columns = ', '.join(f"`{c}`" for c in index.columns)
+    if mode == 'like':
+        where = ' OR '.join(f"`{c}` LIKE %s" for c in index.columns)
+        return f"SELECT id FROM {table} WHERE ({where})"
+    modifier = 'NATURAL LANGUAGE MODE' if mode == 'natural' else 'BOOLEAN MODE'
+    return f"SELECT id FROM {table} WHERE MATCH({columns}) AGAINST(%s IN {modifier})"
+
+
+def mode_params(index, mode, term, min_token):
+    if mode == 'like':
+        return [f"%{term}%"] * len(index.columns)
+    if mode == 'boolean':
+        query = boolean_query(term, min_token)
+        return [query] if query else None
+    return [term]
+
+
+def run_mode(conn, index, mode, terms, repeat, min_token):
+    """Latencia (mediana de repeat) e ids encontrados por término"""
+    sql = mode_query(index, mode)
+    latencies, found = [], {}
+    with conn.cursor() as cursor:
+        for term in terms:
+            params = mode_params(index, mode, term, min_token)
+            if params is None:
+                continue
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                ids = {row[0] for row in cursor.fetchall()}
+                samples.append(time.perf_counter() - start)
+            latencies.append(sorted(samples)[len(samples) // 2])
+            found[term] = ids
+    return latencies, found
+
+
+def overlap(like_found, found):
+    """Recall frente a LIKE y Jaccard promedio en los términos comparables"""
+    recalls, jaccards = [], []
+    for term, ids in found.items():
+        reference = like_found.get(term)
+        if reference is None:
+            continue
+        union = reference | ids
+        if reference:
+            recalls.append(len(reference & ids) / len(reference))
+        jaccards.append(len(reference & ids) / len(union) if union else 1.0)
+    mean = lambda values: round(sum(values) / len(values), 3) if values else None
+    return mean(recalls), mean(jaccards)
+
+
+def summarize(mode, latencies, found, like_found):
+    recall, jaccard = overlap(like_found, found) if mode != 'like' else (1.0, 1.0)
+    rows = [len(ids) for ids in found.values()]
+    return {
+        'terms': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'avg_rows': round(sum(rows) / len(rows), 1) if rows else 0,
+        'recall_vs_like': recall,
+        'jaccard_vs_like': jaccard,
+    }
+
+
+def load_terms(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        terms = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return list(dict.fromkeys(terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIKE vs MATCH ... AGAINST")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--rows', default='10000,100000', help="Tamaños de tabla, separados por coma (hasta 1000000)")
+    parser.add_argument('--tables', help="Solo estas tablas (separadas por coma)")
+    parser.add_argument('--terms', help="Archivo con un término de búsqueda por línea")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por término (se toma la mediana)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    sizes = sorted({int(n) for n in args.rows.split(',') if n.strip()})
+    terms = load_terms(args.terms) if args.terms else list(DEFAULT_TERMS)
+    indexes = bench_indexes()
+    if args.tables:
+        wanted = {t.strip() for t in args.tables.split(',') if t.strip()}
+        indexes = [i for i in indexes if i.table in wanted]
+    if not indexes or not terms:
+        parser.error("sin tablas o sin términos para comparar")
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'charset': 'utf8mb4',
+    }
+    model = load_model()
+    conn = db_pool.connect(config)
+    results = {}
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+            cursor.execute(f"CREATE DATABASE {BENCH_DATABASE} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            cursor.execute(f"USE {BENCH_DATABASE}")
+            cursor.execute("SELECT @@innodb_ft_min_token_size")
+            min_token = cursor.fetchone()[0]
+            ensure_stopwords(cursor, BENCH_DATABASE)
+        conn.commit()
+
+        print(f"🧪 {len(terms)} términos, tamaños {', '.join(f'{n:,}' for n in sizes)}, "
+              f"innodb_ft_min_token_size={min_token}")
+        for index in indexes:
+            types = column_types(model, index)
+            generator = TextGenerator(terms, args.seed)
+            with conn.cursor() as cursor:
+                create_table(cursor, index, types)
+            results[index.table] = []
+            loaded = 0
+            print(f"\n📚 {index.table} ({', '.join(index.columns)})  [{index.source}]")
+            for size in sizes:
+                fill(conn, index, types, generator, size - loaded)
+                loaded = size
+
+                like_latencies, like_found = run_mode(conn, index, 'like', terms, args.repeat, min_token)
+                start = time.perf_counter()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE `{index.table}` ADD FULLTEXT INDEX `{index.name}` "
+                                   f"({', '.join(f'`{c}`' for c in index.columns)})")
+                build = time.perf_counter() - start
+
+                cell = {'rows': size, 'index_build_s': round(build, 2),
+                        'like': summarize('like', like_latencies, like_found, like_found)}
+                for mode in MODES[1:]:
+                    latencies, found = run_mode(conn, index, mode, terms, args.repeat, min_token)
+                    cell[mode] = summarize(mode, latencies, found, like_found)
+                results[index.table].append(cell)
+
+                # El índice se vuelve a crear (y medir) en el siguiente tamaño
+                with conn.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE `{index.table}` DROP INDEX `{index.name}`")
+
+                print(f"  {size:>9,} filas  índice FULLTEXT en {build:.1f}s")
+                for mode in MODES:
+                    r = cell[mode]
+                    extra = '' if mode == 'like' else \
+                        f"  recall {r['recall_vs_like']}  jaccard {r['jaccard_vs_like']}"
+                    speedup = '' if mode == 'like' or not r['p50_ms'] else \
+                        f"  ({cell['like']['p50_ms'] / r['p50_ms']:.0f}x)"
+                    print(f"    {mode:<8} p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+                          f"filas {r['avg_rows']:>9.1f}{extra}{speedup}")
+
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+    finally:
+        conn.close()
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'terms': terms, 'results': results}, f, indent=1, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.report}")
+
+    slower = [(t, c['rows']) for t, cells in results.items() for c in cells
+              if c['boolean']['p50_ms'] and c['boolean']['p50_ms'] > c['like']['p50_ms']]
+    if slower:
+        print(f"\n⚠️  MATCH más lento que LIKE en: {', '.join(f'{t} ({n:,})' for t, n in slower)}")
+        sys.exit(1)
+    print("\n✅ Benchmark completo")
+
+
+if __name__ == '__main__':
+    main()
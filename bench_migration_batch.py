@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark: migración sentencia por sentencia vs modo --batch
+
+Levanta un proxy TCP local que agrega latencia artificial (simula el enlace a
+metro.proxy.rlwy.net) delante de un MySQL local, ejecuta la misma carga en
+ambos modos con MigrationRun y compara tiempo total y round trips.
+
+Ejecutar (requiere un MySQL local de pruebas, NUNCA contra producción):
+    python bench_migration_batch.py --user root --password secret --rtt-ms 40
+    python bench_migration_batch.py --file db/migrations/fase_2a_cursos_basico.sql
+"""
+
+import argparse
+import queue
+import socket
+import sys
+import threading
+import time
+
+from pymysql.constants import CLIENT
+
+from db_pool import connect
+from run_migration import MigrationRun
+from sql_splitter import Statement, iter_file_statements
+
+BENCH_DATABASE = 'bench_migration_batch'
+
+
+class LatencyProxy:
+    """Proxy TCP que retrasa cada dirección rtt/2 y cuenta los envíos del cliente"""
+
+    def __init__(self, target_host, target_port, rtt_ms):
+        self.target = (target_host, target_port)
+        self.delay = rtt_ms / 2000.0
+        self.client_sends = 0
+        self._lock = threading.Lock()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(8)
+        self.port = self._server.getsockname()[1]
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        self._server.close()
+
+    def reset_counter(self):
+        with self._lock:
+            self.client_sends = 0
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._pipe(client, upstream, count=True)
+            self._pipe(upstream, client, count=False)
+
+    def _pipe(self, src, dst, count):
+        chunks = queue.Queue()
+
+        def reader():
+            while True:
+                try:
+                    data = src.recv(65536)
+                except OSError:
+                    data = b''
+                if data and count:
+                    with self._lock:
+                        self.client_sends += 1
+                chunks.put((time.monotonic() + self.delay, data))
+                if not data:
+                    return
+
+        def writer():
+            while True:
+                deadline, data = chunks.get()
+                wait = deadline - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    if not data:
+                        dst.shutdown(socket.SHUT_WR)
+                        return
+                    dst.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=reader, daemon=True).start()
+        threading.Thread(target=writer, daemon=True).start()
+
+
+def synthetic_statements(tables):
+    """Carga parecida a una migración real: DDL, índices, seeds y duplicados"""
+    statements = []
+    for t in range(tables):
+        name = f"bench_tabla_{t}"
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {name} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB""")
+        statements.append(f"ALTER TABLE {name} ADD COLUMN activo TINYINT(1) DEFAULT 1")
+        # Columna duplicada a propósito: error 1060 tolerado
+        statements.append(f"ALTER TABLE {name} ADD COLUMN activo TINYINT(1) DEFAULT 1")
+        statements.append(f"CREATE INDEX idx_{name}_nombre ON {name} (nombre)")
+        statements.append(f"INSERT INTO {name} (nombre) VALUES ('uno'), ('dos'), ('tres')")
+        statements.append(f"UPDATE {name} SET activo = 0 WHERE nombre = 'dos'")
+    statements.append("SELECT COUNT(*) FROM bench_tabla_0")
+    return [Statement(text, None) for text in statements]
+
+
+def reset_database(config, recreate=True):
+    """Borra la base del benchmark y, salvo recreate=False, la crea vacía"""
+    conn = connect(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+            if recreate:
+                cursor.execute(f"CREATE DATABASE {BENCH_DATABASE} CHARACTER SET utf8mb4")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_mode(proxy, config, statements, batch, batch_size):
+    reset_database(config)
+    proxied = dict(config, host='127.0.0.1', port=proxy.port, database=BENCH_DATABASE)
+    if batch:
+        proxied['client_flag'] = CLIENT.MULTI_STATEMENTS
+
+    conn = connect(proxied)
+    try:
+        proxy.reset_counter()
+        start = time.perf_counter()
+        with conn.cursor() as cursor:
+            run = MigrationRun(cursor, batch=batch, batch_size=batch_size, verbose=False)
+            for i, statement in enumerate(statements, 1):
+                run.feed(i, statement)
+            run.flush()
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        return {
+            'elapsed': elapsed,
+            'ok': run.success_count,
+            'total': run.total,
+            'errors': len(run.errors),
+            'round_trips': run.round_trips,
+            'client_sends': proxy.client_sends,
+        }
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de round trips del runner de migraciones")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--rtt-ms', type=float, default=40.0, help="Latencia de ida y vuelta simulada")
+    parser.add_argument('--tables', type=int, default=50, help="Tablas de la carga sintética")
+    parser.add_argument('--file', help="Usar un archivo .sql en lugar de la carga sintética")
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.file:
+        statements = list(iter_file_statements(args.file))
+    else:
+        statements = synthetic_statements(args.tables)
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'charset': 'utf8mb4',
+    }
+
+    proxy = LatencyProxy(args.host, args.port, args.rtt_ms)
+    proxy.start()
+
+    print(f"🧪 {len(statements)} sentencias, RTT simulado {args.rtt_ms:.0f} ms")
+    results = {}
+    try:
+        for name, batch in (('secuencial', False), ('batch', True)):
+            results[name] = run_mode(proxy, config, statements, batch, args.batch_size)
+            r = results[name]
+            print(f"  {name:10} {r['elapsed']:8.2f}s  ok {r['ok']}/{r['total']}  "
+                  f"errores {r['errors']}  round trips {r['round_trips']}  "
+                  f"envíos cliente {r['client_sends']}")
+    finally:
+        proxy.close()
+        reset_database(config, recreate=False)
+
+    seq, bat = results['secuencial'], results['batch']
+    if bat['elapsed'] > 0 and bat['round_trips'] > 0:
+        print(f"\n📊 Speedup: {seq['elapsed'] / bat['elapsed']:.1f}x, "
+              f"round trips {seq['round_trips']} → {bat['round_trips']} "
+              f"({seq['round_trips'] / bat['round_trips']:.1f}x menos)")
+    if seq['ok'] != bat['ok']:
+        print("❌ Los dos modos no reportaron el mismo número de sentencias exitosas")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
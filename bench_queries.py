@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Benchmark de consultas: planes (EXPLAIN) y latencia a distintas escalas
+
+Crea el esquema real (dump base + migraciones) en una base local de pruebas,
+la llena con datos sintéticos a varias escalas (10k/100k/1M filas en las
+tablas de hechos) y, para cada consulta del catálogo (listados de
+diagnósticos, respuestas, inscripciones...), registra:
+
+  - p50/p95 de latencia sobre N ejecuciones con parámetros aleatorios
+  - Filas examinadas (Handler_read_*) por ejecución
+  - EXPLAIN FORMAT=JSON (tipo de acceso e índice por tabla) y EXPLAIN ANALYZE
+
+Falla (exit 1) si un plan cae en un full scan sobre una tabla grande que la
+consulta no declara como permitida, o si empeora respecto a la línea base:
+el p95 sube más de la tolerancia o una tabla deja de usar índice. Con
+--migration aplica el archivo entre dos mediciones y compara el antes y el
+después, para poder condicionar una migración a su efecto en las consultas.
+
+Ejecutar (requiere un MySQL local de pruebas, NUNCA contra producción):
+    python bench_queries.py --user root --password secret --scales 10000,100000
+    python bench_queries.py --scales 100000 --save-baseline
+    python bench_queries.py --scales 100000 --migration db/migrations/nueva.sql
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pymysql
+
+import db_pool
+from migration_ledger import PROJECT_ROOT
+from run_migration import MigrationRun
+from schema_model import model_sources
+from sql_splitter import iter_file_statements
+
+BENCH_DATABASE = 'bench_queries'
+DEFAULT_BASELINE = PROJECT_ROOT / 'bench_queries_baseline.json'
+DEFAULT_SCALES = (10000, 100000, 1000000)
+
+LOAD_CHUNK = 5000
+FULL_SCAN_ACCESS = ('ALL', 'index')
+# Un full scan sobre una tabla con menos filas estimadas no cuenta como regresión
+FULL_SCAN_MIN_ROWS = 1000
+# Diferencias de p95 menores a esto (ms) se consideran ruido
+LATENCY_NOISE_MS = 1.0
+
+# Catálogo: consultas reales de backend/models y check_realizados.py.
+# allow_scan: alias que pueden recorrerse completos (catálogos pequeños)
+QUERIES = [
+    {
+        'name': 'diagnosticos_listado',
+        'origen': 'check_realizados.py',
+        'sql': """SELECT dr.id_diagnostico_realizado, dr.id_usuario, dr.estado,
+                         td.nombre AS tipo_diagnostico, u.nombre AS usuario_nombre
+                  FROM diagnosticos_realizados dr
+                  INNER JOIN tipos_diagnostico td ON dr.id_tipo_diagnostico = td.id_tipo_diagnostico
+                  INNER JOIN usuarios u ON dr.id_usuario = u.id_usuario
+                  LIMIT 1""",
+        'params': lambda rng, n: (),
+        'allow_scan': {'td', 'dr'},
+    },
+    {
+        'name': 'diagnosticos_por_usuario',
+        'origen': 'DiagnosticoRealizado::findByUser',
+        'sql': """SELECT dr.*, td.nombre AS tipo_diagnostico
+                  FROM diagnosticos_realizados dr
+                  INNER JOIN tipos_diagnostico td ON dr.id_tipo_diagnostico = td.id_tipo_diagnostico
+                  WHERE dr.id_usuario = %s
+                  ORDER BY dr.fecha_inicio DESC""",
+        'params': lambda rng, n: (rng.randint(1, n['usuarios']),),
+        'allow_scan': {'td'},
+    },
+    {
+        'name': 'diagnostico_detalle',
+        'origen': 'DiagnosticoRealizado::findById',
+        'sql': """SELECT dr.*, td.nombre AS tipo_diagnostico, td.descripcion AS tipo_descripcion,
+                         u.nombre AS usuario_nombre, u.email AS usuario_email
+                  FROM diagnosticos_realizados dr
+                  INNER JOIN tipos_diagnostico td ON dr.id_tipo_diagnostico = td.id_tipo_diagnostico
+                  INNER JOIN usuarios u ON dr.id_usuario = u.id_usuario
+                  WHERE dr.id_diagnostico_realizado = %s""",
+        'params': lambda rng, n: (rng.randint(1, n['diagnosticos_realizados']),),
+        'allow_scan': set(),
+    },
+    {
+        'name': 'respuestas_diagnostico',
+        'origen': 'DiagnosticoRealizado::getRespuestas',
+        'sql': """SELECT rd.*, pd.pregunta, pd.tipo_pregunta, ae.nombre AS area_nombre, ae.id_area
+                  FROM respuestas_diagnostico rd
+                  INNER JOIN preguntas_diagnostico pd ON rd.id_pregunta = pd.id_pregunta
+                  INNER JOIN areas_evaluacion ae ON pd.id_area = ae.id_area
+                  WHERE rd.id_diagnostico_realizado = %s
+                  ORDER BY ae.orden, pd.orden""",
+        'params': lambda rng, n: (rng.randint(1, n['diagnosticos_con_respuestas']),),
+        'allow_scan': {'ae', 'pd'},
+    },
+    {
+        'name': 'inscripciones_por_usuario',
+        'origen': 'Inscripcion::getByUser',
+        'sql': """SELECT i.*, c.titulo AS curso_titulo, c.slug AS curso_slug, c.nivel,
+                         cat.nombre AS categoria_nombre
+                  FROM inscripciones i
+                  INNER JOIN cursos c ON i.id_curso = c.id_curso
+                  LEFT JOIN categorias_cursos cat ON c.id_categoria = cat.id_categoria
+                  WHERE i.id_usuario = %s
+                  ORDER BY i.fecha_inscripcion DESC""",
+        'params': lambda rng, n: (rng.randint(1, n['usuarios']),),
+        'allow_scan': {'cat'},
+    },
+    {
+        'name': 'inscritos_por_curso',
+        'origen': 'Curso::getInscritos',
+        'sql': """SELECT i.*, u.nombre, u.apellido, u.email, u.foto_perfil
+                  FROM inscripciones i
+                  INNER JOIN usuarios u ON i.id_usuario = u.id_usuario
+                  WHERE i.id_curso = %s
+                  ORDER BY i.fecha_inscripcion DESC
+                  LIMIT 20 OFFSET 0""",
+        'params': lambda rng, n: (rng.randint(1, n['cursos']),),
+        'allow_scan': set(),
+    },
+    {
+        'name': 'estadisticas_usuario',
+        'origen': 'Inscripcion::getEstadisticas',
+        'sql': """SELECT COUNT(*) AS total_cursos,
+                         SUM(CASE WHEN fecha_finalizacion IS NOT NULL THEN 1 ELSE 0 END) AS cursos_completados,
+                         ROUND(AVG(porcentaje_avance), 2) AS promedio_avance,
+                         SUM(tiempo_dedicado) AS tiempo_total_minutos
+                  FROM inscripciones
+                  WHERE id_usuario = %s""",
+        'params': lambda rng, n: (rng.randint(1, n['usuarios']),),
+        'allow_scan': set(),
+    },
+]
+
+# Tablas que llena el cargador, en orden de dependencias
+LOADED_TABLES = [
+    'usuarios', 'tipos_diagnostico', 'areas_evaluacion', 'preguntas_diagnostico',
+    'diagnosticos_realizados', 'respuestas_diagnostico', 'categorias_cursos', 'cursos', 'inscripciones',
+]
+
+
+# ----------------------------------------------------------------------
+# Esquema y datos
+# ----------------------------------------------------------------------
+
+def connect(config, database=None, **options):
+    if database:
+        options['database'] = database
+    return db_pool.connect(config, **options)
+
+
+def create_schema(config):
+    """Base vacía con el esquema del dump y las migraciones (sin datos)"""
+    conn = connect(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+            cursor.execute(f"CREATE DATABASE {BENCH_DATABASE} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    finally:
+        conn.close()
+
+    conn = connect(config, BENCH_DATABASE, autocommit=True)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            run = MigrationRun(cursor, verbose=False)
+            i = 0
+            for path in model_sources():
+                for statement in iter_file_statements(path):
+                    head = statement.text[:20].upper()
+                    # Solo estructura: sin datos ni cambios de base
+                    if head.startswith(('INSERT', 'REPLACE', 'USE ', 'CREATE DATABASE', 'DROP DATABASE')):
+                        continue
+                    i += 1
+                    run.feed(i, statement)
+            run.flush()
+        return run
+    finally:
+        conn.close()
+
+
+def _dates(rng, count, days=730):
+    start = datetime.now() - timedelta(days=days)
+    return [start + timedelta(seconds=rng.randint(0, days * 86400)) for _ in range(count)]
+
+
+def _insert(cursor, table, columns, rows):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), LOAD_CHUNK):
+        cursor.executemany(sql, rows[start:start + LOAD_CHUNK])
+
+
+def load_scale(conn, scale, seed=42):
+    """
+    Llena las tablas del catálogo para `scale` filas en las tablas de hechos
+    (diagnosticos_realizados, respuestas_diagnostico, inscripciones).
+    Retorna los conteos por tabla, que usan los generadores de parámetros.
+    """
+    rng = random.Random(seed)
+    n = {
+        'usuarios': max(100, scale // 10),
+        'tipos_diagnostico': 5,
+        'areas_evaluacion': 25,
+        'preguntas_diagnostico': 250,
+        'diagnosticos_realizados': scale,
+        'diagnosticos_con_respuestas': max(1, scale // 50),
+        'respuestas_diagnostico': max(1, scale // 50) * 50,
+        'categorias_cursos': 10,
+        'cursos': max(20, scale // 1000),
+        'inscripciones': scale,
+    }
+
+    with conn.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute("SET UNIQUE_CHECKS = 0")
+        for table in LOADED_TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+
+        _insert(cursor, 'usuarios', ['id_usuario', 'nombre', 'apellido', 'email', 'password_hash', 'estado'], [
+            (i, f"Nombre{i}", f"Apellido{i}", f"usuario{i}@bench.test", 'x' * 60,
+             'activo' if rng.random() < 0.95 else 'inactivo')
+            for i in range(1, n['usuarios'] + 1)])
+        _insert(cursor, 'tipos_diagnostico', ['id_tipo_diagnostico', 'nombre', 'slug'], [
+            (i, f"Diagnóstico {i}", f"diagnostico-{i}") for i in range(1, n['tipos_diagnostico'] + 1)])
+        _insert(cursor, 'areas_evaluacion', ['id_area', 'id_tipo_diagnostico', 'nombre', 'orden'], [
+            (i, (i - 1) // 5 + 1, f"Área {i}", (i - 1) % 5 + 1) for i in range(1, n['areas_evaluacion'] + 1)])
+        _insert(cursor, 'preguntas_diagnostico', ['id_pregunta', 'id_area', 'pregunta', 'orden'], [
+            (i, (i - 1) // 10 + 1, f"Pregunta {i}", (i - 1) % 10 + 1)
+            for i in range(1, n['preguntas_diagnostico'] + 1)])
+
+        fechas = _dates(rng, n['diagnosticos_realizados'])
+        _insert(cursor, 'diagnosticos_realizados',
+                ['id_diagnostico_realizado', 'id_usuario', 'id_tipo_diagnostico', 'estado', 'fecha_inicio'], [
+                    (i, rng.randint(1, n['usuarios']), rng.randint(1, n['tipos_diagnostico']),
+                     rng.choice(('en_progreso', 'completado', 'completado', 'abandonado')), fechas[i - 1])
+                    for i in range(1, n['diagnosticos_realizados'] + 1)])
+
+        respuestas = []
+        for d in range(1, n['diagnosticos_con_respuestas'] + 1):
+            area_base = rng.randint(0, n['tipos_diagnostico'] - 1) * 50
+            for p in range(1, 51):
+                respuestas.append((d, area_base + p, rng.randint(1, 5)))
+        _insert(cursor, 'respuestas_diagnostico', ['id_diagnostico_realizado', 'id_pregunta', 'respuesta_valor'],
+                respuestas)
+
+        _insert(cursor, 'categorias_cursos', ['id_categoria', 'nombre', 'slug'], [
+            (i, f"Categoría {i}", f"categoria-{i}") for i in range(1, n['categorias_cursos'] + 1)])
+        _insert(cursor, 'cursos', ['id_curso', 'id_categoria', 'id_instructor', 'titulo', 'slug', 'estado'], [
+            (i, rng.randint(1, n['categorias_cursos']), rng.randint(1, n['usuarios']), f"Curso {i}",
+             f"curso-{i}", 'publicado') for i in range(1, n['cursos'] + 1)])
+
+        # Pares (usuario, curso) únicos sin guardar un set: se recorre la matriz
+        fechas = _dates(rng, n['inscripciones'])
+        usuarios = n['usuarios']
+        _insert(cursor, 'inscripciones',
+                ['id_usuario', 'id_curso', 'porcentaje_avance', 'tiempo_dedicado', 'fecha_inscripcion'], [
+                    (k % usuarios + 1, (k // usuarios) % n['cursos'] + 1, rng.randint(0, 100),
+                     rng.randint(0, 600), fechas[k])
+                    for k in range(n['inscripciones'])])
+
+        cursor.execute("SET UNIQUE_CHECKS = 1")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        conn.commit()
+        cursor.execute(f"ANALYZE TABLE {', '.join(LOADED_TABLES)}")
+        cursor.fetchall()
+    return n
+
+
+# ----------------------------------------------------------------------
+# Medición
+# ----------------------------------------------------------------------
+
+def percentile(values, p):
+    """Percentil por rango más cercano"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def plan_tables(plan):
+    """Accesos por tabla de un EXPLAIN FORMAT=JSON (MySQL y MariaDB)"""
+    tables = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            table = node.get('table')
+            if isinstance(table, dict) and 'table_name' in table:
+                tables.append({
+                    'table': table['table_name'],
+                    'access_type': table.get('access_type'),
+                    'key': table.get('key'),
+                    'rows': table.get('rows_examined_per_scan', table.get('rows')),
+                })
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return tables
+
+
+def explain(cursor, sql, params):
+    cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", params)
+    plan = json.loads(cursor.fetchone()[0])
+
+    analyze = None
+    for prefix in ('EXPLAIN ANALYZE', 'ANALYZE FORMAT=JSON'):  # MySQL 8.0.18+ / MariaDB
+        try:
+            cursor.execute(f"{prefix} {sql}", params)
+            analyze = '\n'.join(str(row[0]) for row in cursor.fetchall())
+            break
+        except pymysql.Error:
+            continue
+    return plan_tables(plan), analyze
+
+
+def rows_examined(cursor, sql, params):
+    """Filas leídas por el motor en una ejecución (suma de Handler_read_*)"""
+    cursor.execute("FLUSH STATUS")
+    cursor.execute(sql, params)
+    cursor.fetchall()
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%%'")
+    return sum(int(value) for _, value in cursor.fetchall())
+
+
+def run_query(conn, query, counts, repeat, seed=7):
+    rng = random.Random(seed)
+    sql = query['sql']
+    with conn.cursor() as cursor:
+        params = query['params'](rng, counts)
+        plan, analyze = explain(cursor, sql, params)
+        examined = rows_examined(cursor, sql, params)
+
+        for _ in range(min(5, repeat)):  # calentar el buffer pool
+            cursor.execute(sql, query['params'](rng, counts))
+            cursor.fetchall()
+
+        latencies = []
+        for _ in range(repeat):
+            params = query['params'](rng, counts)
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'rows_examined': examined,
+        'plan': plan,
+        'analyze': analyze,
+    }
+
+
+def run_catalog(conn, counts, repeat, names=None):
+    results = {}
+    for query in QUERIES:
+        if names and query['name'] not in names:
+            continue
+        results[query['name']] = run_query(conn, query, counts, repeat)
+    return results
+
+
+# ----------------------------------------------------------------------
+# Regresiones
+# ----------------------------------------------------------------------
+
+def full_scans(query, result):
+    """Tablas grandes recorridas completas que la consulta no permite"""
+    return [
+        step for step in result['plan']
+        if step['access_type'] in FULL_SCAN_ACCESS
+        and step['table'] not in query['allow_scan']
+        and (step['rows'] or 0) >= FULL_SCAN_MIN_ROWS
+    ]
+
+
+def compare(before, after, tolerance):
+    """Regresiones de after respecto a before: lista de mensajes"""
+    problems = []
+    for name, new in after.items():
+        old = before.get(name)
+        if old is None:
+            continue
+        if new['p95_ms'] > old['p95_ms'] * (1 + tolerance) and new['p95_ms'] - old['p95_ms'] > LATENCY_NOISE_MS:
+            problems.append(f"{name}: p95 {old['p95_ms']:.2f} -> {new['p95_ms']:.2f} ms")
+        old_access = {step['table']: step for step in old['plan']}
+        for step in new['plan']:
+            prev = old_access.get(step['table'])
+            if prev and prev['access_type'] not in FULL_SCAN_ACCESS and step['access_type'] in FULL_SCAN_ACCESS:
+                problems.append(f"{name}: {step['table']} pasó de {prev['access_type']}"
+                                f"({prev['key']}) a {step['access_type']}")
+    return problems
+
+
+def print_results(scale, results):
+    print(f"\n📊 Escala {scale:,} filas")
+    print(f"  {'consulta':28} {'p50 ms':>9} {'p95 ms':>9} {'examinadas':>11}  plan")
+    for name, r in results.items():
+        plan = ', '.join(f"{s['table']}:{s['access_type']}{'(' + s['key'] + ')' if s['key'] else ''}"
+                         for s in r['plan'])
+        print(f"  {name:28} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['rows_examined']:11,}  {plan}")
+
+
+def check_scans(results):
+    problems = []
+    by_name = {q['name']: q for q in QUERIES}
+    for name, result in results.items():
+        for step in full_scans(by_name[name], result):
+            problems.append(f"{name}: full scan ({step['access_type']}) sobre {step['table']} "
+                            f"(~{step['rows']:,} filas)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de planes y latencia de las consultas principales")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help="Filas de las tablas de hechos, separadas por coma")
+    parser.add_argument('--repeat', type=int, default=50, help="Ejecuciones por consulta")
+    parser.add_argument('--query', action='append', help="Solo estas consultas del catálogo")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Archivo de línea base")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Aumento de p95 tolerado respecto a la base (0.5 = 50%%)")
+    parser.add_argument('--migration', help="Archivo .sql a evaluar: mide antes y después de aplicarlo")
+    parser.add_argument('--report', help="Guardar los resultados completos (incluye EXPLAIN ANALYZE) en JSON")
+    args = parser.parse_args()
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'charset': 'utf8mb4',
+    }
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+
+    print(f"🏗️  Creando esquema en {BENCH_DATABASE}...")
+    run = create_schema(config)
+    print(f"  ✓ {run.success_count}/{run.total} sentencias de estructura ({len(run.errors)} errores)")
+
+    results, problems = {}, []
+    conn = connect(config, BENCH_DATABASE)
+    try:
+        for scale in scales:
+            start = time.perf_counter()
+            counts = load_scale(conn, scale)
+            print(f"\n📦 Escala {scale:,}: datos cargados en {time.perf_counter() - start:.1f}s")
+
+            current = run_catalog(conn, counts, args.repeat, args.query)
+            print_results(scale, current)
+            problems += [f"[{scale}] {p}" for p in check_scans(current)]
+
+            if args.migration:
+                print(f"\n🔄 Aplicando {args.migration}...")
+                with conn.cursor() as cursor:
+                    migration = MigrationRun(cursor, verbose=False)
+                    for i, statement in enumerate(iter_file_statements(args.migration), 1):
+                        migration.feed(i, statement)
+                    migration.flush()
+                conn.commit()
+                if migration.errors:
+                    problems += [f"[{scale}] migración: {e}" for e in migration.errors]
+                after = run_catalog(conn, counts, args.repeat, args.query)
+                print_results(scale, after)
+                problems += [f"[{scale}] con migración: {p}" for p in compare(current, after, args.tolerance)]
+                problems += [f"[{scale}] con migración: {p}" for p in check_scans(after)]
+                current = after
+                # La siguiente escala parte del esquema original
+                conn.close()
+                create_schema(config)
+                conn = connect(config, BENCH_DATABASE)
+
+            results[str(scale)] = current
+    finally:
+        conn.close()
+
+    baseline_path = args.baseline
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'results': results}, f, indent=1)
+        print(f"\n💾 Línea base guardada en {baseline_path}")
+    else:
+        try:
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except FileNotFoundError:
+            baseline = {}
+        for scale, current in results.items():
+            if scale in baseline:
+                problems += [f"[{scale}] vs base: {p}" for p in compare(baseline[scale], current, args.tolerance)]
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
+
+    if problems:
+        print(f"\n❌ {len(problems)} regresiones:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones de plan ni de latencia")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Benchmark de triggers de contadores de recursos y migración incremental
+
+Los triggers de fix_recursos_schema.sql recalculan calificacion_promedio con
+un AVG() sobre todas las calificaciones del recurso en cada INSERT/UPDATE/
+DELETE de calificaciones_recursos, e incrementan descargas sobre la misma
+fila de recursos_aprendizaje en cada descarga: con varios escritores sobre un
+recurso popular todos esperan el lock de esa fila.
+
+Este script arma en un MySQL local las tablas de recursos (dump base +
+fix_recursos_schema.sql) y mide, con 1 y N escritores concurrentes,
+inserciones por segundo, latencia p50/p95/p99 y esperas de row locks
+(Innodb_row_lock_*) en descargas_recursos, vistas_recursos y
+calificaciones_recursos para tres escenarios:
+
+  - sin_triggers: techo de referencia
+  - recalculo:    triggers actuales de fix_recursos_schema.sql
+  - incremental:  migración generada por --emit-migration
+
+La migración incremental mantiene todo en O(1) por evento:
+  - Calificaciones: suma y cantidad acumuladas en recursos_aprendizaje; el
+    promedio sale de esos dos valores, sin AVG() sobre la tabla.
+  - Descargas y vistas: deltas en recursos_contadores repartidos en
+    `slots` filas por recurso (CONNECTION_ID() % slots), así las conexiones
+    concurrentes no compiten por la misma fila. El evento
+    ev_recursos_contadores_fold traspasa los deltas a recursos_aprendizaje
+    (por defecto cada 60 s, menos que el caché de 5 min de Recurso::getById);
+    vista_recursos_contadores muestra el total exacto al instante.
+
+Ejecutar (requiere un MySQL local de pruebas, NUNCA contra producción):
+    python bench_triggers.py --user root --password secret --writers 1,8 --duration 5
+    python bench_triggers.py --emit-migration db/migrations/recursos_contadores_incrementales.sql
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pymysql
+
+import db_pool
+from bench_queries import percentile
+from migration_ledger import MIGRATIONS_DIR, PROJECT_ROOT
+from run_migration import MigrationRun
+from sql_splitter import iter_file_statements, iter_statements
+
+BENCH_DATABASE = 'bench_triggers'
+BASE_DUMP = PROJECT_ROOT / 'db' / 'formacion_empresarial.sql'
+RECURSOS_MIGRATION = MIGRATIONS_DIR / 'fix_recursos_schema.sql'
+DEFAULT_MIGRATION = MIGRATIONS_DIR / 'recursos_contadores_incrementales.sql'
+
+SCENARIOS = ('sin_triggers', 'recalculo', 'incremental')
+WORKLOADS = ('descargas', 'vistas', 'calificaciones')
+EVENT_TABLES = ('descargas_recursos', 'vistas_recursos', 'calificaciones_recursos')
+
+DEFAULT_SLOTS = 16
+DEFAULT_FOLD_SECONDS = 60
+LOCK_ERRORS = (1205, 1213)
+
+WORKLOAD_SQL = {
+    'descargas': "INSERT INTO descargas_recursos (id_recurso, id_usuario, ip_address) VALUES (%s, %s, %s)",
+    'vistas': "INSERT INTO vistas_recursos (id_recurso, id_usuario, ip_address) VALUES (%s, %s, %s)",
+    # Igual que Recurso::calificar: una calificación por usuario y recurso
+    'calificaciones': """
+        INSERT INTO calificaciones_recursos (id_recurso, id_usuario, calificacion, comentario)
+        VALUES (%s, %s, %s, NULL)
+        ON DUPLICATE KEY UPDATE
+            calificacion = VALUES(calificacion),
+            fecha_actualizacion = CURRENT_TIMESTAMP
+    """,
+}
+
+
+# ----------------------------------------------------------------------
+# Migración incremental generada
+# ----------------------------------------------------------------------
+
+def incremental_migration(slots=DEFAULT_SLOTS, fold_seconds=DEFAULT_FOLD_SECONDS):
+    """SQL de la migración de contadores O(1) (reemplaza los triggers de fix_recursos_schema.sql)"""
+    def counter_trigger(name, table, column):
+        return f"""DROP TRIGGER IF EXISTS `{name}`;
+
+DELIMITER $$
+CREATE TRIGGER `{name}`
+AFTER INSERT ON `{table}`
+FOR EACH ROW
+BEGIN
+    INSERT INTO `recursos_contadores` (`id_recurso`, `slot`, `{column}`)
+    VALUES (NEW.id_recurso, CONNECTION_ID() % {slots}, 1)
+    ON DUPLICATE KEY UPDATE `{column}` = `{column}` + 1;
+END$$
+DELIMITER ;
+"""
+
+    # calificacion_promedio va primero en cada SET: se calcula con los
+    # valores anteriores de suma y cantidad sin importar el orden de asignación
+    add = """UPDATE `recursos_aprendizaje`
+SET `calificacion_promedio` = (`suma_calificaciones` + NEW.calificacion) / (`total_calificaciones` + 1),
+    `suma_calificaciones` = `suma_calificaciones` + NEW.calificacion,
+    `total_calificaciones` = `total_calificaciones` + 1
+WHERE `id_recurso` = NEW.id_recurso;"""
+    remove = """UPDATE `recursos_aprendizaje`
+SET `calificacion_promedio` = IF(`total_calificaciones` > 1,
+        (`suma_calificaciones` - OLD.calificacion) / (`total_calificaciones` - 1), 0),
+    `suma_calificaciones` = `suma_calificaciones` - OLD.calificacion,
+    `total_calificaciones` = `total_calificaciones` - 1
+WHERE `id_recurso` = OLD.id_recurso;"""
+
+    def indent(sql, spaces):
+        return '\n'.join(' ' * spaces + line if line else line for line in sql.splitlines())
+
+    return f"""-- =====================================================
+-- Contadores incrementales de recursos (O(1) por evento)
+-- Generado por bench_triggers.py --emit-migration (slots={slots}, fold={fold_seconds}s);
+-- para cambiar los parámetros, regenerar en lugar de editar a mano.
+--
+-- Reemplaza los triggers de fix_recursos_schema.sql:
+--   - Calificaciones: suma y cantidad acumuladas en recursos_aprendizaje en
+--     lugar de AVG() sobre calificaciones_recursos en cada cambio.
+--   - Descargas y vistas: deltas en recursos_contadores, {slots} filas por
+--     recurso (una por CONNECTION_ID() % {slots}); las escrituras concurrentes
+--     sobre un recurso popular no esperan el lock de una sola fila.
+--     ev_recursos_contadores_fold los traspasa a recursos_aprendizaje cada
+--     {fold_seconds}s (requiere event_scheduler=ON; si no, llamar a
+--     sp_recursos_contadores_fold() desde un cron). vista_recursos_contadores
+--     muestra el total exacto al instante.
+--
+-- El backfill de calificaciones es idempotente: si hubo calificaciones
+-- mientras se aplicaba, se puede ejecutar de nuevo (sección 3).
+-- =====================================================
+
+-- 1. Columnas de acumulados de calificaciones
+ALTER TABLE `recursos_aprendizaje`
+    ADD COLUMN `suma_calificaciones` INT NOT NULL DEFAULT 0 AFTER `calificacion_promedio`,
+    ADD COLUMN `total_calificaciones` INT NOT NULL DEFAULT 0 AFTER `suma_calificaciones`;
+
+-- 2. Deltas de descargas y vistas por recurso y slot
+CREATE TABLE IF NOT EXISTS `recursos_contadores` (
+  `id_recurso` INT(11) NOT NULL,
+  `slot` TINYINT UNSIGNED NOT NULL,
+  `descargas` INT NOT NULL DEFAULT 0,
+  `vistas` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id_recurso`, `slot`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Deltas de contadores pendientes de traspasar a recursos_aprendizaje';
+
+-- 3. Triggers incrementales (primero los triggers y después el backfill: una
+-- calificación que llegue en medio queda contada por uno o por el otro)
+{counter_trigger('trg_recurso_descarga_insert', 'descargas_recursos', 'descargas')}
+{counter_trigger('trg_recurso_vista_insert', 'vistas_recursos', 'vistas')}
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_insert`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_insert`
+AFTER INSERT ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+{indent(add, 4)}
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_update`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_update`
+AFTER UPDATE ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+    IF NEW.id_recurso = OLD.id_recurso THEN
+        IF NEW.calificacion <> OLD.calificacion THEN
+            UPDATE `recursos_aprendizaje`
+            SET `calificacion_promedio` = (`suma_calificaciones` - OLD.calificacion + NEW.calificacion)
+                    / GREATEST(`total_calificaciones`, 1),
+                `suma_calificaciones` = `suma_calificaciones` - OLD.calificacion + NEW.calificacion
+            WHERE `id_recurso` = NEW.id_recurso;
+        END IF;
+    ELSE
+{indent(remove, 8)}
+{indent(add, 8)}
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_delete`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_delete`
+AFTER DELETE ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+{indent(remove, 4)}
+END$$
+DELIMITER ;
+
+UPDATE `recursos_aprendizaje` r
+LEFT JOIN (
+    SELECT `id_recurso`, SUM(`calificacion`) AS suma, COUNT(*) AS total
+    FROM `calificaciones_recursos`
+    GROUP BY `id_recurso`
+) c ON c.id_recurso = r.id_recurso
+SET r.calificacion_promedio = COALESCE(c.suma / c.total, 0),
+    r.suma_calificaciones = COALESCE(c.suma, 0),
+    r.total_calificaciones = COALESCE(c.total, 0);
+
+-- 4. Traspaso de deltas: se bloquean las filas de recursos_contadores durante
+-- la copia (tabla chica: recursos × slots), así no se pierde ningún incremento
+DROP PROCEDURE IF EXISTS `sp_recursos_contadores_fold`;
+
+DELIMITER $$
+CREATE PROCEDURE `sp_recursos_contadores_fold`()
+BEGIN
+    DECLARE pendientes INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    SELECT COUNT(*) INTO pendientes
+    FROM `recursos_contadores`
+    WHERE `descargas` <> 0 OR `vistas` <> 0
+    FOR UPDATE;
+
+    IF pendientes > 0 THEN
+        UPDATE `recursos_aprendizaje` r
+        JOIN (
+            SELECT `id_recurso`, SUM(`descargas`) AS descargas, SUM(`vistas`) AS vistas
+            FROM `recursos_contadores`
+            GROUP BY `id_recurso`
+            HAVING descargas <> 0 OR vistas <> 0
+        ) t ON t.id_recurso = r.id_recurso
+        SET r.descargas = COALESCE(r.descargas, 0) + t.descargas,
+            r.vistas = COALESCE(r.vistas, 0) + t.vistas;
+
+        UPDATE `recursos_contadores`
+        SET `descargas` = 0, `vistas` = 0
+        WHERE `descargas` <> 0 OR `vistas` <> 0;
+    END IF;
+    COMMIT;
+END$$
+DELIMITER ;
+
+DROP EVENT IF EXISTS `ev_recursos_contadores_fold`;
+
+CREATE EVENT `ev_recursos_contadores_fold`
+ON SCHEDULE EVERY {fold_seconds} SECOND
+DO CALL `sp_recursos_contadores_fold`();
+
+-- 5. Totales exactos (contador traspasado + deltas pendientes)
+CREATE OR REPLACE VIEW `vista_recursos_contadores` AS
+SELECT
+    r.id_recurso,
+    COALESCE(r.descargas, 0) + COALESCE(SUM(c.descargas), 0) AS descargas,
+    COALESCE(r.vistas, 0) + COALESCE(SUM(c.vistas), 0) AS vistas,
+    r.calificacion_promedio,
+    r.total_calificaciones
+FROM `recursos_aprendizaje` r
+LEFT JOIN `recursos_contadores` c ON c.id_recurso = r.id_recurso
+GROUP BY r.id_recurso, r.descargas, r.vistas, r.calificacion_promedio, r.total_calificaciones;
+"""
+
+
+# ----------------------------------------------------------------------
+# Esquema y datos
+# ----------------------------------------------------------------------
+
+def run_statements(cursor, statements):
+    run = MigrationRun(cursor, verbose=False)
+    for i, statement in enumerate(statements, 1):
+        run.feed(i, statement)
+    run.flush()
+    return run
+
+
+def base_statements():
+    """recursos_aprendizaje del dump base (CREATE + índices + AUTO_INCREMENT)"""
+    for statement in iter_file_statements(BASE_DUMP):
+        head = statement.text[:60]
+        if head.startswith(('CREATE TABLE `recursos_aprendizaje`', 'ALTER TABLE `recursos_aprendizaje`')):
+            yield statement
+
+
+def recalculo_triggers():
+    """Triggers actuales (AVG en cada cambio) tal como están en fix_recursos_schema.sql"""
+    for statement in iter_file_statements(RECURSOS_MIGRATION):
+        if statement.text.startswith('CREATE TRIGGER'):
+            yield statement
+
+
+def prepare(config, scenario, args):
+    """Base nueva con las tablas de recursos, datos previos y los triggers del escenario"""
+    conn = db_pool.connect(config, autocommit=True)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+            cursor.execute(f"CREATE DATABASE {BENCH_DATABASE} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    finally:
+        conn.close()
+
+    conn = db_pool.connect(config, database=BENCH_DATABASE, autocommit=True)
+    errors = []
+    try:
+        with conn.cursor() as cursor:
+            errors += run_statements(cursor, base_statements()).errors
+            errors += run_statements(cursor, iter_file_statements(RECURSOS_MIGRATION)).errors
+            # Los datos previos se cargan sin triggers; cada escenario instala los suyos después
+            for name in triggers(cursor):
+                cursor.execute(f"DROP TRIGGER `{name}`")
+            seed(cursor, args.recursos, args.calificaciones, args.users, random.Random(args.seed))
+            if scenario == 'recalculo':
+                errors += run_statements(cursor, recalculo_triggers()).errors
+            elif scenario == 'incremental':
+                sql = incremental_migration(args.slots, args.fold_seconds)
+                errors += run_statements(cursor, iter_statements(io.StringIO(sql))).errors
+                # El traspaso lo hace el benchmark al verificar, no el scheduler
+                cursor.execute("ALTER EVENT `ev_recursos_contadores_fold` DISABLE")
+    finally:
+        conn.close()
+    return errors
+
+
+def triggers(cursor):
+    cursor.execute(
+        "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS "
+        "WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE IN %s",
+        (EVENT_TABLES,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed(cursor, recursos, calificaciones, users, rng):
+    """Recursos y calificaciones previas (el AVG del recálculo crece con ellas)"""
+    cursor.executemany(
+        "INSERT INTO recursos_aprendizaje (id_recurso, titulo, tipo_recurso, slug) VALUES (%s, %s, 'articulo', %s)",
+        [(i, f"Recurso {i}", f"recurso-{i}") for i in range(1, recursos + 1)],
+    )
+    pairs = set()
+    while len(pairs) < min(calificaciones, recursos * users):
+        pairs.add((pick_recurso(rng, recursos, 0.5, 5), rng.randint(1, users)))
+    rows = [(r, u, rng.randint(1, 5)) for r, u in pairs]
+    for start in range(0, len(rows), 5000):
+        cursor.executemany(
+            "INSERT INTO calificaciones_recursos (id_recurso, id_usuario, calificacion) VALUES (%s, %s, %s)",
+            rows[start:start + 5000],
+        )
+    cursor.execute("""
+        UPDATE recursos_aprendizaje r
+        JOIN (SELECT id_recurso, AVG(calificacion) AS promedio FROM calificaciones_recursos
+              GROUP BY id_recurso) c ON c.id_recurso = r.id_recurso
+        SET r.calificacion_promedio = c.promedio
+    """)
+
+
+def pick_recurso(rng, recursos, hot_share, hot_recursos):
+    """Con probabilidad hot_share, uno de los hot_recursos más populares"""
+    if rng.random() < hot_share:
+        return rng.randint(1, min(hot_recursos, recursos))
+    return rng.randint(1, recursos)
+
+
+# ----------------------------------------------------------------------
+# Carga concurrente
+# ----------------------------------------------------------------------
+
+def lock_status(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'")
+        return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def writer(config, workload, deadline, args, seed_value, out):
+    rng = random.Random(seed_value)
+    latencies, lock_errors, other_errors = [], 0, []
+    sql = WORKLOAD_SQL[workload]
+    conn = db_pool.connect(config, database=BENCH_DATABASE, autocommit=True)
+    try:
+        with conn.cursor() as cursor:
+            while time.perf_counter() < deadline:
+                recurso = pick_recurso(rng, args.recursos, args.hot_share, args.hot_recursos)
+                if workload == 'calificaciones':
+                    params = (recurso, rng.randint(1, args.users), rng.randint(1, 5))
+                else:
+                    params = (recurso, rng.randint(1, args.users), f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+                start = time.perf_counter()
+                try:
+                    cursor.execute(sql, params)
+                except pymysql.Error as e:
+                    if e.args[0] in LOCK_ERRORS:
+                        lock_errors += 1
+                    else:
+                        other_errors.append(str(e))
+                    continue
+                latencies.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+    out.append((latencies, lock_errors, other_errors))
+
+
+def run_cell(config, monitor, workload, writers, args):
+    """Una combinación carga × escritores; retorna las métricas agregadas"""
+    out = []
+    before = lock_status(monitor)
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=writer, args=(config, workload, deadline, args, args.seed * 1000 + n, out))
+        for n in range(writers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    after = lock_status(monitor)
+
+    latencies = [l for result in out for l in result[0]]
+    errors = [e for result in out for e in result[2]]
+    return {
+        'writers': writers,
+        'ops': len(latencies),
+        'ops_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        'row_lock_waits': after.get('Innodb_row_lock_waits', 0) - before.get('Innodb_row_lock_waits', 0),
+        'row_lock_ms': after.get('Innodb_row_lock_time', 0) - before.get('Innodb_row_lock_time', 0),
+        'lock_errors': sum(result[1] for result in out),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }
+
+
+def verify_incremental(conn):
+    """Tras el traspaso, los contadores deben coincidir con las tablas de eventos"""
+    with conn.cursor() as cursor:
+        cursor.execute("CALL sp_recursos_contadores_fold()")
+        cursor.execute("""
+            SELECT COUNT(*) FROM recursos_aprendizaje r
+            LEFT JOIN (SELECT id_recurso, COUNT(*) n FROM descargas_recursos GROUP BY id_recurso) d
+                ON d.id_recurso = r.id_recurso
+            LEFT JOIN (SELECT id_recurso, COUNT(*) n FROM vistas_recursos GROUP BY id_recurso) v
+                ON v.id_recurso = r.id_recurso
+            LEFT JOIN (SELECT id_recurso, COUNT(*) n, SUM(calificacion) s, AVG(calificacion) a
+                       FROM calificaciones_recursos GROUP BY id_recurso) c
+                ON c.id_recurso = r.id_recurso
+            WHERE r.descargas <> COALESCE(d.n, 0)
+               OR r.vistas <> COALESCE(v.n, 0)
+               OR r.total_calificaciones <> COALESCE(c.n, 0)
+               OR r.suma_calificaciones <> COALESCE(c.s, 0)
+               OR ABS(r.calificacion_promedio - COALESCE(c.a, 0)) > 0.01
+        """)
+        mismatched = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM recursos_contadores WHERE descargas <> 0 OR vistas <> 0")
+        pending = cursor.fetchone()[0]
+    return mismatched, pending
+
+
+def print_cell(scenario, workload, r):
+    print(f"  {scenario:<13} {workload:<15} {r['writers']:>3}w  {r['ops_per_s']:>9.1f} ops/s  "
+          f"p50 {r['p50_ms'] or 0:7.2f}  p95 {r['p95_ms'] or 0:7.2f}  p99 {r['p99_ms'] or 0:7.2f} ms  "
+          f"locks {r['row_lock_waits']:>6} ({r['row_lock_ms']} ms)  deadlock/timeout {r['lock_errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de triggers de contadores de recursos")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Escenarios separados por coma")
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help="Cargas separadas por coma")
+    parser.add_argument('--writers', default='1,8', help="Escritores concurrentes a medir, separados por coma")
+    parser.add_argument('--duration', type=float, default=5.0, help="Segundos por medición")
+    parser.add_argument('--recursos', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=100000, help="Rango de id_usuario")
+    parser.add_argument('--calificaciones', type=int, default=50000, help="Calificaciones previas")
+    parser.add_argument('--hot-share', type=float, default=0.8,
+                        help="Fracción de escrituras sobre los recursos populares")
+    parser.add_argument('--hot-recursos', type=int, default=5, help="Cantidad de recursos populares")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--slots', type=int, default=DEFAULT_SLOTS, help="Filas de contador por recurso")
+    parser.add_argument('--fold-seconds', type=int, default=DEFAULT_FOLD_SECONDS,
+                        help="Intervalo del evento de traspaso de deltas")
+    parser.add_argument('--emit-migration', nargs='?', const=str(DEFAULT_MIGRATION), metavar='ARCHIVO',
+                        help="Solo escribir la migración incremental (no ejecuta el benchmark)")
+    parser.add_argument('--report', help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    if not 1 <= args.slots <= 255:
+        parser.error("--slots debe estar entre 1 y 255")
+
+    if args.emit_migration:
+        path = Path(args.emit_migration)
+        path.write_text(incremental_migration(args.slots, args.fold_seconds), encoding='utf-8')
+        print(f"📝 Migración incremental escrita en {path} (slots={args.slots}, fold={args.fold_seconds}s)")
+        return
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'charset': 'utf8mb4',
+    }
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    workloads = [w for w in args.workloads.split(',') if w]
+    writer_counts = [int(w) for w in args.writers.split(',') if w.strip()]
+    unknown = set(scenarios) - set(SCENARIOS) | set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"desconocido: {', '.join(sorted(unknown))}")
+
+    results, problems = {}, []
+    print(f"🧪 {args.recursos} recursos, {args.calificaciones} calificaciones previas, "
+          f"{args.hot_share:.0%} de las escrituras sobre {args.hot_recursos} recursos, {args.duration:.0f}s por medición")
+    for scenario in scenarios:
+        results[scenario] = {}
+        for workload in workloads:
+            results[scenario][workload] = []
+            for writers in writer_counts:
+                # Base nueva por medición: cada una parte de los mismos datos
+                errors = prepare(config, scenario, args)
+                if errors:
+                    problems += [f"[{scenario}] esquema: {e}" for e in errors]
+                monitor = db_pool.connect(config, database=BENCH_DATABASE, autocommit=True)
+                try:
+                    cell = run_cell(config, monitor, workload, writers, args)
+                    if scenario == 'incremental':
+                        cell['mismatched'], cell['pending_after_fold'] = verify_incremental(monitor)
+                        if cell['mismatched'] or cell['pending_after_fold']:
+                            problems.append(f"[incremental/{workload}/{writers}w] {cell['mismatched']} recursos "
+                                            f"con contadores distintos, {cell['pending_after_fold']} deltas sin traspasar")
+                finally:
+                    monitor.close()
+                if cell['errors']:
+                    problems.append(f"[{scenario}/{workload}/{writers}w] {cell['errors']} errores: {cell['first_error']}")
+                results[scenario][workload].append(cell)
+                print_cell(scenario, workload, cell)
+
+    if 'recalculo' in results and 'incremental' in results:
+        print("\n📊 incremental vs recalculo (ops/s):")
+        for workload in workloads:
+            for old, new in zip(results['recalculo'][workload], results['incremental'][workload]):
+                ratio = new['ops_per_s'] / old['ops_per_s'] if old['ops_per_s'] else float('inf')
+                print(f"  {workload:<15} {old['writers']:>3}w  {old['ops_per_s']:>9.1f} → {new['ops_per_s']:>9.1f}  "
+                      f"({ratio:.1f}x, esperas de lock {old['row_lock_waits']} → {new['row_lock_waits']})")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'results': results}, f, indent=1, ensure_ascii=False)
+
+    conn = db_pool.connect(config, autocommit=True)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_DATABASE}")
+    finally:
+        conn.close()
+
+    if problems:
+        print(f"\n❌ {len(problems)} problemas:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✅ Benchmark completo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Carga rápida de dumps y fixtures SQL (INSERT → LOAD DATA en paralelo)
+
+Recorre los archivos en orden con sql_splitter. Los INSERT cuyos VALUES son
+solo literales se acumulan en buffers por tabla y se cargan con LOAD DATA
+LOCAL INFILE, varias tablas a la vez, con FOREIGN_KEY_CHECKS y UNIQUE_CHECKS
+desactivados; en tablas grandes los índices secundarios se quitan antes de
+cargar y se reconstruyen al final en un solo ALTER. Todo lo demás (DDL,
+SET @var, INSERT con NOW() o subconsultas...) se ejecuta tal cual con
+MigrationRun, en su lugar: antes de cada una de esas sentencias se vacían
+los buffers pendientes, así un SET @id = (SELECT ...) ve las filas previas.
+Si la sentencia que corta una tanda usa LAST_INSERT_ID(), los INSERT de
+esa tanda también se ejecutan en su lugar: LAST_INSERT_ID() es de la sesión
+principal y no vería el id de una fila cargada por otra conexión. Dentro de
+una tabla las filas se cargan en el orden del archivo (un tramo nuevo cada
+vez que cambian las columnas o el modo), así los AUTO_INCREMENT coinciden.
+
+Al final verifica los conteos: COUNT(*) de cada tabla cargada contra las
+filas que había antes más las cargadas e insertadas.
+
+Ejecutar (base de pruebas/staging; el servidor debe tener local_infile=ON):
+    python bulk_load.py --database pruebas --reset db/formacion_empresarial.sql db/test_data.sql
+    python bulk_load.py --database pruebas db/test_data_cursos.sql db/test_data_fase3.sql
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pymysql
+
+from db_pool import connect
+from run_migration import MigrationRun
+from sql_splitter import iter_file_statements
+
+# Tablas con menos filas pendientes que esto se cargan sin quitar índices
+DEFER_INDEX_ROWS = 50000
+
+_INSERT_HEAD = re.compile(
+    r'^(INSERT|REPLACE)\s+(?:LOW_PRIORITY\s+|DELAYED\s+|HIGH_PRIORITY\s+)?(IGNORE\s+)?(?:INTO\s+)?'
+    r'`?(\w+)`?\s*(?:\(([^()]*)\))?\s*VALUES\s*',
+    re.I | re.S,
+)
+_VALUE_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<str>'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*")
+      | (?P<hex>0x[0-9a-f]+\b)
+      | (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)
+      | (?P<null>NULL\b)
+      | (?P<bool>TRUE\b|FALSE\b)
+      | (?P<punct>[(),])
+    )""",
+    re.I | re.X | re.S,
+)
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_BACKSLASH = re.compile(r'\\(.)', re.S)
+_SKIPPED = re.compile(r'^(USE\s|CREATE\s+DATABASE|DROP\s+DATABASE)', re.I)
+_LAST_INSERT_ID = re.compile(r'\bLAST_INSERT_ID\s*\(', re.I)
+# Sentencias ejecutadas tal cual que cambian el conteo de una tabla
+_WRITES = [
+    ('INSERT', re.compile(r'^INSERT\s+(?:LOW_PRIORITY\s+|DELAYED\s+|HIGH_PRIORITY\s+)?(?:IGNORE\s+)?(?:INTO\s+)?`?(\w+)`?', re.I)),
+    ('REPLACE', re.compile(r'^REPLACE\s+(?:LOW_PRIORITY\s+|DELAYED\s+)?(?:INTO\s+)?`?(\w+)`?', re.I)),
+    ('DELETE', re.compile(r'^DELETE\s+(?:(?:LOW_PRIORITY|QUICK|IGNORE)\s+)*FROM\s+`?(\w+)`?', re.I)),
+    ('TRUNCATE', re.compile(r'^TRUNCATE\s+(?:TABLE\s+)?`?(\w+)`?', re.I)),
+]
+
+
+# ----------------------------------------------------------------------
+# INSERT → filas
+# ----------------------------------------------------------------------
+
+def _unescape(literal):
+    quote = literal[0]
+    body = literal[1:-1].replace(quote * 2, quote)
+    return _BACKSLASH.sub(lambda m: _ESCAPES.get(m.group(1), ('\\' + m.group(1)) if m.group(1) in '%_'
+                                                  else m.group(1)), body)
+
+
+def _tsv(value):
+    """Campo para LOAD DATA con las opciones por defecto (TAB, \\n, \\)"""
+    if value is None:
+        return '\\N'
+    return (value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            .replace('\r', '\\r').replace('\0', '\\0'))
+
+
+def parse_values(text, pos=0):
+    """
+    Tuplas de un VALUES (...),(...) como listas de campos TSV, o None si
+    alguna expresión no es un literal (funciones, @variables, DEFAULT...).
+    """
+    rows, row = [], None
+    expect_value = False
+    end = len(text)
+    while True:
+        match = _VALUE_TOKEN.match(text, pos)
+        if not match:
+            return rows if row is None and not expect_value and not text[pos:].strip() else None
+        pos = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'punct':
+            if token == '(':
+                if row is not None:
+                    return None
+                row, expect_value = [], True
+            elif token == ',':
+                if row is None:
+                    continue  # separador entre tuplas
+                if expect_value:
+                    return None
+                expect_value = True
+            else:
+                if row is None or expect_value:
+                    return None
+                rows.append(row)
+                row = None
+            continue
+        if row is None or not expect_value or kind == 'hex':
+            return None
+        if kind == 'str':
+            row.append(_tsv(_unescape(token)))
+        elif kind == 'null':
+            row.append('\\N')
+        elif kind == 'bool':
+            row.append('1' if token.upper() == 'TRUE' else '0')
+        else:
+            row.append(token)
+        expect_value = False
+        if pos >= end:
+            return None
+
+
+def parse_insert(text):
+    """(tabla, columnas, modo, filas) de un INSERT convertible, o None"""
+    head = _INSERT_HEAD.match(text)
+    if not head:
+        return None
+    rows = parse_values(text, head.end())
+    if not rows:
+        return None
+    verb, ignore, table, columns = head.groups()
+    if columns is not None:
+        columns = tuple(c.strip().strip('`') for c in columns.split(','))
+        if any(len(row) != len(columns) for row in rows):
+            return None
+    mode = 'REPLACE' if verb.upper() == 'REPLACE' else 'IGNORE' if ignore else ''
+    return table, columns, mode, rows
+
+
+# ----------------------------------------------------------------------
+# Carga
+# ----------------------------------------------------------------------
+
+class BulkLoader:
+    """
+    Buffers de filas por tabla que se vacían en paralelo con LOAD DATA.
+    `main` es la conexión donde corren las sentencias que no se convierten;
+    los cargadores copian su sql_mode y time_zone.
+    """
+
+    def __init__(self, config, main, workers=4, defer_rows=DEFER_INDEX_ROWS, verbose=True):
+        self.config = config
+        self.main = main
+        self.workers = workers
+        self.defer_rows = defer_rows
+        self.verbose = verbose
+        self.buffers = {}         # tabla -> [((columnas, modo), [filas])] en orden
+        self.pending_rows = {}    # tabla -> filas en buffer
+        self.before = {}          # tabla -> COUNT(*) antes de la primera carga
+        self.parsed = {}          # tabla -> filas leídas de los INSERT
+        self.loaded = {}          # tabla -> filas que aceptó LOAD DATA
+        self.inserted = {}        # tabla -> filas de INSERT ejecutados tal cual
+        self.unverifiable = set()
+        self.errors = []
+        self.flushes = 0
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # Un solo pool para todas las tandas: cada hilo conserva su conexión
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self.tmp = tempfile.TemporaryDirectory(prefix='bulk_load_')
+
+    def add(self, table, columns, mode, rows):
+        groups = self.buffers.setdefault(table, [])
+        # Columnas o modo distintos: tramo nuevo, cargado después de los anteriores
+        if not groups or groups[-1][0] != (columns, mode):
+            groups.append(((columns, mode), []))
+        groups[-1][1].extend(rows)
+        self.pending_rows[table] = self.pending_rows.get(table, 0) + len(rows)
+        self.parsed[table] = self.parsed.get(table, 0) + len(rows)
+
+    def executed(self, text, rowcount):
+        """Registra el efecto de una sentencia ejecutada tal cual sobre los conteos"""
+        for verb, pattern in _WRITES:
+            match = pattern.match(text)
+            if match:
+                break
+        else:
+            return
+        table = match.group(1)
+        if table not in self.before:
+            return
+        if verb == 'INSERT' and rowcount >= 0:
+            self.inserted[table] = self.inserted.get(table, 0) + rowcount
+        else:
+            self.unverifiable.add(table)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = connect(self.config, local_infile=True)
+            with connection.cursor() as cursor:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                cursor.execute("SET UNIQUE_CHECKS = 0")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION sql_mode = %s, time_zone = %s", self.session)
+        return connection
+
+    def flush(self):
+        """Carga todo lo pendiente, una tabla por hilo"""
+        if not self.buffers:
+            return
+        self.flushes += 1
+        with self.main.cursor() as cursor:
+            cursor.execute("SELECT @@SESSION.sql_mode, @@SESSION.time_zone")
+            self.session = cursor.fetchone()
+            # Los cargadores no ven lo que no se haya confirmado en la sesión principal
+            self.main.commit()
+            for table in self.buffers:
+                if table not in self.before:
+                    cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+                    self.before[table] = cursor.fetchone()[0]
+
+        buffers, self.buffers = self.buffers, {}
+        pending, self.pending_rows = self.pending_rows, {}
+        # Las tablas más grandes primero, para no dejarlas al final en un solo hilo
+        futures = [self._pool.submit(self._load_table, table, groups, pending[table])
+                   for table, groups in sorted(buffers.items(), key=lambda item: -pending[item[0]])]
+        for future in futures:
+            future.result()
+
+    def _load_table(self, table, groups, rows):
+        start = time.perf_counter()
+        try:
+            connection = self._connection()
+            with connection.cursor() as cursor:
+                deferred = self._drop_secondary(cursor, table) if rows >= self.defer_rows else []
+                loaded = 0
+                for n, ((columns, mode), data) in enumerate(groups):
+                    path = Path(self.tmp.name) / f"{table}_{self.flushes}_{n}.tsv"
+                    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+                        f.write(''.join('\t'.join(row) + '\n' for row in data))
+                    column_list = f" ({', '.join(f'`{c}`' for c in columns)})" if columns else ''
+                    cursor.execute(f"LOAD DATA LOCAL INFILE '{path.as_posix()}' {mode} INTO TABLE `{table}` "
+                                   f"CHARACTER SET utf8mb4{column_list}")
+                    loaded += cursor.rowcount
+                    path.unlink()
+                if deferred:
+                    cursor.execute(f"ALTER TABLE `{table}` " + ', '.join(f"ADD {d}" for d in deferred))
+                connection.commit()
+            with self._lock:
+                self.loaded[table] = self.loaded.get(table, 0) + loaded
+            if self.verbose:
+                extra = f", {len(deferred)} índices reconstruidos" if deferred else ''
+                print(f"  ✓ {table}: {loaded:,}/{rows:,} filas ({time.perf_counter() - start:.2f}s{extra})")
+        except pymysql.Error as e:
+            with self._lock:
+                self.errors.append(f"{table}: {e}")
+            print(f"  ❌ {table}: {e}")
+
+    def _drop_secondary(self, cursor, table):
+        """
+        Quita los índices secundarios no únicos que no sostienen una FK y
+        retorna sus definiciones para recrearlos después de la carga.
+        """
+        cursor.execute("""
+            SELECT INDEX_NAME, COLUMN_NAME, SUB_PART, INDEX_TYPE
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 1
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """, (table,))
+        indexes = {}
+        for name, column, sub_part, kind in cursor.fetchall():
+            indexes.setdefault(name, {'kind': kind, 'columns': []})['columns'].append(
+                f"`{column}`({sub_part})" if sub_part else f"`{column}`")
+        cursor.execute("""
+            SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+              AND REFERENCED_TABLE_NAME IS NOT NULL AND ORDINAL_POSITION = 1
+        """, (table,))
+        fk_columns = {f"`{row[0]}`" for row in cursor.fetchall()}
+
+        definitions = []
+        for name, index in indexes.items():
+            if index['kind'] != 'BTREE' or index['columns'][0] in fk_columns:
+                continue
+            definitions.append(f"INDEX `{name}` ({', '.join(index['columns'])})")
+        if definitions:
+            names = [d.split('`')[1] for d in definitions]
+            # Por si la carga se interrumpe: cómo recrearlos a mano
+            print(f"  • {table}: difiriendo {', '.join(names)} "
+                  f"(recrear con: ALTER TABLE `{table}` {', '.join('ADD ' + d for d in definitions)};)")
+            cursor.execute(f"ALTER TABLE `{table}` " + ', '.join(f"DROP INDEX `{n}`" for n in names))
+        return definitions
+
+    def verify(self):
+        """Compara COUNT(*) con lo esperado; retorna la lista de discrepancias"""
+        problems = []
+        with self.main.cursor() as cursor:
+            print(f"\n🔍 Verificando conteos de {len(self.before)} tablas")
+            for table in sorted(self.before):
+                cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+                actual = cursor.fetchone()[0]
+                loaded = self.loaded.get(table, 0)
+                expected = self.before[table] + loaded + self.inserted.get(table, 0)
+                skipped = self.parsed.get(table, 0) - loaded
+                note = f" ({skipped:,} duplicadas omitidas)" if skipped else ''
+                if table in self.unverifiable:
+                    print(f"  ~ {table}: {actual:,} filas (modificada por DELETE/TRUNCATE/REPLACE, sin verificar)")
+                elif actual == expected:
+                    print(f"  ✓ {table}: {actual:,} filas{note}")
+                else:
+                    print(f"  ❌ {table}: {actual:,} filas, se esperaban {expected:,}{note}")
+                    problems.append(f"{table}: {actual} != {expected}")
+        return problems
+
+    def close(self):
+        self._pool.shutdown()
+        for connection in self._connections:
+            connection.close()
+        self.tmp.cleanup()
+
+
+def load_files(paths, config, workers=4, defer_rows=DEFER_INDEX_ROWS, stop_on_error=False):
+    """Carga los archivos en orden; retorna (loader, run) para el reporte"""
+    main = connect(config)
+    loader = BulkLoader(config, main, workers, defer_rows)
+    try:
+        with main.cursor() as cursor:
+            run = MigrationRun(cursor, verbose=False, stop_on_error=stop_on_error)
+
+            def execute(i, statement):
+                loader.flush()
+                run.feed(i, statement)
+                loader.executed(statement.text, cursor.rowcount)
+                return run.stopped
+
+            def drain(in_place):
+                """Pasa la tanda de INSERT al cargador, o los ejecuta en `main`"""
+                batch = pending[:]
+                pending.clear()
+                for i, statement, insert in batch:
+                    if in_place:
+                        if execute(i, statement):
+                            return True
+                        continue
+                    loader.add(*insert)
+                    run.total = i
+                    run.success_count += 1
+                return False
+
+            pending = []  # INSERT convertibles desde la última sentencia ejecutada tal cual
+            i = 0
+            for path in paths:
+                print(f"\n📄 {path}")
+                for statement in iter_file_statements(path):
+                    if _SKIPPED.match(statement.text):
+                        continue  # la base destino la define --database
+                    i += 1
+                    insert = parse_insert(statement.text)
+                    if insert is not None:
+                        pending.append((i, statement, insert))
+                        continue
+                    # El id que lee puede venir de cualquier INSERT de la tanda: todos van a `main`
+                    if drain(bool(_LAST_INSERT_ID.search(statement.text))) or execute(i, statement):
+                        break
+                if run.stopped:
+                    break
+            if not run.stopped:
+                drain(False)
+            loader.flush()
+            main.commit()
+            problems = loader.verify()
+        return loader, run, problems
+    finally:
+        loader.close()
+        main.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga dumps/fixtures SQL convirtiendo los INSERT a LOAD DATA")
+    parser.add_argument('files', nargs='+', help="Archivos .sql, en el orden de carga")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', required=True, help="Base destino (los USE de los archivos se ignoran)")
+    parser.add_argument('--reset', action='store_true', help="Borrar y recrear la base antes de cargar")
+    parser.add_argument('--workers', type=int, default=4, help="Tablas cargadas en paralelo")
+    parser.add_argument('--defer-index-rows', type=int, default=DEFER_INDEX_ROWS,
+                        help="Filas pendientes a partir de las cuales se difieren los índices secundarios")
+    parser.add_argument('--stop-on-error', action='store_true')
+    args = parser.parse_args()
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'charset': 'utf8mb4',
+    }
+    if args.reset:
+        conn = connect(config)
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+            cursor.execute(f"CREATE DATABASE `{args.database}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        conn.close()
+        print(f"🗑️  Base {args.database} recreada")
+    config['database'] = args.database
+
+    start = time.perf_counter()
+    loader, run, problems = load_files(args.files, config, args.workers, args.defer_index_rows, args.stop_on_error)
+    elapsed = time.perf_counter() - start
+
+    total = sum(loader.loaded.values())
+    print("\n" + "=" * 60)
+    print(f"📊 {total:,} filas por LOAD DATA en {loader.flushes} tandas, "
+          f"{run.success_count}/{run.total} sentencias, {elapsed:.1f}s")
+    for error in run.errors + loader.errors:
+        print(f"  ❌ {error}")
+    if run.errors or loader.errors or problems:
+        sys.exit(1)
+    print("✅ Carga completa")
+
+
+if __name__ == '__main__':
+    main()
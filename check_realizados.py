@@ -1,31 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Verificar esquema de diagnosticos_realizados"""
-import pymysql
+from pymysql.constants import CLIENT
 
-DB_CONFIG = {
-    'host': 'metro.proxy.rlwy.net',
-    'port': 52451,
-    'user': 'root',
-    'password': 'hVRfZwfOYSrdWHloqDrsPCAuuAkPKNem',
-    'database': 'formacion_empresarial',
-    'charset': 'utf8mb4'
-}
+from db_pool import connect
+from schema_snapshot import get_snapshot, has_column, table_columns
 
 try:
-    conn = pymysql.connect(**DB_CONFIG)
+    conn = connect(client_flag=CLIENT.MULTI_STATEMENTS)
+    # Todo el esquema en un solo round trip
+    snapshot = get_snapshot(connection=conn, refresh=True)
     with conn.cursor() as cursor:
-        # Verificar diagnosticos_realizados
-        print("\n=== diagnosticos_realizados ===")
-        cursor.execute("DESCRIBE diagnosticos_realizados")
-        for col in cursor.fetchall():
-            print(f"  - {col[0]:30} {col[1]}")
+        for table in ('diagnosticos_realizados', 'perfiles_empresariales'):
+            print(f"\n=== {table} ===")
+            for name, col in table_columns(snapshot, table).items():
+                print(f"  - {name:30} {col['type']}")
         
-        # Verificar perfiles_empresariales
-        print("\n=== perfiles_empresariales ===")
-        cursor.execute("DESCRIBE perfiles_empresariales")
-        for col in cursor.fetchall():
-            print(f"  - {col[0]:30} {col[1]}")
+        print(f"\nTiene dr.id_tipo_diagnostico: "
+              f"{'SI' if has_column(snapshot, 'diagnosticos_realizados', 'id_tipo_diagnostico') else 'NO'}")
         
         # Verificar la consulta que falla
         print("\n=== Probando consulta ===")
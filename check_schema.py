@@ -1,53 +1,42 @@
 #!/usr/bin/env python3
 """
 Script para verificar el esquema de las tablas en Railway
+
+Lee todo el esquema en un solo round trip (ver schema_snapshot.py); con
+--cached responde desde el último snapshot guardado sin conectarse.
 """
 
-import pymysql
+import sys
+
+from schema_snapshot import get_snapshot, has_table, table_columns
 
-# Configuración de Railway
-DB_CONFIG = {
-    'host': 'metro.proxy.rlwy.net',
-    'port': 52451,
-    'user': 'root',
-    'password': 'hVRfZwfOYSrdWHloqDrsPCAuuAkPKNem',
-    'database': 'formacion_empresarial',
-    'charset': 'utf8mb4'
-}
+TABLES = ['tipos_diagnostico', 'areas_evaluacion', 'preguntas_diagnostico',
+          'diagnosticos_realizados', 'respuestas_diagnostico']
 
-def check_schema():
+def check_schema(refresh=True):
     """Verifica el esquema de las tablas"""
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        
-        with connection.cursor() as cursor:
-            tables = ['tipos_diagnostico', 'areas_evaluacion', 'preguntas_diagnostico', 
-                     'diagnosticos_realizados', 'respuestas_diagnostico']
-            
-            for table in tables:
-                print(f"\n{'='*60}")
-                print(f"📋 Tabla: {table}")
-                print('='*60)
-                
-                # Verificar si existe
-                cursor.execute(f"SHOW TABLES LIKE '{table}'")
-                if not cursor.fetchone():
-                    print(f"  ❌ La tabla no existe")
-                    continue
-                
-                # Mostrar estructura
-                cursor.execute(f"DESCRIBE {table}")
-                columns = cursor.fetchall()
-                
-                print("\n  Columnas:")
-                for col in columns:
-                    print(f"    - {col[0]:30} {col[1]:20} {col[2]:10}")
-        
-        connection.close()
-        
+        snapshot = get_snapshot(refresh=refresh)
     except Exception as e:
         print(f"❌ Error: {e}")
+        return
+    
+    for table in TABLES:
+        print(f"\n{'='*60}")
+        print(f"📋 Tabla: {table}")
+        print('='*60)
+        
+        # Verificar si existe
+        if not has_table(snapshot, table):
+            print(f"  ❌ La tabla no existe")
+            continue
+        
+        # Mostrar estructura
+        print("\n  Columnas:")
+        for name, col in table_columns(snapshot, table).items():
+            null = 'YES' if col['nullable'] else 'NO'
+            print(f"    - {name:30} {col['type']:20} {null:10}")
 
 if __name__ == '__main__':
     print("🔍 Verificando esquema de tablas en Railway...")
-    check_schema()
+    check_schema(refresh='--cached' not in sys.argv[1:])
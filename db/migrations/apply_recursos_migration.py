@@ -1,13 +1,55 @@
 #!/usr/bin/env python3
 """
-Script para ejecutar migración de recursos en Railway MySQL
-Ejecutar: python apply_recursos_migration.py
+Script para ejecutar la migración de recursos en cualquier MySQL
+(Railway, staging o un contenedor local)
+
+Todo corre en el mismo proceso: la migración se aplica con run_migration
+(registro en schema_migrations, reanudable) sobre una conexión persistente
+y las verificaciones se ejecutan en paralelo sobre un pool de conexiones.
+Con --dry-run solo muestra el plan: qué sentencias se ejecutarían y qué
+tablas, columnas y triggers ya existen en la base destino.
+
+Ejecutar:
+    python apply_recursos_migration.py
+    python apply_recursos_migration.py --dry-run
+    python apply_recursos_migration.py --host 127.0.0.1 --port 3307 --password secret --yes
 """
 
-import os
+import argparse
+import re
 import sys
-import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pymysql
+
+# Permite importar los módulos de la raíz del proyecto
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from db_pool import DB_CONFIG, ConnectionPool
+from migration_ledger import (
+    ESTADO_APLICADA, LEDGER_TABLE, ensure_ledger, file_checksum, load_ledger, migration_key,
+)
+from run_migration import apply_file
+from schema_snapshot import has_column, has_table, take_snapshot
+from sql_splitter import iter_file_statements
+
+MIGRATION_FILE = Path(__file__).resolve().parent / 'fix_recursos_schema.sql'
+
+VERIFY_QUERIES = [
+    ("Verificar recursos_aprendizaje", "DESCRIBE recursos_aprendizaje"),
+    ("Contar recursos", "SELECT COUNT(*) FROM recursos_aprendizaje"),
+    ("Verificar descargas_recursos", "SHOW TABLES LIKE 'descargas_recursos'"),
+    ("Verificar calificaciones_recursos", "SHOW TABLES LIKE 'calificaciones_recursos'"),
+    ("Verificar vistas_recursos", "SHOW TABLES LIKE 'vistas_recursos'"),
+]
+
+_CREATE_TABLE = re.compile(r'^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?', re.I)
+_CREATE_TRIGGER = re.compile(r'^CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?', re.I)
+_ALTER_TABLE = re.compile(r'^ALTER\s+TABLE\s+`?(\w+)`?', re.I)
+_ADD_COLUMN = re.compile(r'ADD\s+COLUMN\s+`?(\w+)`?', re.I)
+
 
 def print_header(text):
     """Imprimir encabezado"""
@@ -15,142 +57,176 @@ def print_header(text):
     print(f"  {text}")
     print("="*60 + "\n")
 
+
 def print_step(step, text):
     """Imprimir paso"""
     print(f"[{step}] {text}")
 
-def run_command(command, description):
-    """Ejecutar comando y capturar salida"""
-    print_step("▶", description)
+
+def describe_statement(text):
+    """Resumen de una línea de la sentencia para el plan"""
+    first = ' '.join(text.split())
+    return first if len(first) <= 90 else first[:87] + '...'
+
+
+def plan(pool, migration_file):
+    """Plan de ejecución contra el estado actual de la base (sin modificarla)"""
+    print_step("▶", f"Plan para {migration_file.name}")
+    snapshot, entry = None, None
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        if result.returncode == 0:
-            print(f"    ✓ {description} - Éxito")
-            if result.stdout:
-                print(f"    Output: {result.stdout[:200]}")
-            return True
-        else:
-            print(f"    ✗ {description} - Error")
-            if result.stderr:
-                print(f"    Error: {result.stderr[:500]}")
-            return False
-    except subprocess.TimeoutExpired:
-        print(f"    ✗ Timeout ejecutando: {description}")
-        return False
-    except Exception as e:
-        print(f"    ✗ Excepción: {str(e)}")
-        return False
+        with pool.connection() as connection:
+            snapshot = take_snapshot(connection, pool.config['database'])
+            # Sin ensure_ledger: el plan no crea nada en la base
+            if has_table(snapshot, LEDGER_TABLE):
+                with connection.cursor() as cursor:
+                    entry = load_ledger(cursor, pool.config['database']).get(migration_key(migration_file))
+    except pymysql.Error as e:
+        print(f"    ⚠ Sin conexión, plan sin estado de la base: {e}")
+
+    if entry:
+        same = entry['checksum'] == file_checksum(migration_file)
+        print(f"    Registro: {entry['estado']}, {entry['sentencias_aplicadas']} sentencias aplicadas"
+              f"{'' if same else ' (el archivo cambió desde entonces)'}")
+        if same and entry['estado'] == ESTADO_APLICADA:
+            print("    ⏭️  Ya aplicada: no se ejecutaría nada")
+
+    for i, statement in enumerate(iter_file_statements(migration_file), 1):
+        notes = []
+        if snapshot is not None:
+            text = statement.text
+            match = _CREATE_TABLE.match(text) or _CREATE_TRIGGER.match(text)
+            if match and _CREATE_TABLE.match(text):
+                notes.append('tabla ya existe' if has_table(snapshot, match.group(1)) else 'tabla nueva')
+            elif match:
+                triggers = {name for table in snapshot['tables'].values() for name in table['triggers']}
+                notes.append('trigger ya existe' if match.group(1) in triggers else 'trigger nuevo')
+            elif _ALTER_TABLE.match(text):
+                table = _ALTER_TABLE.match(text).group(1)
+                columns = _ADD_COLUMN.findall(text)
+                existing = [c for c in columns if has_column(snapshot, table, c)]
+                if existing:
+                    notes.append(f"ya existen: {', '.join(existing)}")
+                if columns and len(existing) < len(columns):
+                    notes.append(f"{len(columns) - len(existing)} columnas nuevas")
+        suffix = f"  [{'; '.join(notes)}]" if notes else ''
+        print(f"    {i:3d}. (línea {statement.line}) {describe_statement(statement.text)}{suffix}")
+
+
+def migrate(pool, migration_file):
+    """Aplica el archivo con el runner (registro en schema_migrations)"""
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            database = pool.config['database']
+            ensure_ledger(cursor, database)
+            ledger = load_ledger(cursor, database)
+            return apply_file(connection, cursor, migration_file, ledger=ledger, database=database)
+
+
+def run_query(pool, description, query):
+    start = time.perf_counter()
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+    return description, query, rows, time.perf_counter() - start
+
+
+def verify(pool):
+    """Corre las verificaciones en paralelo; retorna True si todas pasan"""
+    ok = True
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = [executor.submit(run_query, pool, desc, query) for desc, query in VERIFY_QUERIES]
+        for future in futures:
+            try:
+                description, query, rows, elapsed = future.result()
+            except pymysql.Error as e:
+                print(f"    ✗ {e}")
+                ok = False
+                continue
+            if query.startswith('SHOW TABLES'):
+                passed = bool(rows)
+                detail = 'existe' if passed else 'NO existe'
+            elif query.startswith('DESCRIBE'):
+                passed = bool(rows)
+                detail = f"{len(rows)} columnas: {', '.join(row[0] for row in rows)}"
+            else:
+                passed = True
+                detail = f"{rows[0][0]} filas"
+            ok = ok and passed
+            print(f"    {'✓' if passed else '✗'} {description} ({elapsed * 1000:.0f} ms) - {detail[:200]}")
+    return ok
+
 
 def main():
-    print_header("MIGRACIÓN DE RECURSOS - RAILWAY")
-    
-    # 1. Verificar que railway CLI está instalado
-    print_step("1", "Verificando Railway CLI...")
-    result = subprocess.run(["railway", "--version"], capture_output=True)
-    if result.returncode != 0:
-        print("    ✗ Railway CLI no encontrado. Instalar con: npm i -g @railway/cli")
-        sys.exit(1)
-    print("    ✓ Railway CLI encontrado")
-    
-    # 2. Verificar conexión
-    print_step("2", "Verificando conexión a Railway...")
-    if not run_command("railway status", "Verificar status"):
-        print("    ⚠ No conectado. Ejecutar: railway login")
-        sys.exit(1)
-    
-    # 3. Leer archivo de migración
-    migration_file = "db/migrations/fix_recursos_schema.sql"
-    print_step("3", f"Leyendo {migration_file}...")
-    
-    if not os.path.exists(migration_file):
+    parser = argparse.ArgumentParser(description="Aplica y verifica la migración de recursos")
+    parser.add_argument('--file', default=str(MIGRATION_FILE), help="Archivo de migración")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar el plan, sin ejecutar")
+    parser.add_argument('--yes', action='store_true', help="No pedir confirmación")
+    parser.add_argument('--pool-size', type=int, default=len(VERIFY_QUERIES),
+                        help="Conexiones del pool (verificaciones simultáneas)")
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=DB_CONFIG['port'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    parser.add_argument('--database', default=DB_CONFIG['database'])
+    args = parser.parse_args()
+
+    print_header("MIGRACIÓN DE RECURSOS")
+    migration_file = Path(args.file)
+    if not migration_file.exists():
         print(f"    ✗ Archivo no encontrado: {migration_file}")
         sys.exit(1)
-    
-    with open(migration_file, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
-    
-    print(f"    ✓ Archivo leído ({len(sql_content)} caracteres)")
-    
-    # 4. Confirmar ejecución
-    print_step("4", "Revisión de cambios a aplicar:")
-    print("""
-    Esta migración realizará los siguientes cambios:
-    
-    ✓ Agregar campos a recursos_aprendizaje:
-      - slug, id_autor, contenido_texto, contenido_html
-      - duracion_minutos, imagen_preview, video_preview
-      - idioma, formato, licencia, destacado
-      - fecha_publicacion, fecha_actualizacion
-    
-    ✓ Crear tablas:
-      - descargas_recursos
-      - calificaciones_recursos
-      - vistas_recursos
-    
-    ✓ Crear triggers:
-      - Actualizar contadores automáticamente
-      - Recalcular calificaciones promedio
-    """)
-    
-    respuesta = input("\n¿Deseas continuar? (si/no): ").lower()
-    if respuesta not in ['si', 'sí', 's', 'y', 'yes']:
-        print("    ⚠ Migración cancelada por el usuario")
-        sys.exit(0)
-    
-    # 5. Aplicar migración
-    print_step("5", "Aplicando migración...")
-    
-    # Guardar SQL temporalmente
-    temp_file = "temp_migration.sql"
-    with open(temp_file, 'w', encoding='utf-8') as f:
-        f.write(sql_content)
-    
-    # Ejecutar con railway
-    command = f'railway run mysql -e "source {temp_file}"'
-    success = run_command(command, "Ejecutar migración SQL")
-    
-    # Limpiar archivo temporal
-    if os.path.exists(temp_file):
-        os.remove(temp_file)
-    
-    if not success:
-        print("\n⚠ La migración puede haber fallado parcialmente.")
-        print("Revisa los errores arriba y verifica la base de datos.")
-        sys.exit(1)
-    
-    # 6. Verificar resultados
-    print_step("6", "Verificando estructura...")
-    
-    verify_queries = [
-        ("Verificar recursos_aprendizaje", "DESCRIBE recursos_aprendizaje;"),
-        ("Contar recursos", "SELECT COUNT(*) FROM recursos_aprendizaje;"),
-        ("Verificar descargas_recursos", "SHOW TABLES LIKE 'descargas_recursos';"),
-        ("Verificar calificaciones_recursos", "SHOW TABLES LIKE 'calificaciones_recursos';"),
-        ("Verificar vistas_recursos", "SHOW TABLES LIKE 'vistas_recursos';"),
-    ]
-    
-    for desc, query in verify_queries:
-        cmd = f'railway run mysql -e "{query}"'
-        run_command(cmd, desc)
-        time.sleep(1)
-    
-    # 7. Resultado final
+
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'charset': 'utf8mb4',
+    }
+    # autocommit: el registro de avance se confirma sentencia por sentencia
+    pool = ConnectionPool(config, args.pool_size, autocommit=True)
+    start = time.perf_counter()
+    try:
+        print_step("1", f"Conectando a {args.host}:{args.port}/{args.database}...")
+        with pool.connection():
+            pass
+        print("    ✓ Conectado")
+
+        if args.dry_run:
+            plan(pool, migration_file)
+            return
+
+        print_step("2", "Revisión de cambios a aplicar:")
+        print("""
+    ✓ Agregar campos a recursos_aprendizaje (slug, id_autor, contenido, previews,
+      idioma, formato, licencia, destacado, fechas)
+    ✓ Crear tablas: descargas_recursos, calificaciones_recursos, vistas_recursos
+    ✓ Crear triggers de contadores y calificación promedio
+    (usa --dry-run para ver el plan sentencia por sentencia)
+        """)
+        if not args.yes:
+            respuesta = input("\n¿Deseas continuar? (si/no): ").lower()
+            if respuesta not in ['si', 'sí', 's', 'y', 'yes']:
+                print("    ⚠ Migración cancelada por el usuario")
+                sys.exit(0)
+
+        print_step("3", "Aplicando migración...")
+        if not migrate(pool, migration_file):
+            print("\n⚠ La migración no se completó; volver a ejecutar reanuda desde la sentencia fallida.")
+            sys.exit(1)
+
+        print_step("4", "Verificando estructura (en paralelo)...")
+        if not verify(pool):
+            print("\n✗ La verificación encontró problemas")
+            sys.exit(1)
+    finally:
+        pool.close()
+
     print_header("MIGRACIÓN COMPLETADA")
+    print(f"    ✓ Migración y verificación en {time.perf_counter() - start:.1f}s ({pool.opened} conexiones)")
     print("""
-    ✓ Migración aplicada exitosamente
-    
-    Próximos pasos:
-    1. Verificar en Railway dashboard que las tablas existen
-    2. Probar endpoints del módulo de recursos
-    3. Revisar que los triggers funcionan correctamente
-    
     Endpoints a probar:
     - GET  /api/v1/recursos
     - GET  /api/v1/recursos/estadisticas
@@ -159,8 +235,7 @@ def main():
     - POST /api/v1/recursos/{id}/descargar
     - POST /api/v1/recursos/{id}/calificar
     """)
-    
-    print("\n🎉 ¡Migración completada con éxito!")
+
 
 if __name__ == "__main__":
     try:
@@ -168,8 +243,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n\n⚠ Migración interrumpida por el usuario")
         sys.exit(1)
-    except Exception as e:
-        print(f"\n\n✗ Error inesperado: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except pymysql.Error as e:
+        print(f"\n\n✗ Error de MySQL: {e}")
         sys.exit(1)
@@ -1,26 +1,24 @@
-import pymysql
+import sys
+from pathlib import Path
 
-conn = pymysql.connect(
-    host='metro.proxy.rlwy.net',
-    port=52451,
-    user='root',
-    password='hVRfZwfOYSrdWHloqDrsPCAuuAkPKNem',
-    database='formacion_empresarial'
-)
+# Permite importar los módulos de la raíz del proyecto
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-cur = conn.cursor()
+from db_pool import connect
+from online_schema_change import alter_table_online
 
-# Agregar estados pendiente y rechazado al enum
-sql = """
-ALTER TABLE productos_vitrina 
+conn = connect(autocommit=True)
+
+# Agregar estados pendiente y rechazado al enum (en línea: INSTANT/INPLACE o
+# copia en tabla sombra, sin bloquear escrituras sobre productos_vitrina)
+spec = """
 MODIFY COLUMN estado ENUM('borrador','publicado','pausado','agotado','pendiente','rechazado') 
 NOT NULL DEFAULT 'borrador'
 """
 
 try:
-    cur.execute(sql)
-    conn.commit()
-    print("✅ Campo estado actualizado correctamente")
+    method = alter_table_online(conn, 'productos_vitrina', spec.strip())
+    print(f"✅ Campo estado actualizado correctamente ({method})")
 except Exception as e:
     print(f"❌ Error: {e}")
 finally:
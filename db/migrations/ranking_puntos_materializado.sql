@@ -0,0 +1,40 @@
+-- =====================================================
+-- Ranking de puntos materializado
+-- Lo mantiene leaderboard_refresh.py a partir de transacciones_puntos;
+-- PuntosUsuario lo lee en lugar de la vista ranking_usuarios (que ordena
+-- todo puntos_usuario en cada consulta) y vuelve a la vista si está vacío.
+--
+--   ranking_puntos         una fila por usuario activo con puntos
+--   ranking_puntos_grupos  una fila por (puntos_totales, nivel) distinto con
+--                          la cantidad de usuarios y su posición (RANK():
+--                          1 + usuarios de los grupos superiores)
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS `ranking_puntos` (
+  `id_usuario` INT(11) NOT NULL PRIMARY KEY,
+  `puntos_totales` INT NOT NULL DEFAULT 0,
+  `nivel` INT NOT NULL DEFAULT 1,
+  `experiencia` INT NOT NULL DEFAULT 0,
+  `fecha_actualizacion` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY `idx_orden` (`puntos_totales`, `nivel`, `id_usuario`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Ranking de puntos materializado (leaderboard_refresh.py)';
+
+CREATE TABLE IF NOT EXISTS `ranking_puntos_grupos` (
+  `puntos_totales` INT NOT NULL,
+  `nivel` INT NOT NULL,
+  `usuarios` INT NOT NULL DEFAULT 0,
+  `posicion` INT NOT NULL DEFAULT 1,
+  PRIMARY KEY (`puntos_totales`, `nivel`),
+  KEY `idx_posicion` (`posicion`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Posición de cada puntaje distinto del ranking (leaderboard_refresh.py)';
+
+CREATE TABLE IF NOT EXISTS `ranking_puntos_estado` (
+  `id` TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+  `ultima_transaccion` INT NOT NULL DEFAULT 0 COMMENT 'Marca de agua en transacciones_puntos.id_transaccion',
+  `usuarios` INT NOT NULL DEFAULT 0,
+  `fecha_reconstruccion` DATETIME NULL,
+  `fecha_calculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Marca de agua del refresco incremental del ranking';
@@ -0,0 +1,30 @@
+-- =====================================================
+-- Recomendaciones de cursos precalculadas
+-- Las llena recommendation_precompute.py; MotorRecomendaciones las lee con
+-- una consulta por PRIMARY KEY y, si no hay fila para la combinación, usa
+-- la búsqueda LIKE en vivo.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS `recomendaciones_cursos_precalculadas` (
+  `area` VARCHAR(200) NOT NULL COMMENT 'areas_evaluacion.nombre',
+  `sector` VARCHAR(100) NOT NULL DEFAULT '' COMMENT 'perfiles_empresariales.sector; vacío = cualquiera',
+  `etapa` VARCHAR(20) NOT NULL DEFAULT '' COMMENT 'perfiles_empresariales.etapa_negocio; vacío = cualquiera',
+  `prioridad` ENUM('critica','mejorable') NOT NULL,
+  `posicion` TINYINT UNSIGNED NOT NULL,
+  `id_curso` INT(11) NOT NULL,
+  `puntaje` DECIMAL(8,3) NOT NULL DEFAULT 0,
+  `es_respaldo` TINYINT(1) NOT NULL DEFAULT 0 COMMENT '1 = cursos generales (ninguno coincidió con el área)',
+  `fecha_calculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`area`, `sector`, `etapa`, `prioridad`, `posicion`),
+  KEY `idx_curso` (`id_curso`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Cursos recomendados por área, sector, etapa y prioridad (recommendation_precompute.py)';
+
+CREATE TABLE IF NOT EXISTS `recomendaciones_cursos_precalculadas_estado` (
+  `id` TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+  `huella` CHAR(40) NOT NULL COMMENT 'Catálogo, áreas, sectores y parámetros del último cálculo',
+  `cursos` INT NOT NULL DEFAULT 0,
+  `combinaciones` INT NOT NULL DEFAULT 0,
+  `fecha_calculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Estado del refresco incremental de recomendaciones_cursos_precalculadas';
@@ -0,0 +1,191 @@
+-- =====================================================
+-- Contadores incrementales de recursos (O(1) por evento)
+-- Generado por bench_triggers.py --emit-migration (slots=16, fold=60s);
+-- para cambiar los parámetros, regenerar en lugar de editar a mano.
+--
+-- Reemplaza los triggers de fix_recursos_schema.sql:
+--   - Calificaciones: suma y cantidad acumuladas en recursos_aprendizaje en
+--     lugar de AVG() sobre calificaciones_recursos en cada cambio.
+--   - Descargas y vistas: deltas en recursos_contadores, 16 filas por
+--     recurso (una por CONNECTION_ID() % 16); las escrituras concurrentes
+--     sobre un recurso popular no esperan el lock de una sola fila.
+--     ev_recursos_contadores_fold los traspasa a recursos_aprendizaje cada
+--     60s (requiere event_scheduler=ON; si no, llamar a
+--     sp_recursos_contadores_fold() desde un cron). vista_recursos_contadores
+--     muestra el total exacto al instante.
+--
+-- El backfill de calificaciones es idempotente: si hubo calificaciones
+-- mientras se aplicaba, se puede ejecutar de nuevo (sección 3).
+-- =====================================================
+
+-- 1. Columnas de acumulados de calificaciones
+ALTER TABLE `recursos_aprendizaje`
+    ADD COLUMN `suma_calificaciones` INT NOT NULL DEFAULT 0 AFTER `calificacion_promedio`,
+    ADD COLUMN `total_calificaciones` INT NOT NULL DEFAULT 0 AFTER `suma_calificaciones`;
+
+-- 2. Deltas de descargas y vistas por recurso y slot
+CREATE TABLE IF NOT EXISTS `recursos_contadores` (
+  `id_recurso` INT(11) NOT NULL,
+  `slot` TINYINT UNSIGNED NOT NULL,
+  `descargas` INT NOT NULL DEFAULT 0,
+  `vistas` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id_recurso`, `slot`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Deltas de contadores pendientes de traspasar a recursos_aprendizaje';
+
+-- 3. Triggers incrementales (primero los triggers y después el backfill: una
+-- calificación que llegue en medio queda contada por uno o por el otro)
+DROP TRIGGER IF EXISTS `trg_recurso_descarga_insert`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_descarga_insert`
+AFTER INSERT ON `descargas_recursos`
+FOR EACH ROW
+BEGIN
+    INSERT INTO `recursos_contadores` (`id_recurso`, `slot`, `descargas`)
+    VALUES (NEW.id_recurso, CONNECTION_ID() % 16, 1)
+    ON DUPLICATE KEY UPDATE `descargas` = `descargas` + 1;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_vista_insert`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_vista_insert`
+AFTER INSERT ON `vistas_recursos`
+FOR EACH ROW
+BEGIN
+    INSERT INTO `recursos_contadores` (`id_recurso`, `slot`, `vistas`)
+    VALUES (NEW.id_recurso, CONNECTION_ID() % 16, 1)
+    ON DUPLICATE KEY UPDATE `vistas` = `vistas` + 1;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_insert`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_insert`
+AFTER INSERT ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+    UPDATE `recursos_aprendizaje`
+    SET `calificacion_promedio` = (`suma_calificaciones` + NEW.calificacion) / (`total_calificaciones` + 1),
+        `suma_calificaciones` = `suma_calificaciones` + NEW.calificacion,
+        `total_calificaciones` = `total_calificaciones` + 1
+    WHERE `id_recurso` = NEW.id_recurso;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_update`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_update`
+AFTER UPDATE ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+    IF NEW.id_recurso = OLD.id_recurso THEN
+        IF NEW.calificacion <> OLD.calificacion THEN
+            UPDATE `recursos_aprendizaje`
+            SET `calificacion_promedio` = (`suma_calificaciones` - OLD.calificacion + NEW.calificacion)
+                    / GREATEST(`total_calificaciones`, 1),
+                `suma_calificaciones` = `suma_calificaciones` - OLD.calificacion + NEW.calificacion
+            WHERE `id_recurso` = NEW.id_recurso;
+        END IF;
+    ELSE
+        UPDATE `recursos_aprendizaje`
+        SET `calificacion_promedio` = IF(`total_calificaciones` > 1,
+                (`suma_calificaciones` - OLD.calificacion) / (`total_calificaciones` - 1), 0),
+            `suma_calificaciones` = `suma_calificaciones` - OLD.calificacion,
+            `total_calificaciones` = `total_calificaciones` - 1
+        WHERE `id_recurso` = OLD.id_recurso;
+        UPDATE `recursos_aprendizaje`
+        SET `calificacion_promedio` = (`suma_calificaciones` + NEW.calificacion) / (`total_calificaciones` + 1),
+            `suma_calificaciones` = `suma_calificaciones` + NEW.calificacion,
+            `total_calificaciones` = `total_calificaciones` + 1
+        WHERE `id_recurso` = NEW.id_recurso;
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS `trg_recurso_calificacion_delete`;
+
+DELIMITER $$
+CREATE TRIGGER `trg_recurso_calificacion_delete`
+AFTER DELETE ON `calificaciones_recursos`
+FOR EACH ROW
+BEGIN
+    UPDATE `recursos_aprendizaje`
+    SET `calificacion_promedio` = IF(`total_calificaciones` > 1,
+            (`suma_calificaciones` - OLD.calificacion) / (`total_calificaciones` - 1), 0),
+        `suma_calificaciones` = `suma_calificaciones` - OLD.calificacion,
+        `total_calificaciones` = `total_calificaciones` - 1
+    WHERE `id_recurso` = OLD.id_recurso;
+END$$
+DELIMITER ;
+
+UPDATE `recursos_aprendizaje` r
+LEFT JOIN (
+    SELECT `id_recurso`, SUM(`calificacion`) AS suma, COUNT(*) AS total
+    FROM `calificaciones_recursos`
+    GROUP BY `id_recurso`
+) c ON c.id_recurso = r.id_recurso
+SET r.calificacion_promedio = COALESCE(c.suma / c.total, 0),
+    r.suma_calificaciones = COALESCE(c.suma, 0),
+    r.total_calificaciones = COALESCE(c.total, 0);
+
+-- 4. Traspaso de deltas: se bloquean las filas de recursos_contadores durante
+-- la copia (tabla chica: recursos × slots), así no se pierde ningún incremento
+DROP PROCEDURE IF EXISTS `sp_recursos_contadores_fold`;
+
+DELIMITER $$
+CREATE PROCEDURE `sp_recursos_contadores_fold`()
+BEGIN
+    DECLARE pendientes INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    SELECT COUNT(*) INTO pendientes
+    FROM `recursos_contadores`
+    WHERE `descargas` <> 0 OR `vistas` <> 0
+    FOR UPDATE;
+
+    IF pendientes > 0 THEN
+        UPDATE `recursos_aprendizaje` r
+        JOIN (
+            SELECT `id_recurso`, SUM(`descargas`) AS descargas, SUM(`vistas`) AS vistas
+            FROM `recursos_contadores`
+            GROUP BY `id_recurso`
+            HAVING descargas <> 0 OR vistas <> 0
+        ) t ON t.id_recurso = r.id_recurso
+        SET r.descargas = COALESCE(r.descargas, 0) + t.descargas,
+            r.vistas = COALESCE(r.vistas, 0) + t.vistas;
+
+        UPDATE `recursos_contadores`
+        SET `descargas` = 0, `vistas` = 0
+        WHERE `descargas` <> 0 OR `vistas` <> 0;
+    END IF;
+    COMMIT;
+END$$
+DELIMITER ;
+
+DROP EVENT IF EXISTS `ev_recursos_contadores_fold`;
+
+CREATE EVENT `ev_recursos_contadores_fold`
+ON SCHEDULE EVERY 60 SECOND
+DO CALL `sp_recursos_contadores_fold`();
+
+-- 5. Totales exactos (contador traspasado + deltas pendientes)
+CREATE OR REPLACE VIEW `vista_recursos_contadores` AS
+SELECT
+    r.id_recurso,
+    COALESCE(r.descargas, 0) + COALESCE(SUM(c.descargas), 0) AS descargas,
+    COALESCE(r.vistas, 0) + COALESCE(SUM(c.vistas), 0) AS vistas,
+    r.calificacion_promedio,
+    r.total_calificaciones
+FROM `recursos_aprendizaje` r
+LEFT JOIN `recursos_contadores` c ON c.id_recurso = r.id_recurso
+GROUP BY r.id_recurso, r.descargas, r.vistas, r.calificacion_promedio, r.total_calificaciones;
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Capa de conexión compartida para los scripts de Python
+
+Todos los scripts (migraciones, verificaciones, seeds, dumps, benchmarks)
+toman la configuración y las conexiones de aquí en lugar de copiar DB_CONFIG
+y abrir conexiones en frío.
+
+Configuración por variables de entorno (los mismos nombres que usa el
+backend en backend/config/config.php); sin variables se usa la base de
+Railway de siempre:
+
+    DB_HOST, DB_PORT, DB_DATABASE, DB_USERNAME, DB_PASSWORD, DB_CHARSET
+    DB_CONNECT_TIMEOUT   segundos para establecer la conexión (default 10)
+    DB_READ_TIMEOUT      segundos máximos esperando una respuesta (default sin límite)
+    DB_WRITE_TIMEOUT     segundos máximos enviando un paquete (default sin límite)
+    DB_RETRIES           reintentos ante errores transitorios al conectar (default 4)
+    DB_POOL_SIZE         conexiones máximas por pool (default 5)
+    DB_POOL_PING         segundos de inactividad tras los que se verifica la
+                         conexión con ping antes de entregarla (default 30)
+    DB_TIMING=1          imprime en stderr un resumen de tiempos por tipo de
+                         sentencia al terminar el proceso
+
+- connect(): conexión con timeouts, TCP keepalive (el proxy de Railway corta
+  conexiones inactivas) y reintentos con backoff exponencial ante errores
+  transitorios (servidor caído, conexión perdida, demasiadas conexiones).
+  La reconexión de ping(reconnect=True) pasa por el mismo camino.
+- ConnectionPool / get_pool(): conexiones calientes reutilizables entre
+  hilos; get_pool() comparte un pool por configuración dentro del proceso.
+- add_query_hook(fn): fn(sql, segundos, error) después de cada sentencia de
+  cualquier cursor (en cursores sin buffer, como SSCursor, mide hasta la
+  primera respuesta). QueryStats agrega los tiempos por tipo de sentencia.
+- retry(fn): reintenta una operación idempotente ante errores transitorios.
+
+PyMySQL no implementa la compresión del protocolo (compress=True lanza
+NotImplementedError), así que no se ofrece; en enlaces remotos lo que más
+pesa es el handshake, que el pool evita reutilizando conexiones.
+
+Ejecutar (verifica la conexión y muestra la latencia):
+    python db_pool.py
+    DB_HOST=127.0.0.1 DB_PORT=3307 DB_PASSWORD=secret python db_pool.py --queries 20
+"""
+
+import argparse
+import atexit
+import os
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+import pymysql.connections
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'metro.proxy.rlwy.net'),
+    'port': int(os.environ.get('DB_PORT', 52451)),
+    'user': os.environ.get('DB_USERNAME', 'root'),
+    'password': os.environ.get('DB_PASSWORD', 'hVRfZwfOYSrdWHloqDrsPCAuuAkPKNem'),
+    'database': os.environ.get('DB_DATABASE', 'formacion_empresarial'),
+    'charset': os.environ.get('DB_CHARSET', 'utf8mb4'),
+}
+
+CONNECT_OPTIONS = {
+    'connect_timeout': _env_float('DB_CONNECT_TIMEOUT', 10),
+    'read_timeout': _env_float('DB_READ_TIMEOUT', None),
+    'write_timeout': _env_float('DB_WRITE_TIMEOUT', None),
+}
+
+RETRIES = int(os.environ.get('DB_RETRIES', 4))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+POOL_PING = _env_float('DB_POOL_PING', 30)
+
+# Keepalive TCP: primer sondeo a los 60 s de inactividad, luego cada 10 s
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 5
+
+# Errores transitorios: demasiadas conexiones, no se pudo conectar, servidor
+# desaparecido, conexión perdida
+CONNECT_ERRORS = (1040, 2003, 2006, 2013)
+# Además, para operaciones completas: lock wait timeout y deadlock
+TRANSIENT_ERRORS = CONNECT_ERRORS + (1205, 1213)
+
+
+def describe(config=None):
+    """host:puerto/base para los mensajes de los scripts"""
+    config = config or DB_CONFIG
+    return f"{config['host']}:{config.get('port', 3306)}/{config.get('database') or ''}"
+
+
+def error_code(error):
+    return error.args[0] if error.args and isinstance(error.args[0], int) else None
+
+
+def retry(operation, attempts=None, codes=TRANSIENT_ERRORS, log=None):
+    """
+    Ejecuta operation() reintentando con backoff exponencial (con jitter)
+    cuando falla con uno de los códigos de error dados. Solo para
+    operaciones que se pueden repetir sin efectos duplicados.
+    """
+    attempts = RETRIES if attempts is None else attempts
+    for attempt in range(attempts + 1):
+        try:
+            return operation()
+        except pymysql.Error as e:
+            if error_code(e) not in codes or attempt == attempts:
+                raise
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if log:
+                log(f"  🔁 {e} - reintentando en {delay:.1f}s ({attempt + 1}/{attempts})")
+            time.sleep(delay)
+
+
+# ----------------------------------------------------------------------
+# Tiempos por sentencia
+# ----------------------------------------------------------------------
+
+_hooks = []
+
+
+def add_query_hook(hook):
+    """Registra hook(sql, segundos, error) para cada sentencia ejecutada"""
+    _hooks.append(hook)
+    return hook
+
+
+def remove_query_hook(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+class QueryStats:
+    """Hook que acumula cantidad, tiempo total y máximo por tipo de sentencia"""
+
+    def __init__(self):
+        self.by_kind = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, sql, seconds, error):
+        words = sql.split(None, 1)
+        kind = words[0].upper() if words else '?'
+        with self._lock:
+            entry = self.by_kind.setdefault(kind, {'count': 0, 'total': 0.0, 'max': 0.0, 'errors': 0})
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['errors'] += error is not None
+
+    def report(self):
+        lines = [f"{'sentencia':<12} {'cant':>7} {'total s':>9} {'prom ms':>9} {'máx ms':>9} {'errores':>8}"]
+        for kind, e in sorted(self.by_kind.items(), key=lambda item: -item[1]['total']):
+            lines.append(f"{kind:<12} {e['count']:>7} {e['total']:>9.2f} "
+                         f"{e['total'] / e['count'] * 1000:>9.1f} {e['max'] * 1000:>9.1f} {e['errors']:>8}")
+        return '\n'.join(lines)
+
+
+class TimedConnection(pymysql.connections.Connection):
+    """Conexión con reintentos al conectar, keepalive TCP y hooks de tiempo"""
+
+    def __init__(self, *args, retries=None, **kwargs):
+        self._retries = RETRIES if retries is None else retries
+        super().__init__(*args, **kwargs)
+
+    def connect(self, sock=None):
+        # También la usa ping(reconnect=True): las reconexiones reintentan igual
+        if sock is not None:
+            return super().connect(sock)
+        retry(super().connect, attempts=self._retries, codes=CONNECT_ERRORS)
+        self._set_keepalive()
+
+    def _set_keepalive(self):
+        sock = self._sock
+        if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+            return
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE), ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+                              ('TCP_KEEPCNT', KEEPALIVE_COUNT)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def query(self, sql, unbuffered=False):
+        if not _hooks:
+            return super().query(sql, unbuffered)
+        error = None
+        start = time.perf_counter()
+        try:
+            return super().query(sql, unbuffered)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            text = sql.decode(self.encoding, 'replace') if isinstance(sql, (bytes, bytearray)) else sql
+            for hook in list(_hooks):
+                hook(text, elapsed, error)
+
+
+def connect(config=None, retries=None, **options):
+    """
+    Conexión nueva con la configuración dada (por defecto DB_CONFIG), los
+    timeouts de CONNECT_OPTIONS y reintentos ante errores transitorios.
+    options se pasan a pymysql (autocommit, client_flag, cursorclass, ...).
+    """
+    params = {**CONNECT_OPTIONS, **(config or DB_CONFIG), **options}
+    return TimedConnection(retries=retries, **params)
+
+
+# ----------------------------------------------------------------------
+# Pool
+# ----------------------------------------------------------------------
+
+class ConnectionPool:
+    """
+    Hasta size conexiones reutilizables entre hilos: se abren al pedirlas,
+    se devuelven al salir del bloque y las que estuvieron inactivas más de
+    ping_interval segundos se verifican (y reconectan) antes de entregarse.
+    """
+
+    def __init__(self, config=None, size=None, ping_interval=None, **options):
+        self.config = config or DB_CONFIG
+        self.size = size or POOL_SIZE
+        self.ping_interval = POOL_PING if ping_interval is None else ping_interval
+        self.options = options
+        self.opened = 0
+        self.reused = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self):
+        try:
+            connection, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            connection = connect(self.config, **self.options)
+            with self._lock:
+                self.opened += 1
+            return connection
+        if time.monotonic() - last_used > self.ping_interval:
+            connection.ping(reconnect=True)
+        with self._lock:
+            self.reused += 1
+        return connection
+
+    @contextmanager
+    def connection(self):
+        if self._closed:
+            raise pymysql.err.InterfaceError("El pool está cerrado")
+        self._slots.acquire()
+        connection = None
+        try:
+            connection = self._acquire()
+            yield connection
+        except Exception:
+            # Una conexión con error de red o transacción a medias no se reutiliza
+            if connection is not None:
+                try:
+                    if connection.open:
+                        connection.rollback()
+                except pymysql.Error:
+                    pass
+                if not connection.open:
+                    connection = None
+            raise
+        finally:
+            if connection is not None and connection.open and not self._closed:
+                self._idle.put((connection, time.monotonic()))
+            elif connection is not None:
+                connection.close()
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except pymysql.Error:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config=None, size=None, **options):
+    """Pool compartido dentro del proceso para la configuración y opciones dadas"""
+    config = config or DB_CONFIG
+    key = (tuple(sorted(config.items())), tuple(sorted(options.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = _pools[key] = ConnectionPool(config, size, **options)
+        return pool
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+if os.environ.get('DB_TIMING') == '1':
+    _stats = add_query_hook(QueryStats())
+
+    @atexit.register
+    def _print_timing():
+        if _stats.by_kind:
+            print(f"\n⏱️  Tiempos por sentencia ({describe()})\n{_stats.report()}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica la conexión configurada y mide su latencia")
+    parser.add_argument('--queries', type=int, default=10, help="Cantidad de SELECT 1 a medir")
+    args = parser.parse_args()
+
+    print(f"🔌 Conectando a {describe()}...")
+    stats = add_query_hook(QueryStats())
+    start = time.perf_counter()
+    try:
+        pool = get_pool()
+        with pool.connection() as connection:
+            print(f"  ✅ Conectado en {(time.perf_counter() - start) * 1000:.0f} ms "
+                  f"(MySQL {connection.get_server_info()})")
+        for _ in range(args.queries):
+            with pool.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+    except pymysql.Error as e:
+        print(f"  ❌ Error de MySQL: {e}")
+        sys.exit(1)
+    print(f"  ♻️  {pool.opened} conexiones abiertas, {pool.reused} reutilizadas\n")
+    print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
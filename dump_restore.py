@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Dump/restore paralelo, comprimido y reanudable por tabla
+
+dump: planea cada tabla en chunks ordenados por llave primaria (límites por
+keyset sobre el índice PRIMARY), los exporta con un pool de conexiones a
+archivos .tsv.gz (formato de LOAD DATA) y registra cada chunk terminado en
+manifest.json. Los rows se leen con cursor de servidor y se escriben en
+streaming: la memoria no depende del tamaño de la tabla.
+
+restore: crea las tablas, carga los chunks en paralelo con LOAD DATA LOCAL
+INFILE (REPLACE, así que repetir un chunk es idempotente) y al final crea
+vistas, rutinas y triggers. El avance se guarda en restore_<host>_<db>.json.
+
+Si se interrumpe, volver a correr el mismo comando continúa desde el último
+chunk completado. Con --consistent todas las conexiones del dump abren su
+snapshot bajo FLUSH TABLES WITH READ LOCK (como mydumper), así el dump es
+consistente entre tablas; un dump reanudado ya no lo es.
+
+Ejecutar:
+    python dump_restore.py dump --out backups/prod --workers 8 --consistent
+    python dump_restore.py restore --out backups/prod --host 127.0.0.1 --database staging --password secret
+    python dump_restore.py status --out backups/prod
+"""
+
+import argparse
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pymysql
+import pymysql.cursors
+
+from db_pool import DB_CONFIG, connect
+
+MANIFEST_VERSION = 1
+CHUNK_ROWS = 100000
+FETCH_ROWS = 5000
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob', 'bit', 'geometry',
+                'point', 'linestring', 'polygon')
+_DEFINER = re.compile(r'\s*DEFINER\s*=\s*(?:`[^`]*`|\S+)@(?:`[^`]*`|\S+)', re.I)
+
+
+# ----------------------------------------------------------------------
+# Manifest
+# ----------------------------------------------------------------------
+
+class StateFile:
+    """JSON de avance que se reescribe de forma atómica en cada cambio"""
+
+    def __init__(self, path, data):
+        self.path = Path(path)
+        self.data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, default=None):
+        path = Path(path)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(path, json.load(f))
+        return cls(path, default)
+
+    def save(self):
+        with self._lock:
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+    def update(self, fn):
+        with self._lock:
+            fn(self.data)
+        self.save()
+
+
+def connection_pool(config, size, **options):
+    connections = queue.Queue()
+    for _ in range(size):
+        connections.put(connect(config, **options))
+    return connections
+
+
+def close_pool(connections):
+    while not connections.empty():
+        connections.get().close()
+
+
+# ----------------------------------------------------------------------
+# Dump
+# ----------------------------------------------------------------------
+
+def _tsv(value):
+    """Campo para LOAD DATA (binarios en hexadecimal; se restauran con UNHEX)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, timedelta):
+        # Columnas TIME: str(timedelta) usaría "1 day, 2:00:00"
+        seconds = int(value.total_seconds())
+        sign, seconds = ('-', -seconds) if seconds < 0 else ('', seconds)
+        return f"{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            .replace('\r', '\\r').replace('\0', '\\0'))
+
+
+def describe_table(cursor, table):
+    """Columnas, tipos binarios y llave primaria de una tabla"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE, GENERATION_EXPRESSION
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (table,))
+    columns, binary, pk_types = [], [], {}
+    for name, data_type, generated in cursor.fetchall():
+        pk_types[name] = data_type.lower()
+        if generated:
+            continue  # columnas generadas: las recalcula el servidor
+        columns.append(name)
+        if data_type.lower() in BINARY_TYPES:
+            binary.append(name)
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY'
+        ORDER BY SEQ_IN_INDEX
+    """, (table,))
+    pk = [row[0] for row in cursor.fetchall()]
+    chunk_key = pk[0] if len(pk) == 1 and pk_types[pk[0]] in INTEGER_TYPES else None
+    return columns, binary, pk, chunk_key
+
+
+def plan_chunks(cursor, table, key, chunk_rows):
+    """Límites superiores de cada chunk recorriendo el índice PRIMARY por keyset"""
+    bounds, lower = [], None
+    while True:
+        where = f"WHERE `{key}` > %s " if lower is not None else ''
+        cursor.execute(f"SELECT `{key}` FROM `{table}` {where}ORDER BY `{key}` LIMIT 1 OFFSET %s",
+                       ((lower,) if lower is not None else ()) + (chunk_rows - 1,))
+        row = cursor.fetchone()
+        if row is None:
+            bounds.append(None)  # último chunk: sin límite superior
+            return bounds
+        bounds.append(row[0])
+        lower = row[0]
+
+
+def plan_dump(connection, chunk_rows):
+    """Manifest inicial: esquema de cada objeto y los chunks por tabla"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT DATABASE()")
+        database = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_TYPE FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME
+        """)
+        objects = cursor.fetchall()
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'database': database,
+            'source': f"{connection.host}:{connection.port}",
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'finished': None,
+            'chunk_rows': chunk_rows,
+            'tables': {},
+            'views': {},
+            'routines': {},
+            'triggers': {},
+        }
+        for name, kind in objects:
+            if kind == 'VIEW':
+                cursor.execute(f"SHOW CREATE VIEW `{name}`")
+                manifest['views'][name] = _DEFINER.sub('', cursor.fetchone()[1])
+                continue
+            cursor.execute(f"SHOW CREATE TABLE `{name}`")
+            create = cursor.fetchone()[1]
+            columns, binary, pk, key = describe_table(cursor, name)
+            bounds = plan_chunks(cursor, name, key, chunk_rows) if key else [None]
+            chunks, lower = [], None
+            for n, upper in enumerate(bounds):
+                chunks.append({'n': n, 'file': f"{name}.{n:05d}.tsv.gz", 'lower': lower, 'upper': upper,
+                               'rows': None, 'bytes': None, 'done': False})
+                lower = upper
+            manifest['tables'][name] = {'create': create, 'columns': columns, 'binary': binary, 'pk': pk,
+                                        'chunk_key': key, 'chunks': chunks}
+
+        cursor.execute("""
+            SELECT ROUTINE_NAME, ROUTINE_TYPE FROM information_schema.ROUTINES
+            WHERE ROUTINE_SCHEMA = DATABASE()
+        """)
+        for name, kind in cursor.fetchall():
+            cursor.execute(f"SHOW CREATE {kind} `{name}`")
+            create = cursor.fetchone()[2]
+            if create is None:
+                print(f"⚠️  Sin permiso para leer la definición de {name}, se omite")
+                continue
+            manifest['routines'][name] = _DEFINER.sub('', create)
+        cursor.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()")
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"SHOW CREATE TRIGGER `{name}`")
+            manifest['triggers'][name] = _DEFINER.sub('', cursor.fetchone()[2])
+    return manifest
+
+
+def dump_chunk(connection, out_dir, table, spec, chunk, level):
+    """Exporta un chunk en streaming a un .tsv.gz; retorna (filas, bytes)"""
+    columns = ', '.join(f"`{c}`" for c in spec['columns'])
+    key = spec['chunk_key']
+    where, params = [], []
+    if key and chunk['lower'] is not None:
+        where.append(f"`{key}` > %s")
+        params.append(chunk['lower'])
+    if key and chunk['upper'] is not None:
+        where.append(f"`{key}` <= %s")
+        params.append(chunk['upper'])
+    order = ', '.join(f"`{c}`" for c in spec['pk'])
+    sql = (f"SELECT {columns} FROM `{table}`" + (f" WHERE {' AND '.join(where)}" if where else '')
+           + (f" ORDER BY {order}" if order else ''))
+
+    path = Path(out_dir) / chunk['file']
+    tmp = path.with_suffix('.part')
+    rows = 0
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(sql, params)
+        with gzip.open(tmp, 'wt', encoding='utf-8', newline='\n', compresslevel=level) as f:
+            while True:
+                batch = cursor.fetchmany(FETCH_ROWS)
+                if not batch:
+                    break
+                f.write(''.join('\t'.join(_tsv(v) for v in row) + '\n' for row in batch))
+                rows += len(batch)
+    finally:
+        cursor.close()
+    os.replace(tmp, path)
+    return rows, path.stat().st_size
+
+
+def run_dump(config, out_dir, workers, chunk_rows, level, consistent, tables=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state = StateFile.load(out_dir / 'manifest.json')
+
+    if state.data is None:
+        print("🗺️  Planeando chunks...")
+        connection = connect(config)
+        try:
+            state.data = plan_dump(connection, chunk_rows)
+        finally:
+            connection.close()
+        state.save()
+    else:
+        print(f"♻️  Reanudando dump de {state.data['database']} (iniciado {state.data['started']})")
+
+    manifest = state.data
+    pending = [(table, chunk) for table, spec in manifest['tables'].items()
+               if tables is None or table in tables
+               for chunk in spec['chunks'] if not chunk['done']]
+    total = sum(len(spec['chunks']) for spec in manifest['tables'].values())
+    print(f"📦 {len(manifest['tables'])} tablas, {total} chunks, {len(pending)} pendientes, {workers} conexiones")
+
+    connections = connection_pool(config, workers)
+    if consistent:
+        # Todas las conexiones abren su snapshot mientras nadie puede escribir
+        lock = connect(config)
+        with lock.cursor() as cursor:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+            for connection in list(connections.queue):
+                with connection.cursor() as c:
+                    c.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                    c.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cursor.execute("UNLOCK TABLES")
+        lock.close()
+        print("🔒 Snapshot consistente abierto en todas las conexiones")
+
+    errors = []
+    start = time.perf_counter()
+
+    def work(table, chunk):
+        connection = connections.get()
+        try:
+            rows, size = dump_chunk(connection, out_dir, table, manifest['tables'][table], chunk, level)
+        except (pymysql.Error, OSError) as e:
+            errors.append(f"{table}#{chunk['n']}: {e}")
+            print(f"  ❌ {table}#{chunk['n']}: {e}")
+            return
+        finally:
+            if not consistent:
+                connection.commit()  # soltar el snapshot de lectura entre chunks
+            connections.put(connection)
+
+        def mark(data):
+            chunk.update(rows=rows, bytes=size, done=True)
+        state.update(mark)
+        print(f"  ✓ {table}#{chunk['n']}: {rows:,} filas, {size / 1024:,.0f} KB")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda item: work(*item), pending))
+    finally:
+        close_pool(connections)
+
+    if not errors and all(c['done'] for spec in manifest['tables'].values() for c in spec['chunks']):
+        state.update(lambda data: data.update(finished=datetime.now().isoformat(timespec='seconds')))
+    rows = sum(c['rows'] or 0 for spec in manifest['tables'].values() for c in spec['chunks'])
+    size = sum(c['bytes'] or 0 for spec in manifest['tables'].values() for c in spec['chunks'])
+    print(f"\n📊 {rows:,} filas, {size / 1048576:,.1f} MB comprimidos en {time.perf_counter() - start:.1f}s")
+    return errors
+
+
+# ----------------------------------------------------------------------
+# Restore
+# ----------------------------------------------------------------------
+
+def restore_chunk(connection, out_dir, table, spec, chunk, tmp_dir):
+    """Descomprime un chunk a un temporal y lo carga; retorna las filas afectadas"""
+    source = Path(out_dir) / chunk['file']
+    target = Path(tmp_dir) / f"{table}.{chunk['n']}.tsv"
+    with gzip.open(source, 'rb') as src, open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    binary = set(spec['binary'])
+    fields = ', '.join(f"@`{c}`" if c in binary else f"`{c}`" for c in spec['columns'])
+    sets = ', '.join(f"`{c}` = UNHEX(@`{c}`)" for c in spec['columns'] if c in binary)
+    # REPLACE con PK: recargar un chunk tras una interrupción no duplica filas
+    mode = 'REPLACE ' if spec['pk'] else ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOAD DATA LOCAL INFILE '{target.as_posix()}' {mode}INTO TABLE `{table}` "
+                           f"CHARACTER SET utf8mb4 ({fields})" + (f" SET {sets}" if sets else ''))
+            affected = cursor.rowcount
+        connection.commit()
+    finally:
+        target.unlink()
+    return affected
+
+
+def run_restore(config, out_dir, workers, tables=None):
+    out_dir = Path(out_dir)
+    manifest = StateFile.load(out_dir / 'manifest.json').data
+    if manifest is None:
+        raise FileNotFoundError(f"No hay manifest.json en {out_dir}")
+    if not manifest.get('finished'):
+        print("⚠️  El dump no está completo: solo se restauran los chunks terminados")
+
+    state = StateFile.load(out_dir / f"restore_{config['host']}_{config['database']}.json",
+                           {'created': [], 'chunks': {}, 'objects': False})
+    done = state.data['chunks']
+    if 'created' not in state.data:  # Estado anterior: schema=True era el esquema completo
+        state.data['created'] = list(manifest['tables']) if state.data.pop('schema') else []
+    # Solo se crean las tablas de --tables: un restore completo posterior crea el resto
+    missing = [table for table in manifest['tables']
+               if (tables is None or table in tables) and table not in state.data['created']]
+
+    setup = connect(config)
+    try:
+        with setup.cursor() as cursor:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            if missing:
+                print(f"🏗️  Creando {len(missing)} tablas...")
+                for table in missing:
+                    cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+                    cursor.execute(manifest['tables'][table]['create'])
+                    state.update(lambda data: data['created'].append(table))
+    finally:
+        setup.close()
+
+    pending = [(table, chunk) for table, spec in manifest['tables'].items()
+               if tables is None or table in tables
+               for chunk in spec['chunks'] if chunk['done'] and chunk['file'] not in done]
+    print(f"📥 {len(pending)} chunks pendientes con {workers} conexiones")
+
+    connections = connection_pool(config, workers, local_infile=True)
+    for connection in list(connections.queue):
+        with connection.cursor() as cursor:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            cursor.execute("SET UNIQUE_CHECKS = 0")
+            cursor.execute("SET SESSION sql_mode = CONCAT(@@sql_mode, ',NO_AUTO_VALUE_ON_ZERO')")
+
+    errors = []
+    start = time.perf_counter()
+    tmp_dir = tempfile.mkdtemp(prefix='restore_')
+
+    def work(table, chunk):
+        connection = connections.get()
+        try:
+            affected = restore_chunk(connection, out_dir, table, manifest['tables'][table], chunk, tmp_dir)
+        except (pymysql.Error, OSError) as e:
+            errors.append(f"{table}#{chunk['n']}: {e}")
+            print(f"  ❌ {table}#{chunk['n']}: {e}")
+            return
+        finally:
+            connections.put(connection)
+
+        def mark(data):
+            data['chunks'][chunk['file']] = affected
+        state.update(mark)
+        # REPLACE cuenta 2 por fila reemplazada: solo se avisa si faltan filas
+        note = '' if affected >= chunk['rows'] else f" ⚠️  se esperaban {chunk['rows']:,}"
+        print(f"  ✓ {table}#{chunk['n']}: {affected:,} filas{note}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda item: work(*item), pending))
+    finally:
+        close_pool(connections)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if not errors and not state.data['objects'] and tables is None:
+        # Vistas, rutinas y triggers después de los datos (los triggers no se disparan en la carga)
+        setup = connect(config)
+        try:
+            with setup.cursor() as cursor:
+                # Una vista puede depender de otra: se reintenta mientras haya avance
+                views = dict(manifest['views'])
+                while views:
+                    failed = {}
+                    for name, create in views.items():
+                        try:
+                            cursor.execute(create)
+                        except pymysql.Error as e:
+                            failed[name] = e
+                    if len(failed) == len(views):
+                        errors += [f"vista {name}: {e}" for name, e in failed.items()]
+                        break
+                    views = {name: manifest['views'][name] for name in failed}
+                for kind in ('routines', 'triggers'):
+                    for name, create in manifest[kind].items():
+                        try:
+                            cursor.execute(create)
+                        except pymysql.Error as e:
+                            errors.append(f"{kind} {name}: {e}")
+            setup.commit()
+        finally:
+            setup.close()
+        if not errors:
+            state.update(lambda data: data.update(objects=True))
+    print(f"\n📊 Restore en {time.perf_counter() - start:.1f}s")
+    return errors
+
+
+def print_status(out_dir):
+    out_dir = Path(out_dir)
+    manifest = StateFile.load(out_dir / 'manifest.json').data
+    if manifest is None:
+        print(f"❌ No hay manifest.json en {out_dir}")
+        return
+    chunks = [c for spec in manifest['tables'].values() for c in spec['chunks']]
+    done = [c for c in chunks if c['done']]
+    print(f"📋 Dump de {manifest['database']} ({manifest['source']}), iniciado {manifest['started']}, "
+          f"{'terminado ' + manifest['finished'] if manifest['finished'] else 'en curso'}")
+    print(f"  chunks: {len(done)}/{len(chunks)}, filas: {sum(c['rows'] for c in done):,}, "
+          f"{sum(c['bytes'] for c in done) / 1048576:,.1f} MB")
+    for path in sorted(out_dir.glob('restore_*.json')):
+        state = StateFile.load(path).data
+        print(f"  {path.stem}: {len(state['chunks'])}/{len(done)} chunks restaurados"
+              f"{', objetos creados' if state['objects'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump/restore paralelo y reanudable por chunks")
+    parser.add_argument('command', choices=['dump', 'restore', 'status'])
+    parser.add_argument('--out', required=True, help="Directorio del dump (manifest.json + chunks)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--level', type=int, default=1, help="Compresión gzip (1 = rápida)")
+    parser.add_argument('--consistent', action='store_true',
+                        help="Snapshot consistente entre tablas (requiere FLUSH TABLES WITH READ LOCK)")
+    parser.add_argument('--tables', help="Solo estas tablas, separadas por coma")
+    parser.add_argument('--host', help="Por defecto la base de run_migration.py (solo para dump)")
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    parser.add_argument('--database')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        print_status(args.out)
+        return
+
+    overrides = {k: v for k, v in (('host', args.host), ('port', args.port), ('user', args.user),
+                                   ('password', args.password), ('database', args.database)) if v is not None}
+    tables = [t.strip() for t in args.tables.split(',')] if args.tables else None
+
+    if args.command == 'dump':
+        errors = run_dump({**DB_CONFIG, **overrides}, args.out, args.workers, args.chunk_rows, args.level,
+                          args.consistent, tables)
+    else:
+        if 'host' not in overrides or 'database' not in overrides:
+            parser.error("restore requiere --host y --database explícitos")
+        if (overrides['host'], overrides.get('port', 3306)) == (DB_CONFIG['host'], DB_CONFIG['port']):
+            parser.error("restore no se permite sobre la base de producción")
+        config = {'port': 3306, 'user': 'root', 'password': '', 'charset': 'utf8mb4', **overrides}
+        errors = run_restore(config, args.out, args.workers, tables)
+
+    if errors:
+        print(f"❌ {len(errors)} errores (volver a correr el comando reanuda desde aquí):")
+        for error in errors:
+            print(f"  - {error}")
+        sys.exit(1)
+    print("✅ Completo")
+
+
+if __name__ == '__main__':
+    main()
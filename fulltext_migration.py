@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Índices FULLTEXT para las búsquedas de recursos, cursos y productos
+
+Las búsquedas de Recurso.php, Curso.php y Producto.php (esquema de
+producción) usan LIKE '%término%' sobre titulo/descripcion/contenido_texto/
+descripcion_corta: recorren la tabla completa en cada búsqueda. Este script
+agrega los índices FULLTEXT equivalentes (FULLTEXT_INDEXES) sin bloquear
+escrituras:
+
+  - Stopwords en español: InnoDB trae una lista en inglés; se crea la tabla
+    fts_stopwords_es y se usa con innodb_ft_user_stopword_table (variable de
+    sesión, no requiere SUPER) al crear cada índice. La colación
+    utf8mb4_unicode_ci ya ignora acentos y mayúsculas (gestión = GESTION).
+  - Backfill en línea con online_schema_change.py: InnoDB no permite
+    LOCK=NONE al agregar un FULLTEXT, así que se usa la copia en tabla sombra
+    (el índice se llena mientras se copian los chunks). Las tablas
+    referenciadas por FOREIGN KEYs (cursos) no admiten la copia; con
+    --allow-shared-lock se crean con ALGORITHM=INPLACE, LOCK=SHARED (las
+    lecturas siguen, las escrituras esperan a que termine).
+
+innodb_ft_min_token_size (3 por defecto, solo en my.cnf) deja fuera palabras
+de 1-2 letras ("IA", "TI"); boolean_query() las descarta también.
+
+Ejecutar:
+    python fulltext_migration.py --dry-run
+    python fulltext_migration.py --tables cursos --allow-shared-lock
+    python fulltext_migration.py --host 127.0.0.1 --port 3307 --password secret --max-threads-running 20
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections import namedtuple
+
+import pymysql
+
+from db_pool import DB_CONFIG, connect
+from online_schema_change import alter_table_online
+from schema_snapshot import has_column, has_table, take_snapshot
+
+STOPWORD_TABLE = 'fts_stopwords_es'
+DEFAULT_MIN_TOKEN_SIZE = 3
+
+# Índice FULLTEXT: tabla, nombre, columnas, consulta PHP que lo usa y si
+# reemplaza una búsqueda LIKE '%...%' (las que compara bench_fulltext.py)
+FulltextIndex = namedtuple('FulltextIndex', ['table', 'name', 'columns', 'source', 'like'])
+
+FULLTEXT_INDEXES = [
+    FulltextIndex('recursos_aprendizaje', 'ft_recursos_busqueda', ('titulo', 'descripcion', 'contenido_texto'),
+                  'backend/models/Recurso.php:116', True),
+    # MATCH() exige un índice con exactamente las mismas columnas
+    FulltextIndex('recursos_aprendizaje', 'ft_recursos_titulo', ('titulo', 'descripcion'),
+                  'backend/models/Recurso.php:813 (buscarFullText)', False),
+    FulltextIndex('cursos', 'ft_cursos_busqueda', ('titulo', 'descripcion'),
+                  'backend/models/Curso.php:156', True),
+    # Esquema de producción; productos (desarrollo) ya tiene idx_busqueda
+    FulltextIndex('productos_vitrina', 'ft_productos_busqueda', ('nombre', 'descripcion', 'descripcion_corta'),
+                  'backend/models/Producto.php:394', True),
+]
+
+SPANISH_STOPWORDS = (
+    'a', 'al', 'algo', 'algunas', 'algunos', 'ante', 'antes', 'aquel', 'aquella', 'aquellas', 'aquellos',
+    'aqui', 'aquí', 'cada', 'casi', 'como', 'cómo', 'con', 'contra', 'cual', 'cuál', 'cuales', 'cuando',
+    'cuándo', 'de', 'del', 'desde', 'donde', 'dónde', 'dos', 'durante', 'e', 'el', 'él', 'ella', 'ellas',
+    'ellos', 'en', 'entre', 'era', 'eran', 'es', 'esa', 'esas', 'ese', 'eso', 'esos', 'esta', 'está',
+    'estaba', 'estado', 'estan', 'están', 'estar', 'estas', 'éstas', 'este', 'esto', 'estos', 'fue',
+    'fueron', 'ha', 'había', 'han', 'hasta', 'hay', 'la', 'las', 'le', 'les', 'lo', 'los', 'mas', 'más',
+    'me', 'mi', 'mí', 'mis', 'mucho', 'muchos', 'muy', 'nada', 'ni', 'no', 'nos', 'nosotros', 'nuestra',
+    'nuestras', 'nuestro', 'nuestros', 'o', 'os', 'otra', 'otras', 'otro', 'otros', 'para', 'pero', 'poco',
+    'por', 'porque', 'que', 'qué', 'quien', 'quién', 'quienes', 'se', 'sea', 'sean', 'según', 'ser', 'si',
+    'sí', 'sido', 'sin', 'sobre', 'sois', 'somos', 'son', 'soy', 'su', 'sus', 'también', 'tanto', 'te',
+    'tiene', 'tienen', 'todo', 'todos', 'tu', 'tú', 'tus', 'u', 'un', 'una', 'unas', 'uno', 'unos', 'usted',
+    'ustedes', 'va', 'vamos', 'van', 'y', 'ya', 'yo',
+)
+
+_WORD = re.compile(r'\w+', re.U)
+
+
+def boolean_query(term, min_token_size=DEFAULT_MIN_TOKEN_SIZE):
+    """
+    Término de búsqueda -> consulta IN BOOLEAN MODE: todas las palabras
+    significativas obligatorias y como prefijo ("plan negocios" -> "+plan* +negocios*").
+    Vacía si solo quedan stopwords o palabras cortas.
+    """
+    stopwords = set(SPANISH_STOPWORDS)
+    words = [w for w in _WORD.findall(term.lower()) if len(w) >= min_token_size and w not in stopwords]
+    return ' '.join(f"+{w}*" for w in dict.fromkeys(words))
+
+
+def ensure_stopwords(cursor, database):
+    """Crea y llena la tabla de stopwords y la activa en la sesión"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{STOPWORD_TABLE}` (
+            `value` VARCHAR(30) NOT NULL PRIMARY KEY
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        COMMENT='Stopwords en español para los índices FULLTEXT (innodb_ft_user_stopword_table)'
+    """)
+    cursor.executemany(f"INSERT IGNORE INTO `{STOPWORD_TABLE}` (`value`) VALUES (%s)",
+                       [(w,) for w in SPANISH_STOPWORDS])
+    cursor.execute("SET SESSION innodb_ft_user_stopword_table = %s", (f"{database}/{STOPWORD_TABLE}",))
+
+
+def index_spec(index):
+    columns = ', '.join(f"`{c}`" for c in index.columns)
+    return f"ADD FULLTEXT INDEX `{index.name}` ({columns})"
+
+
+def fulltext_exists(snapshot, index):
+    """¿Ya hay un FULLTEXT con esas mismas columnas (con cualquier nombre)?"""
+    for existing in snapshot['tables'].get(index.table, {}).get('indexes', {}).values():
+        if existing['type'] == 'FULLTEXT' and sorted(existing['columns']) == sorted(index.columns):
+            return True
+    return False
+
+
+def plan(snapshot, indexes):
+    """[(índice, estado)] con estado 'pendiente', 'existe', 'sin tabla' o 'sin columnas'"""
+    result = []
+    for index in indexes:
+        if not has_table(snapshot, index.table):
+            status = 'sin tabla'
+        elif not all(has_column(snapshot, index.table, c) for c in index.columns):
+            status = 'sin columnas'
+        elif fulltext_exists(snapshot, index):
+            status = 'existe'
+        else:
+            status = 'pendiente'
+        result.append((index, status))
+    return result
+
+
+def create_index(connection, index, args):
+    """Crea un índice en línea; retorna el método usado o None si no se pudo"""
+    try:
+        return alter_table_online(
+            connection, index.table, index_spec(index), chunk_size=args.chunk_size, sleep=args.sleep,
+            max_threads_running=args.max_threads_running, lock_wait_timeout=args.lock_wait_timeout,
+            recreate_triggers=args.recreate_triggers, dry_run=args.dry_run)
+    except RuntimeError as e:
+        # Copia en sombra imposible (FOREIGN KEYs que apuntan a la tabla, sin PK, triggers)
+        if not args.allow_shared_lock:
+            print(f"    ✗ {e}")
+            print("      (--allow-shared-lock lo crea con LOCK=SHARED: las escrituras esperan durante la creación)")
+            return None
+        print(f"    ↪️  {e}; usando ALGORITHM=INPLACE, LOCK=SHARED")
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE `{index.table}` {index_spec(index)}, ALGORITHM=INPLACE, LOCK=SHARED")
+        return 'inplace (shared)'
+
+
+def verify(connection, indexes):
+    """Cada índice responde una consulta MATCH ... AGAINST; retorna los que fallan"""
+    failed = []
+    with connection.cursor() as cursor:
+        for index in indexes:
+            columns = ', '.join(f"`{c}`" for c in index.columns)
+            start = time.perf_counter()
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM `{index.table}` "
+                               f"WHERE MATCH({columns}) AGAINST(%s IN BOOLEAN MODE)", (boolean_query('negocio'),))
+                count = cursor.fetchone()[0]
+            except pymysql.Error as e:
+                print(f"    ✗ {index.table}.{index.name}: {e}")
+                failed.append(index)
+                continue
+            print(f"    ✓ {index.table}.{index.name}: MATCH responde ({count} filas con 'negocio', "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índices FULLTEXT (stopwords en español) creados en línea")
+    parser.add_argument('--tables', help="Solo estas tablas (separadas por coma)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar el plan")
+    parser.add_argument('--allow-shared-lock', action='store_true',
+                        help="Si la copia en sombra no aplica, crear con LOCK=SHARED (bloquea escrituras)")
+    parser.add_argument('--recreate-triggers', action='store_true',
+                        help="Recrear los triggers propios de la tabla tras la copia en sombra")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Filas por chunk inicial de la copia")
+    parser.add_argument('--sleep', type=float, default=0.0, help="Pausa entre chunks (segundos)")
+    parser.add_argument('--max-threads-running', type=int, default=None,
+                        help="Pausar la copia si Threads_running supera este valor")
+    parser.add_argument('--lock-wait-timeout', type=int, default=5)
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=DB_CONFIG['port'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    parser.add_argument('--database', default=DB_CONFIG['database'])
+    args = parser.parse_args()
+
+    indexes = FULLTEXT_INDEXES
+    if args.tables:
+        wanted = {t.strip() for t in args.tables.split(',') if t.strip()}
+        indexes = [i for i in indexes if i.table in wanted]
+
+    config = dict(DB_CONFIG, host=args.host, port=args.port, user=args.user,
+                  password=args.password, database=args.database)
+    print(f"🔎 Índices FULLTEXT en {args.host}:{args.port}/{args.database}")
+    connection = connect(config, autocommit=True)
+    failed = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT VERSION(), @@innodb_ft_min_token_size")
+            version, min_token = cursor.fetchone()
+        print(f"  Servidor {version}, innodb_ft_min_token_size={min_token}")
+
+        steps = plan(take_snapshot(connection, args.database), indexes)
+        for index, status in steps:
+            mark = {'pendiente': '▶', 'existe': '✓'}.get(status, '⚠️ ')
+            print(f"  {mark} {index.table}.{index.name} ({', '.join(index.columns)}): {status}  [{index.source}]")
+        pending = [index for index, status in steps if status == 'pendiente']
+        if not pending:
+            print("✅ Nada que crear")
+            return
+
+        if not args.dry_run:
+            with connection.cursor() as cursor:
+                ensure_stopwords(cursor, args.database)
+            print(f"  ✓ Stopwords en español: {args.database}.{STOPWORD_TABLE} ({len(SPANISH_STOPWORDS)} palabras)")
+
+        for index in pending:
+            print(f"\n🔧 {index.table}: {index_spec(index)}")
+            start = time.perf_counter()
+            try:
+                method = create_index(connection, index, args)
+            except pymysql.Error as e:
+                print(f"    ✗ {e}")
+                method = None
+            if method is None:
+                failed.append(index)
+            elif not args.dry_run:
+                print(f"    ✓ Creado en {time.perf_counter() - start:.1f}s (método: {method})")
+
+        if not args.dry_run:
+            print("\n🔍 Verificación")
+            failed += verify(connection, [i for i in pending if i not in failed])
+    finally:
+        connection.close()
+
+    if failed:
+        print(f"\n❌ {len(failed)} índices sin crear: {', '.join(f'{i.table}.{i.name}' for i in failed)}")
+        sys.exit(1)
+    if not args.dry_run:
+        print("\n✅ Índices FULLTEXT listos")
+
+
+if __name__ == '__main__':
+    main()
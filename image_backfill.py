@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Backfill de imágenes optimizadas (mismas variantes que FileOptimizer.php)
+
+FileOptimizer::optimizarImagen(), generarThumbnail(), generarWebP() y
+generarSrcSet() redimensionan y codifican con GD dentro de la request de
+subida, una imagen a la vez. Este script genera las mismas variantes para
+todo un árbol de uploads en un pool de procesos, con los mismos nombres y
+parámetros que el PHP:
+
+  <dir>/<nombre>                        original (opcional, --rewrite-originals):
+                                        máx. 1920x1080, JPEG 85 / PNG nivel 8
+  <dir>/thumbnails/<nombre>             JPEG 85, máx. 400x300
+  <dir>/<base>.webp                     WebP 80 de la versión optimizada
+  <dir>/responsive/<base>_<tamaño>.jpg  JPEG 85 de 480/768/1200/1920 px de
+                                        ancho, solo los menores que la imagen
+
+Diferencias con GD: se respeta la orientación EXIF (GD la ignora y los
+thumbnails de fotos de celular salían rotados) y la transparencia se aplana
+sobre blanco en las variantes JPEG (GD dejaba negro).
+
+Manifiesto (<raíz>/.image_manifest.json): por cada original guarda su
+SHA-256, tamaño, mtime, la versión de los parámetros y las variantes
+generadas. Una imagen se omite si no cambió (mismo tamaño y mtime, o el
+mismo hash si solo cambió el mtime), los parámetros son los mismos y sus
+variantes siguen en disco. Se guarda cada SAVE_EVERY imágenes: si se
+interrumpe, la siguiente ejecución continúa.
+
+Requiere Pillow con soporte WebP (pip install Pillow).
+
+Ejecutar:
+    python image_backfill.py                              # uploads/recursos
+    python image_backfill.py --root uploads/recursos --workers 8
+    python image_backfill.py --dry-run
+    python image_backfill.py --rewrite-originals --force
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_ROOT = PROJECT_ROOT / 'uploads' / 'recursos'
+MANIFEST_NAME = '.image_manifest.json'
+
+# Constantes de FileOptimizer.php
+MAX_IMAGE_WIDTH = 1920
+MAX_IMAGE_HEIGHT = 1080
+THUMBNAIL_WIDTH = 400
+THUMBNAIL_HEIGHT = 300
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+PNG_COMPRESS_LEVEL = 8
+SRCSET_SIZES = {'small': 480, 'medium': 768, 'large': 1200, 'xlarge': 1920}
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+DERIVED_DIRS = {'thumbnails', 'responsive', 'cache'}
+INFLIGHT = 4        # tareas pendientes por worker (acota la memoria)
+SAVE_EVERY = 200    # imágenes entre guardados del manifiesto
+
+# Cambia si cambia cualquier parámetro de salida: invalida el manifiesto
+PARAMS_VERSION = hashlib.sha1(json.dumps([
+    MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, JPEG_QUALITY,
+    WEBP_QUALITY, PNG_COMPRESS_LEVEL, SRCSET_SIZES, 1,
+]).encode()).hexdigest()[:12]
+
+
+def resize_dimensions(width, height, max_width, max_height):
+    """Igual que calculateResizeDimensions(): encaja sin agrandar, redondeo de PHP"""
+    ratio = min(max_width / width, max_height / height)
+    if ratio >= 1:
+        return width, height
+    return max(1, int(width * ratio + 0.5)), max(1, int(height * ratio + 0.5))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save(image, path, **params):
+    """Escritura atómica: el servidor web nunca ve un archivo a medias"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    image.save(tmp, **params)
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _flatten(image):
+    """RGB sobre fondo blanco para las variantes JPEG"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _resized(image, size):
+    return image if image.size == size else image.resize(size, Image.Resampling.LANCZOS)
+
+
+def _save_original(image, path, fmt):
+    if fmt == 'JPEG':
+        return _save(_flatten(image), path, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    if fmt == 'PNG':
+        return _save(image, path, format='PNG', compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    if fmt == 'WEBP':
+        return _save(image, path, format='WEBP', quality=WEBP_QUALITY)
+    return _save(image, path, format=fmt)
+
+
+def process_image(path, root, rewrite_original):
+    """
+    Tarea del pool: genera las variantes de una imagen. Retorna un dict con
+    hash, tamaños y variantes (rutas relativas a root), o 'error'.
+    """
+    path, root = Path(path), Path(root)
+    result = {'path': path.relative_to(root).as_posix(), 'outputs': {}}
+    try:
+        result['sha256'] = file_sha256(path)
+        stat = path.stat()
+        result['original_size'] = result['size'] = stat.st_size
+        result['mtime'] = stat.st_mtime
+
+        with Image.open(path) as source:
+            fmt = source.format
+            target = resize_dimensions(*source.size, MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT)
+            if fmt == 'JPEG':
+                source.draft('RGB', target)  # decodifica reducido si la foto es muy grande
+            image = ImageOps.exif_transpose(source)
+            if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                image = image.convert('RGBA' if 'transparency' in image.info or image.mode == 'P' else 'RGB')
+            optimized = _resized(image, resize_dimensions(*image.size, MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT))
+        width, height = optimized.size
+        result['dimensions'] = [width, height]
+
+        if rewrite_original and fmt in ('JPEG', 'PNG', 'WEBP'):
+            tmp = path.with_name(f".{path.name}.opt")
+            size = _save_original(optimized, tmp, fmt)
+            # Solo se reemplaza si ahorra bytes o si había que reducirla
+            if size < result['size'] or optimized.size != image.size:
+                os.replace(tmp, path)
+                stat = path.stat()
+                result.update(size=stat.st_size, sha256=file_sha256(path), mtime=stat.st_mtime)
+            else:
+                tmp.unlink()
+
+        outputs = result['outputs']
+        thumb = path.parent / 'thumbnails' / path.name
+        size = _save(_flatten(_resized(optimized, resize_dimensions(
+            width, height, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))), thumb, format='JPEG', quality=JPEG_QUALITY)
+        outputs['thumbnail'] = [thumb.relative_to(root).as_posix(), size]
+
+        if fmt != 'WEBP':
+            webp = path.with_suffix('.webp')
+            size = _save(optimized, webp, format='WEBP', quality=WEBP_QUALITY, method=4)
+            outputs['webp'] = [webp.relative_to(root).as_posix(), size]
+
+        for name, max_width in SRCSET_SIZES.items():
+            if width <= max_width:
+                continue
+            variant = path.parent / 'responsive' / f"{path.stem}_{name}.jpg"
+            size = _save(_flatten(_resized(optimized, resize_dimensions(width, height, max_width, 9999))),
+                         variant, format='JPEG', quality=JPEG_QUALITY)
+            outputs[f"srcset_{max_width}"] = [variant.relative_to(root).as_posix(), size]
+    except Exception as e:  # imagen corrupta o formato no soportado: se reporta y sigue
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ----------------------------------------------------------------------
+# Manifiesto y escaneo
+# ----------------------------------------------------------------------
+
+def load_manifest(root):
+    path = Path(root) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('images', {})
+
+
+def save_manifest(root, images):
+    path = Path(root) / MANIFEST_NAME
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'params_version': PARAMS_VERSION, 'images': images}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def scan(root):
+    """Originales bajo root; omite las carpetas de variantes y los .webp generados"""
+    root = Path(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in DERIVED_DIRS and not d.startswith('.'))
+        stems = {Path(f).stem for f in filenames if Path(f).suffix.lower() in IMAGE_EXTENSIONS - {'.webp'}}
+        for name in sorted(filenames):
+            suffix = Path(name).suffix.lower()
+            if name.startswith('.') or suffix not in IMAGE_EXTENSIONS:
+                continue
+            if suffix == '.webp' and Path(name).stem in stems:
+                continue  # variante WebP de otro original
+            yield Path(dirpath) / name
+
+
+def up_to_date(entry, path, root):
+    """El original no cambió, los parámetros son los mismos y las variantes existen"""
+    if not entry or entry.get('params_version') != PARAMS_VERSION or entry.get('error'):
+        return False
+    stat = path.stat()
+    if stat.st_size != entry['size']:
+        return False
+    if stat.st_mtime != entry['mtime'] and file_sha256(path) != entry['sha256']:
+        return False
+    root = Path(root)
+    return all((root / rel).exists() for rel, _ in entry['outputs'].values())
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def run(root, workers, rewrite_original, force, limit=None, dry_run=False):
+    manifest = load_manifest(root)
+    pending, skipped, seen = [], 0, set()
+    for path in scan(root):
+        rel = path.relative_to(root).as_posix()
+        seen.add(rel)
+        if not force and up_to_date(manifest.get(rel), path, root):
+            skipped += 1
+            continue
+        pending.append(path)
+    for rel in set(manifest) - seen:
+        del manifest[rel]  # originales borrados
+    if limit:
+        pending = pending[:limit]
+    print(f"🖼️  {len(pending) + skipped} imágenes en {root}: {skipped} al día, {len(pending)} por procesar")
+    if dry_run or not pending:
+        if not dry_run:
+            save_manifest(root, manifest)
+        return {'processed': 0, 'skipped': skipped, 'failed': 0}
+
+    totals = {'processed': 0, 'skipped': skipped, 'failed': 0, 'source_bytes': 0, 'optimized_bytes': 0,
+              'webp_bytes': 0, 'webp_source_bytes': 0, 'derived_bytes': 0}
+    start = time.perf_counter()
+
+    def collect(future):
+        result = future.result()
+        rel = result.pop('path')
+        if 'error' in result:
+            totals['failed'] += 1
+            print(f"  ✗ {rel}: {result['error']}")
+            manifest[rel] = {'error': result['error'], 'params_version': PARAMS_VERSION}
+            return
+        result['params_version'] = PARAMS_VERSION
+        manifest[rel] = result
+        totals['processed'] += 1
+        totals['source_bytes'] += result.pop('original_size')
+        totals['optimized_bytes'] += result['size']
+        if 'webp' in result['outputs']:
+            totals['webp_bytes'] += result['outputs']['webp'][1]
+            totals['webp_source_bytes'] += result['size']
+        totals['derived_bytes'] += sum(size for _, size in result['outputs'].values())
+        done = totals['processed'] + totals['failed']
+        if done % SAVE_EVERY == 0:
+            save_manifest(root, manifest)
+            rate = done / (time.perf_counter() - start)
+            print(f"  📦 {done}/{len(pending)} ({rate:.1f} imágenes/s)")
+
+    in_flight = deque()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path in pending:
+                in_flight.append(pool.submit(process_image, str(path), str(root), rewrite_original))
+                if len(in_flight) >= workers * INFLIGHT:
+                    collect(in_flight.popleft())
+            while in_flight:
+                collect(in_flight.popleft())
+    finally:
+        save_manifest(root, manifest)
+
+    elapsed = time.perf_counter() - start
+    totals['seconds'] = round(elapsed, 2)
+    totals['images_per_second'] = round((totals['processed'] + totals['failed']) / elapsed, 1) if elapsed else None
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera thumbnails, WebP y srcset como FileOptimizer.php")
+    parser.add_argument('--root', action='append', help=f"Carpeta a procesar (default {DEFAULT_ROOT}); repetible")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rewrite-originals', action='store_true',
+                        help="Reemplazar los originales por la versión optimizada si ocupa menos")
+    parser.add_argument('--force', action='store_true', help="Reprocesar aunque el manifiesto diga que está al día")
+    parser.add_argument('--limit', type=int, help="Procesar como máximo N imágenes por carpeta")
+    parser.add_argument('--dry-run', action='store_true', help="Solo contar lo pendiente")
+    parser.add_argument('--report', help="Guardar los totales en JSON")
+    args = parser.parse_args()
+
+    if not features.check('webp'):
+        print("❌ Pillow no tiene soporte WebP (instalar libwebp y reinstalar Pillow)")
+        sys.exit(1)
+
+    failed = 0
+    report = {}
+    for root in args.root or [DEFAULT_ROOT]:
+        root = Path(root).resolve()
+        if not root.is_dir():
+            print(f"❌ No existe {root}")
+            sys.exit(1)
+        totals = run(root, args.workers, args.rewrite_originals, args.force, args.limit, args.dry_run)
+        report[str(root)] = totals
+        failed += totals['failed']
+        if not totals['processed']:
+            continue
+        saved = totals['source_bytes'] - totals['optimized_bytes']
+        webp_saved = totals['webp_source_bytes'] - totals['webp_bytes']
+        print(f"  ✓ {totals['processed']} procesadas, {totals['failed']} con error en {totals['seconds']}s "
+              f"({totals['images_per_second']} imágenes/s, {args.workers} workers)")
+        if args.rewrite_originals:
+            print(f"  💾 Originales: {format_bytes(totals['source_bytes'])} -> "
+                  f"{format_bytes(totals['optimized_bytes'])} ({format_bytes(saved)} ahorrados)")
+        if totals['webp_source_bytes']:
+            pct = 100 * webp_saved / totals['webp_source_bytes']
+            print(f"  🌐 WebP: {format_bytes(webp_saved)} menos que los originales ({pct:.0f}%) al servirlos")
+        print(f"  🗂️  Variantes en disco: {format_bytes(totals['derived_bytes'])}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"💾 Totales guardados en {args.report}")
+    if failed:
+        print(f"⚠️  {failed} imágenes con error (quedan en el manifiesto y se reintentan)")
+        sys.exit(1)
+    print("✅ Listo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Asesor de índices a partir de las consultas de backend/models/*.php
+
+Extrae las consultas embebidas en los modelos PHP (schema_model.py), anota
+por tabla las columnas filtradas (WHERE/ON/HAVING), unidas (JOIN ... ON) y
+ordenadas (ORDER BY), y las compara con los índices del modelo compilado de
+las migraciones (sin conexión a la base). Cada acceso que ningún índice
+resuelve genera un índice candidato:
+
+  - sin índice:     ninguna columna filtrada es el inicio de un índice
+  - índice parcial: el índice que se usa cubre solo columnas de baja
+                    selectividad (activo, estado, enums) y deja fuera una
+                    columna selectiva que también se filtra
+  - filesort:       el ORDER BY no se puede leer de un índice después de los
+                    filtros por igualdad (solo con LIMIT o con filtros)
+
+Los candidatos de una tabla se fusionan (uno que es prefijo de otro se
+cubre con el más largo), se ordenan por puntaje (peso del problema por
+consulta afectada) y se pueden escribir como una migración idempotente.
+
+Las consultas armadas con $query .= "..." juntan los filtros opcionales de
+todas las ramas, así que las columnas se cuentan igual pero el índice
+compuesto se limita a MAX_INDEX_COLUMNS columnas.
+
+Ejecutar:
+    python index_advisor.py                          # reporte ordenado
+    python index_advisor.py backend/models/Recurso.php --top 5
+    python index_advisor.py --json indices.json
+    python index_advisor.py --emit-migration         # db/migrations/add_indices_sugeridos.sql
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+from migration_ledger import MIGRATIONS_DIR
+from schema_model import (BASE_DUMPS, DEFAULT_BASE, PHP_PLACEHOLDER, SQL_KEYWORDS, iter_php_queries,
+                          load_model, tokenize)
+
+DEFAULT_MIGRATION = MIGRATIONS_DIR / 'add_indices_sugeridos.sql'
+DEFAULT_TOP = 20
+
+# Columnas por índice sugerido (más columnas = índice más pesado y menos reutilizable)
+MAX_INDEX_COLUMNS = 3
+
+# Peso de cada problema en el puntaje
+PROBLEM_WEIGHTS = {'sin índice': 3, 'índice parcial': 2, 'filesort': 1}
+
+_SOURCE_KEYWORDS = {'from', 'join', 'update', 'straight_join'}
+_ALIAS_STOP = SQL_KEYWORDS | {'force', 'use', 'ignore', 'index', 'partition', 'lateral'}
+_CLAUSES = {
+    'where': 'filtro', 'on': 'filtro', 'having': 'filtro',
+    'select': None, 'set': None, 'from': None, 'join': None, 'limit': None, 'values': None,
+    'union': None, 'into': None, 'using': None, 'duplicate': None,
+}
+
+# Acceso de una consulta a una tabla
+Access = namedtuple('Access', ['table', 'equality', 'ranges', 'joins', 'order'])
+
+# Índice sugerido: tabla, columnas, problema y consultas (archivo:línea) que lo motivan
+Candidate = namedtuple('Candidate', ['table', 'columns', 'problem', 'query'])
+
+
+# ----------------------------------------------------------------------
+# Análisis de consultas
+# ----------------------------------------------------------------------
+
+def _is_value(tokens, k):
+    """El token k es un valor constante para el optimizador (?, :x, literal, $php, NOW())"""
+    if k < 0 or k >= len(tokens):
+        return False
+    kind, value = tokens[k]
+    if kind in ('param', 'num', 'str'):
+        return True
+    if kind == 'name':
+        return PHP_PLACEHOLDER in value or value.startswith('@') or value.lower() in ('null', 'true', 'false') \
+            or (k + 1 < len(tokens) and tokens[k + 1][1] == '(')
+    return False
+
+
+def _sources(tokens, words, model):
+    """
+    alias o nombre -> (tabla real, profundidad de paréntesis) de FROM/JOIN/UPDATE;
+    las tablas derivadas y las vistas no se registran
+    """
+    tables = model['tables']
+    sources = {}
+    depth = 0
+    for i, word in enumerate(words):
+        depth += (word == '(') - (word == ')')
+        if word not in _SOURCE_KEYWORDS or i + 1 >= len(tokens):
+            continue
+        if word == 'update' and i > 0 and words[i - 1] in ('key', 'for'):
+            continue
+        kind, value = tokens[i + 1]
+        if kind != 'name' or PHP_PLACEHOLDER in value:
+            continue
+        table = value.split('.')[-1]
+        if table not in tables or tables[table]['type'] != 'BASE TABLE':
+            continue
+        sources[table.lower()] = (table, depth)
+        j = i + 2
+        if j < len(tokens) and words[j] == 'as':
+            j += 1
+        if j < len(tokens) and tokens[j][0] == 'name' and '.' not in tokens[j][1] and words[j] not in _ALIAS_STOP:
+            sources[words[j]] = (table, depth)
+    return sources
+
+
+def _column(token, sources, aliases, model):
+    """(alias, tabla, columna) de un token name; None si no es una columna conocida"""
+    kind, value = token
+    if kind != 'name' or PHP_PLACEHOLDER in value or value.startswith('@'):
+        return None
+    tables = model['tables']
+    if '.' in value:
+        qualifier, column = value.rsplit('.', 1)
+        qualifier = qualifier.split('.')[-1].lower()
+        if qualifier not in sources:
+            return None
+        table = sources[qualifier][0]
+        if column not in tables[table]['columns']:
+            return None
+        return qualifier, table, column
+    lower = value.lower()
+    if lower in SQL_KEYWORDS or lower in sources or lower in aliases:
+        return None
+    owners = {(alias, source[0]) for alias, source in sources.items() if value in tables[source[0]]['columns']}
+    if len({table for _, table in owners}) != 1:
+        return None  # ambigua o desconocida
+    alias, table = sorted(owners)[0]
+    return alias, table, value
+
+
+def analyze_query(model, sql):
+    """
+    Accesos por tabla de una consulta: columnas comparadas por igualdad
+    (=, IN, IS NULL), por rango (<, >, BETWEEN), condiciones de JOIN y el
+    ORDER BY de primer nivel si es de una sola tabla, por columnas simples y
+    en una sola dirección. Las columnas envueltas en funciones (DATE(col))
+    no usan índices y se ignoran.
+    """
+    tokens = tokenize(sql)
+    words = [value.lower() for _, value in tokens]
+    sources = _sources(tokens, words, model)
+    if not sources:
+        return []
+    # Alias de la lista SELECT (COUNT(*) AS total): no son columnas de ninguna tabla
+    aliases = {words[k + 1] for k in range(len(tokens) - 1)
+               if words[k] == 'as' and tokens[k + 1][0] == 'name' and words[k + 1] not in sources}
+
+    accesses = {}
+
+    def note(table, kind, column):
+        access = accesses.setdefault(table, {'equality': [], 'ranges': [], 'joins': [], 'order': []})
+        if column not in access[kind]:
+            access[kind].append(column)
+
+    def word(k):
+        return words[k] if 0 <= k < len(words) else ''
+
+    clause, stack = None, []
+    join_alias = None     # tabla que se une en el ON actual
+    order_items, order_dirs = [], set()
+    grouped = False       # con GROUP BY el ORDER BY se aplica al resultado agrupado
+    i = 0
+    while i < len(tokens):
+        current = words[i]
+        if current == '(':
+            stack.append(clause)
+        elif current == ')':
+            clause = stack.pop() if stack else None
+        elif current in ('order', 'group') and word(i + 1) == 'by':
+            clause = current
+            if current == 'order' and not stack:
+                order_items, order_dirs = [[]], set()
+            elif not stack:
+                grouped = True
+            i += 2
+            continue
+        elif current in _CLAUSES:
+            clause = _CLAUSES[current]
+            if current == 'join':
+                j = i + 3 if word(i + 2) == 'as' else i + 2
+                join_alias = word(j) if word(j) in sources else word(i + 1)
+            elif current == 'where':
+                join_alias = None
+            i += 1
+            continue
+
+        if clause == 'order' and not stack:
+            if current == ',':
+                order_items.append([])
+            elif current in ('asc', 'desc'):
+                order_dirs.add(current)
+            else:
+                order_items[-1].append(i)
+        elif clause == 'filtro':
+            found = _column(tokens[i], sources, aliases, model)
+            wrapped = word(i - 1) == '(' and tokens[i - 2][0] == 'name' and word(i - 2) not in SQL_KEYWORDS \
+                if i >= 2 else False
+            if found and not wrapped:
+                alias, table, column = found
+                after, after2 = word(i + 1), word(i + 2)
+                before, before2 = word(i - 1), word(i - 2)
+                other = _column(tokens[i + 2], sources, aliases, model) if after == '=' and i + 2 < len(tokens) else None
+                if other and other[0] != alias and word(i + 3) != '(':
+                    # col = col: sirve el índice de la tabla de la subconsulta correlacionada
+                    # o, en el ON, el de la tabla que se une
+                    inner = max(sources[found[0]][1], sources[other[0]][1])
+                    sides = [side for side in (found, other) if sources[side[0]][1] == inner]
+                    if len(sides) == 2:
+                        sides = [side for side in sides if side[0] == join_alias] or sides
+                    for _, side_table, side_column in sides:
+                        note(side_table, 'joins', side_column)
+                    i += 3
+                    continue
+                if after == '=' and (after2 == '(' or _is_value(tokens, i + 2)):
+                    note(table, 'equality', column)
+                elif after == 'in' or (after == 'is' and after2 == 'null'):
+                    note(table, 'equality', column)
+                elif (after in ('<', '>') and after2 != '>') or after == 'between':
+                    note(table, 'ranges', column)
+                elif before == '=' and before2 not in ('<', '>', '!') and _is_value(tokens, i - 2):
+                    note(table, 'equality', column)
+                elif (before in ('<', '>') and before2 != '<') or (before == '=' and before2 in ('<', '>')):
+                    note(table, 'ranges', column)
+        i += 1
+
+    # ORDER BY: columnas simples de una sola tabla, en una sola dirección
+    order = []
+    if order_items and not grouped and len(order_dirs) <= 1 and all(len(item) == 1 for item in order_items):
+        columns = [_column(tokens[item[0]], sources, aliases, model) for item in order_items]
+        if all(columns) and len({c[1] for c in columns}) == 1:
+            order = [c[2] for c in columns]
+            for column in order:
+                note(columns[0][1], 'order', column)
+
+    return [Access(table, a['equality'], a['ranges'], a['joins'], a['order'] if order else [])
+            for table, a in accesses.items()]
+
+
+# ----------------------------------------------------------------------
+# Comparación con los índices
+# ----------------------------------------------------------------------
+
+def _index_columns(index):
+    return [c.split('(')[0].split()[0] for c in index['columns']]
+
+
+def low_cardinality(definition):
+    """Columnas con pocos valores distintos (booleanos, enums): malas como primera columna"""
+    column_type = definition['type'].lower()
+    return column_type.startswith(('tinyint(1)', 'bool', 'enum(', 'set(', 'bit'))
+
+
+def usable_prefix(columns, equality, ranges):
+    """Columnas del índice que sirven para buscar: igualdades y, al final, un rango"""
+    n = 0
+    for column in columns:
+        if column in equality:
+            n += 1
+        elif column in ranges:
+            return n + 1
+        else:
+            break
+    return n
+
+
+def serves_order(columns, equality, order):
+    """El índice entrega las filas ya ordenadas tras las columnas fijadas por igualdad"""
+    for start in range(len(equality) + 1):
+        if set(columns[:start]) <= set(equality) and columns[start:start + len(order)] == order:
+            return True
+    return False
+
+
+def candidates_for(model, access, has_limit):
+    """Problemas de un acceso contra los índices existentes -> lista de (columnas, problema)"""
+    table = model['tables'][access.table]
+    definitions = table['columns']
+    indexes = [(_index_columns(i), i['unique']) for i in table['indexes'].values() if i['type'] != 'FULLTEXT']
+    equality = [c for c in access.equality + access.joins if c in definitions]
+    equality = list(dict.fromkeys(equality))
+    ranges = [c for c in access.ranges if c not in equality]
+    found = []
+
+    def build(columns):
+        return tuple(columns[:MAX_INDEX_COLUMNS])
+
+    if equality or ranges:
+        covered = any(unique and set(columns) <= set(equality) for columns, unique in indexes)
+        best = max(indexes, key=lambda i: usable_prefix(i[0], equality, ranges), default=([], False))
+        used = best[0][:usable_prefix(best[0], equality, ranges)]
+        selective = [c for c in equality if not low_cardinality(definitions[c])]
+        weak = [c for c in equality if low_cardinality(definitions[c])]
+        lookup = selective + weak + ranges[:1]
+        if not covered and not used:
+            if lookup and not (len(lookup) == 1 and low_cardinality(definitions[lookup[0]])):
+                found.append((build(lookup), 'sin índice'))
+        elif not covered and all(low_cardinality(definitions[c]) for c in used if c in definitions) \
+                and (set(selective) - set(used)):
+            found.append((build(selective + [c for c in used if c not in selective] + ranges[:1]),
+                          'índice parcial'))
+
+    order = access.order
+    if order and not ranges and (equality or has_limit) and len(equality) + len(order) <= MAX_INDEX_COLUMNS:
+        if not any(serves_order(columns, equality, order) for columns, _ in indexes):
+            found.append((tuple(equality + [c for c in order if c not in equality]), 'filesort'))
+    return found
+
+
+def advise(model, queries):
+    """Candidatos fusionados por tabla, ordenados por puntaje"""
+    raw = []
+    for query in queries:
+        has_limit = 'limit' in {value.lower() for _, value in tokenize(query.text)}
+        for access in analyze_query(model, query.text):
+            for columns, problem in candidates_for(model, access, has_limit):
+                raw.append(Candidate(access.table, columns, problem, f"{query.file}:{query.line}"))
+
+    # Fusionar: un candidato que es prefijo de otro más largo se cubre con ese
+    merged = {}
+    for candidate in sorted(raw, key=lambda c: (c.table, -len(c.columns), c.columns)):
+        target = next((key for key in merged if key[0] == candidate.table
+                       and key[1][:len(candidate.columns)] == candidate.columns), None)
+        if target is None:
+            target = (candidate.table, candidate.columns)
+            merged[target] = {'problems': {}, 'queries': []}
+        entry = merged[target]
+        entry['problems'][candidate.problem] = entry['problems'].get(candidate.problem, 0) + 1
+        if candidate.query not in entry['queries']:
+            entry['queries'].append(candidate.query)
+
+    results = []
+    for (table, columns), entry in merged.items():
+        score = sum(PROBLEM_WEIGHTS[p] * n for p, n in entry['problems'].items())
+        results.append({
+            'table': table,
+            'columns': list(columns),
+            'name': index_name(model, table, columns),
+            'score': score,
+            'problems': entry['problems'],
+            'queries': sorted(entry['queries']),
+        })
+    results.sort(key=lambda r: (-r['score'], r['table'], r['columns']))
+    return results
+
+
+def index_name(model, table, columns):
+    existing = model['tables'][table]['indexes']
+    base = ('idx_' + '_'.join(columns))[:60]
+    name, n = base, 2
+    while name in existing:
+        name, n = f"{base}_{n}", n + 1
+    return name
+
+
+# ----------------------------------------------------------------------
+# Salida
+# ----------------------------------------------------------------------
+
+def format_report(results, top):
+    lines = []
+    for rank, r in enumerate(results[:top], 1):
+        problems = ', '.join(f"{p} ×{n}" for p, n in sorted(r['problems'].items(), key=lambda x: -x[1]))
+        lines.append(f"{rank:>3}. {r['table']} ({', '.join(r['columns'])})  puntaje {r['score']}  [{problems}]")
+        for query in r['queries'][:3]:
+            lines.append(f"       {query}")
+        if len(r['queries']) > 3:
+            lines.append(f"       ... y {len(r['queries']) - 3} consultas más")
+    return lines
+
+
+def migration_sql(results):
+    """Migración idempotente (mismo patrón que fix_diagnosticos_schema.sql)"""
+    parts = [
+        "-- =====================================================",
+        "-- Índices sugeridos por index_advisor.py a partir de backend/models/*.php",
+        f"-- Generado: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        "-- Cada índice se crea solo si no existe uno con el mismo nombre; revisar",
+        "-- el tamaño de las tablas grandes antes de aplicar (online_schema_change.py).",
+        "-- =====================================================",
+    ]
+    for r in results:
+        columns = ', '.join(f"`{c}`" for c in r['columns'])
+        problems = ', '.join(f"{p} ×{n}" for p, n in r['problems'].items())
+        parts.append("")
+        parts.append(f"-- {r['table']} ({', '.join(r['columns'])}): puntaje {r['score']}, {problems}")
+        for query in r['queries'][:5]:
+            parts.append(f"--   {query}")
+        parts.append(f"""SET @index_exists = (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = '{r['table']}'
+    AND INDEX_NAME = '{r['name']}'
+);
+
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE `{r['table']}` ADD INDEX `{r['name']}` ({columns})',
+    'SELECT "Índice {r['name']} ya existe" as mensaje'
+);
+
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;""")
+    return '\n'.join(parts) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índices faltantes según las consultas de backend/models")
+    parser.add_argument('files', nargs='*', help="Archivos PHP (default: backend/models/*.php)")
+    parser.add_argument('--base', default=DEFAULT_BASE,
+                        help=f"Dump base: {', '.join(BASE_DUMPS)} o una ruta (default {DEFAULT_BASE})")
+    parser.add_argument('--refresh', action='store_true', help="Ignorar el caché del modelo y recompilar")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="Sugerencias a mostrar")
+    parser.add_argument('--min-score', type=int, default=1, help="Puntaje mínimo para sugerir un índice")
+    parser.add_argument('--json', metavar='ARCHIVO', help="Guardar el reporte completo en JSON")
+    parser.add_argument('--emit-migration', nargs='?', const=str(DEFAULT_MIGRATION), metavar='ARCHIVO',
+                        help="Escribir la migración con los índices sugeridos")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = load_model(args.base, refresh=args.refresh)
+    paths = [Path(f) for f in args.files] or None
+    queries = list(iter_php_queries(paths))
+    results = [r for r in advise(model, queries) if r['score'] >= args.min_score]
+    elapsed = time.perf_counter() - start
+
+    print(f"🔎 {len(queries)} consultas analizadas en {elapsed * 1000:.0f} ms, "
+          f"{len(results)} índices sugeridos")
+    for line in format_report(results, args.top):
+        print(line)
+    if len(results) > args.top:
+        print(f"  ... {len(results) - args.top} más (--top)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'queries': len(queries), 'indexes': results}, f, indent=1, ensure_ascii=False)
+        print(f"💾 Reporte guardado en {args.json}")
+
+    if args.emit_migration and results:
+        path = Path(args.emit_migration)
+        path.write_text(migration_sql(results), encoding='utf-8')
+        print(f"📝 Migración con {len(results)} índices escrita en {path}")
+
+    sys.exit(1 if results else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Ranking de puntos materializado e incremental
+
+PuntosUsuario::getRanking() y getPosicionRanking() leen la vista
+ranking_usuarios, que calcula RANK() sobre todo puntos_usuario en cada
+consulta; LIMIT/OFFSET y "mi posición" empeoran con cada usuario nuevo.
+Este job mantiene las tablas de db/migrations/ranking_puntos_materializado.sql:
+
+  - ranking_puntos: puntos_totales, nivel y experiencia de cada usuario
+    activo, con índice (puntos_totales, nivel, id_usuario).
+  - ranking_puntos_grupos: índice denso de los puntajes distintos; cada
+    grupo (puntos_totales, nivel) guarda cuántos usuarios tiene y su
+    posición, igual que el RANK() de la vista.
+
+Así "mi posición" son dos lecturas por PRIMARY KEY, el top-N es un rango
+del índice y una página empieza en el grupo con posicion <= offset + 1
+(idx_posicion) en lugar de saltar offset filas.
+
+Refresco incremental: toma los usuarios con transacciones_puntos nuevas
+desde la marca de agua (ranking_puntos_estado.ultima_transaccion, releyendo
+OVERLAP_IDS ids anteriores por transacciones que confirmaron tarde), lee su
+puntos_usuario actual, aplica las diferencias a los contadores de los grupos
+y recalcula las posiciones de los grupos (una pasada sobre los puntajes
+distintos, no sobre los usuarios). Reprocesar un usuario sin cambios no hace
+nada, así que repetir un lote es seguro.
+
+Las altas/bajas de usuarios (usuarios.estado) y los ajustes directos a
+puntos_usuario no generan transacciones: --rebuild (p. ej. nocturno) los
+recoge, y --verify compara el ranking contra el cálculo de la vista.
+
+Ejecutar:
+    python leaderboard_refresh.py                   # un lote incremental (cron cada minuto)
+    python leaderboard_refresh.py --interval 15     # como servicio, un lote cada 15s
+    python leaderboard_refresh.py --rebuild --verify
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+import pymysql
+
+from db_pool import DB_CONFIG, connect
+
+LOCK_NAME = 'leaderboard_refresh'
+OVERLAP_IDS = 1000
+USER_CHUNK = 1000
+
+# Mismo criterio que la vista ranking_usuarios del dump
+RANKED_USERS = """
+    SELECT pu.id_usuario,
+           COALESCE(pu.puntos_totales, 0) AS puntos_totales,
+           COALESCE(pu.nivel, 1) AS nivel,
+           COALESCE(pu.experiencia, 0) AS experiencia
+    FROM puntos_usuario pu
+    INNER JOIN usuarios u ON u.id_usuario = pu.id_usuario
+    WHERE u.estado = 'activo'
+"""
+
+RECOMPUTE_POSITIONS = """
+    UPDATE ranking_puntos_grupos g
+    INNER JOIN (
+        SELECT puntos_totales, nivel,
+               1 + COALESCE(SUM(usuarios) OVER (
+                   ORDER BY puntos_totales DESC, nivel DESC
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS posicion
+        FROM ranking_puntos_grupos
+    ) p ON p.puntos_totales = g.puntos_totales AND p.nivel = g.nivel
+    SET g.posicion = p.posicion
+    WHERE g.posicion <> p.posicion
+"""
+
+
+def read_watermark(cursor):
+    cursor.execute("SELECT ultima_transaccion FROM ranking_puntos_estado WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def save_state(cursor, watermark, rebuilt=False):
+    cursor.execute("SELECT COUNT(*) FROM ranking_puntos")
+    (users,), = cursor.fetchall()
+    rebuilt_sql = "NOW()" if rebuilt else "NULL"
+    cursor.execute(
+        "INSERT INTO ranking_puntos_estado (id, ultima_transaccion, usuarios, fecha_reconstruccion, fecha_calculo) "
+        f"VALUES (1, %s, %s, {rebuilt_sql}, NOW()) ON DUPLICATE KEY UPDATE "
+        "ultima_transaccion = VALUES(ultima_transaccion), usuarios = VALUES(usuarios), fecha_calculo = NOW()"
+        + (", fecha_reconstruccion = NOW()" if rebuilt else ""),
+        (watermark, users))
+    return users
+
+
+def max_transaction(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id_transaccion), 0) FROM transacciones_puntos")
+    return cursor.fetchone()[0]
+
+
+def changed_users(cursor, since, until):
+    cursor.execute(
+        "SELECT DISTINCT id_usuario FROM transacciones_puntos "
+        "WHERE id_transaccion > %s AND id_transaccion <= %s",
+        (max(0, since - OVERLAP_IDS), until))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def group_deltas(old, new):
+    """
+    Cambios de los contadores por grupo y filas de usuario a escribir/borrar.
+    old (materializado) y new (actual): {id_usuario: (puntos, nivel, experiencia)}.
+    """
+    deltas = Counter()
+    upserts, deletes = [], []
+    for user in set(old) | set(new):
+        before = old.get(user)
+        after = new.get(user)
+        if before == after:
+            continue
+        moved = not before or not after or before[:2] != after[:2]
+        if before and moved:
+            deltas[before[:2]] -= 1
+        if after and moved:
+            deltas[after[:2]] += 1
+        if after:
+            upserts.append((user, *after))
+        else:
+            deletes.append(user)
+    return {group: n for group, n in deltas.items() if n}, upserts, deletes
+
+
+def apply_deltas(cursor, deltas, upserts, deletes):
+    if upserts:
+        cursor.executemany(
+            "INSERT INTO ranking_puntos (id_usuario, puntos_totales, nivel, experiencia) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE puntos_totales = VALUES(puntos_totales), nivel = VALUES(nivel), "
+            "experiencia = VALUES(experiencia)", upserts)
+    if deletes:
+        cursor.executemany("DELETE FROM ranking_puntos WHERE id_usuario = %s", deletes)
+    if deltas:
+        cursor.executemany(
+            "INSERT INTO ranking_puntos_grupos (puntos_totales, nivel, usuarios) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE usuarios = usuarios + VALUES(usuarios)",
+            [(points, level, n) for (points, level), n in deltas.items()])
+        cursor.execute("DELETE FROM ranking_puntos_grupos WHERE usuarios <= 0")
+
+
+def refresh(connection):
+    """Un lote incremental; retorna (usuarios revisados, usuarios cambiados, grupos movidos)"""
+    with connection.cursor() as cursor:
+        watermark = read_watermark(cursor)
+        if watermark is None:
+            raise RuntimeError("Ranking sin construir; ejecutar con --rebuild")
+        until = max_transaction(cursor)
+        if until <= watermark:
+            return 0, 0, 0
+        users = changed_users(cursor, watermark, until)
+        if not users:
+            save_state(cursor, until)
+            return 0, 0, 0
+
+    checked = changed = moved = 0
+    for start in range(0, len(users), USER_CHUNK):
+        chunk = users[start:start + USER_CHUNK]
+        marks = ', '.join(['%s'] * len(chunk))
+        connection.begin()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT id_usuario, puntos_totales, nivel, experiencia FROM ranking_puntos "
+                               f"WHERE id_usuario IN ({marks})", chunk)
+                old = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+                cursor.execute(f"{RANKED_USERS} AND pu.id_usuario IN ({marks})", chunk)
+                new = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+                deltas, upserts, deletes = group_deltas(old, new)
+                apply_deltas(cursor, deltas, upserts, deletes)
+                if deltas:
+                    moved += cursor.execute(RECOMPUTE_POSITIONS)
+                last = start + USER_CHUNK >= len(users)
+                if last:
+                    save_state(cursor, until)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        checked += len(chunk)
+        changed += len(upserts) + len(deletes)
+    return checked, changed, moved
+
+
+def rebuild(connection):
+    """Reconstrucción completa en una transacción (las lecturas ven la versión anterior hasta el COMMIT)"""
+    connection.begin()
+    try:
+        with connection.cursor() as cursor:
+            until = max_transaction(cursor)
+            cursor.execute("DELETE FROM ranking_puntos")
+            cursor.execute("DELETE FROM ranking_puntos_grupos")
+            cursor.execute(f"INSERT INTO ranking_puntos (id_usuario, puntos_totales, nivel, experiencia) {RANKED_USERS}")
+            cursor.execute(
+                "INSERT INTO ranking_puntos_grupos (puntos_totales, nivel, usuarios) "
+                "SELECT puntos_totales, nivel, COUNT(*) FROM ranking_puntos GROUP BY puntos_totales, nivel")
+            cursor.execute(RECOMPUTE_POSITIONS)
+            users = save_state(cursor, until, rebuilt=True)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return users
+
+
+def verify(connection, show=10):
+    """Compara la posición materializada de cada usuario con RANK() calculado en vivo"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id_usuario, RANK() OVER (ORDER BY puntos_totales DESC, nivel DESC) "
+            f"FROM ({RANKED_USERS}) AS v")
+        expected = dict(cursor.fetchall())
+        cursor.execute(
+            "SELECT r.id_usuario, g.posicion FROM ranking_puntos r "
+            "INNER JOIN ranking_puntos_grupos g ON g.puntos_totales = r.puntos_totales AND g.nivel = r.nivel")
+        actual = dict(cursor.fetchall())
+    mismatches = [(user, expected.get(user), actual.get(user))
+                  for user in sorted(set(expected) | set(actual)) if expected.get(user) != actual.get(user)]
+    print(f"🔍 {len(expected)} usuarios en la vista, {len(actual)} materializados, "
+          f"{len(mismatches)} diferencias")
+    for user, want, got in mismatches[:show]:
+        print(f"   usuario {user}: vista {want}, materializado {got}")
+    return mismatches
+
+
+def run_once(connection, args):
+    if args.rebuild:
+        start = time.perf_counter()
+        users = rebuild(connection)
+        print(f"🏗️  Ranking reconstruido: {users} usuarios en {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        checked, changed, moved = refresh(connection)
+        if checked:
+            print(f"🔄 {checked} usuarios con transacciones nuevas, {changed} cambiaron, "
+                  f"{moved} grupos movidos ({time.perf_counter() - start:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking de puntos materializado e incremental")
+    parser.add_argument('--rebuild', action='store_true', help="Reconstruir el ranking completo")
+    parser.add_argument('--verify', action='store_true', help="Comparar contra el RANK() de la vista")
+    parser.add_argument('--interval', type=float, help="Repetir el refresco incremental cada N segundos")
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=DB_CONFIG['port'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    parser.add_argument('--database', default=DB_CONFIG['database'])
+    args = parser.parse_args()
+
+    config = dict(DB_CONFIG, host=args.host, port=args.port, user=args.user,
+                  password=args.password, database=args.database)
+    connection = connect(config, autocommit=True)
+    mismatches = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                print("⏭️  Otra ejecución del ranking está en curso")
+                return
+        run_once(connection, args)
+        while args.interval:
+            time.sleep(args.interval)
+            args.rebuild = False
+            run_once(connection, args)
+        if args.verify:
+            mismatches = verify(connection)
+    except KeyboardInterrupt:
+        print("\n⏹️  Detenido")
+    except (pymysql.Error, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    if mismatches:
+        print("❌ El ranking materializado no coincide; ejecutar con --rebuild")
+        sys.exit(1)
+    print("✅ Ranking al día")
+
+
+if __name__ == '__main__':
+    main()
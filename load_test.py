@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la API (/api/v1) con escenarios de usuario
+
+Cada escenario (load_scenarios/*.json) describe un recorrido de un usuario
+autenticado: una secuencia de pasos HTTP con tiempo de "pensar" entre uno y
+otro, valores capturados de respuestas anteriores (p. ej. un id_recurso del
+listado) y una tasa de llegada. La carga es de lazo abierto: los recorridos
+empiezan según un proceso de Poisson a la tasa pedida, tarden lo que tarden
+las respuestas, así que un servidor lento acumula recorridos en curso en
+lugar de recibir menos carga (si se supera --max-concurrent, las llegadas se
+descartan y se reportan).
+
+Por ruta (plantilla del paso, p. ej. "POST /recursos/{id_recurso}/descargar")
+registra latencias en un histograma log-lineal estilo HdrHistogram (error
+relativo < 1%), throughput y errores por tipo (http_500, timeout, conexion,
+sin_dato). Compara contra una línea base y falla (exit 1) si el p95/p99 de
+una ruta sube más de la tolerancia, si aumenta su tasa de error o si se
+descartan más recorridos que antes.
+
+Solo usa la biblioteca estándar (asyncio, sin clientes HTTP externos).
+Los usuarios por defecto son los de synthetic_data.py (usuarioN@seed.test,
+Password123!). Servidor local (PATH_INFO: index.php recibe la ruta completa):
+    php -S 127.0.0.1:8000 -t backend
+
+Ejecutar (NUNCA contra producción):
+    python load_test.py                                   # todos los escenarios
+    python load_test.py recursos --rate 20 --duration 60
+    python load_test.py --start-server --php-workers 4 --save-baseline
+    python load_test.py recursos gamificacion --report carga.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+SCENARIOS_DIR = PROJECT_ROOT / 'load_scenarios'
+DEFAULT_BASELINE = PROJECT_ROOT / 'load_test_baseline.json'
+DEFAULT_BASE_URL = 'http://127.0.0.1:8000/index.php/api/v1'
+
+LOGIN_PATH = '/auth/login'
+HEALTH_PATH = '/health'
+LATENCY_NOISE_MS = 5.0      # diferencias menores no cuentan como regresión
+ERROR_RATE_NOISE = 0.01     # +1 punto porcentual de errores
+PERCENTILES = (50, 90, 95, 99, 99.9)
+PLACEHOLDER = re.compile(r'\{(rand:-?\d+:-?\d+|choice:[^{}]+|[A-Za-z_][A-Za-z0-9_]*)\}')
+
+
+class MissingValue(Exception):
+    """El paso usa un valor que ningún paso anterior capturó"""
+
+
+# ----------------------------------------------------------------------
+# Histograma
+# ----------------------------------------------------------------------
+
+class LatencyHistogram:
+    """
+    Histograma log-lineal en microsegundos, como HdrHistogram: cada potencia de
+    2 se divide en 2^SUB_BITS buckets, así que el error relativo es < 1/2^SUB_BITS.
+    Los conteos se guardan por límite inferior del bucket (mezclable y JSON).
+    """
+
+    SUB_BITS = 7
+
+    def __init__(self, counts=None):
+        self.counts = Counter({int(k): v for k, v in (counts or {}).items()})
+        self.total = sum(self.counts.values())
+        self.max_us = max(self.counts) if self.counts else 0
+
+    @classmethod
+    def bucket(cls, us):
+        us = max(int(us), 0)
+        shift = max(us.bit_length() - 1 - cls.SUB_BITS, 0)
+        return (us >> shift) << shift, shift
+
+    def record(self, us):
+        key, _ = self.bucket(us)
+        self.counts[key] += 1
+        self.total += 1
+        self.max_us = max(self.max_us, int(us))
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, p):
+        """Valor (µs) bajo el cual queda el p% de las muestras (extremo superior del bucket)"""
+        if not self.total:
+            return 0
+        target = self.total * p / 100
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= target:
+                _, shift = self.bucket(key)
+                return min(key + (1 << shift) - 1, self.max_us)
+        return self.max_us
+
+    def mean(self):
+        return sum(k * n for k, n in self.counts.items()) / self.total if self.total else 0
+
+    def to_dict(self):
+        return {str(k): n for k, n in sorted(self.counts.items())}
+
+
+class RouteStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = Counter()
+        self.bytes = 0
+
+    def summary(self, elapsed):
+        h = self.histogram
+        result = {
+            'requests': self.requests,
+            'errors': dict(self.errors),
+            'error_rate': round(sum(self.errors.values()) / self.requests, 4) if self.requests else 0,
+            'throughput_rps': round(self.requests / elapsed, 2) if elapsed else 0,
+            'bytes': self.bytes,
+            'mean_ms': round(h.mean() / 1000, 2),
+            'max_ms': round(h.max_us / 1000, 2),
+            'histogram_us': h.to_dict(),
+        }
+        for p in PERCENTILES:
+            result[f"p{p:g}_ms".replace('.', '_')] = round(h.percentile(p) / 1000, 2)
+        return result
+
+
+# ----------------------------------------------------------------------
+# Cliente HTTP/1.1 mínimo sobre asyncio
+# ----------------------------------------------------------------------
+
+class HttpConnection:
+    """Una conexión keep-alive por recorrido; se reabre si el servidor la cierra (php -S lo hace)"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def _open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 'Accept: application/json', f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self._roundtrip(raw), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        # La conexión reutilizada estaba cerrada del lado del servidor: un reintento
+        return await asyncio.wait_for(self._roundtrip(raw), self.timeout)
+
+    async def _roundtrip(self, raw):
+        if self.writer is None:
+            await self._open()
+        self.writer.write(raw)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('conexión cerrada por el servidor')
+        version, status = status_line.split(b' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        connection = headers.get('connection', '').lower()
+        if connection == 'close' or (version == b'HTTP/1.0' and connection != 'keep-alive'):
+            self.close()
+        return int(status), body
+
+
+# ----------------------------------------------------------------------
+# Escenarios
+# ----------------------------------------------------------------------
+
+def load_scenario(name_or_path):
+    path = Path(name_or_path)
+    if not path.suffix:
+        path = SCENARIOS_DIR / f"{name_or_path}.json"
+    with open(path, 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+    scenario.setdefault('nombre', path.stem)
+    return scenario
+
+
+def render(value, variables, rng):
+    """Reemplaza {var}, {rand:a:b} y {choice:a|b}; un placeholder solo conserva el tipo del valor"""
+    if isinstance(value, dict):
+        return {k: render(v, variables, rng) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, variables, rng) for v in value]
+    if not isinstance(value, str):
+        return value
+
+    def resolve(token):
+        if token.startswith('rand:'):
+            low, high = token[5:].split(':')
+            return rng.randint(int(low), int(high))
+        if token.startswith('choice:'):
+            return rng.choice(token[7:].split('|'))
+        if token not in variables:
+            raise MissingValue(token)
+        return variables[token]
+
+    whole = PLACEHOLDER.fullmatch(value)
+    if whole:
+        return resolve(whole.group(1))
+    return PLACEHOLDER.sub(lambda m: str(resolve(m.group(1))), value)
+
+
+def find_values(data, key):
+    """Todos los valores de key en cualquier nivel de la respuesta (los controladores no comparten formato)"""
+    found = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node and node[key] not in (None, ''):
+                found.append(node[key])
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return found
+
+
+def route_name(step):
+    return step.get('nombre') or f"{step.get('method', 'GET').upper()} {step['path'].split('?', 1)[0]}"
+
+
+class ScenarioRun:
+    def __init__(self, scenario, base_url, tokens, rate, duration, timeout, max_concurrent, seed):
+        self.scenario = scenario
+        self.base_url = base_url
+        self.tokens = tokens
+        self.rate = rate if rate is not None else scenario.get('llegadas', {}).get('tasa', 5)
+        self.duration = duration if duration is not None else scenario.get('llegadas', {}).get('duracion', 30)
+        self.ramp = scenario.get('llegadas', {}).get('rampa', 0)
+        self.think = scenario.get('pensar', [0, 0])
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self.rng = random.Random(seed)
+        self.routes = {route_name(step): RouteStats() for step in scenario['pasos']}
+        self.journeys = Counter()
+        self.active = 0
+        self.max_active = 0
+
+    async def journey(self, user):
+        conn = HttpConnection(self.base_url, self.timeout)
+        rng = random.Random(self.rng.random())
+        variables = {'email': user[0], 'n': user[2]}
+        headers = {'Authorization': f"Bearer {user[1]}"} if user[1] else {}
+        try:
+            for i, step in enumerate(self.scenario['pasos']):
+                if i and self.think[1]:
+                    await asyncio.sleep(rng.uniform(*self.think))
+                if rng.random() >= step.get('probabilidad', 1):
+                    continue
+                stats = self.routes[route_name(step)]
+                try:
+                    path = render(step['path'], variables, rng)
+                    body = render(step.get('body'), variables, rng)
+                except MissingValue:
+                    stats.requests += 1
+                    stats.errors['sin_dato'] += 1
+                    continue
+
+                stats.requests += 1
+                start = time.perf_counter()
+                try:
+                    status, payload = await conn.request(step.get('method', 'GET').upper(), path, headers, body)
+                except asyncio.TimeoutError:
+                    conn.close()
+                    stats.errors['timeout'] += 1
+                    continue
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    conn.close()
+                    stats.errors['conexion'] += 1
+                    continue
+                stats.histogram.record((time.perf_counter() - start) * 1_000_000)
+                stats.bytes += len(payload)
+
+                if status not in step.get('esperar', range(200, 300)):
+                    stats.errors[f"http_{status}"] += 1
+                    continue
+                for var, key in step.get('capturar', {}).items():
+                    try:
+                        values = find_values(json.loads(payload), key)
+                    except ValueError:
+                        values = []
+                    if values:
+                        variables[var] = rng.choice(values)
+            self.journeys['completados'] += 1
+        finally:
+            conn.close()
+            self.active -= 1
+
+    async def run(self):
+        tasks = set()
+        start = time.perf_counter()
+        t = 0.0
+        while True:
+            rate = self.rate * min(1.0, max(t / self.ramp, 0.05)) if self.ramp else self.rate
+            t += self.rng.expovariate(rate)
+            if t >= self.duration:
+                break
+            delay = start + t - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.active >= self.max_concurrent:
+                self.journeys['descartados'] += 1
+                continue
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.journeys['iniciados'] += 1
+            task = asyncio.create_task(self.journey(self.rng.choice(self.tokens)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        # Se espera a los recorridos en curso hasta un timeout completo más
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.timeout + self.think[1] * len(self.scenario['pasos']))
+            for task in pending:
+                task.cancel()
+            self.journeys['cancelados'] += len(pending)
+        elapsed = time.perf_counter() - start
+        total = RouteStats()
+        for stats in self.routes.values():
+            total.histogram.merge(stats.histogram)
+            total.requests += stats.requests
+            total.errors.update(stats.errors)
+            total.bytes += stats.bytes
+        return {
+            'rate': self.rate,
+            'duration': self.duration,
+            'elapsed_s': round(elapsed, 2),
+            'journeys': dict(self.journeys),
+            'max_active': self.max_active,
+            'total': total.summary(elapsed),
+            'routes': {name: stats.summary(elapsed) for name, stats in self.routes.items()},
+        }
+
+
+async def login_users(base_url, users, timeout, concurrency=8):
+    """(email, token, n) de los usuarios que pudieron iniciar sesión"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(email, password, n):
+        async with semaphore:
+            conn = HttpConnection(base_url, timeout)
+            try:
+                status, payload = await conn.request('POST', LOGIN_PATH, body={'email': email, 'password': password})
+                tokens = find_values(json.loads(payload), 'token') if status == 200 else []
+                return (email, tokens[0], n) if tokens else None
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                return None
+            finally:
+                conn.close()
+
+    results = await asyncio.gather(*(login(*user) for user in users))
+    return [r for r in results if r]
+
+
+def scenario_users(scenario):
+    spec = scenario.get('usuarios')
+    if not spec:
+        return []
+    first, step = spec.get('desde', 1), spec.get('paso', 1)
+    return [(spec['email'].format(n=n), spec['password'], n)
+            for n in range(first, first + spec.get('cantidad', 10) * step, step)]
+
+
+# ----------------------------------------------------------------------
+# Servidor local y línea base
+# ----------------------------------------------------------------------
+
+def start_php_server(base_url, workers):
+    parts = urlsplit(base_url)
+    env = dict(os.environ)
+    if workers > 1:
+        env['PHP_CLI_SERVER_WORKERS'] = str(workers)  # php -S atiende de a una request sin esto
+    process = subprocess.Popen(['php', '-S', f"{parts.hostname}:{parts.port or 80}", '-t', 'backend'],
+                               cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process
+
+
+async def wait_healthy(base_url, timeout, attempts=1):
+    for attempt in range(attempts):
+        conn = HttpConnection(base_url, timeout)
+        try:
+            status, _ = await conn.request('GET', HEALTH_PATH)
+            if status == 200:
+                return True
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            conn.close()
+        if attempt + 1 < attempts:
+            await asyncio.sleep(0.5)
+    return False
+
+
+def compare(before, after, tolerance):
+    """Regresiones de after respecto a before (un escenario): lista de mensajes"""
+    problems = []
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if not old or not new['requests']:
+            continue
+        for key in ('p95_ms', 'p99_ms'):
+            if new[key] > old[key] * (1 + tolerance) and new[key] - old[key] > LATENCY_NOISE_MS:
+                problems.append(f"{name}: {key[:-3]} {old[key]:.1f} -> {new[key]:.1f} ms")
+        if new['error_rate'] - old['error_rate'] > ERROR_RATE_NOISE:
+            problems.append(f"{name}: errores {100 * old['error_rate']:.1f}% -> {100 * new['error_rate']:.1f}%")
+    old_started = before['journeys'].get('iniciados', 0) + before['journeys'].get('descartados', 0)
+    new_started = after['journeys'].get('iniciados', 0) + after['journeys'].get('descartados', 0)
+    if old_started and new_started:
+        old_drop = before['journeys'].get('descartados', 0) / old_started
+        new_drop = after['journeys'].get('descartados', 0) / new_started
+        if new_drop - old_drop > ERROR_RATE_NOISE:
+            problems.append(f"recorridos descartados {100 * old_drop:.1f}% -> {100 * new_drop:.1f}%")
+    return problems
+
+
+def print_results(name, result):
+    j = result['journeys']
+    print(f"\n📊 {name}: {result['rate']:g} recorridos/s durante {result['duration']}s "
+          f"({j.get('iniciados', 0)} iniciados, {j.get('completados', 0)} completos, "
+          f"{j.get('descartados', 0)} descartados, máx. {result['max_active']} en curso)")
+    print(f"  {'ruta':44} {'req':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'p99.9':>8} {'máx':>8}  errores")
+    for route, r in list(result['routes'].items()) + [('TOTAL', result['total'])]:
+        errors = ', '.join(f"{k}:{v}" for k, v in sorted(r['errors'].items())) or '-'
+        print(f"  {route[:44]:44} {r['requests']:>7} {r['throughput_rps']:>7.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['p99_9_ms']:>8.1f} {r['max_ms']:>8.1f}  {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de lazo abierto de la API con escenarios")
+    parser.add_argument('scenarios', nargs='*', help="Nombres en load_scenarios/ o rutas .json (default: todos)")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--rate', type=float, help="Recorridos por segundo (default: el del escenario)")
+    parser.add_argument('--duration', type=float, help="Segundos de llegadas (default: el del escenario)")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Timeout por request en segundos")
+    parser.add_argument('--max-concurrent', type=int, default=500, help="Recorridos en curso antes de descartar")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start-server', action='store_true', help="Levantar php -S -t backend durante la prueba")
+    parser.add_argument('--php-workers', type=int, default=4, help="PHP_CLI_SERVER_WORKERS con --start-server")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Archivo de línea base")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Aumento de p95/p99 tolerado respecto a la base (0.5 = 50%%)")
+    parser.add_argument('--report', help="Guardar los resultados completos (con histogramas) en JSON")
+    args = parser.parse_args()
+
+    names = args.scenarios or sorted(p.stem for p in SCENARIOS_DIR.glob('*.json'))
+    scenarios = [load_scenario(name) for name in names]
+
+    server = start_php_server(args.base_url, args.php_workers) if args.start_server else None
+    results, problems = {}, []
+    try:
+        if not asyncio.run(wait_healthy(args.base_url, args.timeout, attempts=20 if server else 1)):
+            print(f"❌ {args.base_url}{HEALTH_PATH} no responde")
+            sys.exit(1)
+
+        for i, scenario in enumerate(scenarios):
+            name = scenario['nombre']
+            users = scenario_users(scenario)
+            tokens = [(None, None, 0)]
+            if users:
+                tokens = asyncio.run(login_users(args.base_url, users, args.timeout))
+                print(f"🔑 {name}: {len(tokens)}/{len(users)} usuarios con sesión")
+                if not tokens:
+                    problems.append(f"{name}: ningún usuario pudo iniciar sesión")
+                    continue
+            run = ScenarioRun(scenario, args.base_url, tokens, args.rate, args.duration,
+                              args.timeout, args.max_concurrent, args.seed + i)
+            results[name] = asyncio.run(run.run())
+            print_results(name, results[name])
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'base_url': args.base_url,
+                       'results': results}, f, indent=1, ensure_ascii=False)
+        print(f"\n💾 Línea base guardada en {args.baseline}")
+    else:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except FileNotFoundError:
+            baseline = {}
+        for name, current in results.items():
+            if name not in baseline:
+                continue
+            if baseline[name]['rate'] != current['rate']:
+                print(f"⚠️  {name}: la base se midió a {baseline[name]['rate']:g} recorridos/s, "
+                      f"ahora {current['rate']:g}")
+            problems += [f"[{name}] vs base: {p}" for p in compare(baseline[name], current, args.tolerance)]
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {args.report}")
+
+    if problems:
+        print(f"\n❌ {len(problems)} regresiones:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones de latencia ni de errores")
+
+
+if __name__ == '__main__':
+    main()
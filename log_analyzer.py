@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Análisis incremental de los logs de backend/logs
+
+Logger::log() escribe líneas "[Y-m-d H:i:s] [NIVEL] mensaje | Context: {json}"
+en app_YYYY-MM-DD.log y activity_YYYY-MM-DD.log; Database::logError() escribe
+"[Y-m-d H:i:s] mensaje" en database_YYYY-MM-DD.log. Este script los lee en
+streaming (nunca un archivo entero en memoria), un archivo por proceso, y
+guarda por archivo el offset en bytes hasta la última línea completa junto
+con sus agregados. La siguiente ejecución solo lee lo que se agregó desde
+entonces; si un archivo se truncó o se reemplazó, se vuelve a leer desde 0.
+
+Cada registro se agrupa por:
+  endpoint:<MÉTODO> <ruta>   si el contexto trae endpoint/uri/url/ruta
+                             (segmentos numéricos de la ruta -> :id)
+  accion:<acción>            Logger::activity()
+  mensaje:<plantilla>        el resto: texto antes de ": " con números -> N
+                             ("Error al crear recurso: SQLSTATE..." ->
+                             "Error al crear recurso")
+
+Por grupo: registros, errores, warnings, tasa de error y, si el contexto trae
+tiempos (claves *_ms en milisegundos, o duration/duracion/tiempo/elapsed en
+segundos), percentiles de latencia a partir de un histograma logarítmico
+(error relativo < 5%) que se puede mezclar entre archivos.
+
+Ejecutar:
+    python log_analyzer.py                      # actualizar y mostrar resumen
+    python log_analyzer.py --since 2026-09-01 --top 30
+    python log_analyzer.py --type app --json resumen.json
+    python log_analyzer.py --reset              # descartar el estado y releer todo
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_LOG_DIR = PROJECT_ROOT / 'backend' / 'logs'
+STATE_NAME = '.log_analytics.json'  # Logger::cleanup() solo borra *.log
+
+LOG_FILE = re.compile(r'^([a-z]+)_(\d{4}-\d{2}-\d{2})\.log$')
+HEADER = re.compile(rb'^\[(\d{4}-\d{2}-\d{2}) (\d{2}):\d{2}:\d{2}\] (?:\[([A-Z]+)\] )?')
+ACTIVITY = re.compile(r'^User ID: (\S*) - Action: (.*)$')
+NUMBER = re.compile(r'\d+')
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+CONTEXT_SEPARATOR = ' | Context: '
+ENDPOINT_KEYS = ('endpoint', 'uri', 'url', 'ruta', 'path')
+SECONDS_KEYS = ('duration', 'duracion', 'tiempo', 'elapsed')
+HEAD_BYTES = 256                      # huella para detectar archivos reemplazados
+HIST_BASE = 1.1                       # ancho relativo de los buckets de latencia
+LOG_HIST_BASE = math.log(HIST_BASE)
+MAX_KEY_LENGTH = 120
+
+
+# ----------------------------------------------------------------------
+# Agregados (dicts JSON: se guardan tal cual en el estado)
+# ----------------------------------------------------------------------
+
+def new_aggregate():
+    return {'records': 0, 'unparsed': 0, 'levels': {}, 'hours': {}, 'keys': {}}
+
+
+def latency_bucket(ms):
+    """Bucket del histograma: 0 para < 1 ms, luego potencias de HIST_BASE"""
+    return 0 if ms < 1 else int(math.log(ms) / LOG_HIST_BASE) + 1
+
+
+def bucket_value(bucket):
+    """Punto medio (geométrico) del bucket, en ms"""
+    return 0.5 if bucket == 0 else HIST_BASE ** (bucket - 0.5)
+
+
+def add_record(agg, day, hour, level, key, latency):
+    agg['records'] += 1
+    agg['levels'][level] = agg['levels'].get(level, 0) + 1
+    is_error = level == 'ERROR'
+    slot = agg['hours'].setdefault(f"{day} {hour}", [0, 0])
+    slot[0] += 1
+    slot[1] += is_error
+    stats = agg['keys'].get(key)
+    if stats is None:
+        stats = agg['keys'][key] = {'count': 0, 'errors': 0, 'warnings': 0, 'hist': {}, 'lat_sum': 0.0, 'lat_max': 0.0}
+    stats['count'] += 1
+    stats['errors'] += is_error
+    stats['warnings'] += level == 'WARNING'
+    if latency is not None:
+        bucket = str(latency_bucket(latency))
+        stats['hist'][bucket] = stats['hist'].get(bucket, 0) + 1
+        stats['lat_sum'] += latency
+        stats['lat_max'] = max(stats['lat_max'], latency)
+
+
+def merge_aggregate(dst, src):
+    dst['records'] += src['records']
+    dst['unparsed'] += src['unparsed']
+    for level, n in src['levels'].items():
+        dst['levels'][level] = dst['levels'].get(level, 0) + n
+    for hour, (total, errors) in src['hours'].items():
+        slot = dst['hours'].setdefault(hour, [0, 0])
+        slot[0] += total
+        slot[1] += errors
+    for key, stats in src['keys'].items():
+        target = dst['keys'].get(key)
+        if target is None:
+            target = dst['keys'][key] = {'count': 0, 'errors': 0, 'warnings': 0, 'hist': {}, 'lat_sum': 0.0, 'lat_max': 0.0}
+        for field in ('count', 'errors', 'warnings', 'lat_sum'):
+            target[field] += stats[field]
+        target['lat_max'] = max(target['lat_max'], stats['lat_max'])
+        for bucket, n in stats['hist'].items():
+            target['hist'][bucket] = target['hist'].get(bucket, 0) + n
+    return dst
+
+
+def percentiles(hist, points=(50, 95, 99)):
+    total = sum(hist.values())
+    if not total:
+        return {}
+    result, seen = {}, 0
+    targets = list(points)
+    for bucket in sorted(hist, key=int):
+        seen += hist[bucket]
+        while targets and seen >= total * targets[0] / 100:
+            result[targets.pop(0)] = bucket_value(int(bucket))
+    return result
+
+
+# ----------------------------------------------------------------------
+# Parseo
+# ----------------------------------------------------------------------
+
+def _endpoint(context):
+    for field in ENDPOINT_KEYS:
+        value = context.get(field)
+        if isinstance(value, str) and value:
+            path = ID_SEGMENT.sub('/:id', value.split('?', 1)[0])
+            method = context.get('method') or context.get('metodo') or ''
+            return f"endpoint:{method.upper()} {path}" if method else f"endpoint:{path}"
+    return None
+
+
+def _latency(context):
+    for field, value in context.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            continue
+        if field.endswith('_ms'):
+            return float(value)
+        if field in SECONDS_KEYS:
+            return float(value) * 1000
+    return None
+
+
+def classify(message, log_type):
+    """(clave, latencia en ms o None) de un registro"""
+    text, _, raw_context = message.partition(CONTEXT_SEPARATOR)
+    context = None
+    if raw_context:
+        try:
+            context = json.loads(raw_context)
+        except ValueError:
+            context = None
+    if not isinstance(context, dict):
+        context = {}
+
+    key = _endpoint(context)
+    if key is None and log_type == 'activity':
+        match = ACTIVITY.match(text)
+        if match:
+            key = f"accion:{match.group(2).strip()}"
+    if key is None:
+        template = NUMBER.sub('N', text.split('\n', 1)[0].split(': ', 1)[0].strip())
+        key = f"mensaje:{template}" if template else 'mensaje:(vacío)'
+    return key[:MAX_KEY_LENGTH], _latency(context)
+
+
+def parse_file(path, offset, log_type):
+    """
+    Tarea del pool: lee path desde offset hasta la última línea completa.
+    Retorna (nuevo offset, agregado). Las líneas sin "[fecha hora]" son la
+    continuación de un mensaje con saltos de línea y se unen al registro anterior.
+    """
+    agg = new_aggregate()
+    default_level = 'ERROR' if log_type == 'database' else 'INFO'
+    pending = None
+
+    def flush():
+        day, hour, level, message = pending
+        key, latency = classify(message.decode('utf-8', 'replace'), log_type)
+        add_record(agg, day, hour, level, key, latency)
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # línea a medio escribir: se lee en la próxima ejecución
+            offset += len(line)
+            line = line.rstrip(b'\r\n')
+            match = HEADER.match(line)
+            if match:
+                if pending:
+                    flush()
+                level = match.group(3).decode() if match.group(3) else default_level
+                pending = [match.group(1).decode(), match.group(2).decode(), level, line[match.end():]]
+            elif pending:
+                pending[3] += b'\n' + line
+            elif line:
+                agg['unparsed'] += 1
+    if pending:
+        flush()
+    return offset, agg
+
+
+def file_head(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Estado
+# ----------------------------------------------------------------------
+
+def load_state(path):
+    if not path.exists():
+        return {'files': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def refresh(log_dir, state, workers):
+    """Lee lo nuevo de cada archivo y actualiza state['files']. Retorna (archivos, bytes leídos)"""
+    jobs = []
+    for entry in sorted(os.scandir(log_dir), key=lambda e: e.name):
+        match = LOG_FILE.match(entry.name)
+        if not match or not entry.is_file():
+            continue
+        size = entry.stat().st_size
+        known = state['files'].get(entry.name)
+        head_len = min(size, HEAD_BYTES)
+        head = file_head(entry.path, head_len)
+        # Un log solo crece: si el tamaño no bajó y el comienzo es el mismo, se sigue desde el offset
+        reset = not (known and known['offset'] <= size
+                     and file_head(entry.path, known['head_len']) == known['head'])
+        if not reset and known['offset'] == size:
+            continue
+        jobs.append((entry.name, entry.path, 0 if reset else known['offset'], match.group(1),
+                     size, head, head_len, reset))
+
+    read_bytes, updated = 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(job, pool.submit(parse_file, job[1], job[2], job[3])) for job in jobs]
+        for (name, _, start, log_type, size, head, head_len, reset), future in futures:
+            offset, agg = future.result()
+            read_bytes += offset - start
+            updated += offset > start or reset
+            known = state['files'].get(name)
+            if known and not reset:
+                agg = merge_aggregate(known['aggregate'], agg)
+            state['files'][name] = {'type': log_type, 'day': LOG_FILE.match(name).group(2), 'offset': offset,
+                                    'size': size, 'head': head, 'head_len': head_len, 'aggregate': agg}
+    return updated, read_bytes
+
+
+def summarize(state, since=None, until=None, log_types=None):
+    total = new_aggregate()
+    for info in state['files'].values():
+        if since and info['day'] < since or until and info['day'] > until:
+            continue
+        if log_types and info['type'] not in log_types:
+            continue
+        merge_aggregate(total, info['aggregate'])
+    return total
+
+
+def key_rows(agg):
+    rows = []
+    for key, stats in agg['keys'].items():
+        row = {'key': key, 'count': stats['count'], 'errors': stats['errors'], 'warnings': stats['warnings'],
+               'error_rate': round(stats['errors'] / stats['count'], 4) if stats['count'] else 0}
+        timed = sum(stats['hist'].values())
+        if timed:
+            row.update({f"p{p}_ms": round(v, 1) for p, v in percentiles(stats['hist']).items()})
+            row['avg_ms'] = round(stats['lat_sum'] / timed, 1)
+            row['max_ms'] = round(stats['lat_max'], 1)
+            row['timed'] = timed
+        rows.append(row)
+    rows.sort(key=lambda r: (-r['count'], r['key']))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen incremental de los logs de Logger.php")
+    parser.add_argument('--log-dir', default=str(DEFAULT_LOG_DIR))
+    parser.add_argument('--state', help=f"Archivo de estado (default <log-dir>/{STATE_NAME})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--since', help="Desde el día YYYY-MM-DD (inclusive)")
+    parser.add_argument('--until', help="Hasta el día YYYY-MM-DD (inclusive)")
+    parser.add_argument('--type', action='append', dest='types', help="app, activity, database (repetible)")
+    parser.add_argument('--top', type=int, default=20, help="Grupos a mostrar")
+    parser.add_argument('--json', help="Guardar el resumen completo en JSON")
+    parser.add_argument('--reset', action='store_true', help="Descartar el estado y releer todos los archivos")
+    args = parser.parse_args()
+
+    log_dir = Path(args.log_dir)
+    if not log_dir.is_dir():
+        print(f"❌ No existe {log_dir}")
+        sys.exit(1)
+    state_path = Path(args.state) if args.state else log_dir / STATE_NAME
+    state = {'files': {}} if args.reset else load_state(state_path)
+
+    start = time.perf_counter()
+    files, read_bytes = refresh(log_dir, state, args.workers)
+    save_state(state_path, state)
+    elapsed = time.perf_counter() - start
+    print(f"📂 {len(state['files'])} archivos de log, {files} con datos nuevos: "
+          f"{read_bytes / 1024 / 1024:.1f} MB leídos en {elapsed:.2f}s")
+
+    agg = summarize(state, args.since, args.until, set(args.types) if args.types else None)
+    if not agg['records']:
+        print("ℹ️  No hay registros en el rango pedido")
+        return
+    rows = key_rows(agg)
+    errors = agg['levels'].get('ERROR', 0)
+    print(f"\n📊 {agg['records']} registros, {errors} errores ({100 * errors / agg['records']:.1f}%)"
+          + (f", {agg['unparsed']} líneas sin formato" if agg['unparsed'] else ''))
+    print("   " + ", ".join(f"{level}: {n}" for level, n in sorted(agg['levels'].items(), key=lambda x: -x[1])))
+
+    print(f"\n{'grupo':<60} {'total':>8} {'errores':>8} {'%err':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows[:args.top]:
+        lat = [f"{row[f'p{p}_ms']:>8.1f}" if f"p{p}_ms" in row else f"{'-':>8}" for p in (50, 95, 99)]
+        print(f"{row['key'][:60]:<60} {row['count']:>8} {row['errors']:>8} {100 * row['error_rate']:>5.1f}% "
+              + " ".join(lat))
+
+    busiest = sorted(agg['hours'].items(), key=lambda x: -x[1][1])[:5]
+    if busiest and busiest[0][1][1]:
+        print("\n🔥 Horas con más errores:")
+        for hour, (total, hour_errors) in busiest:
+            if hour_errors:
+                print(f"   {hour}:00  {hour_errors} errores de {total} registros")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'records': agg['records'], 'unparsed': agg['unparsed'], 'levels': agg['levels'],
+                       'hours': dict(sorted(agg['hours'].items())), 'groups': rows}, f, indent=1, ensure_ascii=False)
+        print(f"\n💾 Resumen guardado en {args.json}")
+
+
+if __name__ == '__main__':
+    main()
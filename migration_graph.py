@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Grafo de dependencias entre migraciones y ejecutor paralelo
+
+Analiza cada archivo de db/migrations (CREATE TABLE, ALTER, FOREIGN KEY,
+triggers, vistas, INSERT/UPDATE...) para saber cómo toca cada tabla. Dos
+archivos quedan ordenados (en el orden de MIGRATION_ORDER) solo si acceden
+a una misma tabla de forma conflictiva; el resto se aplica en paralelo
+sobre un pool acotado de conexiones.
+
+Ejecutar:
+    python migration_graph.py                  # muestra el plan por niveles
+    python run_migration.py --all --parallel 4 # aplica usando el grafo
+"""
+
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from migration_ledger import list_migrations, migration_key
+from sql_splitter import iter_file_statements
+
+# Esquemas del sistema: no son dependencias entre migraciones
+SYSTEM_SCHEMAS = {'information_schema', 'performance_schema', 'mysql', 'sys'}
+
+# Palabras que pueden seguir a FROM/INTO/TABLE sin ser una tabla
+_KEYWORDS = {'if', 'not', 'exists', 'select', 'dual', 'values', 'set', 'ignore', 'as'}
+
+_LITERALS = re.compile(r"""'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*\"""", re.S)
+
+_NAME = r'((?:`[^`]+`|\w+)(?:\s*\.\s*(?:`[^`]+`|\w+))?)'
+
+# Tipos de acceso a una tabla
+SCHEMA = 'schema'    # CREATE/ALTER/DROP/RENAME/índices
+DATA = 'data'        # INSERT/UPDATE/DELETE
+TRIGGER = 'trigger'  # CREATE TRIGGER ... ON tabla
+READ = 'read'        # FOREIGN KEY, FROM/JOIN, cuerpos de vistas y triggers
+
+# Sentencia principal -> (tipo de acceso, regex de la tabla afectada)
+_HEAD_PATTERNS = [
+    (SCHEMA, re.compile(r'^CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?' + _NAME, re.I)),
+    (SCHEMA, re.compile(r'^CREATE\s+(?:OR\s+REPLACE\s+)?(?:ALGORITHM\s*=\s*\w+\s+)?'
+                        r'(?:DEFINER\s*=\s*\S+\s+)?(?:SQL\s+SECURITY\s+\w+\s+)?VIEW\s+' + _NAME, re.I)),
+    (TRIGGER, re.compile(r'^CREATE\s+(?:DEFINER\s*=\s*\S+\s+)?TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?\S+\s+'
+                         r'(?:BEFORE|AFTER)\s+(?:INSERT|UPDATE|DELETE)\s+ON\s+' + _NAME, re.I)),
+    (SCHEMA, re.compile(r'^CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX\s+\S+\s+ON\s+' + _NAME, re.I)),
+    (SCHEMA, re.compile(r'^ALTER\s+(?:IGNORE\s+)?TABLE\s+' + _NAME, re.I)),
+    (SCHEMA, re.compile(r'^TRUNCATE\s+(?:TABLE\s+)?' + _NAME, re.I)),
+    (DATA, re.compile(r'^(?:INSERT|REPLACE)\s+(?:LOW_PRIORITY\s+|DELAYED\s+|HIGH_PRIORITY\s+)?'
+                      r'(?:IGNORE\s+)?(?:INTO\s+)?' + _NAME, re.I)),
+    (DATA, re.compile(r'^UPDATE\s+(?:LOW_PRIORITY\s+)?(?:IGNORE\s+)?' + _NAME, re.I)),
+    (DATA, re.compile(r'^DELETE\s+(?:LOW_PRIORITY\s+)?(?:QUICK\s+)?(?:IGNORE\s+)?FROM\s+' + _NAME, re.I)),
+]
+
+_DROP_TABLES = re.compile(r'^DROP\s+(?:TEMPORARY\s+)?(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?(.+)$', re.I | re.S)
+_RENAME_TABLES = re.compile(r'^RENAME\s+TABLE\s+(.+)$', re.I | re.S)
+
+# Cualquier parte de la sentencia -> tablas que lee (o de las que depende)
+_READ_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|REFERENCES|INTO|UPDATE|TABLE)\s+' + _NAME, re.I
+)
+
+
+def _table_name(raw):
+    """Nombre de tabla sin comillas ni esquema; None si es del sistema"""
+    parts = [p.strip().strip('`').lower() for p in raw.split('.')]
+    if len(parts) == 2:
+        if parts[0] in SYSTEM_SCHEMAS:
+            return None
+        return parts[1]
+    if not re.match(r'^[a-z_]', parts[0]) or parts[0] in _KEYWORDS:
+        return None
+    return parts[0]
+
+
+def _add(access, table, kind):
+    if table is not None:
+        access.setdefault(table, set()).add(kind)
+
+
+def statement_tables(sql):
+    """Accesos de una sentencia: {tabla: {tipos de acceso}}"""
+    text = _LITERALS.sub("''", sql)
+    access = {}
+
+    for kind, pattern in _HEAD_PATTERNS:
+        m = pattern.match(text)
+        if m:
+            _add(access, _table_name(m.group(1)), kind)
+            break
+    else:
+        m = _DROP_TABLES.match(text)
+        if m:
+            for name in m.group(1).split(','):
+                _add(access, _table_name(name), SCHEMA)
+        m = _RENAME_TABLES.match(text)
+        if m:
+            for pair in m.group(1).split(','):
+                for name in re.split(r'\s+TO\s+', pair.strip(), flags=re.I):
+                    _add(access, _table_name(name), SCHEMA)
+
+    for m in _READ_PATTERN.finditer(text):
+        table = _table_name(m.group(1))
+        if table is not None and table not in access:
+            _add(access, table, READ)
+    return access
+
+
+def file_tables(path):
+    """Accesos de todo un archivo: {tabla: {tipos de acceso}}"""
+    access = {}
+    for statement in iter_file_statements(path):
+        for table, kinds in statement_tables(statement.text).items():
+            access.setdefault(table, set()).update(kinds)
+    return access
+
+
+def conflicts(a, b):
+    """Dos conjuntos de accesos a la misma tabla obligan a respetar el orden"""
+    if SCHEMA in a or SCHEMA in b:
+        return True
+    if DATA in a or DATA in b:
+        # Datos contra datos, lecturas o triggers (que deben existir antes del INSERT)
+        return True
+    # Solo quedan triggers y lecturas: dos triggers sobre la misma tabla chocan
+    return TRIGGER in a and TRIGGER in b
+
+
+def build_graph(paths):
+    """
+    Construye el DAG: {archivo: conjunto de archivos de los que depende}.
+
+    paths debe venir en orden de aplicación; una arista A -> B (A antes que
+    B) existe cuando ambos tocan una misma tabla de forma conflictiva (ver
+    conflicts); dos archivos que solo leen una tabla no se ordenan.
+    """
+    paths = [Path(p) for p in paths]
+    tables = {path: file_tables(path) for path in paths}
+    depends = {path: set() for path in paths}
+
+    for j, later in enumerate(paths):
+        for earlier in paths[:j]:
+            shared = tables[earlier].keys() & tables[later].keys()
+            if any(conflicts(tables[earlier][t], tables[later][t]) for t in shared):
+                depends[later].add(earlier)
+    return depends, tables
+
+
+def graph_levels(depends):
+    """Agrupa los archivos por nivel: cada nivel solo depende de los anteriores"""
+    level = {}
+    for path in depends:  # depends conserva el orden de aplicación
+        level[path] = 1 + max((level[d] for d in depends[path]), default=-1)
+    levels = {}
+    for path, n in level.items():
+        levels.setdefault(n, []).append(path)
+    return [levels[n] for n in sorted(levels)]
+
+
+def run_parallel(paths, workers=4, batch=False, batch_size=None, use_ledger=True, force=False,
+                 online=False, profile=None):
+    """
+    Aplica los archivos respetando el DAG con hasta `workers` conexiones.
+
+    Cada hilo usa su propia conexión; el reporte de cada archivo se imprime
+    completo al terminar para que no se mezcle con el de otros hilos. Si un
+    archivo falla, sus dependientes (directos e indirectos) no se ejecutan.
+    Con profile (MigrationProfile) cada hilo registra sus sentencias y los
+    snapshots de performance_schema se toman en una conexión aparte.
+    """
+    from db_pool import DB_CONFIG
+    from run_migration import BATCH_MAX_STATEMENTS, apply_file, open_connection
+    from migration_ledger import ensure_ledger, load_ledger
+
+    if batch_size is None:
+        batch_size = BATCH_MAX_STATEMENTS
+
+    depends, _ = build_graph(paths)
+    pending = {path: set(deps) for path, deps in depends.items()}
+    dependents = {path: [] for path in depends}
+    for path, deps in depends.items():
+        for dep in deps:
+            dependents[dep].append(path)
+
+    print(f"🔌 Conectando a {DB_CONFIG['host']}:{DB_CONFIG['port']} ({workers} conexiones)...")
+    ledger = None
+    if use_ledger:
+        connection = open_connection(autocommit=True)
+        try:
+            with connection.cursor() as cursor:
+                ensure_ledger(cursor, DB_CONFIG['database'])
+                ledger = load_ledger(cursor, DB_CONFIG['database'])
+        finally:
+            connection.close()
+
+    observer = None
+    if profile is not None:
+        observer = open_connection(autocommit=True)
+        profile.begin(observer)
+
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+    print_lock = threading.Lock()
+
+    def worker(path):
+        if not hasattr(local, 'connection'):
+            local.connection = open_connection(batch=batch, autocommit=use_ledger)
+            with connections_lock:
+                connections.append(local.connection)
+        lines = []
+        try:
+            with local.connection.cursor() as cursor:
+                ok = apply_file(local.connection, cursor, path, ledger=ledger, batch=batch,
+                                batch_size=batch_size, force=force, verbose=False,
+                                log=lines.append, online=online, profile=profile)
+        except Exception as e:
+            lines.append(f"  ❌ {e}")
+            ok = False
+        with print_lock:
+            print(f"\n=== {migration_key(path)} ===")
+            for line in lines:
+                print(line.lstrip('\n'))
+        return ok
+
+    failed, skipped, done = [], [], []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            ready = [p for p in depends if not pending[p]]
+            while ready or running:
+                for path in ready:
+                    running[pool.submit(worker, path)] = path
+                ready = []
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    if future.result():
+                        done.append(path)
+                        for child in dependents[path]:
+                            pending[child].discard(path)
+                            if not pending[child] and child not in skipped:
+                                ready.append(child)
+                    else:
+                        failed.append(path)
+                        # Descartar todo lo que depende del archivo fallido
+                        stack = list(dependents[path])
+                        while stack:
+                            child = stack.pop()
+                            if child not in skipped:
+                                skipped.append(child)
+                                stack.extend(dependents[child])
+                ready = [p for p in depends if p in ready]  # orden estable
+    finally:
+        for connection in connections:
+            connection.close()
+        if observer is not None:
+            profile.end(observer)
+            observer.close()
+
+    print(f"\n📊 Resumen paralelo:")
+    print(f"  ✅ Aplicados: {len(done)}/{len(depends)}")
+    if failed:
+        print(f"  ❌ Fallidos: {', '.join(p.name for p in failed)}")
+    if skipped:
+        print(f"  ⏭️  No ejecutados por dependencias: {', '.join(p.name for p in skipped)}")
+    return not failed and not skipped
+
+
+def main():
+    paths = [Path(p) for p in sys.argv[1:]] or list_migrations()
+    depends, tables = build_graph(paths)
+
+    print(f"📊 {len(paths)} migraciones")
+    for n, level in enumerate(graph_levels(depends), 1):
+        print(f"\nNivel {n} ({len(level)} en paralelo):")
+        for path in level:
+            deps = ', '.join(sorted(d.name for d in depends[path])) or '-'
+            writes = ', '.join(sorted(t for t, kinds in tables[path].items() if kinds != {READ})) or '-'
+            print(f"  - {path.name}")
+            print(f"      escribe: {writes}")
+            print(f"      depende de: {deps}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Registro de migraciones aplicadas (tabla schema_migrations)
+
+Cada archivo .sql tiene una fila con su checksum SHA-256 y el número de
+sentencias ya aplicadas. run_migration.py usa este registro para:
+
+  - Saltar, sin ejecutar nada, los archivos ya aplicados con el mismo checksum
+  - Reanudar un archivo a partir de la primera sentencia que no se aplicó
+  - Detectar archivos modificados después de haberse aplicado
+"""
+
+import hashlib
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+MIGRATIONS_DIR = PROJECT_ROOT / 'db' / 'migrations'
+
+LEDGER_TABLE = 'schema_migrations'
+
+# Orden de aplicación para un entorno nuevo (las tablas base como usuarios
+# vienen del dump db/formacion_empresarial.sql)
+MIGRATION_ORDER = [
+    'fase_2a_cursos_basico.sql',
+    'fase_2b_evaluaciones.sql',
+    'fase_3_diagnosticos.sql',
+    'create_diagnosticos_tables.sql',
+    'fix_diagnosticos_schema.sql',
+    'fase_4_gamificacion.sql',
+    'fase_5a_productos.sql',
+    'fase_5b_mentoria.sql',
+    'fase_6_biblioteca_recursos.sql',
+    'fase_6b_versionado_recursos.sql',
+    'fix_recursos_schema.sql',
+    'fase_onboarding.sql',
+    'add_extended_curso_fields.sql',
+    'fix_onboarding_courses.sql',
+    'fix_onboarding_courses_v2.sql',
+    'add_privacy_settings.sql',
+    'add_privacy_simple.sql',
+    'update_privacy_defaults.sql',
+    'add_instructor_user.sql',
+    '007_configuracion_sistema.sql',
+]
+
+# Scripts manuales que --all no ejecuta (se pueden correr individualmente):
+# limpieza destructiva, renombrado único de producción, un duplicado y el
+# reemplazo de triggers de recursos generado por bench_triggers.py
+MANUAL_MIGRATIONS = {
+    'fase_5a_productos_clean.sql',
+    'rename_tables_fix.sql',
+    'migration_single_line.sql',
+    'recursos_contadores_incrementales.sql',
+}
+
+ESTADO_PARCIAL = 'parcial'
+ESTADO_APLICADA = 'aplicada'
+ESTADO_FALLIDA = 'fallida'
+
+
+def list_migrations():
+    """Archivos de db/migrations en orden; los nuevos van al final por nombre"""
+    available = {p.name: p for p in MIGRATIONS_DIR.glob('*.sql')}
+    ordered = [available.pop(name) for name in MIGRATION_ORDER if name in available]
+    for name in sorted(available):
+        if name not in MANUAL_MIGRATIONS:
+            ordered.append(available[name])
+    return ordered
+
+
+def migration_key(path):
+    """Identificador estable del archivo: ruta relativa a la raíz del proyecto"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_checksum(path):
+    """SHA-256 del archivo, leído en bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ledger_table(database):
+    return f"`{database}`.`{LEDGER_TABLE}`"
+
+
+def ensure_ledger(cursor, database):
+    """Crea la tabla de registro si no existe"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ledger_table(database)} (
+            archivo VARCHAR(255) NOT NULL PRIMARY KEY,
+            checksum CHAR(64) NOT NULL,
+            sentencias_aplicadas INT NOT NULL DEFAULT 0,
+            total_sentencias INT NULL,
+            estado ENUM('parcial', 'aplicada', 'fallida') NOT NULL DEFAULT 'parcial',
+            ultimo_error TEXT NULL,
+            fecha_inicio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB COMMENT='Registro de migraciones aplicadas por run_migration.py'
+    """)
+
+
+def load_ledger(cursor, database):
+    """Todas las filas del registro en un solo query: {archivo: fila}"""
+    cursor.execute(
+        f"SELECT archivo, checksum, sentencias_aplicadas, total_sentencias, estado "
+        f"FROM {ledger_table(database)}"
+    )
+    return {
+        row[0]: {
+            'checksum': row[1],
+            'sentencias_aplicadas': row[2],
+            'total_sentencias': row[3],
+            'estado': row[4],
+        }
+        for row in cursor.fetchall()
+    }
+
+
+def start_entry(cursor, database, archivo, checksum, resume_from):
+    """Registra el inicio (o la reanudación) de un archivo"""
+    cursor.execute(
+        f"INSERT INTO {ledger_table(database)} (archivo, checksum, sentencias_aplicadas, estado) "
+        f"VALUES (%s, %s, %s, %s) "
+        f"ON DUPLICATE KEY UPDATE checksum = VALUES(checksum), "
+        f"sentencias_aplicadas = VALUES(sentencias_aplicadas), estado = VALUES(estado), "
+        f"ultimo_error = NULL",
+        (archivo, checksum, resume_from, ESTADO_PARCIAL)
+    )
+
+
+def checkpoint_sql(connection, database, archivo, applied):
+    """UPDATE de avance, listo para viajar dentro de un paquete multi-sentencia"""
+    return (
+        f"UPDATE {ledger_table(database)} SET sentencias_aplicadas = {int(applied)} "
+        f"WHERE archivo = {connection.escape(archivo)}"
+    )
+
+
+def finish_entry(cursor, database, archivo, applied, total, estado, error=None):
+    """Guarda el resultado final del archivo"""
+    cursor.execute(
+        f"UPDATE {ledger_table(database)} SET sentencias_aplicadas = %s, total_sentencias = %s, "
+        f"estado = %s, ultimo_error = %s WHERE archivo = %s",
+        (applied, total, estado, error, archivo)
+    )
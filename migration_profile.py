@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Perfil de ejecución de migraciones (tiempos, filas, warnings y locks)
+
+run_migration.py --profile registra, para cada sentencia (o cada paquete en
+modo --batch): tiempo de reloj, filas afectadas, warnings (con el texto de
+SHOW WARNINGS) y, si performance_schema está disponible, el tiempo de espera
+de locks y las filas examinadas según events_statements_history del propio
+hilo. Con --perf-schema además toma un snapshot de los digests de
+sentencias y de las esperas de metadata locks antes y después de la
+ejecución y reporta la diferencia. En un paquete el cliente solo ve el
+resultado de la última sentencia (el checkpoint): filas y warnings salen
+del historial, y sin él quedan en None.
+
+El resultado es un reporte JSON (migration_profiles/) y un resumen con las
+N sentencias más lentas para diagnosticar y presupuestar migraciones.
+
+Ejecutar:
+    python run_migration.py --all --profile --top 15
+    python run_migration.py archivo.sql --profile reporte.json --perf-schema
+    python migration_profile.py migration_profiles/perfil_20250101_120000.json --top 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pymysql
+
+from migration_ledger import PROJECT_ROOT, migration_key
+
+PROFILES_DIR = PROJECT_ROOT / 'migration_profiles'
+DEFAULT_TOP = 10
+MAX_WARNINGS = 20
+SQL_SUMMARY = 160
+PICOSECONDS = 1e12
+
+THREAD_QUERY = """
+    SELECT t.THREAD_ID, c.ENABLED
+    FROM performance_schema.threads t
+    JOIN performance_schema.setup_consumers c ON c.NAME = 'events_statements_history'
+    WHERE t.PROCESSLIST_ID = CONNECTION_ID()
+"""
+
+HISTORY_QUERY = """
+    SELECT EVENT_NAME, TIMER_WAIT, LOCK_TIME, ROWS_AFFECTED, ROWS_EXAMINED, ROWS_SENT, WARNINGS
+    FROM performance_schema.events_statements_history
+    WHERE THREAD_ID = %s
+    ORDER BY EVENT_ID DESC
+    LIMIT %s
+"""
+
+DIGEST_QUERY = """
+    SELECT DIGEST, DIGEST_TEXT, COUNT_STAR, SUM_TIMER_WAIT, SUM_LOCK_TIME,
+           SUM_ROWS_AFFECTED, SUM_ROWS_EXAMINED, SUM_WARNINGS, SUM_ERRORS
+    FROM performance_schema.events_statements_summary_by_digest
+    WHERE SCHEMA_NAME = DATABASE()
+"""
+
+WAITS_QUERY = """
+    SELECT i.NAME, i.ENABLED, w.COUNT_STAR, w.SUM_TIMER_WAIT
+    FROM performance_schema.setup_instruments i
+    JOIN performance_schema.events_waits_summary_global_by_event_name w ON w.EVENT_NAME = i.NAME
+    WHERE i.NAME IN ('wait/lock/metadata/sql/mdl', 'wait/lock/table/sql/handler')
+"""
+
+
+# Segunda palabra que forma parte del tipo: CREATE TABLE, DROP TRIGGER...
+KIND_OBJECTS = {'TABLE', 'INDEX', 'UNIQUE', 'FULLTEXT', 'TRIGGER', 'VIEW', 'PROCEDURE', 'FUNCTION',
+                'EVENT', 'DATABASE', 'SCHEMA', 'TEMPORARY', 'OR'}
+
+
+def statement_kind(sql):
+    """Tipo de sentencia para agrupar: INSERT, UPDATE, CREATE TABLE, ALTER TABLE..."""
+    words = sql.split(None, 2)[:2]
+    if len(words) == 2 and words[1].upper() in KIND_OBJECTS:
+        return ' '.join(words).upper()
+    return words[0].upper() if words else '?'
+
+
+def summarize(sql):
+    text = ' '.join(sql.split())
+    return text if len(text) <= SQL_SUMMARY else text[:SQL_SUMMARY - 3] + '...'
+
+
+def _warning_count(cursor):
+    # PyMySQL solo expone el contador del paquete OK en el resultado crudo
+    result = getattr(cursor, '_result', None)
+    return getattr(result, 'warning_count', 0) or 0
+
+
+class StatementProfiler:
+    """Mediciones de las sentencias de un archivo sobre una conexión"""
+
+    def __init__(self, connection, sql_file):
+        self.file = migration_key(sql_file)
+        self.entries = []
+        self.round_trips = 0
+        self.thread_id = None
+        self.started = time.perf_counter()
+        self.seconds = None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(THREAD_QUERY)
+                row = cursor.fetchone()
+            self.round_trips += 1
+            if row and row[1] == 'YES':
+                self.thread_id = row[0]
+        except pymysql.Error:
+            pass  # Sin performance_schema o sin permisos: solo métricas del cliente
+
+    def record(self, cursor, statements, seconds, error=None, server=True, trailing=0):
+        """
+        Registra una sentencia o un paquete: statements es una lista de
+        (número, Statement). trailing: sentencias ejecutadas después de las
+        registradas (el checkpoint al final de un paquete). server=False
+        omite events_statements_history (ALTER en línea, que ejecuta muchas
+        sentencias propias).
+        """
+        # En un paquete el rowcount y los warnings del cliente son de la última
+        # sentencia (el checkpoint si lo hay), no del paquete
+        packet = len(statements) > 1 or trailing > 0
+        if packet:
+            rows = warnings = None
+        else:
+            rows = cursor.rowcount if error is None and cursor.rowcount >= 0 else None
+            warnings = 0 if error is not None else _warning_count(cursor)
+        messages = []
+        if warnings:
+            cursor.execute("SHOW WARNINGS")
+            self.round_trips += 1
+            messages = [f"{level} {code}: {message}" for level, code, message in cursor.fetchall()]
+
+        lock_seconds = rows_examined = note = None
+        if server and self.thread_id is not None:
+            history = self._history(cursor, len(statements), trailing, skip_show=bool(warnings))
+            if history is not None and len(history) < len(statements):
+                # El historial por hilo guarda pocas filas (10 por defecto): un paquete
+                # grande lo desborda y las sumas quedarían cortas
+                note = (f"historial parcial: {len(history)} de {len(statements)} sentencias "
+                        f"(performance_schema_events_statements_history_size)")
+            elif history:
+                lock_seconds = sum(h['lock'] for h in history)
+                rows_examined = sum(h['examined'] for h in history)
+                if packet:
+                    rows = sum(h['affected'] for h in history)
+                    warnings = sum(h['warnings'] for h in history)
+        if packet and rows is None and note is None:
+            note = "sin historial de performance_schema: filas y warnings del paquete no disponibles"
+
+        first = statements[0][1]
+        entry = {
+            'file': self.file,
+            'statements': [i for i, _ in statements],
+            'line': first.line,
+            'kind': statement_kind(first.text),
+            'sql': summarize(first.text) if len(statements) == 1 else
+                   f"(paquete de {len(statements)}) {summarize(first.text)}",
+            'seconds': round(seconds, 6),
+            'rows': rows,
+            'rows_examined': rows_examined,
+            'lock_seconds': None if lock_seconds is None else round(lock_seconds, 6),
+            'warnings': warnings,
+            'warning_messages': messages[:MAX_WARNINGS],
+            'error': None if error is None else str(error),
+            'note': note,
+        }
+        self.entries.append(entry)
+        return entry
+
+    def _history(self, cursor, count, trailing, skip_show):
+        """
+        Las `count` sentencias del hilo previas a las `trailing` últimas, en
+        orden (menos de `count` si el historial ya las descartó), o None si
+        performance_schema no está disponible.
+        """
+        try:
+            cursor.execute(HISTORY_QUERY, (self.thread_id, count + trailing + skip_show))
+            self.round_trips += 1
+            rows = cursor.fetchall()
+        except pymysql.Error:
+            self.thread_id = None
+            return None
+        history = [
+            {'lock': lock / PICOSECONDS, 'examined': examined, 'affected': affected, 'warnings': warns}
+            for name, _, lock, affected, examined, _, warns in reversed(rows)
+            if name != 'statement/sql/show_warnings'
+        ]
+        return history[:max(len(history) - trailing, 0)]
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    def to_dict(self):
+        return {
+            'file': self.file,
+            'seconds': None if self.seconds is None else round(self.seconds, 3),
+            'profiler_round_trips': self.round_trips,
+            'performance_schema': self.thread_id is not None,
+            'statements': self.entries,
+        }
+
+
+class MigrationProfile:
+    """Perfil de una ejecución completa (uno o varios archivos, uno o varios hilos)"""
+
+    def __init__(self, perf_schema=False, host=None):
+        self.perf_schema = perf_schema
+        self.host = host
+        self.started = datetime.now()
+        self.files = []
+        self.before = None
+        self.after = None
+        self._lock = threading.Lock()
+
+    def for_file(self, connection, sql_file):
+        profiler = StatementProfiler(connection, sql_file)
+        with self._lock:
+            self.files.append(profiler)
+        return profiler
+
+    def begin(self, connection):
+        if self.perf_schema:
+            self.before = take_perf_snapshot(connection)
+
+    def end(self, connection):
+        if self.perf_schema:
+            self.after = take_perf_snapshot(connection)
+
+    def statements(self):
+        return [entry for profiler in self.files for entry in profiler.entries]
+
+    def to_dict(self, top=DEFAULT_TOP):
+        entries = self.statements()
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'host': self.host,
+            'total_seconds': round(sum(e['seconds'] for e in entries), 3),
+            'lock_seconds': round(sum(e['lock_seconds'] or 0 for e in entries), 3),
+            'warnings': sum(e['warnings'] or 0 for e in entries),
+            'errors': sum(e['error'] is not None for e in entries),
+            'slowest': slowest(entries, top),
+            'by_kind': by_kind(entries),
+            'files': [profiler.to_dict() for profiler in self.files],
+            'perf_schema': perf_delta(self.before, self.after, top) if self.perf_schema else None,
+        }
+
+    def save(self, path=None, top=DEFAULT_TOP):
+        if path is None:
+            PROFILES_DIR.mkdir(exist_ok=True)
+            path = PROFILES_DIR / f"perfil_{self.started:%Y%m%d_%H%M%S}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(top), f, ensure_ascii=False, indent=1, default=str)
+        return path
+
+
+# ----------------------------------------------------------------------
+# performance_schema: digests y esperas de locks
+# ----------------------------------------------------------------------
+
+def take_perf_snapshot(connection):
+    """Contadores acumulados de digests (base actual) y esperas de locks"""
+    snapshot = {'digests': {}, 'waits': {}, 'error': None}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(DIGEST_QUERY)
+            for digest, text, count, timer, lock, affected, examined, warnings, errors in cursor.fetchall():
+                if text and 'performance_schema' in text:
+                    continue  # Consultas del propio perfil
+                snapshot['digests'][digest] = {
+                    'text': text, 'count': count, 'seconds': timer / PICOSECONDS,
+                    'lock_seconds': lock / PICOSECONDS, 'rows_affected': affected,
+                    'rows_examined': examined, 'warnings': warnings, 'errors': errors,
+                }
+            cursor.execute(WAITS_QUERY)
+            for name, enabled, count, timer in cursor.fetchall():
+                snapshot['waits'][name] = {'enabled': enabled == 'YES', 'count': count,
+                                           'seconds': timer / PICOSECONDS}
+    except pymysql.Error as e:
+        snapshot['error'] = str(e)
+    return snapshot
+
+
+def perf_delta(before, after, top=DEFAULT_TOP):
+    """Diferencia entre dos snapshots: digests más costosos y esperas nuevas"""
+    if not before or not after or before['error'] or after['error']:
+        return {'error': (before or {}).get('error') or (after or {}).get('error') or 'sin snapshot'}
+    digests = []
+    for digest, now in after['digests'].items():
+        prev = before['digests'].get(digest)
+        count = now['count'] - (prev['count'] if prev else 0)
+        if count <= 0:
+            continue
+        delta = {'digest': digest, 'text': summarize(now['text'] or ''), 'count': count}
+        for key in ('seconds', 'lock_seconds', 'rows_affected', 'rows_examined', 'warnings', 'errors'):
+            delta[key] = now[key] - (prev[key] if prev else 0)
+        digests.append(delta)
+    digests.sort(key=lambda d: -d['seconds'])
+    waits = {}
+    for name, now in after['waits'].items():
+        prev = before['waits'].get(name, {'count': 0, 'seconds': 0})
+        waits[name] = {'enabled': now['enabled'], 'count': now['count'] - prev['count'],
+                       'seconds': round(now['seconds'] - prev['seconds'], 6)}
+    return {'digests': digests[:top], 'waits': waits}
+
+
+# ----------------------------------------------------------------------
+# Resumen
+# ----------------------------------------------------------------------
+
+def slowest(entries, top=DEFAULT_TOP):
+    return sorted(entries, key=lambda e: -e['seconds'])[:top]
+
+
+def by_kind(entries):
+    kinds = {}
+    for e in entries:
+        k = kinds.setdefault(e['kind'], {'count': 0, 'seconds': 0.0, 'lock_seconds': 0.0})
+        k['count'] += 1
+        k['seconds'] += e['seconds']
+        k['lock_seconds'] += e['lock_seconds'] or 0
+    return {kind: {key: round(v, 3) if isinstance(v, float) else v for key, v in k.items()}
+            for kind, k in sorted(kinds.items(), key=lambda item: -item[1]['seconds'])}
+
+
+def format_summary(report, top=DEFAULT_TOP):
+    """Líneas del resumen: totales, top N más lentas y, si hay, performance_schema"""
+    lines = [
+        f"\n⏱️  Perfil: {report['total_seconds']:.2f}s en sentencias, "
+        f"{report['lock_seconds']:.2f}s esperando locks, {report['warnings']} warnings, "
+        f"{report['errors']} errores",
+        f"\n🐢 Top {top} sentencias más lentas:",
+    ]
+    for e in report['slowest'][:top]:
+        lock = '-' if e['lock_seconds'] is None else f"{e['lock_seconds']:.3f}s"
+        rows = '-' if e['rows'] is None else e['rows']
+        warnings = '-' if e['warnings'] is None else e['warnings']
+        lines.append(f"  {e['seconds']:8.3f}s  lock {lock:>8}  filas {rows!s:>7}  warn {warnings!s:>3}  "
+                     f"{e['file']}:{e['line']}")
+        lines.append(f"             {e['sql'][:100]}")
+        for message in e['warning_messages'][:3]:
+            lines.append(f"             ⚠️  {message}")
+        if e['error']:
+            lines.append(f"             ❌ {e['error']}")
+        if e.get('note'):
+            lines.append(f"             ℹ️  {e['note']}")
+
+    if report['by_kind']:
+        lines.append("\n📊 Por tipo de sentencia:")
+        for kind, k in report['by_kind'].items():
+            lines.append(f"  {kind:<24} {k['count']:>5}  {k['seconds']:8.2f}s  lock {k['lock_seconds']:.2f}s")
+
+    perf = report.get('perf_schema')
+    if perf:
+        if 'error' in perf:
+            lines.append(f"\n⚠️  performance_schema no disponible: {perf['error']}")
+        else:
+            lines.append("\n🔎 performance_schema (diferencia antes/después):")
+            for name, w in perf['waits'].items():
+                state = '' if w['enabled'] else ' (instrumento deshabilitado)'
+                lines.append(f"  {name}: {w['count']} esperas, {w['seconds']:.3f}s{state}")
+            for d in perf['digests'][:top]:
+                lines.append(f"  {d['seconds']:8.3f}s  x{d['count']:<5} lock {d['lock_seconds']:.3f}s  {d['text'][:90]}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Muestra el resumen de un reporte de perfil de migración")
+    parser.add_argument('report', help="Archivo JSON generado por run_migration.py --profile")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    args = parser.parse_args()
+
+    with open(args.report, encoding='utf-8') as f:
+        report = json.load(f)
+    # El reporte guarda su propio top; se recalcula desde todas las sentencias
+    report['slowest'] = slowest([e for file in report['files'] for e in file['statements']], args.top)
+    if report.get('perf_schema') and 'digests' in report['perf_schema']:
+        report['perf_schema']['digests'] = report['perf_schema']['digests'][:args.top]
+    for line in format_summary(report, args.top):
+        print(line)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
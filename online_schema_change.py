@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+ALTER TABLE en línea para tablas grandes
+
+Intenta primero los algoritmos nativos que no bloquean escrituras y, si el
+servidor no los soporta para ese cambio, usa una copia en tabla sombra:
+
+  1. ALGORITHM=INSTANT               (solo metadatos, MySQL 8.0+)
+  2. ALGORITHM=INPLACE, LOCK=NONE    (reconstrucción en línea)
+  3. Copia en sombra (estilo pt-online-schema-change):
+     - CREATE TABLE _tabla_new con la definición actual + el ALTER
+     - Triggers AFTER INSERT/UPDATE/DELETE que replican los cambios
+       concurrentes a la tabla sombra
+     - Copia por rangos de PRIMARY KEY, con tamaño de chunk adaptativo y
+       pausas cuando el servidor está cargado
+     - RENAME TABLE atómico: tabla -> _tabla_old, _tabla_new -> tabla
+
+Limitaciones de la copia en sombra: la tabla necesita PRIMARY KEY, no puede
+ser referenciada por FOREIGN KEYs de otras tablas, los renombres de columna
+no se mapean (las columnas nuevas toman su DEFAULT) y las FOREIGN KEYs
+propias quedan con el prefijo '_' en el nombre de la restricción.
+
+Ejecutar:
+    python online_schema_change.py productos_vitrina "MODIFY COLUMN estado ENUM(...) NOT NULL"
+    python online_schema_change.py recursos_aprendizaje "ADD COLUMN idioma VARCHAR(5)" --dry-run
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import pymysql
+
+# Errores que indican que el algoritmo pedido no aplica a este cambio
+UNSUPPORTED_ALGORITHM_ERRORS = (1235, 1845, 1846)
+# Error de sintaxis justo en INSTANT: el servidor no conoce ALGORITHM=INSTANT
+# (MySQL 5.7, MariaDB < 10.3). Cualquier otro 1064 es un spec mal escrito.
+PARSE_ERROR = 1064
+UNKNOWN_INSTANT = re.compile(r"near 'INSTANT\b", re.I)
+
+LOCK_WAIT_TIMEOUT_ERROR = 1205
+DDL_RETRIES = 3
+
+MIN_CHUNK = 100
+MAX_CHUNK = 50000
+
+ALTER_TABLE = re.compile(r'^ALTER\s+(?:ONLINE\s+)?TABLE\s+(`[^`]+`|\w+)\s+(.+)$', re.I | re.S)
+
+
+def parse_alter(sql):
+    """Separa 'ALTER TABLE tabla especificación' en (tabla, especificación)"""
+    m = ALTER_TABLE.match(sql.strip())
+    if not m:
+        return None
+    return m.group(1).strip('`'), m.group(2).strip()
+
+
+def _quote(name):
+    return '`' + name.replace('`', '``') + '`'
+
+
+def _osc_name(table, suffix):
+    # Los identificadores de MySQL tienen un máximo de 64 caracteres
+    return f"_{table}"[:64 - len(suffix)] + suffix
+
+
+class OnlineSchemaChange:
+    """Aplica un ALTER sobre una tabla sin bloquear escrituras"""
+
+    def __init__(self, connection, table, spec, method='auto', chunk_size=1000, chunk_time=0.5,
+                 sleep=0.0, max_threads_running=None, lock_wait_timeout=5, keep_old=False,
+                 recreate_triggers=False, dry_run=False, log=print):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.table = table
+        self.spec = spec
+        self.method = method
+        self.chunk_size = chunk_size
+        self.chunk_time = chunk_time
+        self.sleep = sleep
+        self.max_threads_running = max_threads_running
+        self.lock_wait_timeout = lock_wait_timeout
+        self.keep_old = keep_old
+        self.recreate_triggers = recreate_triggers
+        self.dry_run = dry_run
+        self.log = log
+
+        self.shadow = _osc_name(table, '_new')
+        self.old = _osc_name(table, '_old')
+        self.osc_triggers = {
+            'INSERT': _osc_name(f"osc_{table}", '_ins'),
+            'UPDATE': _osc_name(f"osc_{table}", '_upd'),
+            'DELETE': _osc_name(f"osc_{table}", '_del'),
+        }
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """Retorna el método usado: 'instant', 'inplace' o 'copy'"""
+        previous_timeout = None
+        if self.lock_wait_timeout and not self.dry_run:
+            # Que el DDL no haga fila detrás de transacciones largas
+            (previous_timeout,), = self._query("SELECT @@SESSION.lock_wait_timeout")
+            self.cursor.execute("SET SESSION lock_wait_timeout = %s", (self.lock_wait_timeout,))
+        try:
+            if self.method in ('auto', 'instant') and self._try_native('INSTANT'):
+                return 'instant'
+            if self.method in ('auto', 'inplace') and self._try_native('INPLACE', 'NONE'):
+                return 'inplace'
+            if self.method in ('instant', 'inplace'):
+                raise RuntimeError(f"ALGORITHM={self.method.upper()} no soportado para este cambio")
+
+            self._copy()
+            return 'copy'
+        finally:
+            if previous_timeout is not None:
+                self.cursor.execute("SET SESSION lock_wait_timeout = %s", (previous_timeout,))
+
+    def _execute(self, sql, args=None):
+        if self.dry_run:
+            self.log(f"  [dry-run] {sql}")
+            return
+        self.cursor.execute(sql, args)
+
+    def _execute_ddl(self, sql):
+        """DDL con reintentos si no consigue el metadata lock a tiempo"""
+        for attempt in range(1, DDL_RETRIES + 1):
+            try:
+                self._execute(sql)
+                return
+            except pymysql.Error as e:
+                if e.args[0] != LOCK_WAIT_TIMEOUT_ERROR or attempt == DDL_RETRIES:
+                    raise
+                self.log(f"  ⏳ Lock wait timeout, reintento {attempt}/{DDL_RETRIES - 1}...")
+                time.sleep(attempt)
+
+    def _try_native(self, algorithm, lock=None):
+        clause = f"ALGORITHM={algorithm}" + (f", LOCK={lock}" if lock else "")
+        sql = f"ALTER TABLE {_quote(self.table)} {self.spec}, {clause}"
+        if self.dry_run:
+            self.log(f"  [dry-run] {sql}")
+            return False  # En dry-run se muestra el plan completo
+        try:
+            start = time.perf_counter()
+            self._execute_ddl(sql)
+        except pymysql.Error as e:
+            message = str(e.args[1]) if len(e.args) > 1 else ''
+            if e.args[0] in UNSUPPORTED_ALGORITHM_ERRORS or (
+                    e.args[0] == PARSE_ERROR and UNKNOWN_INSTANT.search(message)):
+                self.log(f"  ↪️  {clause} no disponible: {message or e}")
+                return False
+            raise
+        self.log(f"  ✓ {clause} en {time.perf_counter() - start:.2f}s")
+        return True
+
+    # ------------------------------------------------------------------
+    # Copia en tabla sombra
+    # ------------------------------------------------------------------
+
+    def _query(self, sql, args=None):
+        self.cursor.execute(sql, args)
+        return self.cursor.fetchall()
+
+    def _inspect(self):
+        (self.database,), = self._query("SELECT DATABASE()")
+
+        self.pk = [row[0] for row in self._query(
+            "SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY' "
+            "ORDER BY ORDINAL_POSITION", (self.database, self.table))]
+        if not self.pk:
+            raise RuntimeError(f"{self.table} no tiene PRIMARY KEY; no se puede copiar por chunks")
+
+        referenced = self._query(
+            "SELECT TABLE_NAME, CONSTRAINT_NAME FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE REFERENCED_TABLE_SCHEMA = %s AND REFERENCED_TABLE_NAME = %s",
+            (self.database, self.table))
+        if referenced:
+            names = ', '.join(f"{t}.{c}" for t, c in referenced)
+            raise RuntimeError(f"{self.table} es referenciada por FOREIGN KEYs ({names}); "
+                               f"el RENAME las dejaría apuntando a {self.old}")
+
+        self.triggers = self._query(
+            "SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, ACTION_STATEMENT "
+            "FROM information_schema.TRIGGERS WHERE EVENT_OBJECT_SCHEMA = %s AND EVENT_OBJECT_TABLE = %s "
+            "ORDER BY ACTION_ORDER", (self.database, self.table))
+        self.triggers = [t for t in self.triggers if t[0] not in self.osc_triggers.values()]
+        if self.triggers and not self.recreate_triggers:
+            names = ', '.join(t[0] for t in self.triggers)
+            raise RuntimeError(f"{self.table} tiene triggers propios ({names}); usa --recreate-triggers "
+                               f"para recrearlos sobre la tabla nueva tras el RENAME")
+
+        for name in (self.shadow, self.old):
+            if self._query("SHOW TABLES LIKE %s", (name,)):
+                raise RuntimeError(f"Ya existe {name} (¿ejecución anterior interrumpida?); revísala y elimínala")
+
+        rows = self._query(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (self.database, self.table))
+        self.estimated_rows = rows[0][0] or 0 if rows else 0
+
+    def _columns(self, table):
+        return [row[0] for row in self._query(
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND EXTRA NOT LIKE '%%GENERATED%%' "
+            "ORDER BY ORDINAL_POSITION", (self.database, table))]
+
+    def _create_shadow(self):
+        (_, ddl), = self._query(f"SHOW CREATE TABLE {_quote(self.table)}")
+        ddl = ddl.replace(f"CREATE TABLE {_quote(self.table)}", f"CREATE TABLE {_quote(self.shadow)}", 1)
+
+        # Los nombres de restricción son únicos por esquema: alternar el prefijo '_'
+        def rename_constraint(m):
+            name = m.group(1)
+            return f"CONSTRAINT {_quote(name[1:] if name.startswith('_') else '_' + name)}"
+        ddl = re.sub(r'CONSTRAINT `([^`]+)`', rename_constraint, ddl)
+
+        self._execute(ddl)
+        self._execute_ddl(f"ALTER TABLE {_quote(self.shadow)} {self.spec}")
+
+    def _create_triggers(self):
+        cols = ', '.join(_quote(c) for c in self.columns)
+        new_values = ', '.join(f"NEW.{_quote(c)}" for c in self.columns)
+        match_old = ' AND '.join(f"{_quote(c)} <=> OLD.{_quote(c)}" for c in self.pk)
+        table, shadow = _quote(self.table), _quote(self.shadow)
+        replace_new = f"REPLACE INTO {shadow} ({cols}) VALUES ({new_values})"
+
+        self._execute_ddl(
+            f"CREATE TRIGGER {_quote(self.osc_triggers['INSERT'])} AFTER INSERT ON {table} "
+            f"FOR EACH ROW {replace_new}")
+        self._execute_ddl(
+            f"CREATE TRIGGER {_quote(self.osc_triggers['UPDATE'])} AFTER UPDATE ON {table} "
+            f"FOR EACH ROW BEGIN DELETE IGNORE FROM {shadow} WHERE {match_old}; {replace_new}; END")
+        self._execute_ddl(
+            f"CREATE TRIGGER {_quote(self.osc_triggers['DELETE'])} AFTER DELETE ON {table} "
+            f"FOR EACH ROW DELETE IGNORE FROM {shadow} WHERE {match_old}")
+
+    def _drop_osc_triggers(self):
+        for name in self.osc_triggers.values():
+            self._execute(f"DROP TRIGGER IF EXISTS {_quote(name)}")
+
+    def _pk_condition(self, op):
+        if len(self.pk) == 1:
+            return f"{_quote(self.pk[0])} {op} %s"
+        cols = ', '.join(_quote(c) for c in self.pk)
+        marks = ', '.join(['%s'] * len(self.pk))
+        return f"({cols}) {op} ({marks})"
+
+    def _throttle(self):
+        if self.sleep:
+            time.sleep(self.sleep)
+        if not self.max_threads_running:
+            return
+        while True:
+            (_, running), = self._query("SHOW GLOBAL STATUS LIKE 'Threads_running'")
+            if int(running) <= self.max_threads_running:
+                return
+            self.log(f"  ⏸️  Threads_running={running} > {self.max_threads_running}, esperando...")
+            time.sleep(1)
+
+    def _copy_chunks(self):
+        cols = ', '.join(_quote(c) for c in self.columns)
+        pk_cols = ', '.join(_quote(c) for c in self.pk)
+        table, shadow = _quote(self.table), _quote(self.shadow)
+        source = f"{table} FORCE INDEX (PRIMARY)"
+
+        last = None
+        copied = 0
+        chunks = 0
+        started = time.perf_counter()
+        while True:
+            lower = f"WHERE {self._pk_condition('>')}" if last is not None else ""
+            upper_rows = self._query(
+                f"SELECT {pk_cols} FROM {source} {lower} ORDER BY {pk_cols} "
+                f"LIMIT 1 OFFSET {int(self.chunk_size) - 1}", last)
+            upper = upper_rows[0] if upper_rows else None
+
+            conditions, args = [], []
+            if last is not None:
+                conditions.append(self._pk_condition('>'))
+                args.extend(last)
+            if upper is not None:
+                conditions.append(self._pk_condition('<='))
+                args.extend(upper)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            start = time.perf_counter()
+            self.cursor.execute(
+                f"INSERT IGNORE INTO {shadow} ({cols}) SELECT {cols} FROM {source} {where} "
+                f"LOCK IN SHARE MODE", args)
+            self.connection.commit()
+            elapsed = time.perf_counter() - start
+            copied += max(self.cursor.rowcount, 0)
+            chunks += 1
+
+            if upper is None:
+                break
+            last = upper
+
+            # Ajustar el chunk para que cada uno tarde ~chunk_time segundos
+            if self.chunk_time and elapsed > 0:
+                factor = max(0.5, min(2.0, self.chunk_time / elapsed))
+                self.chunk_size = int(max(MIN_CHUNK, min(MAX_CHUNK, self.chunk_size * factor)))
+
+            if chunks % 20 == 0:
+                pct = f" (~{100 * copied / self.estimated_rows:.0f}%)" if self.estimated_rows else ""
+                self.log(f"  📦 {copied} filas copiadas{pct}, chunk={self.chunk_size}")
+            self._throttle()
+
+        total = time.perf_counter() - started
+        self.log(f"  ✓ Copia terminada: {copied} filas en {chunks} chunks ({total:.1f}s)")
+
+    def _swap(self):
+        self._execute_ddl(
+            f"RENAME TABLE {_quote(self.table)} TO {_quote(self.old)}, "
+            f"{_quote(self.shadow)} TO {_quote(self.table)}")
+        self.log(f"  ✓ RENAME atómico: {self.table} -> {self.old}, {self.shadow} -> {self.table}")
+
+        # Los triggers viajan con la tabla renombrada
+        self._drop_osc_triggers()
+        for name, timing, event, statement in self.triggers:
+            self._execute(f"DROP TRIGGER IF EXISTS {_quote(name)}")
+            self._execute(
+                f"CREATE TRIGGER {_quote(name)} {timing} {event} ON {_quote(self.table)} "
+                f"FOR EACH ROW {statement}")
+            self.log(f"  ✓ Trigger {name} recreado")
+
+        if self.keep_old:
+            self.log(f"  💾 Tabla anterior conservada como {self.old}")
+        else:
+            self._execute(f"DROP TABLE {_quote(self.old)}")
+
+    def _copy(self):
+        self.log(f"  🔁 Copia en tabla sombra {self.shadow}")
+        if self.dry_run:
+            self.log(f"  [dry-run] CREATE TABLE {self.shadow} (definición actual) + ALTER {self.spec}")
+            self.log(f"  [dry-run] Triggers {', '.join(self.osc_triggers.values())}")
+            self.log(f"  [dry-run] Copia por chunks de PRIMARY KEY y RENAME TABLE atómico")
+            return
+
+        self._inspect()
+        self._create_shadow()
+        try:
+            shadow_columns = set(self._columns(self.shadow))
+            self.columns = [c for c in self._columns(self.table) if c in shadow_columns]
+            missing_pk = [c for c in self.pk if c not in shadow_columns]
+            if missing_pk:
+                raise RuntimeError(f"El ALTER elimina columnas de la PRIMARY KEY: {missing_pk}")
+
+            self._create_triggers()
+            self._copy_chunks()
+            self._swap()
+        except BaseException:
+            self.log(f"  ❌ Falló la copia, limpiando {self.shadow} y triggers temporales")
+            try:
+                if self._query("SHOW TABLES LIKE %s", (self.shadow,)):
+                    self._drop_osc_triggers()
+                    self.cursor.execute(f"DROP TABLE IF EXISTS {_quote(self.shadow)}")
+            except pymysql.Error:
+                pass
+            raise
+
+
+def alter_table_online(connection, table, spec, **options):
+    """Atajo: aplica el ALTER en línea y retorna el método usado"""
+    return OnlineSchemaChange(connection, table, spec, **options).run()
+
+
+def main():
+    from db_pool import connect
+
+    parser = argparse.ArgumentParser(description="ALTER TABLE en línea (INSTANT/INPLACE/copia en sombra)")
+    parser.add_argument('table', help="Tabla a modificar")
+    parser.add_argument('spec', help="Especificación del ALTER, p. ej. \"ADD COLUMN x INT NULL\"")
+    parser.add_argument('--method', choices=['auto', 'instant', 'inplace', 'copy'], default='auto')
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Filas por chunk inicial")
+    parser.add_argument('--chunk-time', type=float, default=0.5,
+                        help="Segundos objetivo por chunk (0 = tamaño fijo)")
+    parser.add_argument('--sleep', type=float, default=0.0, help="Pausa entre chunks (segundos)")
+    parser.add_argument('--max-threads-running', type=int, default=None,
+                        help="Pausar la copia si Threads_running supera este valor")
+    parser.add_argument('--lock-wait-timeout', type=int, default=5)
+    parser.add_argument('--keep-old', action='store_true', help="Conservar la tabla anterior (_tabla_old)")
+    parser.add_argument('--recreate-triggers', action='store_true',
+                        help="Recrear los triggers propios de la tabla después del RENAME")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar el plan")
+    args = parser.parse_args()
+
+    print(f"🔧 ALTER TABLE {args.table} {args.spec}")
+    connection = connect(autocommit=True)
+    try:
+        method = alter_table_online(
+            connection, args.table, args.spec, method=args.method, chunk_size=args.chunk_size,
+            chunk_time=args.chunk_time, sleep=args.sleep,
+            max_threads_running=args.max_threads_running, lock_wait_timeout=args.lock_wait_timeout,
+            keep_old=args.keep_old, recreate_triggers=args.recreate_triggers, dry_run=args.dry_run)
+        if not args.dry_run:
+            print(f"✅ Cambio aplicado (método: {method})")
+    except (pymysql.Error, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Particiones mensuales para las tablas de eventos que solo crecen
+
+vistas_recursos, descargas_recursos, mensajes, transacciones_puntos,
+notificaciones y auditoria_logs reciben INSERTs y casi nunca UPDATEs; sus
+índices crecen sin límite y las purgas son DELETEs enormes. Con particiones
+RANGE por mes (p202610 = octubre 2026, pfuture = MAXVALUE):
+
+  - Las consultas con rango de fecha leen solo los meses que tocan
+    (partition pruning) y el mes actual queda caliente en el buffer pool.
+  - La retención es DROP PARTITION (solo metadatos) o EXCHANGE PARTITION a
+    una tabla <tabla>_archivo_AAAAMM (PARTITIONED_TABLES define cuál).
+
+Comandos:
+  status    Particiones, filas estimadas, meses futuros y vencidos
+  convert   Convierte la tabla con online_schema_change.py (copia en sombra;
+            particionar nunca es INPLACE). Requisitos de MySQL/MariaDB:
+              - La columna de fecha entra en la PRIMARY KEY (id, fecha) y
+                queda NOT NULL.
+              - Las tablas particionadas no admiten FOREIGN KEYs: se eliminan
+                con --drop-foreign-keys (los índices quedan). Los ON DELETE
+                CASCADE / SET NULL dejan de aplicarse: borrar un usuario o un
+                recurso deja filas huérfanas hasta que venza su partición.
+              - Los triggers propios se recrean tras el RENAME.
+  maintain  Crea los meses futuros (REORGANIZE de pfuture vacía) y aplica la
+            retención. Pensado para cron, p. ej. el día 1 y 15 de cada mes:
+              0 3 1,15 * *  python partition_maintenance.py maintain
+
+Las búsquedas solo por id (WHERE id_mensaje = ?) ahora consultan el índice
+de cada partición; las que filtran por fecha son las que ganan.
+
+Ejecutar:
+    python partition_maintenance.py status
+    python partition_maintenance.py convert --tables vistas_recursos --drop-foreign-keys --dry-run
+    python partition_maintenance.py convert --drop-foreign-keys --max-threads-running 20
+    python partition_maintenance.py maintain --ahead 3 --retention notificaciones=3
+"""
+
+import argparse
+import re
+import sys
+from collections import namedtuple
+from datetime import date
+
+import pymysql
+
+from db_pool import DB_CONFIG, connect
+from online_schema_change import alter_table_online
+from schema_snapshot import has_table, take_snapshot
+
+# Tabla, columna de fecha, meses que se conservan (None = sin vencimiento)
+# y qué hacer con los meses vencidos ('drop' o 'archive')
+PartitionedTable = namedtuple('PartitionedTable', ['table', 'column', 'retention', 'expire'])
+
+PARTITIONED_TABLES = [
+    # Los contadores vivos están en recursos_aprendizaje.vistas / descargas (los
+    # actualiza el backend); la tabla recursos no se usa
+    PartitionedTable('vistas_recursos', 'fecha_vista', 12, 'drop'),
+    PartitionedTable('descargas_recursos', 'fecha_descarga', 24, 'drop'),
+    PartitionedTable('mensajes', 'fecha_envio', 36, 'archive'),
+    # Historial de puntos: solo pruning, puntos_usuario tiene los acumulados
+    PartitionedTable('transacciones_puntos', 'fecha_transaccion', None, None),
+    PartitionedTable('notificaciones', 'fecha_creacion', 6, 'drop'),
+    PartitionedTable('auditoria_logs', 'fecha_creacion', 24, 'archive'),
+]
+
+FUTURE_PARTITION = 'pfuture'
+DEFAULT_AHEAD = 3
+# Con fechas muy antiguas (datos de prueba, 1970-01-01) todo lo anterior
+# cae en la primera partición en vez de crear cientos
+MAX_INITIAL_MONTHS = 120
+
+MONTH_PARTITION = re.compile(r'^p(\d{4})(\d{2})$')
+DATE_TYPES = ('timestamp', 'datetime', 'date')
+
+Partition = namedtuple('Partition', ['name', 'month', 'rows'])
+
+
+def add_months(month, n):
+    """Primer día del mes desplazado n meses"""
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(value):
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def _quote(name):
+    return '`' + name.replace('`', '``') + '`'
+
+
+def column_kind(column_type):
+    """'timestamp' se particiona por UNIX_TIMESTAMP(); datetime/date con RANGE COLUMNS"""
+    base = column_type.lower().split('(')[0]
+    return base if base in DATE_TYPES else None
+
+
+def less_than(kind, month):
+    """Límite de la partición del mes: el primer día del mes siguiente"""
+    end = add_months(month, 1)
+    if kind == 'timestamp':
+        return f"UNIX_TIMESTAMP('{end:%Y-%m-%d} 00:00:00')"
+    return f"'{end:%Y-%m-%d}'"
+
+
+def partition_definitions(kind, months):
+    parts = [f"PARTITION {partition_name(m)} VALUES LESS THAN ({less_than(kind, m)})" for m in months]
+    bound = 'MAXVALUE' if kind == 'timestamp' else '(MAXVALUE)'
+    parts.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN {bound}")
+    return ',\n  '.join(parts)
+
+
+def partition_clause(pt, kind, months):
+    expression = f"RANGE (UNIX_TIMESTAMP({_quote(pt.column)}))" if kind == 'timestamp' \
+        else f"RANGE COLUMNS({_quote(pt.column)})"
+    return f"PARTITION BY {expression} (\n  {partition_definitions(kind, months)}\n)"
+
+
+def month_range(first, last):
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(first, 1)
+    return months
+
+
+def read_partitions(cursor, database, table):
+    """(método, particiones) o (None, []) si la tabla no está particionada"""
+    cursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_METHOD, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY PARTITION_ORDINAL_POSITION",
+        (database, table))
+    rows = cursor.fetchall()
+    if not rows or rows[0][0] is None:
+        return None, []
+    partitions = []
+    for name, _, table_rows in rows:
+        m = MONTH_PARTITION.match(name)
+        month = date(int(m.group(1)), int(m.group(2)), 1) if m else None
+        partitions.append(Partition(name, month, table_rows or 0))
+    return rows[0][1], partitions
+
+
+def expired(pt, partitions, today):
+    """Particiones mensuales cuyo mes completo quedó fuera de la retención"""
+    if not pt.retention:
+        return []
+    cutoff = add_months(month_of(today), -pt.retention)
+    return [p for p in partitions if p.month and p.month < cutoff]
+
+
+def missing_future(partitions, today, ahead):
+    """Meses entre la última partición y el mes actual + ahead"""
+    months = [p.month for p in partitions if p.month]
+    last = max(months) if months else add_months(month_of(today), -1)
+    return month_range(add_months(last, 1), add_months(month_of(today), ahead))
+
+
+# ----------------------------------------------------------------------
+# Conversión
+# ----------------------------------------------------------------------
+
+def _column_definition(column, info):
+    """MODIFY COLUMN ... NOT NULL conservando tipo, DEFAULT y ON UPDATE"""
+    sql = f"MODIFY COLUMN {_quote(column)} {info['type']} NOT NULL"
+    default = info['default']
+    if default is not None and default.upper() != 'NULL':
+        if default.lower().startswith('current_timestamp'):
+            sql += " DEFAULT CURRENT_TIMESTAMP"
+        else:
+            literal = default.strip("'")
+            sql += f" DEFAULT '{literal}'"
+    if 'on update' in info['extra'].lower():
+        sql += " ON UPDATE CURRENT_TIMESTAMP"
+    return sql
+
+
+def conversion_plan(snapshot, pt, months):
+    """
+    (spec, foreign_keys, problems): el ALTER para la tabla sombra, las FKs
+    propias que hay que eliminar antes y lo que impide particionar.
+    """
+    table = snapshot['tables'][pt.table]
+    problems = []
+    info = table['columns'].get(pt.column)
+    kind = column_kind(info['type']) if info else None
+    if not info:
+        problems.append(f"no tiene la columna {pt.column}")
+    elif not kind:
+        problems.append(f"{pt.column} es {info['type']}, se necesita TIMESTAMP/DATETIME/DATE")
+
+    primary = table['indexes'].get('PRIMARY')
+    if not primary:
+        problems.append("no tiene PRIMARY KEY")
+    for name, index in table['indexes'].items():
+        if name != 'PRIMARY' and index['unique'] and pt.column not in index['columns']:
+            problems.append(f"UNIQUE {name} ({', '.join(index['columns'])}) no incluye {pt.column}")
+
+    referenced = [f"{t}.{fk}" for t, other in snapshot['tables'].items()
+                  for fk, d in other['foreign_keys'].items() if d['ref_table'] == pt.table]
+    if referenced:
+        problems.append(f"es referenciada por FOREIGN KEYs ({', '.join(referenced)})")
+    if problems:
+        return None, table['foreign_keys'], problems
+
+    changes = []
+    if info['nullable']:
+        changes.append(_column_definition(pt.column, info))
+    if pt.column not in primary['columns']:
+        columns = ', '.join(_quote(c) for c in primary['columns'] + [pt.column])
+        changes.append(f"DROP PRIMARY KEY, ADD PRIMARY KEY ({columns})")
+    spec = ', '.join(changes)
+    spec = f"{spec}\n{partition_clause(pt, kind, months)}" if spec else partition_clause(pt, kind, months)
+    return spec, table['foreign_keys'], []
+
+
+def convert(connection, snapshot, pt, args, today):
+    """Retorna True si la tabla quedó (o quedaría, en dry-run) particionada"""
+    database = snapshot['database']
+    with connection.cursor() as cursor:
+        if read_partitions(cursor, database, pt.table)[0]:
+            print("  ✓ Ya está particionada")
+            return True
+        cursor.execute(f"SELECT MIN({_quote(pt.column)}), "
+                       f"SUM({_quote(pt.column)} IS NULL) FROM {_quote(pt.table)}")
+        oldest, nulls = cursor.fetchone()
+
+    current = month_of(today)
+    first = max(month_of(oldest), add_months(current, -MAX_INITIAL_MONTHS)) if oldest else current
+    months = month_range(first, add_months(current, args.ahead))
+    spec, foreign_keys, problems = conversion_plan(snapshot, pt, months)
+    if nulls:
+        problems.append(f"{int(nulls)} filas con {pt.column} NULL; asígnales fecha antes, p. ej. "
+                        f"UPDATE {pt.table} SET {pt.column} = <fecha> WHERE {pt.column} IS NULL")
+    for problem in problems:
+        print(f"  ✗ {pt.table} {problem}")
+    if problems:
+        return False
+
+    if foreign_keys:
+        for name, fk in foreign_keys.items():
+            print(f"  🔗 {name}: ({', '.join(fk['columns'])}) -> {fk['ref_table']} ON DELETE {fk['on_delete']}")
+        if not args.drop_foreign_keys:
+            print("  ✗ Las tablas particionadas no admiten FOREIGN KEYs; usa --drop-foreign-keys")
+            return False
+        sql = f"ALTER TABLE {_quote(pt.table)} " + ', '.join(
+            f"DROP FOREIGN KEY {_quote(name)}" for name in foreign_keys)
+        if args.dry_run:
+            print(f"  [dry-run] {sql}")
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+            print(f"  ✓ {len(foreign_keys)} FOREIGN KEYs eliminadas (los índices se conservan)")
+
+    print(f"  📅 {len(months)} particiones mensuales ({partition_name(months[0])}..{partition_name(months[-1])}) "
+          f"+ {FUTURE_PARTITION}")
+    method = alter_table_online(
+        connection, pt.table, spec, method='copy', chunk_size=args.chunk_size, sleep=args.sleep,
+        max_threads_running=args.max_threads_running, lock_wait_timeout=args.lock_wait_timeout,
+        recreate_triggers=True, dry_run=args.dry_run, log=lambda message: print(f"  {message}"))
+    if not args.dry_run:
+        print(f"  ✓ Particionada (método: {method})")
+    return True
+
+
+# ----------------------------------------------------------------------
+# Mantenimiento
+# ----------------------------------------------------------------------
+
+def _execute(connection, sql, dry_run):
+    if dry_run:
+        print(f"  [dry-run] {sql}")
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+def add_future(connection, pt, method, partitions, args, today):
+    months = missing_future(partitions, today, args.ahead)
+    if not months:
+        return 0
+    if FUTURE_PARTITION not in [p.name for p in partitions]:
+        raise RuntimeError(f"{pt.table} no tiene la partición {FUTURE_PARTITION}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {_quote(pt.table)} PARTITION ({FUTURE_PARTITION})")
+        (pending,), = cursor.fetchall()
+    if pending:
+        # Correcto igual, pero REORGANIZE copia esas filas en lugar de solo tocar metadatos
+        print(f"  ⚠️  {FUTURE_PARTITION} tiene {pending} filas; el REORGANIZE las moverá")
+    kind = 'timestamp' if method == 'RANGE' else 'datetime'
+    _execute(connection, f"ALTER TABLE {_quote(pt.table)} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n  "
+                         f"{partition_definitions(kind, months)}\n)", args.dry_run)
+    print(f"  ✓ {len(months)} meses nuevos: {', '.join(partition_name(m) for m in months)}")
+    return len(months)
+
+
+def expire(connection, pt, partitions, args, today):
+    old = expired(pt, partitions, today)
+    if not old:
+        return 0
+    table = _quote(pt.table)
+    if pt.expire == 'archive':
+        for partition in old:
+            archive = f"{pt.table}_archivo_{partition.month:%Y%m}"
+            with connection.cursor() as cursor:
+                if cursor.execute("SHOW TABLES LIKE %s", (archive,)):
+                    raise RuntimeError(f"Ya existe {archive} (¿ejecución anterior interrumpida?); revísala")
+            _execute(connection, f"CREATE TABLE {_quote(archive)} LIKE {table}", args.dry_run)
+            _execute(connection, f"ALTER TABLE {_quote(archive)} REMOVE PARTITIONING", args.dry_run)
+            _execute(connection, f"ALTER TABLE {table} EXCHANGE PARTITION {partition.name} "
+                                 f"WITH TABLE {_quote(archive)}", args.dry_run)
+            _execute(connection, f"ALTER TABLE {table} DROP PARTITION {partition.name}", args.dry_run)
+            print(f"  📦 {partition.name} -> {archive} (~{partition.rows} filas)")
+    else:
+        _execute(connection, f"ALTER TABLE {table} DROP PARTITION {', '.join(p.name for p in old)}", args.dry_run)
+        print(f"  🗑️  {len(old)} meses vencidos eliminados: {', '.join(p.name for p in old)} "
+              f"(~{sum(p.rows for p in old)} filas)")
+    return len(old)
+
+
+def status_line(pt, method, partitions, today, ahead):
+    if not method:
+        return "sin particionar"
+    months = [p.month for p in partitions if p.month]
+    future = [m for m in months if m > month_of(today)]
+    retention = f"{pt.retention} meses ({pt.expire})" if pt.retention else "sin vencimiento"
+    span = f" ({partition_name(min(months))}..{partition_name(max(months))})" if months else ""
+    line = (f"{len(partitions)} particiones{span}, ~{sum(p.rows for p in partitions)} filas, "
+            f"{len(future)} meses futuros, retención {retention}")
+    late = expired(pt, partitions, today)
+    if late:
+        line += f", {len(late)} vencidos"
+    missing = missing_future(partitions, today, ahead)
+    if missing:
+        line += f", faltan {len(missing)} meses futuros"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones mensuales de las tablas de eventos")
+    parser.add_argument('command', choices=['status', 'convert', 'maintain'])
+    parser.add_argument('--tables', help="Solo estas tablas (separadas por coma)")
+    parser.add_argument('--ahead', type=int, default=DEFAULT_AHEAD, help="Meses futuros a tener creados")
+    parser.add_argument('--retention', action='append', default=[], metavar='TABLA=MESES',
+                        help="Cambiar la retención de una tabla (0 = sin vencimiento)")
+    parser.add_argument('--drop-foreign-keys', action='store_true',
+                        help="convert: eliminar las FOREIGN KEYs propias (requisito para particionar)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo mostrar el plan")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Filas por chunk inicial de la copia")
+    parser.add_argument('--sleep', type=float, default=0.0, help="Pausa entre chunks (segundos)")
+    parser.add_argument('--max-threads-running', type=int, default=None,
+                        help="Pausar la copia si Threads_running supera este valor")
+    parser.add_argument('--lock-wait-timeout', type=int, default=5)
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=DB_CONFIG['port'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    parser.add_argument('--database', default=DB_CONFIG['database'])
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.retention:
+        table, _, months = item.partition('=')
+        if not months.isdigit():
+            parser.error(f"--retention espera TABLA=MESES: {item}")
+        overrides[table] = int(months) or None
+    tables = [pt._replace(retention=overrides.get(pt.table, pt.retention),
+                          expire=pt.expire or 'drop') if pt.table in overrides else pt
+              for pt in PARTITIONED_TABLES]
+    if args.tables:
+        wanted = {t.strip() for t in args.tables.split(',') if t.strip()}
+        tables = [pt for pt in tables if pt.table in wanted]
+
+    config = dict(DB_CONFIG, host=args.host, port=args.port, user=args.user,
+                  password=args.password, database=args.database)
+    today = date.today()
+    print(f"🗂️  Particiones mensuales en {args.host}:{args.port}/{args.database} ({args.command})")
+    connection = connect(config, autocommit=True)
+    failed = []
+    try:
+        snapshot = take_snapshot(connection, args.database)
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION lock_wait_timeout = %s", (args.lock_wait_timeout,))
+        for pt in tables:
+            if not has_table(snapshot, pt.table):
+                print(f"\n· {pt.table}: no existe, se omite")
+                continue
+            with connection.cursor() as cursor:
+                method, partitions = read_partitions(cursor, args.database, pt.table)
+            print(f"\n📋 {pt.table} ({pt.column}): {status_line(pt, method, partitions, today, args.ahead)}")
+            try:
+                if args.command == 'convert':
+                    if not convert(connection, snapshot, pt, args, today):
+                        failed.append(pt.table)
+                elif args.command == 'maintain' and method:
+                    add_future(connection, pt, method, partitions, args, today)
+                    expire(connection, pt, partitions, args, today)
+                elif args.command == 'status' and method and missing_future(partitions, today, 1):
+                    failed.append(pt.table)
+            except (pymysql.Error, RuntimeError) as e:
+                print(f"  ❌ {e}")
+                failed.append(pt.table)
+    finally:
+        connection.close()
+
+    if failed:
+        reason = 'sin el mes siguiente creado' if args.command == 'status' else 'con errores'
+        print(f"\n❌ {len(failed)} tablas {reason}: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Listo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Recomendaciones de cursos precalculadas para MotorRecomendaciones
+
+MotorRecomendaciones::buscarCursosParaArea() arma en cada request una
+consulta de 5 palabras clave × 3 columnas LIKE '%...%' por cada área del
+diagnóstico: cada generarRecomendaciones() recorre cursos completa varias
+veces. Este job hace el trabajo una sola vez:
+
+  1. Lee los cursos publicados y los tokeniza en un índice invertido en
+     memoria (token sin acentos -> curso y peso por campo: titulo 3,
+     descripcion_corta 2, descripcion 1).
+  2. Arma la matriz cursos × palabras clave (AREA_KEYWORDS, copia de
+     $palabrasClave en PHP) y puntúa todas las áreas con un producto de
+     matrices en NumPy. El sector del perfil (sus palabras en el texto del
+     curso) y la etapa del negocio (nivel del curso adecuado) suman un bono.
+  3. Guarda las listas ordenadas por (area, sector, etapa, prioridad) en
+     recomendaciones_cursos_precalculadas; PHP las lee con una consulta
+     por PRIMARY KEY. (recomendaciones_cursos ya existe y es otra tabla:
+     las recomendaciones por área y puntaje de fase_3_diagnosticos.sql.)
+
+Como en PHP, una palabra clave coincide sin distinguir acentos ni mayúsculas
+y como prefijo ("gestión" encuentra "gestiones"); las de varias palabras
+("redes sociales") deben aparecer seguidas. Prioridad crítica: cursos más
+básicos primero; luego puntaje y los más nuevos. Si ningún curso coincide
+con el área se guardan los generales (empresa/negocio en el título).
+
+Refresco incremental: la huella (catálogo, áreas, sectores y parámetros) se
+guarda en recomendaciones_cursos_precalculadas_estado. Si no cambió, el job
+termina tras una consulta; si cambió, solo reescribe las combinaciones cuya
+lista cambió. --show solo consulta y nunca escribe.
+
+Requiere numpy (pip install numpy) y la migración
+db/migrations/recomendaciones_cursos_precalculadas.sql.
+
+Ejecutar (p. ej. cada 10 minutos por cron):
+    python recommendation_precompute.py
+    python recommendation_precompute.py --show Finanzas
+    python recommendation_precompute.py --force --max-sectores 100
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pymysql
+
+from db_pool import DB_CONFIG, connect
+from fulltext_migration import SPANISH_STOPWORDS
+
+# Copia de $palabrasClave en MotorRecomendaciones::buscarCursosParaArea()
+AREA_KEYWORDS = {
+    'Gestión Empresarial': ('gestión', 'administración', 'liderazgo', 'planificación', 'estrategia'),
+    'Finanzas': ('finanzas', 'contabilidad', 'presupuesto', 'costos', 'financiero'),
+    'Marketing y Ventas': ('marketing', 'ventas', 'digital', 'redes sociales', 'publicidad'),
+    'Operaciones': ('operaciones', 'procesos', 'productividad', 'calidad', 'logística'),
+    'Recursos Humanos': ('recursos humanos', 'talento', 'equipo', 'capacitación', 'personal'),
+}
+DEFAULT_KEYWORDS = ('empresa', 'negocio')
+
+PRIORIDADES = ('critica', 'mejorable')
+NIVELES = ('principiante', 'intermedio', 'avanzado')
+# Nivel de curso que corresponde a cada perfiles_empresariales.etapa_negocio
+ETAPA_NIVEL = {
+    'idea': 'principiante',
+    'inicio': 'principiante',
+    'crecimiento': 'intermedio',
+    'consolidacion': 'intermedio',
+    'expansion': 'avanzado',
+}
+
+FIELD_WEIGHTS = {'titulo': 3.0, 'descripcion_corta': 2.0, 'descripcion': 1.0}
+SECTOR_BOOST = 2.0
+ETAPA_BOOST = 1.5
+LIMIT = 5
+FALLBACK_LIMIT = 3
+DEFAULT_MAX_SECTORES = 50
+
+# Cambiar si cambia el cálculo, para forzar el refresco en el siguiente cron
+ALGORITHM_VERSION = 1
+
+TOKEN = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Minúsculas y sin acentos, como compara utf8mb4_unicode_ci"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return TOKEN.findall(normalize(text))
+
+
+def phrase_count(tokens, words):
+    """Veces que words aparece seguida en tokens (cada palabra como prefijo)"""
+    n = len(words)
+    return sum(1 for start in range(len(tokens) - n + 1)
+               if all(tokens[start + k].startswith(words[k]) for k in range(n)))
+
+
+class CourseIndex:
+    """Índice invertido de los cursos: token -> {posición del curso: peso}"""
+
+    def __init__(self, courses):
+        self.courses = courses
+        self.fields = []
+        self.postings = defaultdict(dict)
+        for i, course in enumerate(courses):
+            fields = {field: tokenize(course.get(field)) for field in FIELD_WEIGHTS}
+            self.fields.append(fields)
+            for field, tokens in fields.items():
+                for token in tokens:
+                    posting = self.postings[token]
+                    posting[i] = posting.get(i, 0.0) + FIELD_WEIGHTS[field]
+        self.vocabulary = sorted(self.postings)
+
+    def prefixed(self, prefix):
+        """Tokens del vocabulario que empiezan con prefix"""
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\uffff')
+        return self.vocabulary[start:end]
+
+    def weights(self, keyword):
+        """Vector con el peso de la palabra clave en cada curso (0 = no aparece)"""
+        words = tokenize(keyword)
+        result = np.zeros(len(self.courses))
+        if len(words) == 1:
+            for token in self.prefixed(words[0]):
+                for i, weight in self.postings[token].items():
+                    result[i] += weight
+        elif words:
+            # Frase: candidatos con todas las palabras y después se verifica el orden
+            candidates = None
+            for word in words:
+                docs = {i for token in self.prefixed(word) for i in self.postings[token]}
+                candidates = docs if candidates is None else candidates & docs
+            for i in candidates:
+                result[i] = sum(weight * phrase_count(self.fields[i][field], words)
+                                for field, weight in FIELD_WEIGHTS.items())
+        return result
+
+    def title_matches(self, words):
+        """Cursos con alguna de las palabras en el título (consulta de respaldo en PHP)"""
+        prefixes = [normalize(w) for w in words]
+        return np.array([any(t.startswith(p) for t in fields['titulo'] for p in prefixes)
+                         for fields in self.fields], dtype=bool)
+
+
+# ----------------------------------------------------------------------
+# Lectura
+# ----------------------------------------------------------------------
+
+def catalog_fingerprint(cursor):
+    """Cambia si se agrega, borra, publica o edita cualquier curso"""
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('|', id_curso, estado, "
+                   "fecha_actualizacion))), 0) FROM cursos")
+    return [int(v) for v in cursor.fetchone()]
+
+
+def load_dimensions(cursor, max_sectores):
+    """Áreas de los diagnósticos y sectores más frecuentes de los perfiles"""
+    cursor.execute("SELECT DISTINCT nombre FROM areas_evaluacion")
+    areas = sorted({row[0] for row in cursor.fetchall()} | set(AREA_KEYWORDS))
+    cursor.execute(
+        "SELECT sector FROM perfiles_empresariales WHERE sector IS NOT NULL AND sector <> '' "
+        "GROUP BY sector ORDER BY COUNT(*) DESC, sector LIMIT %s", (max_sectores,))
+    sectores = [row[0] for row in cursor.fetchall()]
+    return areas, sectores
+
+
+def load_courses(cursor, database):
+    """Cursos publicados con las columnas de texto que existan en este esquema"""
+    cursor.execute("SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                   "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'cursos'", (database,))
+    available = {row[0] for row in cursor.fetchall()}
+    columns = ['id_curso', 'fecha_creacion'] + [c for c in ('nivel', *FIELD_WEIGHTS) if c in available]
+    cursor.execute(f"SELECT {', '.join(columns)} FROM cursos WHERE estado = 'publicado' ORDER BY id_curso")
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# ----------------------------------------------------------------------
+# Cálculo
+# ----------------------------------------------------------------------
+
+def rank_lists(courses, areas, sectores):
+    """
+    {(area, sector, etapa, prioridad): [(id_curso, puntaje, es_respaldo), ...]}
+    para todas las combinaciones; sector y etapa '' = sin dato.
+    """
+    index = CourseIndex(courses)
+    n = len(courses)
+    ids = np.array([c['id_curso'] for c in courses], dtype=np.int64)
+    created = np.array([c['fecha_creacion'].timestamp() if c.get('fecha_creacion') else 0
+                        for c in courses], dtype=np.float64)
+    # Sin nivel conocido va después de los tres niveles
+    nivel = np.array([NIVELES.index(c['nivel']) if c.get('nivel') in NIVELES else len(NIVELES)
+                      for c in courses], dtype=np.int64)
+
+    # Matriz cursos × palabras clave y relevancia cursos × áreas en un solo producto
+    area_keywords = [AREA_KEYWORDS.get(area, DEFAULT_KEYWORDS) for area in areas]
+    keywords = sorted({k for ks in area_keywords for k in ks})
+    matrix = np.column_stack([index.weights(k) for k in keywords]) if n else np.zeros((0, len(keywords)))
+    membership = np.array([[k in ks for k in keywords] for ks in area_keywords], dtype=np.float64)
+    relevance = np.log1p(matrix) @ membership.T
+    eligible = (matrix @ membership.T) > 0
+
+    # Bonos por sector (columna 0 = sin sector) y por etapa (columna 0 = sin etapa)
+    sector_match = np.zeros((n, len(sectores) + 1))
+    for s, sector in enumerate(sectores, start=1):
+        words = [w for w in tokenize(sector) if len(w) >= 3 and w not in SPANISH_STOPWORDS]
+        if words:
+            sector_match[:, s] = np.any([index.weights(w) > 0 for w in words], axis=0)
+    etapas = [''] + list(ETAPA_NIVEL)
+    etapa_nivel = np.array([-1] + [NIVELES.index(ETAPA_NIVEL[e]) for e in etapas[1:]])
+    etapa_match = (nivel[:, None] == etapa_nivel[None, :]).astype(np.float64)
+
+    fallback = index.title_matches(DEFAULT_KEYWORDS)
+    fallback_ids = ids[fallback][np.argsort(-created[fallback], kind='stable')][:FALLBACK_LIMIT]
+
+    lists = {}
+    for a, area in enumerate(areas):
+        rows = np.flatnonzero(eligible[:, a])
+        if not len(rows):
+            for sector in [''] + sectores:
+                for etapa in etapas:
+                    for prioridad in PRIORIDADES:
+                        lists[(area, sector, etapa, prioridad)] = [(int(i), 0.0, True) for i in fallback_ids]
+            continue
+
+        # Puntaje de las combinaciones sector × etapa a la vez: (cursos, sectores, etapas)
+        scores = (relevance[rows, a][:, None, None]
+                  + SECTOR_BOOST * sector_match[rows][:, :, None]
+                  + ETAPA_BOOST * etapa_match[rows][:, None, :])
+        for s, sector in enumerate([''] + sectores):
+            for e, etapa in enumerate(etapas):
+                score = scores[:, s, e]
+                for prioridad in PRIORIDADES:
+                    keys = (-created[rows], -score) + ((nivel[rows],) if prioridad == 'critica' else ())
+                    top = np.lexsort(keys)[:LIMIT]
+                    lists[(area, sector, etapa, prioridad)] = [
+                        (int(ids[rows[i]]), round(float(score[i]), 3), False) for i in top]
+    return lists
+
+
+# ----------------------------------------------------------------------
+# Escritura incremental
+# ----------------------------------------------------------------------
+
+def current_lists(cursor):
+    cursor.execute("SELECT area, sector, etapa, prioridad, id_curso FROM recomendaciones_cursos_precalculadas "
+                   "ORDER BY area, sector, etapa, prioridad, posicion")
+    lists = defaultdict(list)
+    for area, sector, etapa, prioridad, id_curso in cursor.fetchall():
+        lists[(area, sector, etapa, prioridad)].append(id_curso)
+    return lists
+
+
+def diff_lists(old, new):
+    """(claves a reescribir, claves a borrar): solo las listas que cambiaron"""
+    changed = [key for key, items in new.items() if old.get(key) != [i for i, _, _ in items]]
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+def write_lists(connection, new, changed, removed, fingerprint, courses):
+    where = "area = %s AND sector = %s AND etapa = %s AND prioridad = %s"
+    rows = [(*key, position, id_curso, score, int(fallback))
+            for key in changed for position, (id_curso, score, fallback) in enumerate(new[key], start=1)]
+    with connection.cursor() as cursor:
+        connection.begin()
+        try:
+            if changed or removed:
+                cursor.executemany(f"DELETE FROM recomendaciones_cursos_precalculadas WHERE {where}",
+                                   changed + removed)
+            if rows:
+                cursor.executemany(
+                    "INSERT INTO recomendaciones_cursos_precalculadas "
+                    "(area, sector, etapa, prioridad, posicion, id_curso, puntaje, es_respaldo) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows)
+            cursor.execute(
+                "INSERT INTO recomendaciones_cursos_precalculadas_estado "
+                "(id, huella, cursos, combinaciones, fecha_calculo) VALUES (1, %s, %s, %s, NOW()) "
+                "ON DUPLICATE KEY UPDATE huella = VALUES(huella), "
+                "cursos = VALUES(cursos), combinaciones = VALUES(combinaciones), fecha_calculo = NOW()",
+                (fingerprint, courses, len(new)))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+    return len(rows)
+
+
+def stored_fingerprint(cursor):
+    cursor.execute("SELECT huella FROM recomendaciones_cursos_precalculadas_estado WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def fingerprint_of(catalog, areas, sectores):
+    params = [ALGORITHM_VERSION, AREA_KEYWORDS, DEFAULT_KEYWORDS, ETAPA_NIVEL, FIELD_WEIGHTS,
+              SECTOR_BOOST, ETAPA_BOOST, LIMIT, FALLBACK_LIMIT]
+    payload = json.dumps([catalog, areas, sectores, params], ensure_ascii=False, sort_keys=True, default=list)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def show(lists, area, courses):
+    titles = {c['id_curso']: c.get('titulo') for c in courses}
+    for prioridad in PRIORIDADES:
+        items = lists.get((area, '', '', prioridad))
+        if items is None:
+            print(f"  (sin lista para {area})")
+            return
+        print(f"\n  {area} / {prioridad}:")
+        for position, (id_curso, score, fallback) in enumerate(items, start=1):
+            mark = ' (respaldo)' if fallback else ''
+            print(f"    {position}. [{id_curso}] {titles.get(id_curso)}  puntaje {score}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula los cursos recomendados por área de diagnóstico")
+    parser.add_argument('--force', action='store_true', help="Recalcular aunque la huella no haya cambiado")
+    parser.add_argument('--dry-run', action='store_true', help="Calcular y mostrar los cambios sin escribir")
+    parser.add_argument('--max-sectores', type=int, default=DEFAULT_MAX_SECTORES,
+                        help="Sectores más frecuentes con lista propia (el resto usa la lista sin sector)")
+    parser.add_argument('--show', metavar='AREA',
+                        help="Mostrar las listas sin sector ni etapa de un área (solo lectura)")
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=DB_CONFIG['port'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    parser.add_argument('--database', default=DB_CONFIG['database'])
+    args = parser.parse_args()
+
+    config = dict(DB_CONFIG, host=args.host, port=args.port, user=args.user,
+                  password=args.password, database=args.database)
+    connection = connect(config, autocommit=True)
+    try:
+        with connection.cursor() as cursor:
+            areas, sectores = load_dimensions(cursor, args.max_sectores)
+            fingerprint = fingerprint_of(catalog_fingerprint(cursor), areas, sectores)
+            try:
+                stored = stored_fingerprint(cursor)
+            except pymysql.err.ProgrammingError:
+                print("❌ Falta recomendaciones_cursos_precalculadas: aplicar "
+                      "db/migrations/recomendaciones_cursos_precalculadas.sql")
+                sys.exit(1)
+            if stored == fingerprint and not args.force and not args.show:
+                print("✅ Catálogo sin cambios, recomendaciones al día")
+                return
+
+            start = time.perf_counter()
+            courses = load_courses(cursor, args.database)
+            loaded = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lists = rank_lists(courses, areas, sectores)
+        ranked = time.perf_counter() - start
+        print(f"🎯 {len(courses)} cursos publicados, {len(areas)} áreas, {len(sectores)} sectores: "
+              f"{len(lists)} combinaciones (lectura {loaded:.2f}s, cálculo {ranked:.2f}s)")
+        if args.show:
+            show(lists, args.show, courses)
+
+        with connection.cursor() as cursor:
+            changed, removed = diff_lists(current_lists(cursor), lists)
+        print(f"  {len(changed)} listas cambiaron, {len(removed)} combinaciones ya no existen")
+        if args.dry_run or args.show:
+            return  # --show solo consulta: nunca escribe
+        start = time.perf_counter()
+        written = write_lists(connection, lists, changed, removed, fingerprint, len(courses))
+        print(f"✅ {written} filas escritas en {time.perf_counter() - start:.2f}s")
+    except pymysql.Error as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,93 +1,395 @@
 #!/usr/bin/env python3
 """
 Script para ejecutar la migración SQL en Railway usando pymysql
-Ejecutar: python run_migration.py
+Ejecutar: python run_migration.py [archivo.sql ...] [--all] [--batch] [--parallel N] [--online]
+          [--profile [REPORTE.json]] [--top N] [--perf-schema]
+
+Las sentencias se leen en streaming con sql_splitter (entiende DELIMITER,
+literales y comentarios), así que también sirve para restaurar dumps
+completos como db/formacion_empresarial.sql.
+
+Con --batch, las sentencias consecutivas que no devuelven filas se envían en
+paquetes multi-sentencia (CLIENT.MULTI_STATEMENTS): un round trip por paquete
+en lugar de uno por sentencia. El resultado se sigue reportando por sentencia.
+Ver bench_migration_batch.py para medir la diferencia con latencia simulada.
+
+Cada archivo queda registrado en la tabla schema_migrations (checksum y
+sentencias aplicadas, ver migration_ledger.py): los archivos ya aplicados se
+omiten y uno interrumpido se reanuda desde la sentencia donde se detuvo.
+Con registro, la ejecución se detiene en el primer error no tolerado.
+Usar --no-ledger para ejecutar sin registro (dumps, scripts de verificación).
+
+Con --online, cada ALTER TABLE pasa por online_schema_change.py (INSTANT,
+INPLACE sin bloqueo o copia en tabla sombra) para no bloquear escrituras en
+tablas grandes.
+
+Con --profile se mide cada sentencia (tiempo, filas, warnings y tiempo de
+locks) y se guarda un reporte JSON con las más lentas (ver
+migration_profile.py); --perf-schema agrega la diferencia de digests y
+esperas de metadata locks de performance_schema.
+
+La conexión sale de db_pool.py: por defecto la base de Railway, o la que
+indiquen las variables DB_HOST, DB_PORT, DB_DATABASE, DB_USERNAME y
+DB_PASSWORD.
 """
 
+import argparse
 import pymysql
+import re
 import sys
+import time
 from pathlib import Path
 
-# Configuración de Railway (desde variables)
-DB_CONFIG = {
-    'host': 'metro.proxy.rlwy.net',
-    'port': 52451,
-    'user': 'root',
-    'password': 'hVRfZwfOYSrdWHloqDrsPCAuuAkPKNem',
-    'database': 'formacion_empresarial',
-    'charset': 'utf8mb4'
-}
-
-def run_migration():
-    """Ejecuta el script de migración SQL"""
-    print("🔄 Iniciando migración de tablas de diagnósticos...")
-    
-    # Leer archivo SQL
-    sql_file = Path(__file__).parent / 'db' / 'migrations' / 'fix_diagnosticos_schema.sql'
-    
-    if not sql_file.exists():
-        print(f"❌ Error: No se encontró el archivo {sql_file}")
-        return False
+from pymysql.constants import CLIENT
+
+from db_pool import DB_CONFIG, connect, describe
+from online_schema_change import alter_table_online, parse_alter
+from migration_ledger import (
+    ESTADO_APLICADA, ESTADO_FALLIDA, checkpoint_sql, ensure_ledger, file_checksum,
+    finish_entry, list_migrations, load_ledger, migration_key, start_entry,
+)
+from migration_profile import DEFAULT_TOP, MigrationProfile, format_summary
+from sql_splitter import Statement, iter_file_statements
+
+DEFAULT_SQL_FILE = Path(__file__).parent / 'db' / 'migrations' / 'fix_diagnosticos_schema.sql'
+
+# Errores tolerados: tabla/columna/índice/registro ya existe
+IGNORED_ERRORS = (1050, 1060, 1061, 1062)
+
+# Modo batch: límites de cada paquete multi-sentencia
+BATCH_MAX_STATEMENTS = 50
+BATCH_MAX_BYTES = 1024 * 1024
+
+# Sentencias que devuelven filas o varios resultados: siempre van solas
+NON_BATCHABLE_PREFIXES = ('SELECT', 'SHOW', 'DESC', 'EXPLAIN', 'CALL', 'WITH', '(')
+
+# Sentencias compuestas (BEGIN ... END): también van solas
+COMPOUND_STATEMENT = re.compile(
+    r'^CREATE\s+(?:DEFINER\s*=\s*\S+\s+)?(?:TRIGGER|PROCEDURE|FUNCTION|EVENT)\b', re.I
+)
+
+
+def is_batchable(sql):
+    """Indica si la sentencia puede viajar en un paquete multi-sentencia"""
+    head = sql[:16].upper()
+    return not head.startswith(NON_BATCHABLE_PREFIXES) and not COMPOUND_STATEMENT.match(sql)
+
+
+def execute_batch(cursor, statements):
+    """
+    Envía varias sentencias en un solo paquete (CLIENT.MULTI_STATEMENTS).
     
+    Retorna (exitosas, error): cuántas sentencias terminaron bien antes del
+    primer error y el error (o None). El servidor descarta el resto del
+    paquete en cuanto una sentencia falla.
+    """
+    done = 0
     try:
-        print(f"📖 Leyendo script SQL desde {sql_file}")
-        with open(sql_file, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
+        cursor.execute(';\n'.join(s.text for s in statements))
+        done = 1
+        while cursor.nextset():
+            done += 1
+    except pymysql.Error as e:
+        return done, e
+    return done, None
+
+
+class MigrationRun:
+    """
+    Ejecuta sentencias una a una o en batch y lleva el conteo por sentencia.
+    
+    checkpoint: función opcional (sentencias aplicadas -> SQL) que registra el
+    avance en schema_migrations. En modo batch viaja al final del mismo
+    paquete, así que no agrega round trips.
+    stop_on_error: detenerse en el primer error no tolerado, para que el
+    archivo se pueda reanudar exactamente desde esa sentencia.
+    online: función opcional (tabla, especificación) que aplica los ALTER
+    TABLE sin bloquear escrituras; esas sentencias nunca van en batch.
+    profiler: StatementProfiler opcional (migration_profile.py) que registra
+    tiempo, filas, warnings y locks de cada sentencia o paquete.
+    """
+    
+    def __init__(self, cursor, batch=False, batch_size=BATCH_MAX_STATEMENTS, verbose=True,
+                 checkpoint=None, stop_on_error=False, applied=0, online=None, profiler=None):
+        self.cursor = cursor
+        self.batch = batch
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.checkpoint = checkpoint
+        self.stop_on_error = stop_on_error
+        self.online = online
+        self.profiler = profiler
+        self.pending = []
+        self.pending_bytes = 0
+        self.errors = []
+        self.success_count = 0
+        self.total = applied
+        self.round_trips = 0
+        self.applied = applied  # prefijo de sentencias aplicadas sin huecos
+        self.stopped = False
+    
+    def skip(self, i):
+        """Cuenta una sentencia ya aplicada en una ejecución anterior"""
+        self.total = i
+    
+    def feed(self, i, statement):
+        """Agrega la sentencia número i (1-based) a la ejecución"""
+        if self.stopped:
+            return
+        alter = parse_alter(statement.text) if self.online is not None else None
+        if self.batch and alter is None and is_batchable(statement.text):
+            self.total = i
+            self.pending.append((i, statement))
+            self.pending_bytes += len(statement.text)
+            if len(self.pending) >= self.batch_size or self.pending_bytes >= BATCH_MAX_BYTES:
+                self.flush()
+            return
+        
+        self.flush()
+        if self.stopped:
+            return
+        self.total = i
+        self.execute_one(i, statement, alter)
+    
+    def execute_one(self, i, statement, alter=None):
+        """Ejecuta una sentencia en su propio round trip"""
+        if self.stopped:
+            return
+        self.round_trips += 1
+        error = None
+        start = time.perf_counter()
+        try:
+            if alter is not None:
+                if self.verbose:
+                    print(f"\n[{i}] ALTER en línea sobre {alter[0]}...")
+                method = self.online(*alter)
+                if self.verbose:
+                    print(f"  [{i}] ✓ ({method})")
+                self._advance(i)
+                self.success_count += 1
+            elif statement.text[:6].upper() == 'SELECT':
+                if self.verbose:
+                    print(f"\n[{i}] Ejecutando verificación...")
+                self.cursor.execute(statement.text)
+                results = self.cursor.fetchall()
+                if self.verbose:
+                    for row in results:
+                        print(f"  ✓ {row}")
+                self._advance(i)
+            else:
+                self.cursor.execute(statement.text)
+                self._ok(i)
+        except (pymysql.Error, RuntimeError) as e:
+            error = e
+            self._fail(i, statement, e)
+        
+        if self.profiler is not None:
+            self.profiler.record(self.cursor, [(i, statement)], time.perf_counter() - start, error,
+                                 server=alter is None)
+        
+        if self.checkpoint is not None and self.applied == i:
+            self.round_trips += 1
+            self.cursor.execute(self.checkpoint(i))
+    
+    def flush(self):
+        """Envía las sentencias pendientes; tras un error reenvía el resto"""
+        pending = self.pending
+        self.pending = []
+        self.pending_bytes = 0
+        
+        while pending and not self.stopped:
+            statements = [s for _, s in pending]
+            if self.checkpoint is not None:
+                # Solo se ejecuta si todo el paquete terminó bien
+                target = pending[-1][0] if self.applied + 1 == pending[0][0] else self.applied
+                statements.append(Statement(self.checkpoint(target), None))
+            
+            self.round_trips += 1
+            start = time.perf_counter()
+            done, error = execute_batch(self.cursor, statements)
+            if self.profiler is not None:
+                executed = pending if error is None else pending[:done + 1]
+                trailing = len(statements) - len(pending) if error is None else 0
+                self.profiler.record(self.cursor, executed, time.perf_counter() - start, error,
+                                     trailing=trailing)
+            for i, _ in pending[:done]:
+                self._ok(i)
+            if error is None:
+                break
+            if done >= len(pending):
+                raise error  # Falló el propio registro de avance
+            i, statement = pending[done]
+            self._fail(i, statement, error)
+            pending = pending[done + 1:]
+    
+    def _advance(self, i):
+        if i == self.applied + 1:
+            self.applied = i
+    
+    def _ok(self, i):
+        self.success_count += 1
+        self._advance(i)
+        if self.verbose:
+            print(f"  [{i}] ✓", end='\r')
+    
+    def _fail(self, i, statement, e):
+        # Ignorar errores de "tabla ya existe" o "columna ya existe"
+        if e.args[0] in IGNORED_ERRORS:
+            if self.verbose:
+                print(f"  [{i}] ⚠️  Ya existe, omitiendo...")
+            self.success_count += 1
+            self._advance(i)
+        else:
+            error_msg = f"Statement {i} (línea {statement.line}): {str(e)}"
+            self.errors.append(error_msg)
+            if self.verbose:
+                print(f"  [{i}] ❌ {str(e)}")
+            if self.stop_on_error:
+                self.stopped = True
+                self.pending = []
+
+
+def open_connection(batch=False, autocommit=False):
+    """Conexión para el runner (multi-sentencia solo en modo batch)"""
+    options = {'autocommit': autocommit}
+    if batch:
+        options['client_flag'] = CLIENT.MULTI_STATEMENTS
+    return connect(**options)
+
+
+def apply_file(connection, cursor, sql_file, ledger=None, batch=False,
+               batch_size=BATCH_MAX_STATEMENTS, force=False, verbose=True, log=print, online=False,
+               database=None, profile=None):
+    """
+    Ejecuta un archivo .sql. Con ledger (dict cargado de schema_migrations)
+    omite archivos ya aplicados, reanuda los parciales y registra el avance.
+    
+    log recibe cada línea del reporte (el ejecutor paralelo las agrupa por
+    archivo); verbose=False omite el detalle por sentencia. online=True aplica
+    los ALTER TABLE con online_schema_change. database indica dónde está el
+    registro si la conexión no es la de DB_CONFIG. profile (MigrationProfile)
+    registra las mediciones de cada sentencia ejecutada.
+    """
+    database = database or DB_CONFIG['database']
+    log(f"\n📖 Leyendo script SQL desde {sql_file}")
+    
+    resume_from = 0
+    checkpoint = None
+    if ledger is not None:
+        archivo = migration_key(sql_file)
+        checksum = file_checksum(sql_file)
+        entry = ledger.get(archivo)
         
+        if entry and entry['checksum'] == checksum and entry['estado'] == ESTADO_APLICADA:
+            log(f"  ⏭️  Ya aplicada (checksum sin cambios), omitiendo")
+            return True
+        if entry and entry['checksum'] != checksum and entry['sentencias_aplicadas'] > 0:
+            if not force:
+                log(f"  ❌ El archivo cambió después de aplicarse (checksum distinto)")
+                log(f"  💡 Usa --force para ejecutarlo de nuevo desde el inicio")
+                return False
+            log(f"  ⚠️  Checksum distinto, ejecutando desde el inicio (--force)")
+        elif entry:
+            resume_from = entry['sentencias_aplicadas']
+            if resume_from:
+                log(f"  ↪️  Reanudando desde la sentencia {resume_from + 1}")
+        
+        start_entry(cursor, database, archivo, checksum, resume_from)
+        checkpoint = lambda applied: checkpoint_sql(connection, database, archivo, applied)
+    
+    # Ejecutar las sentencias a medida que se leen del archivo
+    mode = f"en batches de hasta {batch_size}" if batch else "una por una"
+    log(f"📊 Ejecutando statements SQL ({mode})...")
+    
+    online_alter = None
+    if online:
+        online_alter = lambda table, spec: alter_table_online(connection, table, spec, log=log)
+    profiler = profile.for_file(connection, sql_file) if profile is not None else None
+    run = MigrationRun(cursor, batch=batch, batch_size=batch_size, verbose=verbose,
+                       checkpoint=checkpoint, stop_on_error=ledger is not None, applied=resume_from,
+                       online=online_alter, profiler=profiler)
+    for i, statement in enumerate(iter_file_statements(sql_file), 1):
+        if i <= resume_from:
+            run.skip(i)
+            continue
+        run.feed(i, statement)
+        if run.stopped:
+            break
+    run.flush()
+    
+    connection.commit()
+    if profiler is not None:
+        profiler.finish()
+    
+    if ledger is not None:
+        estado = ESTADO_FALLIDA if run.errors else ESTADO_APLICADA
+        total = None if run.stopped else run.total
+        finish_entry(cursor, database, archivo, run.applied, total, estado,
+                     run.errors[-1] if run.errors else None)
+        ledger[archivo] = {
+            'checksum': checksum,
+            'sentencias_aplicadas': run.applied,
+            'total_sentencias': total,
+            'estado': estado,
+        }
+    
+    log(f"\n📊 Resumen:")
+    log(f"  ✅ Exitosos: {run.success_count}/{run.total - resume_from}")
+    log(f"  🔁 Round trips: {run.round_trips}")
+    if run.errors:
+        log(f"  ❌ Errores: {len(run.errors)}")
+        for error in run.errors:
+            log(f"     - {error}")
+    if run.stopped:
+        log(f"  ⏸️  Detenida en la sentencia {run.applied + 1}; la próxima ejecución reanuda desde ahí")
+    if profiler is not None:
+        log(f"  ⏱️  {profiler.seconds:.2f}s, {len(profiler.entries)} mediciones "
+            f"({profiler.round_trips} round trips del perfil)")
+    
+    if ledger is not None:
+        return not run.errors
+    return run.success_count > 0
+
+
+def run_migrations(sql_files, batch=False, batch_size=BATCH_MAX_STATEMENTS, use_ledger=True, force=False,
+                   online=False, profile=None):
+    """Ejecuta varios archivos .sql en orden sobre una sola conexión"""
+    sql_files = [Path(f) for f in sql_files]
+    for sql_file in sql_files:
+        if not sql_file.exists():
+            print(f"❌ Error: No se encontró el archivo {sql_file}")
+            return False
+    
+    try:
         # Conectar a la base de datos
         print(f"🔌 Conectando a {DB_CONFIG['host']}:{DB_CONFIG['port']}...")
-        connection = pymysql.connect(**DB_CONFIG)
+        connection = open_connection(batch=batch, autocommit=use_ledger)
         
         try:
+            if profile is not None:
+                profile.begin(connection)
             with connection.cursor() as cursor:
-                # Dividir en statements individuales y ejecutar
-                statements = [s.strip() for s in sql_content.split(';') if s.strip()]
-                
-                total = len(statements)
-                print(f"📊 Ejecutando {total} statements SQL...")
-                
-                errors = []
-                success_count = 0
-                
-                for i, statement in enumerate(statements, 1):
-                    try:
-                        if statement.upper().startswith('SELECT'):
-                            print(f"\n[{i}/{total}] Ejecutando verificación...")
-                            cursor.execute(statement)
-                            results = cursor.fetchall()
-                            for row in results:
-                                print(f"  ✓ {row}")
-                        else:
-                            cursor.execute(statement)
-                            success_count += 1
-                            print(f"  [{i}/{total}] ✓", end='\r')
-                    except pymysql.Error as e:
-                        # Ignorar errores de "tabla ya existe" o "columna ya existe"
-                        if e.args[0] in (1050, 1060, 1061, 1062):  # Table/column/index exists
-                            print(f"  [{i}/{total}] ⚠️  Ya existe, omitiendo...")
-                            success_count += 1
-                        else:
-                            error_msg = f"Statement {i}: {str(e)}"
-                            errors.append(error_msg)
-                            print(f"  [{i}/{total}] ❌ {str(e)}")
+                ledger = None
+                if use_ledger:
+                    ensure_ledger(cursor, DB_CONFIG['database'])
+                    ledger = load_ledger(cursor, DB_CONFIG['database'])
                 
-                connection.commit()
+                for sql_file in sql_files:
+                    ok = apply_file(connection, cursor, sql_file, ledger=ledger, batch=batch,
+                                    batch_size=batch_size, force=force, online=online, profile=profile)
+                    # Con registro, los archivos siguientes dependen de este
+                    if not ok and use_ledger:
+                        print(f"\n❌ No se pudo completar la migración")
+                        return False
+                    if not ok:
+                        print(f"\n❌ No se pudo completar {sql_file.name}")
                 
-                print(f"\n📊 Resumen:")
-                print(f"  ✅ Exitosos: {success_count}/{total}")
-                if errors:
-                    print(f"  ❌ Errores: {len(errors)}")
-                    for error in errors:
-                        print(f"     - {error}")
-                
-                if success_count > 0:
-                    print(f"\n✅ Migración completada!")
-                    return True
-                else:
-                    print(f"\n❌ No se pudo completar la migración")
-                    return False
+                print(f"\n✅ Migración completada!")
+                return True
                 
         finally:
+            if profile is not None and connection.open:
+                profile.end(connection)
             connection.close()
             
     except pymysql.Error as e:
@@ -97,9 +399,19 @@ def run_migration():
         print(f"\n❌ Error: {e}")
         return False
 
+
+def run_migration(sql_file=None, batch=False, batch_size=BATCH_MAX_STATEMENTS, use_ledger=True, force=False,
+                  online=False):
+    """Ejecuta el script de migración SQL (por defecto, la de diagnósticos)"""
+    print("🔄 Iniciando migración...")
+    if sql_file is None:
+        sql_file = DEFAULT_SQL_FILE
+    return run_migrations([sql_file], batch=batch, batch_size=batch_size,
+                          use_ledger=use_ledger, force=force, online=online)
+
 if __name__ == '__main__':
     print("=" * 60)
-    print("  MIGRACIÓN DE TABLAS DE DIAGNÓSTICOS - RAILWAY")
+    print("  MIGRACIONES DE BASE DE DATOS - RAILWAY")
     print("=" * 60)
     
     # Verificar que pymysql está instalado
@@ -110,5 +422,57 @@ if __name__ == '__main__':
         print("💡 Instalar con: pip install pymysql")
         sys.exit(1)
     
-    success = run_migration()
+    parser = argparse.ArgumentParser(description="Ejecuta scripts SQL en streaming")
+    parser.add_argument('sql_files', nargs='*',
+                        help="Archivos .sql a ejecutar (por defecto fix_diagnosticos_schema.sql)")
+    parser.add_argument('--all', action='store_true',
+                        help="Ejecutar todas las migraciones de db/migrations en orden")
+    parser.add_argument('--batch', action='store_true',
+                        help="Agrupar sentencias consecutivas en paquetes multi-sentencia")
+    parser.add_argument('--batch-size', type=int, default=BATCH_MAX_STATEMENTS,
+                        help=f"Máximo de sentencias por paquete (default {BATCH_MAX_STATEMENTS})")
+    parser.add_argument('--no-ledger', action='store_true',
+                        help="No usar schema_migrations (ejecuta todo, p. ej. para dumps)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-ejecutar archivos cuyo checksum cambió después de aplicarse")
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help="Aplicar archivos independientes en paralelo con N conexiones "
+                             "(ver migration_graph.py)")
+    parser.add_argument('--online', action='store_true',
+                        help="Aplicar los ALTER TABLE sin bloquear escrituras "
+                             "(ver online_schema_change.py)")
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='REPORTE',
+                        help="Medir cada sentencia y guardar un reporte JSON "
+                             "(por defecto en migration_profiles/)")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP,
+                        help=f"Sentencias más lentas a mostrar con --profile (default {DEFAULT_TOP})")
+    parser.add_argument('--perf-schema', action='store_true',
+                        help="Con --profile, comparar digests y esperas de locks de performance_schema")
+    args = parser.parse_args()
+    
+    if args.all:
+        files = list_migrations()
+    else:
+        files = args.sql_files or [DEFAULT_SQL_FILE]
+    
+    profile = None
+    if args.profile is not None:
+        profile = MigrationProfile(perf_schema=args.perf_schema, host=describe())
+    
+    print("🔄 Iniciando migración...")
+    if args.parallel > 1 and len(files) > 1:
+        from migration_graph import run_parallel
+        success = run_parallel(files, workers=args.parallel, batch=args.batch,
+                               batch_size=args.batch_size, use_ledger=not args.no_ledger,
+                               force=args.force, online=args.online, profile=profile)
+    else:
+        success = run_migrations(files, batch=args.batch, batch_size=args.batch_size,
+                                 use_ledger=not args.no_ledger, force=args.force,
+                                 online=args.online, profile=profile)
+    
+    if profile is not None:
+        path = profile.save(args.profile or None, top=args.top)
+        for line in format_summary(profile.to_dict(args.top), args.top):
+            print(line)
+        print(f"\n📝 Reporte de perfil: {path}")
     sys.exit(0 if success else 1)
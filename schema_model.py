@@ -0,0 +1,1019 @@
+#!/usr/bin/env python3
+"""
+Modelo del esquema compilado desde los archivos SQL (sin conexión)
+
+Aplica en memoria, en orden, el dump base (db/formacion_empresarial.sql o
+db/nyd_db.sql) y las migraciones de db/migrations: CREATE/ALTER/DROP/RENAME
+TABLE, índices, FOREIGN KEYs, vistas, triggers y los ALTER dinámicos dentro
+de SET @sql = IF(...). El resultado tiene el mismo formato que
+schema_snapshot.py, así que se puede comparar con el esquema real.
+
+El modelo se guarda en .schema_cache/model.json con una clave derivada del
+hash de cada archivo fuente; mientras no cambien, cargarlo es leer un JSON.
+
+Con el modelo se valida SQL sin base de datos: tablas, alias, columnas
+calificadas (dr.id_tipo_diagnostico), columnas sueltas y listas de INSERT.
+Las consultas embebidas en backend/models/*.php se extraen directamente
+del código (incluidas las armadas con $query .= "...").
+
+Ejecutar:
+    python schema_model.py                       # compila (o carga) el modelo
+    python schema_model.py check-php             # valida las consultas de backend/models
+    python schema_model.py check "SELECT dr.id_tipo_diagnostico FROM diagnosticos_realizados dr"
+    python schema_model.py diff                  # modelo vs último snapshot real
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+
+from migration_ledger import PROJECT_ROOT, file_checksum, list_migrations, migration_key
+from schema_snapshot import CACHE_DIR, SNAPSHOT_VERSION
+from sql_splitter import iter_file_statements
+
+MODEL_CACHE = CACHE_DIR / 'model.json'
+
+BASE_DUMPS = {
+    'formacion_empresarial': PROJECT_ROOT / 'db' / 'formacion_empresarial.sql',
+    'nyd_db': PROJECT_ROOT / 'db' / 'nyd_db.sql',
+}
+DEFAULT_BASE = 'formacion_empresarial'
+
+PHP_MODELS_DIR = PROJECT_ROOT / 'backend' / 'models'
+
+# Problema encontrado al validar una consulta
+Issue = namedtuple('Issue', ['kind', 'name', 'detail'])
+
+# Consulta extraída de un archivo PHP
+PhpQuery = namedtuple('PhpQuery', ['file', 'line', 'text'])
+
+# Marcador para las partes dinámicas de una consulta PHP ($var, {$x['y']})
+PHP_PLACEHOLDER = '__php__'
+
+
+# ----------------------------------------------------------------------
+# Utilidades de texto SQL
+# ----------------------------------------------------------------------
+
+_QUOTED = re.compile(r"""'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*\"""", re.S)
+_COMMENTS = re.compile(r"/\*(?![!+]).*?\*/|--[ \t][^\n]*|#[^\n]*", re.S)
+_QUOTED_OR_COMMENT = re.compile(f"({_QUOTED.pattern})|{_COMMENTS.pattern}", re.S)
+_IDENT = r'(?:`[^`]+`|[\w$]+)'
+_NAME = _IDENT + r'(?:\s*\.\s*' + _IDENT + r')?'
+
+
+def _unquote(name):
+    """Último componente del nombre, sin backticks ni esquema"""
+    return name.split('.')[-1].strip().strip('`')
+
+
+def _split_top(text, sep=','):
+    """Separa por `sep` fuera de paréntesis y literales"""
+    parts, depth, quote, start = [], 0, None, 0
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "'\"`":
+            quote = c
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _paren_body(text, start=0):
+    """(contenido, fin) del primer paréntesis balanceado desde start"""
+    open_at = text.index('(', start)
+    depth, quote = 0, None
+    for i in range(open_at, len(text)):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                continue
+            if c == quote:
+                quote = None
+        elif c in "'\"`":
+            quote = c
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return text[open_at + 1:i], i + 1
+    return text[open_at + 1:], len(text)
+
+
+def _column_list(text):
+    """Columnas de una lista de índice: (`a`, b(20), c DESC) -> ['a', 'b(20)', 'c']"""
+    columns = []
+    for part in _split_top(text):
+        m = re.match(r'(' + _IDENT + r')\s*(\(\s*\d+\s*\))?', part)
+        if m:
+            name = m.group(1).strip('`')
+            columns.append(name + (m.group(2).replace(' ', '') if m.group(2) else ''))
+    return columns
+
+
+# ----------------------------------------------------------------------
+# Modelo
+# ----------------------------------------------------------------------
+
+def _new_table(kind='BASE TABLE'):
+    return {
+        'type': kind,
+        'engine': 'InnoDB' if kind == 'BASE TABLE' else None,
+        'collation': None,
+        'comment': '',
+        'columns': {},
+        'indexes': {},
+        'foreign_keys': {},
+        'triggers': {},
+    }
+
+
+_COLUMN_DEF = re.compile(r'^(' + _IDENT + r')\s+(\w+)\s*(\((?:[^()\'"]|\'(?:[^\'\\]|\\.|\'\')*\')*\))?'
+                         r'((?:\s+(?:unsigned|zerofill|signed))*)(.*)$', re.I | re.S)
+_DEFAULT = re.compile(r"\bDEFAULT\s+('(?:[^'\\]|\\.|'')*'|\(.*?\)|[\w.+-]+(?:\(\))?)", re.I | re.S)
+_POSITION = re.compile(r'\s+(FIRST|AFTER\s+(' + _IDENT + r'))\s*$', re.I)
+
+
+def _parse_column(text):
+    """(nombre, definición, posición) de una definición de columna"""
+    position = None
+    m = _POSITION.search(text)
+    if m:
+        position = 'FIRST' if m.group(1).upper() == 'FIRST' else m.group(2).strip('`')
+        text = text[:m.start()]
+
+    m = _COLUMN_DEF.match(text.strip())
+    if not m:
+        return None
+    name = m.group(1).strip('`')
+    col_type = (m.group(2) + (m.group(3) or '') + (m.group(4) or '')).lower()
+    col_type = re.sub(r'\s+', ' ', col_type)
+    rest = m.group(5)
+    rest_clean = _QUOTED.sub("''", rest)
+
+    default = None
+    d = _DEFAULT.search(rest)
+    if d:
+        default = d.group(1)
+        if default.startswith("'"):
+            default = default[1:-1].replace("''", "'")
+        elif default.upper() == 'NULL':
+            default = None
+
+    extra = []
+    if re.search(r'\bAUTO_INCREMENT\b', rest_clean, re.I):
+        extra.append('auto_increment')
+    if re.search(r'\bON\s+UPDATE\s+CURRENT_TIMESTAMP', rest_clean, re.I):
+        extra.append('on update CURRENT_TIMESTAMP')
+    if re.search(r'\b(?:GENERATED\s+ALWAYS\s+)?AS\s*\(', rest_clean, re.I):
+        extra.append('VIRTUAL GENERATED' if not re.search(r'\bSTORED\b', rest_clean, re.I)
+                     else 'STORED GENERATED')
+
+    primary = bool(re.search(r'\bPRIMARY\s+KEY\b', rest_clean, re.I))
+    definition = {
+        'type': col_type,
+        'nullable': not primary and not re.search(r'\bNOT\s+NULL\b', rest_clean, re.I),
+        'key': '',
+        'default': default,
+        'extra': ' '.join(extra),
+    }
+    inline = 'PRIMARY' if primary else ('UNIQUE' if re.search(r'\bUNIQUE\b', rest_clean, re.I) else None)
+    return name, definition, position, inline
+
+
+def _place_column(table, name, definition, position):
+    columns = table['columns']
+    columns.pop(name, None)
+    if position is None:
+        columns[name] = definition
+        return
+    items = list(columns.items())
+    if position == 'FIRST':
+        index = 0
+    else:
+        names = [n for n, _ in items]
+        index = names.index(position) + 1 if position in names else len(items)
+    items.insert(index, (name, definition))
+    table['columns'] = dict(items)
+
+
+class SchemaModel:
+    """Esquema en memoria que se construye aplicando sentencias DDL"""
+
+    def __init__(self):
+        self.tables = {}
+        self.warnings = []
+        self._fk_counter = {}
+
+    # -- tablas ---------------------------------------------------------
+
+    def _table(self, name, context):
+        table = self.tables.get(name)
+        if table is None:
+            self.warnings.append(f"{context}: tabla desconocida {name}")
+        return table
+
+    def _add_index(self, table_name, table, name, columns, unique=False, kind='BTREE'):
+        if name is None:
+            # Nombre automático de MySQL: la primera columna (con sufijo si se repite)
+            base = columns[0].split('(')[0] if columns else 'idx'
+            name, n = base, 2
+            while name in table['indexes']:
+                name, n = f"{base}_{n}", n + 1
+        table['indexes'][name] = {'unique': unique, 'type': kind, 'columns': columns}
+
+    def _add_foreign_key(self, table_name, table, clause):
+        m = re.match(r'(?:CONSTRAINT\s+(' + _IDENT + r')?\s*)?FOREIGN\s+KEY\s*(?:' + _IDENT + r'\s*)?'
+                     r'\(([^)]*)\)\s*REFERENCES\s+(' + _NAME + r')\s*\(([^)]*)\)(.*)$', clause, re.I | re.S)
+        if not m:
+            return False
+        name = m.group(1).strip('`') if m.group(1) else None
+        if name is None:
+            n = self._fk_counter.get(table_name, 0) + 1
+            self._fk_counter[table_name] = n
+            name = f"{table_name}_ibfk_{n}"
+        rules = m.group(5)
+        on_delete = re.search(r'ON\s+DELETE\s+(SET\s+NULL|NO\s+ACTION|SET\s+DEFAULT|\w+)', rules, re.I)
+        on_update = re.search(r'ON\s+UPDATE\s+(SET\s+NULL|NO\s+ACTION|SET\s+DEFAULT|\w+)', rules, re.I)
+        table['foreign_keys'][name] = {
+            'columns': _column_list(m.group(2)),
+            'ref_table': _unquote(m.group(3)),
+            'ref_columns': _column_list(m.group(4)),
+            'on_update': ' '.join(on_update.group(1).upper().split()) if on_update else 'RESTRICT',
+            'on_delete': ' '.join(on_delete.group(1).upper().split()) if on_delete else 'RESTRICT',
+        }
+        # InnoDB crea un índice para la FK si no existe uno que la cubra
+        columns = table['foreign_keys'][name]['columns']
+        if not any(idx['columns'][:len(columns)] == columns for idx in table['indexes'].values()):
+            self._add_index(table_name, table, name, columns)
+        return True
+
+    def _add_key_clause(self, table_name, table, clause):
+        """PRIMARY KEY / UNIQUE / INDEX / FULLTEXT / FOREIGN KEY; False si es una columna"""
+        upper = clause.upper()
+        if re.match(r'PRIMARY\s+KEY', upper):
+            body, _ = _paren_body(clause)
+            table['indexes']['PRIMARY'] = {'unique': True, 'type': 'BTREE', 'columns': _column_list(body)}
+            return True
+        if re.match(r'(CONSTRAINT\s+(' + _IDENT + r'\s+)?)?FOREIGN\s+KEY', clause, re.I):
+            return self._add_foreign_key(table_name, table, clause)
+        m = re.match(r'(?:CONSTRAINT\s+(?:' + _IDENT + r'\s+)?)?(UNIQUE|FULLTEXT|SPATIAL)?\s*(?:KEY|INDEX)?\s*'
+                     r'(' + _IDENT + r')?\s*(?:USING\s+\w+\s*)?\(', clause, re.I)
+        if m and (m.group(1) or re.match(r'(KEY|INDEX)\b', upper)):
+            body, _ = _paren_body(clause)
+            kind = m.group(1).upper() if m.group(1) else ''
+            name = m.group(2).strip('`') if m.group(2) else None
+            if name and name.upper() in ('KEY', 'INDEX'):
+                name = None
+            self._add_index(table_name, table, name, _column_list(body), unique=kind == 'UNIQUE',
+                            kind='FULLTEXT' if kind == 'FULLTEXT' else 'BTREE')
+            return True
+        if re.match(r'(CONSTRAINT\s+(' + _IDENT + r'\s+)?)?CHECK\b', clause, re.I):
+            return True
+        return False
+
+    def _add_column(self, table_name, table, text):
+        parsed = _parse_column(text)
+        if parsed is None:
+            self.warnings.append(f"{table_name}: columna no reconocida: {text[:60]}")
+            return
+        name, definition, position, inline = parsed
+        _place_column(table, name, definition, position)
+        if inline == 'PRIMARY':
+            table['indexes']['PRIMARY'] = {'unique': True, 'type': 'BTREE', 'columns': [name]}
+        elif inline == 'UNIQUE':
+            self._add_index(table_name, table, name, [name], unique=True)
+
+    # -- sentencias -----------------------------------------------------
+
+    def apply(self, sql):
+        """Aplica una sentencia; las que no cambian el esquema se ignoran"""
+        text = sql.strip()  # sql_splitter ya eliminó los comentarios
+        if text[:5].upper() == 'SET @':
+            # ALTER/CREATE dinámicos: SET @sql = IF(cond, 'ALTER TABLE ...', 'SELECT 1')
+            for m in _QUOTED.finditer(text):
+                quote = m.group(0)[0]
+                inner = m.group(0)[1:-1].replace(quote * 2, quote).replace('\\' + quote, quote)
+                if re.match(r'\s*(ALTER|CREATE|DROP)\s', inner, re.I):
+                    self.apply(inner)
+            return
+
+        handlers = (
+            (r'CREATE\s+(?:TEMPORARY\s+)?TABLE\b', self._create_table),
+            (r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:ALGORITHM\s*=\s*\w+\s+)?(?:DEFINER\s*=\s*\S+\s+)?'
+             r'(?:SQL\s+SECURITY\s+\w+\s+)?VIEW\b', self._create_view),
+            (r'CREATE\s+(?:DEFINER\s*=\s*\S+\s+)?TRIGGER\b', self._create_trigger),
+            (r'CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX\b', self._create_index),
+            (r'ALTER\s+(?:ONLINE\s+|IGNORE\s+)?TABLE\b', self._alter_table),
+            (r'DROP\s+(?:TEMPORARY\s+)?(?:TABLE|VIEW)\b', self._drop_table),
+            (r'DROP\s+INDEX\b', self._drop_index),
+            (r'DROP\s+TRIGGER\b', self._drop_trigger),
+            (r'RENAME\s+TABLE\b', self._rename_table),
+        )
+        for pattern, handler in handlers:
+            if re.match(pattern, text, re.I):
+                handler(text)
+                return
+
+    def _create_table(self, text):
+        m = re.match(r'CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(' + _NAME + r')\s*(.*)$',
+                     text, re.I | re.S)
+        if not m:
+            return
+        name, rest = _unquote(m.group(2)), m.group(3)
+        if name in self.tables and m.group(1):
+            return
+
+        like = re.match(r'\(?\s*LIKE\s+(' + _NAME + r')', rest, re.I)
+        if like:
+            source = self._table(_unquote(like.group(1)), name)
+            if source is not None:
+                self.tables[name] = json.loads(json.dumps(source))
+                self.tables[name]['triggers'] = {}
+                self.tables[name]['foreign_keys'] = {}
+            return
+
+        table = _new_table()
+        self.tables[name] = table
+        self._fk_counter[name] = 0
+        if not rest.startswith('('):
+            return  # CREATE TABLE ... AS SELECT: columnas desconocidas
+        body, end = _paren_body(rest)
+        for clause in _split_top(body):
+            if not self._add_key_clause(name, table, clause):
+                self._add_column(name, table, clause)
+        self._table_options(table, rest[end:])
+
+    def _table_options(self, table, options):
+        engine = re.search(r'ENGINE\s*=?\s*(\w+)', options, re.I)
+        if engine:
+            table['engine'] = engine.group(1)
+        collation = re.search(r'COLLATE\s*=?\s*(\w+)', options, re.I)
+        if collation:
+            table['collation'] = collation.group(1)
+        comment = re.search(r"COMMENT\s*=?\s*'((?:[^'\\]|\\.|'')*)'", options, re.I)
+        if comment:
+            table['comment'] = comment.group(1).replace("''", "'")
+
+    def _create_view(self, text):
+        m = re.match(r'.*?VIEW\s+(' + _NAME + r')\s*(\([^)]*\))?\s*AS\s+(.*)$', text, re.I | re.S)
+        if not m:
+            return
+        name = _unquote(m.group(1))
+        view = _new_table('VIEW')
+        if m.group(2):
+            columns = _column_list(m.group(2)[1:-1])
+        else:
+            columns = _select_columns(m.group(3))
+        for column in columns or []:
+            view['columns'][column] = {'type': '', 'nullable': True, 'key': '', 'default': None, 'extra': ''}
+        self.tables[name] = view
+
+    def _create_trigger(self, text):
+        m = re.match(r'CREATE\s+(?:DEFINER\s*=\s*\S+\s+)?TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?(' + _NAME + r')\s+'
+                     r'(BEFORE|AFTER)\s+(INSERT|UPDATE|DELETE)\s+ON\s+(' + _NAME + r')\s+FOR\s+EACH\s+ROW\s+'
+                     r'(?:(?:FOLLOWS|PRECEDES)\s+' + _IDENT + r'\s+)?(.*)$', text, re.I | re.S)
+        if not m:
+            return
+        table = self._table(_unquote(m.group(4)), f"trigger {_unquote(m.group(1))}")
+        if table is not None:
+            table['triggers'][_unquote(m.group(1))] = {
+                'timing': m.group(2).upper(),
+                'event': m.group(3).upper(),
+                'statement': m.group(5).strip(),
+            }
+
+    def _create_index(self, text):
+        m = re.match(r'CREATE\s+(UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(' + _IDENT + r')'
+                     r'(?:\s+USING\s+\w+)?\s+ON\s+(' + _NAME + r')\s*\(', text, re.I | re.S)
+        if not m:
+            return
+        table_name = _unquote(m.group(3))
+        table = self._table(table_name, 'CREATE INDEX')
+        if table is None:
+            return
+        kind = (m.group(1) or '').strip().upper()
+        body, _ = _paren_body(text, m.end() - 1)
+        self._add_index(table_name, table, m.group(2).strip('`'), _column_list(body),
+                        unique=kind == 'UNIQUE', kind='FULLTEXT' if kind == 'FULLTEXT' else 'BTREE')
+
+    def _alter_table(self, text):
+        m = re.match(r'ALTER\s+(?:ONLINE\s+|IGNORE\s+)?TABLE\s+(' + _NAME + r')\s*(.*)$', text, re.I | re.S)
+        if not m:
+            return
+        name = _unquote(m.group(1))
+        table = self._table(name, 'ALTER TABLE')
+        if table is None:
+            return
+
+        for clause in _split_top(m.group(2)):
+            name = self._alter_clause(name, table, clause)
+
+    def _alter_clause(self, name, table, clause):
+        """Aplica una cláusula de ALTER TABLE; retorna el nombre (cambia con RENAME TO)"""
+        upper = ' '.join(clause.upper().split())
+
+        if upper.startswith('ADD '):
+            rest = re.sub(r'^ADD\s+', '', clause, flags=re.I)
+            if re.match(r'COLUMN\b', rest, re.I) or not self._add_key_clause(name, table, rest):
+                rest = re.sub(r'^COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?', '', rest, flags=re.I)
+                if rest.startswith('('):
+                    body, _ = _paren_body(rest)
+                    for item in _split_top(body):
+                        if not self._add_key_clause(name, table, item):
+                            self._add_column(name, table, item)
+                else:
+                    self._add_column(name, table, rest)
+        elif re.match(r'(MODIFY|CHANGE)\b', upper):
+            rest = re.sub(r'^(MODIFY|CHANGE)\s+(?:COLUMN\s+)?(?:IF\s+EXISTS\s+)?', '', clause, flags=re.I)
+            if upper.startswith('CHANGE'):
+                old, rest = re.match(r'(' + _IDENT + r')\s+(.*)$', rest, re.S).groups()
+                old = old.strip('`')
+            else:
+                old = re.match(_IDENT, rest).group(0).strip('`')
+            parsed = _parse_column(rest)
+            if parsed is None or old not in table['columns']:
+                self.warnings.append(f"{name}: no se pudo aplicar {clause[:60]}")
+                return name
+            new, definition, position, _ = parsed
+            if position is None:
+                # Conservar la posición original
+                table['columns'] = {(new if n == old else n): (definition if n == old else d)
+                                    for n, d in table['columns'].items()}
+            else:
+                table['columns'].pop(old)
+                _place_column(table, new, definition, position)
+            if new != old:
+                self._rename_in_indexes(table, old, new)
+        elif upper.startswith('DROP '):
+            m = re.match(r'DROP\s+(PRIMARY\s+KEY|FOREIGN\s+KEY|INDEX|KEY|CONSTRAINT|CHECK|COLUMN)?\s*'
+                         r'(?:IF\s+EXISTS\s+)?(' + _IDENT + r')?', clause, re.I)
+            what = ' '.join((m.group(1) or 'COLUMN').upper().split())
+            target = m.group(2).strip('`') if m.group(2) else None
+            if what == 'PRIMARY KEY':
+                table['indexes'].pop('PRIMARY', None)
+            elif what == 'FOREIGN KEY':
+                table['foreign_keys'].pop(target, None)
+            elif what in ('INDEX', 'KEY'):
+                table['indexes'].pop(target, None)
+            elif what == 'CONSTRAINT':
+                table['foreign_keys'].pop(target, None)
+                table['indexes'].pop(target, None)
+            elif what == 'COLUMN' and target:
+                table['columns'].pop(target, None)
+                for index_name, index in list(table['indexes'].items()):
+                    index['columns'] = [c for c in index['columns'] if c.split('(')[0] != target]
+                    if not index['columns']:
+                        del table['indexes'][index_name]
+        elif upper.startswith('RENAME '):
+            m = re.match(r'RENAME\s+(COLUMN|INDEX|KEY)\s+(' + _IDENT + r')\s+TO\s+(' + _IDENT + r')', clause, re.I)
+            if m:
+                old, new = m.group(2).strip('`'), m.group(3).strip('`')
+                if m.group(1).upper() == 'COLUMN':
+                    table['columns'] = {(new if n == old else n): d for n, d in table['columns'].items()}
+                    self._rename_in_indexes(table, old, new)
+                elif old in table['indexes']:
+                    table['indexes'][new] = table['indexes'].pop(old)
+            else:
+                m = re.match(r'RENAME\s+(?:TO\s+|AS\s+)?(' + _NAME + r')', clause, re.I)
+                new = _unquote(m.group(1))
+                self.tables[new] = self.tables.pop(name)
+                return new
+        elif upper.startswith('ALTER '):
+            m = re.match(r'ALTER\s+(?:COLUMN\s+)?(' + _IDENT + r')\s+(SET\s+DEFAULT\s+(.+)|DROP\s+DEFAULT)',
+                         clause, re.I | re.S)
+            if m and m.group(1).strip('`') in table['columns']:
+                default = m.group(3).strip().strip("'") if m.group(3) else None
+                table['columns'][m.group(1).strip('`')]['default'] = default
+        else:
+            self._table_options(table, clause)
+        return name
+
+    @staticmethod
+    def _rename_in_indexes(table, old, new):
+        for index in table['indexes'].values():
+            index['columns'] = [new + c[len(old):] if c.split('(')[0] == old else c for c in index['columns']]
+        for fk in table['foreign_keys'].values():
+            fk['columns'] = [new if c == old else c for c in fk['columns']]
+
+    def _drop_table(self, text):
+        m = re.match(r'DROP\s+(?:TEMPORARY\s+)?(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?(.+?)(?:\s+(?:RESTRICT|CASCADE))?$',
+                     text, re.I | re.S)
+        if m:
+            for name in _split_top(m.group(1)):
+                self.tables.pop(_unquote(name), None)
+
+    def _drop_index(self, text):
+        m = re.match(r'DROP\s+INDEX\s+(' + _IDENT + r')\s+ON\s+(' + _NAME + r')', text, re.I)
+        if m and _unquote(m.group(2)) in self.tables:
+            self.tables[_unquote(m.group(2))]['indexes'].pop(m.group(1).strip('`'), None)
+
+    def _drop_trigger(self, text):
+        m = re.match(r'DROP\s+TRIGGER\s+(?:IF\s+EXISTS\s+)?(' + _NAME + r')', text, re.I)
+        if m:
+            for table in self.tables.values():
+                table['triggers'].pop(_unquote(m.group(1)), None)
+
+    def _rename_table(self, text):
+        m = re.match(r'RENAME\s+TABLE\s+(.+)$', text, re.I | re.S)
+        for pair in _split_top(m.group(1)):
+            parts = re.split(r'\s+TO\s+', pair, flags=re.I)
+            if len(parts) == 2 and _unquote(parts[0]) in self.tables:
+                self.tables[_unquote(parts[1])] = self.tables.pop(_unquote(parts[0]))
+
+    # -- resultado ------------------------------------------------------
+
+    def finalize(self):
+        """Completa COLUMN_KEY (PRI/UNI/MUL) a partir de los índices"""
+        for table in self.tables.values():
+            for column in table['columns'].values():
+                column['key'] = ''
+            marks = []
+            for name, index in table['indexes'].items():
+                if not index['columns']:
+                    continue
+                first = index['columns'][0].split('(')[0]
+                if name == 'PRIMARY':
+                    for column in index['columns']:
+                        marks.append((column.split('(')[0], 'PRI'))
+                elif index['unique'] and len(index['columns']) == 1:
+                    marks.append((first, 'UNI'))
+                else:
+                    marks.append((first, 'MUL'))
+            rank = {'PRI': 3, 'UNI': 2, 'MUL': 1, '': 0}
+            for column, key in marks:
+                definition = table['columns'].get(column)
+                if definition is not None and rank[key] > rank[definition['key']]:
+                    definition['key'] = key
+
+    def as_snapshot(self, source):
+        self.finalize()
+        return {
+            'version': SNAPSHOT_VERSION,
+            'database': 'modelo',
+            'source': source,
+            'taken_at': None,
+            'tables': dict(sorted(self.tables.items())),
+            'warnings': self.warnings,
+        }
+
+
+def _select_columns(select):
+    """Nombres de columna de una lista SELECT (None si usa * o no se reconoce)"""
+    m = re.match(r'\s*SELECT\s+(?:DISTINCT\s+)?(.*)$', _QUOTED.sub("''", select), re.I | re.S)
+    if not m:
+        return None
+    body = m.group(1)
+    # Cortar en el FROM de primer nivel
+    depth = 0
+    for i, c in enumerate(body):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif depth == 0 and re.match(r'\sFROM\s', body[i:i + 6], re.I):
+            body = body[:i]
+            break
+    columns = []
+    for item in _split_top(body):
+        alias = re.search(r'\bAS\s+(' + _IDENT + r')\s*$', item, re.I)
+        if alias:
+            columns.append(alias.group(1).strip('`'))
+            continue
+        if item.endswith('*'):
+            return None
+        plain = re.search(r'(?:^|[\s.])(' + _IDENT + r')\s*$', item)
+        if not plain:
+            return None
+        columns.append(plain.group(1).strip('`'))
+    return columns
+
+
+# ----------------------------------------------------------------------
+# Construcción y caché
+# ----------------------------------------------------------------------
+
+def model_sources(base=DEFAULT_BASE):
+    """Archivos que forman el modelo, en orden de aplicación"""
+    base_path = BASE_DUMPS.get(base, Path(base))
+    return [Path(base_path)] + list_migrations()
+
+
+def model_key(sources):
+    """Clave del caché: hash de cada fuente y del propio parser"""
+    digest = hashlib.sha256()
+    for path in [Path(__file__), PROJECT_ROOT / 'sql_splitter.py'] + list(sources):
+        digest.update(migration_key(path).encode())
+        digest.update(file_checksum(path).encode())
+    return digest.hexdigest()
+
+
+def compile_model(sources):
+    model = SchemaModel()
+    for path in sources:
+        for statement in iter_file_statements(path):
+            try:
+                model.apply(statement.text)
+            except (ValueError, AttributeError) as e:
+                model.warnings.append(f"{migration_key(path)}:{statement.line}: {e}")
+    return model.as_snapshot(', '.join(migration_key(p) for p in sources))
+
+
+def load_model(base=DEFAULT_BASE, refresh=False, cache=MODEL_CACHE):
+    """Modelo desde el caché si las fuentes no cambiaron; si no, lo compila y lo guarda"""
+    sources = model_sources(base)
+    key = model_key(sources)
+    cache = Path(cache)
+    if not refresh and cache.exists():
+        with open(cache, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == key:
+            return cached['model']
+
+    model = compile_model(sources)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache, 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'model': model}, f, ensure_ascii=False)
+    return model
+
+
+# ----------------------------------------------------------------------
+# Validación de consultas
+# ----------------------------------------------------------------------
+
+# Palabras que pueden aparecer sueltas en una consulta sin ser columnas
+SQL_KEYWORDS = {
+    'select', 'distinct', 'from', 'where', 'and', 'or', 'not', 'xor', 'null', 'is', 'in', 'like',
+    'between', 'exists', 'as', 'on', 'using', 'join', 'inner', 'left', 'right', 'outer', 'cross',
+    'natural', 'straight_join', 'group', 'order', 'by', 'having', 'limit', 'offset', 'asc', 'desc',
+    'union', 'all', 'any', 'some', 'case', 'when', 'then', 'else', 'end', 'if', 'insert', 'into',
+    'values', 'value', 'update', 'set', 'delete', 'replace', 'ignore', 'low_priority', 'high_priority',
+    'delayed', 'quick', 'duplicate', 'key', 'true', 'false', 'unknown', 'interval', 'microsecond',
+    'second', 'minute', 'hour', 'day', 'week', 'month', 'quarter', 'year', 'day_hour', 'day_minute',
+    'day_second', 'hour_minute', 'hour_second', 'minute_second', 'year_month', 'current_timestamp',
+    'current_date', 'current_time', 'current_user', 'localtime', 'localtimestamp', 'utc_timestamp',
+    'utc_date', 'regexp', 'rlike', 'div', 'mod', 'binary', 'collate', 'escape', 'separator',
+    'with', 'recursive', 'rollup', 'over', 'partition', 'rows', 'range', 'preceding', 'following',
+    'unbounded', 'current', 'row', 'for', 'share', 'lock', 'mode', 'nowait', 'skip', 'locked',
+    'boolean', 'natural', 'language', 'query', 'expansion', 'against', 'signed', 'unsigned',
+    'char', 'varchar', 'integer', 'int', 'decimal', 'date', 'datetime', 'time', 'json', 'double',
+    'float', 'nchar', 'utf8mb4', 'sql_calc_found_rows', 'sql_no_cache', 'dual', 'window',
+    'default', 'unique', 'new', 'old', 'both', 'leading', 'trailing', 'outfile',
+}
+
+_TOKEN = re.compile(r"""
+    (?P<name>[A-Za-z_@][\w$@]*(?:\s*\.\s*(?:[A-Za-z_][\w$]*|\*))*)
+  | (?P<num>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<str>'')
+  | (?P<param>\?|:\w+)
+  | (?P<op>[^\s\w])
+""", re.X)
+
+_SOURCE_KEYWORDS = {'from', 'join', 'into', 'update', 'straight_join'}
+_ALIAS_STOP = SQL_KEYWORDS | {'force', 'use', 'ignore', 'index', 'partition', 'lateral'}
+
+
+def tokenize(sql):
+    """Tokens (tipo, valor) de una consulta; literales como '' y sin comentarios ni backticks"""
+    text = _QUOTED_OR_COMMENT.sub(lambda m: "''" if m.group(1) else ' ', sql)
+    text = text.replace('`', '')
+    return [(m.lastgroup, re.sub(r'\s+', '', m.group(m.lastgroup))) for m in _TOKEN.finditer(text)]
+
+
+def matching_paren(tokens, i):
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j][1] == '(':
+            depth += 1
+        elif tokens[j][1] == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens) - 1
+
+
+def check_query(model, sql):
+    """
+    Valida una consulta contra el modelo; retorna una lista de Issue.
+
+    Se revisan las tablas de FROM/JOIN/INTO/UPDATE, los alias y columnas
+    calificadas (alias.columna), las listas de columnas de INSERT y las
+    columnas sin calificar (deben existir en alguna tabla de la consulta).
+    Las partes dinámicas (PHP_PLACEHOLDER) y las tablas derivadas o CTE se
+    tratan como desconocidas y no generan problemas.
+    """
+    tables = model['tables']
+    tokens = tokenize(sql)
+    words = [value.lower() for _, value in tokens]
+
+    sources = {}        # alias o nombre -> tabla real (None = desconocida)
+    used_tables = []
+    insert_columns = []  # (tabla, columna)
+    aliases = set()
+    opaque = False      # hay fuentes cuyas columnas no se conocen
+
+    def read_source(j, keyword):
+        nonlocal opaque
+        if j >= len(tokens):
+            return j
+        kind, value = tokens[j]
+        if value == '(':
+            close = matching_paren(tokens, j)
+            j = close + 1
+            table = None
+            opaque = True
+        elif kind == 'name':
+            table = value.split('.')[-1]
+            if PHP_PLACEHOLDER in value or value.lower().startswith(('information_schema.', 'performance_schema.', 'mysql.')):
+                table = None
+                opaque = True
+            elif value.lower() == 'dual':
+                return j + 1
+            else:
+                used_tables.append(table)
+            sources[value.split('.')[-1].lower()] = table
+            j += 1
+        else:
+            return j
+        if j < len(tokens) and words[j] == 'as':
+            j += 1
+        if j < len(tokens) and tokens[j][0] == 'name' and '.' not in tokens[j][1] \
+                and words[j] not in _ALIAS_STOP:
+            sources[words[j]] = table
+            aliases.add(words[j])
+            j += 1
+        if keyword == 'into' and table is not None and j < len(tokens) and tokens[j][1] == '(' \
+                and j + 1 < len(tokens) and words[j + 1] != 'select':
+            close = matching_paren(tokens, j)
+            for k in range(j + 1, close):
+                if tokens[k][0] == 'name':
+                    insert_columns.append((table, tokens[k][1]))
+            j = close + 1
+        return j
+
+    i = 0
+    while i < len(tokens):
+        word = words[i]
+        if word in _SOURCE_KEYWORDS and not (word == 'update' and i > 0 and words[i - 1] in ('key', 'for')):
+            j = read_source(i + 1, word)
+            while word == 'from' and j < len(tokens) and tokens[j][1] == ',':
+                j = read_source(j + 1, word)
+            i = max(j, i + 1)
+            continue
+        if word in ('with', 'recursive') and i + 2 < len(tokens) and words[i + 2] == 'as' \
+                or (word == ',' and i + 3 < len(tokens) and words[i + 2] == 'as' and tokens[i + 3][1] == '('
+                    and tokens[i + 1][0] == 'name' and i > 0 and tokens[i - 1][1] == ')'):
+            if tokens[i + 1][0] == 'name':
+                sources[words[i + 1]] = None
+                opaque = True
+        if word == 'as' and i + 1 < len(tokens) and tokens[i + 1][0] == 'name':
+            aliases.add(words[i + 1])
+        i += 1
+
+    issues = []
+    for table in used_tables:
+        if table not in tables:
+            issues.append(Issue('tabla', table, 'no existe en el modelo'))
+
+    def columns_of(table):
+        if table is None or table not in tables:
+            return None
+        columns = tables[table]['columns']
+        return columns if columns else None
+
+    known = [columns_of(t) for t in set(sources.values())]
+    all_known = not opaque and all(c is not None for c in known) and used_tables
+
+    reported = set()
+    for table, column in insert_columns:
+        columns = columns_of(table)
+        if columns is not None and column not in columns:
+            issues.append(Issue('columna', f"{table}.{column}", 'no existe (lista de INSERT)'))
+            reported.add(column.lower())
+
+    for k, (kind, value) in enumerate(tokens):
+        if kind != 'name' or PHP_PLACEHOLDER in value or value.startswith('@'):
+            continue
+        lower = value.lower()
+        next_value = tokens[k + 1][1] if k + 1 < len(tokens) else ''
+        prev_word = words[k - 1] if k > 0 else ''
+
+        if '.' in value:
+            qualifier, column = lower.rsplit('.', 1)
+            qualifier = qualifier.split('.')[-1]
+            if next_value == '(' or column == '*':
+                continue
+            if qualifier in ('new', 'old'):
+                continue
+            if qualifier in sources:
+                table = sources[qualifier]
+            elif qualifier in tables and not opaque:
+                issues.append(Issue('alias', qualifier, 'tabla usada sin estar en FROM/JOIN'))
+                continue
+            elif opaque:
+                continue
+            else:
+                issues.append(Issue('alias', qualifier, 'alias no definido'))
+                continue
+            columns = columns_of(table)
+            if columns is not None and value.rsplit('.', 1)[1] not in columns:
+                issues.append(Issue('columna', f"{qualifier}.{value.rsplit('.', 1)[1]}",
+                                    f"no existe en {table}"))
+            continue
+
+        if not all_known:
+            continue
+        if lower in SQL_KEYWORDS or lower in sources or lower in aliases or lower in reported \
+                or next_value == '(':
+            continue
+        if prev_word in ('collate', 'interval', 'as', 'separator'):
+            continue
+        # Alias implícito: nombre justo después de una expresión (COUNT(*) total)
+        if k > 0 and (tokens[k - 1][1] == ')' or tokens[k - 1][0] in ('name', 'num', 'str')) \
+                and words[k - 1] not in SQL_KEYWORDS:
+            aliases.add(lower)
+            continue
+        if not any(value in columns for columns in known):
+            names = ', '.join(sorted({t for t in sources.values() if t}))
+            issues.append(Issue('columna', value, f"no existe en {names}"))
+
+    unique = []
+    for issue in issues:
+        if issue not in unique:
+            unique.append(issue)
+    return unique
+
+
+# ----------------------------------------------------------------------
+# Consultas embebidas en PHP
+# ----------------------------------------------------------------------
+
+_PHP_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<heredoc><<<[ \t]*(?P<hq>['"]?)(?P<tag>\w+)(?P=hq)\r?\n(?P<hbody>.*?)\r?\n[ \t]*(?P=tag)\b)
+  | (?P<dq>"(?:[^"\\]|\\.)*")
+  | (?P<sq>'(?:[^'\\]|\\.)*')
+""", re.X | re.S)
+
+_PHP_INTERPOLATION = re.compile(r"\{\$[^}]*\}|\$\w+(?:->\w+|\[[^\]]*\])*")
+_SQL_START = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\s', re.I)
+_SQL_COMPLETE = re.compile(
+    r'^\s*(?:SELECT\s|WITH\s|INSERT\s+(?:IGNORE\s+)?INTO\s|REPLACE\s+INTO\s|UPDATE\s+\S+.*?\sSET\s|DELETE\s.*?FROM\s)',
+    re.I | re.S)
+_PHP_ASSIGN = re.compile(r'\$(\w+)\s*(\.?=)\s*\(?\s*$')
+_PHP_CONCAT = re.compile(r'^\s*\.\s*(?:(.*?)\s*\.\s*)?$', re.S)
+
+
+def _php_string(match):
+    if match.group('sq'):
+        body = match.group('sq')[1:-1]
+        return body.replace("\\'", "'").replace('\\\\', '\\')
+    if match.group('dq'):
+        body = match.group('dq')[1:-1]
+    else:
+        body = match.group('hbody')
+        if match.group('hq') == "'":
+            return body
+    body = _PHP_INTERPOLATION.sub(PHP_PLACEHOLDER, body)
+    return body.replace('\\"', '"').replace('\\n', '\n').replace('\\t', '\t').replace('\\$', '$')
+
+
+def extract_php_queries(path):
+    """
+    Consultas SQL de un archivo PHP. Une las partes concatenadas con
+    "..." . $x . "..." y las que se agregan con $query .= "..." (de todas
+    las ramas, así que el texto sirve para validar nombres, no para ejecutarse).
+    """
+    source = Path(path).read_text(encoding='utf-8', errors='replace')
+    newlines = [i for i, c in enumerate(source) if c == '\n']
+    queries = []      # [línea, partes]
+    by_var = {}       # variable -> índice en queries
+    last = None       # consulta que recibió el literal anterior
+    prev_end = 0
+
+    for m in _PHP_TOKEN.finditer(source):
+        if m.group('comment'):
+            continue
+        gap = source[prev_end:m.start()]
+        prev_end = m.end()
+        text = _php_string(m)
+        line = bisect_right(newlines, m.start()) + 1
+
+        assign = _PHP_ASSIGN.search(gap)
+        concat = _PHP_CONCAT.match(gap) if ';' not in gap else None
+
+        if last is not None and concat and not assign:
+            if concat.group(1):
+                queries[last][1].append(f" {PHP_PLACEHOLDER} ")
+            queries[last][1].append(text)
+            continue
+
+        last = None
+        if assign and assign.group(2) == '.=':
+            index = by_var.get(assign.group(1))
+            if index is not None:
+                queries[index][1].append(text)
+                last = index
+            continue
+        if _SQL_START.match(text):
+            queries.append([line, [text]])
+            last = len(queries) - 1
+            if assign:
+                by_var[assign.group(1)] = last
+        elif assign:
+            by_var.pop(assign.group(1), None)
+
+    result = []
+    for line, parts in queries:
+        text = ''.join(parts)
+        if _SQL_COMPLETE.match(text):
+            result.append(PhpQuery(migration_key(path), line, text))
+    return result
+
+
+def iter_php_queries(paths=None):
+    if paths is None:
+        paths = sorted(PHP_MODELS_DIR.glob('*.php'))
+    for path in paths:
+        yield from extract_php_queries(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modelo del esquema compilado desde los archivos SQL")
+    parser.add_argument('--base', default=DEFAULT_BASE,
+                        help=f"Dump base: {', '.join(BASE_DUMPS)} o una ruta (default {DEFAULT_BASE})")
+    parser.add_argument('--refresh', action='store_true', help="Ignorar el caché y recompilar")
+    sub = parser.add_subparsers(dest='command')
+    check = sub.add_parser('check', help="Validar una consulta SQL")
+    check.add_argument('sql')
+    php = sub.add_parser('check-php', help="Validar las consultas de backend/models/*.php")
+    php.add_argument('files', nargs='*')
+    sub.add_parser('diff', help="Comparar el modelo con el último snapshot real (schema_snapshot.py)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = load_model(args.base, refresh=args.refresh)
+    elapsed = time.perf_counter() - start
+    tables = model['tables']
+    print(f"🧩 Modelo: {len(tables)} tablas, {sum(len(t['columns']) for t in tables.values())} columnas, "
+          f"{sum(len(t['indexes']) for t in tables.values())} índices ({elapsed * 1000:.0f} ms)")
+    for warning in model['warnings']:
+        print(f"  ⚠️  {warning}")
+
+    if args.command == 'check':
+        issues = check_query(model, args.sql)
+        for issue in issues:
+            print(f"  ❌ {issue.kind} {issue.name}: {issue.detail}")
+        if not issues:
+            print("  ✓ Consulta válida")
+        sys.exit(1 if issues else 0)
+
+    if args.command == 'check-php':
+        start = time.perf_counter()
+        paths = [Path(f) for f in args.files] or None
+        queries = list(iter_php_queries(paths))
+        problems = [(q, check_query(model, q.text)) for q in queries]
+        problems = [(q, issues) for q, issues in problems if issues]
+        elapsed = time.perf_counter() - start
+        for query, issues in problems:
+            print(f"\n{query.file}:{query.line}")
+            for issue in issues:
+                print(f"  ❌ {issue.kind} {issue.name}: {issue.detail}")
+        print(f"\n📊 {len(queries)} consultas validadas en {elapsed * 1000:.0f} ms, "
+              f"{len(problems)} con problemas")
+        sys.exit(1 if problems else 0)
+
+    if args.command == 'diff':
+        from db_pool import DB_CONFIG
+        from schema_snapshot import diff_snapshots, format_diff, load_snapshot, snapshot_path
+
+        live = load_snapshot(snapshot_path(DB_CONFIG['database']))
+        changes = diff_snapshots(model, live)
+        print(f"📊 {len(changes)} diferencias (modelo -> {live['source']}, {live['taken_at']})")
+        for line in format_diff(changes):
+            print(line)
+        sys.exit(1 if changes else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Snapshot del esquema de la base de datos (tablas, columnas, índices, FKs y triggers)
+
+Todo el esquema se lee con cinco consultas a information_schema que viajan
+juntas en un solo paquete multi-sentencia (un round trip), en lugar de un
+SHOW TABLES + DESCRIBE por tabla. El resultado se guarda como JSON
+versionado en .schema_cache/ y las verificaciones posteriores ("¿tiene
+preguntas_diagnostico la columna id_area?") se responden desde el archivo.
+
+Ejecutar:
+    python schema_snapshot.py                        # toma y guarda el snapshot
+    python schema_snapshot.py --cached               # usa el snapshot guardado
+    python schema_snapshot.py check preguntas_diagnostico.id_area usuarios
+    python schema_snapshot.py diff antes.json despues.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from migration_ledger import PROJECT_ROOT
+
+SNAPSHOT_VERSION = 1
+CACHE_DIR = PROJECT_ROOT / '.schema_cache'
+
+# Una consulta por sección; el orden define el orden de los result sets
+_QUERIES = {
+    'tables': (
+        "SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_COLLATION, TABLE_COMMENT "
+        "FROM information_schema.TABLES WHERE TABLE_SCHEMA = {db} ORDER BY TABLE_NAME"
+    ),
+    'columns': (
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA "
+        "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = {db} "
+        "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+    ),
+    'indexes': (
+        "SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME, INDEX_TYPE, SUB_PART "
+        "FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = {db} "
+        "ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+    ),
+    'foreign_keys': (
+        "SELECT k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, "
+        "k.REFERENCED_COLUMN_NAME, r.UPDATE_RULE, r.DELETE_RULE "
+        "FROM information_schema.KEY_COLUMN_USAGE k "
+        "JOIN information_schema.REFERENTIAL_CONSTRAINTS r "
+        "ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME "
+        "AND r.TABLE_NAME = k.TABLE_NAME "
+        "WHERE k.TABLE_SCHEMA = {db} AND k.REFERENCED_TABLE_NAME IS NOT NULL "
+        "ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION"
+    ),
+    'triggers': (
+        "SELECT EVENT_OBJECT_TABLE, TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, ACTION_STATEMENT "
+        "FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = {db} "
+        "ORDER BY EVENT_OBJECT_TABLE, ACTION_ORDER"
+    ),
+}
+
+
+def _empty_table(kind='BASE TABLE', engine=None, collation=None, comment=''):
+    return {
+        'type': kind,
+        'engine': engine,
+        'collation': collation,
+        'comment': comment,
+        'columns': {},
+        'indexes': {},
+        'foreign_keys': {},
+        'triggers': {},
+    }
+
+
+def _fetch_sections(connection, database):
+    """Result sets de las consultas: uno por sección, en un solo round trip si se puede"""
+    from pymysql.constants import CLIENT
+
+    queries = [q.format(db=connection.escape(database)) for q in _QUERIES.values()]
+    sections = {}
+    with connection.cursor() as cursor:
+        if connection.client_flag & CLIENT.MULTI_STATEMENTS:
+            cursor.execute(';\n'.join(queries))
+            for name in _QUERIES:
+                sections[name] = cursor.fetchall()
+                cursor.nextset()
+        else:
+            for name, sql in zip(_QUERIES, queries):
+                cursor.execute(sql)
+                sections[name] = cursor.fetchall()
+    return sections
+
+
+def build_snapshot(sections, database, source):
+    """Arma el diccionario del snapshot a partir de las filas de information_schema"""
+    tables = {}
+    for name, kind, engine, collation, comment in sections['tables']:
+        tables[name] = _empty_table(kind, engine, collation, comment or '')
+
+    def table(name):
+        return tables.setdefault(name, _empty_table())
+
+    for name, column, col_type, nullable, key, default, extra in sections['columns']:
+        table(name)['columns'][column] = {
+            'type': col_type,
+            'nullable': nullable == 'YES',
+            'key': key or '',
+            'default': default,
+            'extra': extra or '',
+        }
+
+    for name, index, non_unique, column, index_type, sub_part in sections['indexes']:
+        entry = table(name)['indexes'].setdefault(index, {
+            'unique': not int(non_unique),
+            'type': index_type,
+            'columns': [],
+        })
+        entry['columns'].append(f"{column}({sub_part})" if sub_part else column)
+
+    for name, constraint, column, ref_table, ref_column, on_update, on_delete in sections['foreign_keys']:
+        entry = table(name)['foreign_keys'].setdefault(constraint, {
+            'columns': [],
+            'ref_table': ref_table,
+            'ref_columns': [],
+            'on_update': on_update,
+            'on_delete': on_delete,
+        })
+        entry['columns'].append(column)
+        entry['ref_columns'].append(ref_column)
+
+    for name, trigger, timing, event, statement in sections['triggers']:
+        table(name)['triggers'][trigger] = {
+            'timing': timing,
+            'event': event,
+            'statement': statement,
+        }
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'database': database,
+        'source': source,
+        'taken_at': datetime.now().isoformat(timespec='seconds'),
+        'tables': tables,
+    }
+
+
+def take_snapshot(connection, database=None):
+    """Lee el esquema completo de la base de datos de la conexión"""
+    if database is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DATABASE()")
+            database = cursor.fetchone()[0]
+    source = f"{connection.host}:{connection.port}"
+    return build_snapshot(_fetch_sections(connection, database), database, source)
+
+
+def snapshot_path(database):
+    return CACHE_DIR / f"{database}.json"
+
+
+def save_snapshot(snapshot, path=None):
+    path = Path(path) if path else snapshot_path(snapshot['database'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def load_snapshot(path):
+    """Carga un snapshot guardado; ValueError si es de otra versión del formato"""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: snapshot versión {snapshot.get('version')}, "
+                         f"se esperaba {SNAPSHOT_VERSION} (vuelve a tomarlo)")
+    return snapshot
+
+
+def get_snapshot(connection=None, refresh=False, path=None, max_age=None):
+    """
+    Snapshot desde el caché local, o desde la base si no existe, es más viejo
+    que max_age segundos o refresh=True. Al leerlo de la base se guarda.
+    """
+    from pymysql.constants import CLIENT
+    from db_pool import DB_CONFIG, connect
+
+    path = Path(path) if path else snapshot_path(DB_CONFIG['database'])
+    if not refresh and path.exists():
+        fresh = max_age is None or time.time() - path.stat().st_mtime <= max_age
+        if fresh:
+            return load_snapshot(path)
+
+    own_connection = connection is None
+    if own_connection:
+        connection = connect(client_flag=CLIENT.MULTI_STATEMENTS)
+    try:
+        snapshot = take_snapshot(connection, DB_CONFIG['database'])
+    finally:
+        if own_connection:
+            connection.close()
+    save_snapshot(snapshot, path)
+    return snapshot
+
+
+# ----------------------------------------------------------------------
+# Consultas sobre el snapshot
+# ----------------------------------------------------------------------
+
+def has_table(snapshot, table):
+    return table in snapshot['tables']
+
+
+def has_column(snapshot, table, column):
+    return column in snapshot['tables'].get(table, {}).get('columns', {})
+
+
+def table_columns(snapshot, table):
+    """{columna: definición} en orden de posición; {} si la tabla no existe"""
+    return snapshot['tables'].get(table, {}).get('columns', {})
+
+
+def has_index(snapshot, table, columns):
+    """¿Hay un índice cuyo prefijo izquierdo sean estas columnas?"""
+    columns = list(columns)
+    for index in snapshot['tables'].get(table, {}).get('indexes', {}).values():
+        if [c.split('(')[0] for c in index['columns'][:len(columns)]] == columns:
+            return True
+    return False
+
+
+def check_paths(snapshot, paths):
+    """Verifica 'tabla' o 'tabla.columna'; retorna [(ruta, existe)]"""
+    results = []
+    for path in paths:
+        table, _, column = path.partition('.')
+        ok = has_column(snapshot, table, column) if column else has_table(snapshot, table)
+        results.append((path, ok))
+    return results
+
+
+# ----------------------------------------------------------------------
+# Diff
+# ----------------------------------------------------------------------
+
+_SECTIONS = (('columns', 'columna'), ('indexes', 'índice'),
+             ('foreign_keys', 'foreign key'), ('triggers', 'trigger'))
+
+
+def _describe(section, definition):
+    if section == 'columns':
+        null = 'NULL' if definition['nullable'] else 'NOT NULL'
+        default = f" DEFAULT {definition['default']}" if definition['default'] is not None else ''
+        return f"{definition['type']} {null}{default} {definition['extra']}".strip()
+    if section == 'indexes':
+        unique = 'UNIQUE ' if definition['unique'] else ''
+        return f"{unique}{definition['type']} ({', '.join(definition['columns'])})"
+    if section == 'foreign_keys':
+        return (f"({', '.join(definition['columns'])}) -> {definition['ref_table']}"
+                f"({', '.join(definition['ref_columns'])}) ON DELETE {definition['on_delete']}")
+    return f"{definition['timing']} {definition['event']}"
+
+
+def diff_snapshots(old, new):
+    """
+    Cambios de old a new: lista de (operación, tipo, nombre, detalle) con
+    operación '+' (agregado), '-' (eliminado) o '~' (modificado).
+    """
+    changes = []
+    old_tables, new_tables = old['tables'], new['tables']
+
+    for name in sorted(old_tables.keys() - new_tables.keys()):
+        changes.append(('-', 'tabla', name, ''))
+    for name in sorted(new_tables.keys() - old_tables.keys()):
+        changes.append(('+', 'tabla', name, f"{len(new_tables[name]['columns'])} columnas"))
+
+    for name in sorted(old_tables.keys() & new_tables.keys()):
+        before, after = old_tables[name], new_tables[name]
+        if before == after:
+            continue
+        if before['engine'] != after['engine']:
+            changes.append(('~', 'tabla', name, f"ENGINE {before['engine']} -> {after['engine']}"))
+        for section, label in _SECTIONS:
+            a, b = before[section], after[section]
+            for item in a.keys() - b.keys():
+                changes.append(('-', label, f"{name}.{item}", _describe(section, a[item])))
+            for item in b.keys() - a.keys():
+                changes.append(('+', label, f"{name}.{item}", _describe(section, b[item])))
+            for item in a.keys() & b.keys():
+                if a[item] != b[item]:
+                    changes.append(('~', label, f"{name}.{item}",
+                                    f"{_describe(section, a[item])} -> {_describe(section, b[item])}"))
+    return sorted(changes, key=lambda c: (c[2].split('.')[0], c[1] != 'tabla', c[2], c[0]))
+
+
+def format_diff(changes):
+    return [f"  {op} {kind:12} {name:45} {detail}".rstrip() for op, kind, name, detail in changes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot del esquema en un solo round trip")
+    parser.add_argument('--cached', action='store_true', help="Usar el snapshot guardado si existe")
+    parser.add_argument('--out', help="Ruta del snapshot (default .schema_cache/<base>.json)")
+    sub = parser.add_subparsers(dest='command')
+    check = sub.add_parser('check', help="Verificar tablas o columnas (tabla[.columna])")
+    check.add_argument('paths', nargs='+')
+    diff = sub.add_parser('diff', help="Comparar dos snapshots")
+    diff.add_argument('old')
+    diff.add_argument('new')
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        changes = diff_snapshots(load_snapshot(args.old), load_snapshot(args.new))
+        print(f"📊 {len(changes)} cambios")
+        for line in format_diff(changes):
+            print(line)
+        sys.exit(1 if changes else 0)
+
+    start = time.perf_counter()
+    snapshot = get_snapshot(refresh=not args.cached, path=args.out)
+    elapsed = time.perf_counter() - start
+    tables = snapshot['tables']
+    print(f"📸 {snapshot['database']} ({snapshot['source']}, {snapshot['taken_at']}): "
+          f"{len(tables)} tablas, {sum(len(t['columns']) for t in tables.values())} columnas, "
+          f"{sum(len(t['indexes']) for t in tables.values())} índices, "
+          f"{sum(len(t['foreign_keys']) for t in tables.values())} FKs, "
+          f"{sum(len(t['triggers']) for t in tables.values())} triggers ({elapsed:.2f}s)")
+
+    if args.command == 'check':
+        results = check_paths(snapshot, args.paths)
+        for path, ok in results:
+            print(f"  {'✓' if ok else '❌'} {path}")
+        sys.exit(0 if all(ok for _, ok in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
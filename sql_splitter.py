@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Tokenizador incremental de scripts SQL (compatible con el cliente mysql)
+
+Lee un archivo o stream línea por línea y entrega las sentencias una a una,
+sin cargar el script completo en memoria. Entiende:
+
+  - DELIMITER // / DELIMITER $$ (triggers, procedimientos y funciones)
+  - Literales '...', "..." y `...` (con escapes \\ y comillas duplicadas)
+  - Comentarios -- , # y /* ... */ (se eliminan)
+  - Comentarios ejecutables /*! ... */ y hints /*+ ... */ (se conservan)
+
+Uso como librería:
+    from sql_splitter import iter_file_statements
+    for stmt in iter_file_statements('db/formacion_empresarial.sql'):
+        cursor.execute(stmt.text)
+
+Uso desde consola (lista las sentencias y mide el rendimiento):
+    python sql_splitter.py db/formacion_empresarial.sql [--quiet]
+"""
+
+import re
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Sentencia completa: texto sin delimitador final y línea donde inicia
+Statement = namedtuple('Statement', ['text', 'line'])
+
+DEFAULT_DELIMITER = ';'
+
+# Fin de literal desde dentro del literal (loop "desenrollado" para no hacer
+# backtracking carácter por carácter en cadenas largas)
+_QUOTE_END = {
+    "'": re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'", re.S),
+    '"': re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S),
+    '`': re.compile(r'[^`]*`'),
+}
+
+_DELIMITER_CMD = re.compile(r'^\s*delimiter\s+(\S+)', re.I)
+
+# Literales que abren y cierran en la misma línea
+_STRING_BODY = (
+    r"""'[^'\\]*(?:\\.[^'\\]*)*'"""
+    r'''|"[^"\\]*(?:\\.[^"\\]*)*"'''
+    r"""|`[^`]*`"""
+)
+
+# Patrones por delimitador (normalmente solo ';', '//' y '$$')
+_PATTERN_CACHE = {}
+
+
+def _patterns(delimiter):
+    """
+    Regex por delimitador:
+      body    - texto "normal" de una sentencia, incluidos los literales
+                completos de la línea (se consume en C, sin iterar en
+                Python por cada token)
+      special - el token que detuvo a body: comilla sin cerrar, inicio de
+                comentario o el delimitador
+    """
+    patterns = _PATTERN_CACHE.get(delimiter)
+    if patterns is not None:
+        return patterns
+
+    # Caracteres que pueden iniciar algo especial y la continuación que
+    # efectivamente lo vuelve especial ('' = siempre especial)
+    risky = {'/': [r'\*'], '-': [r'-(?:[ \t\r\n]|$)']}
+    risky.setdefault(delimiter[0], []).append(re.escape(delimiter[1:]))
+
+    stop = set(risky) | {"'", '"', '`', '#'}
+    alternatives = ['[^' + ''.join(re.escape(c) for c in sorted(stop)) + ']+', _STRING_BODY]
+    for char, follows in risky.items():
+        if '' not in follows:
+            alternatives.append(re.escape(char) + '(?!' + '|'.join(follows) + ')')
+
+    body = re.compile('(?:' + '|'.join(alternatives) + ')*')
+    special = re.compile(
+        r"""(?P<quote>['"`])"""
+        r"""|(?P<block>/\*)"""
+        r"""|(?P<line>--(?=[ \t\r\n]|$)|\#)"""
+        r"""|(?P<delim>""" + re.escape(delimiter) + r""")"""
+    )
+    patterns = (body, special)
+    _PATTERN_CACHE[delimiter] = patterns
+    return patterns
+
+
+def iter_statements(stream, delimiter=DEFAULT_DELIMITER):
+    """
+    Genera objetos Statement a partir de un iterable de líneas.
+
+    El estado (literal abierto, comentario abierto, delimitador actual) se
+    conserva entre líneas, así que las sentencias pueden abarcar cualquier
+    número de líneas. Solo se mantiene en memoria la sentencia en curso.
+    """
+    body, special = _patterns(delimiter)
+    buf = []
+    start_line = None
+    quote = None            # comilla del literal abierto
+    in_comment = False      # dentro de /* ... */
+    keep_comment = False    # el comentario abierto es /*! o /*+
+    lineno = 0
+
+    for line in stream:
+        lineno += 1
+        pos = 0
+        end = len(line)
+
+        # DELIMITER es un comando del cliente: solo cuenta entre sentencias
+        if quote is None and not in_comment and start_line is None:
+            cmd = _DELIMITER_CMD.match(line)
+            if cmd:
+                delimiter = cmd.group(1)
+                body, special = _patterns(delimiter)
+                buf = []
+                continue
+
+        while pos < end:
+            if quote is not None:
+                m = _QUOTE_END[quote].match(line, pos)
+                if m is None:
+                    buf.append(line[pos:])
+                    break
+                buf.append(line[pos:m.end()])
+                pos = m.end()
+                quote = None
+                continue
+
+            if in_comment:
+                close = line.find('*/', pos)
+                if close < 0:
+                    if keep_comment:
+                        buf.append(line[pos:])
+                    break
+                if keep_comment:
+                    buf.append(line[pos:close + 2])
+                pos = close + 2
+                in_comment = False
+                continue
+
+            stop = body.match(line, pos).end()
+            m = special.match(line, stop) if stop < end else None
+            if m is None:
+                chunk = line[pos:]
+                if start_line is None and chunk.strip():
+                    start_line = lineno
+                buf.append(chunk)
+                break
+
+            chunk = line[pos:stop]
+            if start_line is None and chunk.strip():
+                start_line = lineno
+            buf.append(chunk)
+            pos = m.end()
+            kind = m.lastgroup
+
+            if kind == 'quote':
+                if start_line is None:
+                    start_line = lineno
+                quote = m.group('quote')
+                buf.append(quote)
+            elif kind == 'block':
+                in_comment = True
+                keep_comment = line.startswith(('!', '+'), pos)
+                if keep_comment:
+                    if start_line is None:
+                        start_line = lineno
+                    buf.append('/*')
+                else:
+                    # Un comentario equivale a un espacio para el parser
+                    buf.append(' ')
+            elif kind == 'line':
+                buf.append('\n')
+                break
+            else:
+                text = ''.join(buf).strip()
+                if text:
+                    yield Statement(text, start_line)
+                buf = []
+                start_line = None
+
+    text = ''.join(buf).strip()
+    if text:
+        yield Statement(text, start_line)
+
+
+def iter_file_statements(path, delimiter=DEFAULT_DELIMITER, encoding='utf-8'):
+    """Abre un archivo .sql y entrega sus sentencias en streaming"""
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        yield from iter_statements(f, delimiter)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python sql_splitter.py <archivo.sql> [--quiet]")
+        sys.exit(1)
+
+    path = Path(sys.argv[1])
+    quiet = '--quiet' in sys.argv[2:]
+    size = path.stat().st_size
+
+    start = time.perf_counter()
+    count = 0
+    for stmt in iter_file_statements(path):
+        count += 1
+        if not quiet:
+            preview = ' '.join(stmt.text.split())[:100]
+            print(f"[{count}] línea {stmt.line}: {preview}")
+    elapsed = time.perf_counter() - start
+
+    mb = size / (1024 * 1024)
+    rate = mb / elapsed if elapsed > 0 else float('inf')
+    print(f"\n📊 {count} sentencias, {mb:.2f} MB en {elapsed:.3f}s ({rate:.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    main()
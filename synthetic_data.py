@@ -0,0 +1,786 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos a escala de producción
+
+Recorre el grafo de llaves foráneas (usuarios → cursos → modulos → lecciones →
+inscripciones → progreso_lecciones, conversaciones → mensajes, recursos,
+productos, puntos_usuario) y genera millones de filas deterministas a partir
+de una semilla, con sesgo realista: pocos cursos concentran la mayoría de las
+inscripciones, la mayoría de los alumnos abandona pronto y los puntos siguen
+una distribución de cola larga.
+
+Es consciente del esquema: toma las columnas de la base destino (o del modelo
+offline de schema_model con --no-load), descarta las que no existen, completa
+las NOT NULL sin default y omite las tablas ausentes. Los ids se asignan a
+partir del máximo existente, así que puede correr sobre una base con datos;
+los catálogos (categorías) que ya tienen filas se reutilizan.
+
+Las filas salen de un productor hacia una cola acotada y varios consumidores
+las escriben en lotes de executemany o en archivos para LOAD DATA LOCAL INFILE
+(el servidor debe tener local_infile=ON).
+
+Ejecutar (base de pruebas, NUNCA contra producción):
+    python synthetic_data.py --users 1000000 --database carga --mode load-data --output-dir /tmp/carga
+    python synthetic_data.py --users 10000 --tables usuarios,cursos,modulos,lecciones
+    python synthetic_data.py --users 100000 --mode load-data --output-dir /tmp/carga --no-load
+"""
+
+import argparse
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pymysql
+
+from db_pool import connect
+from schema_model import DEFAULT_BASE, load_model
+from schema_snapshot import take_snapshot
+
+# Fecha de referencia fija: misma semilla, mismos datos, sin importar el día
+REFERENCE_DATE = datetime(2025, 1, 1)
+# Contraseña: Password123! (mismo hash que db/fix_passwords.sql)
+PASSWORD_HASH = '$2y$10$3N2VSsK2Dpospd2pQEi9aOvLUcLud1supqTE1/vRBgiW1ZRrh9NpG'
+
+BATCH_ROWS = 2000
+QUEUE_BATCHES = 16
+
+CATEGORIAS_CURSOS = ['Finanzas', 'Marketing', 'Ventas', 'Liderazgo', 'Operaciones', 'Tecnología',
+                     'Legal', 'Recursos Humanos', 'Innovación', 'Comercio Exterior', 'Productividad', 'Estrategia']
+CATEGORIAS_RECURSOS = ['Plantillas', 'Guías', 'Herramientas', 'Casos de éxito', 'Normatividad',
+                       'Financiamiento', 'Marketing digital', 'Podcasts']
+CATEGORIAS_PRODUCTOS = ['Alimentos y Bebidas', 'Artesanías', 'Ropa y Accesorios', 'Belleza y Cuidado Personal',
+                        'Hogar y Decoración', 'Servicios Profesionales', 'Tecnología', 'Salud y Bienestar']
+PALABRAS = ['plan', 'negocio', 'ventas', 'clientes', 'costos', 'precio', 'mercado', 'equipo', 'crédito',
+            'marca', 'digital', 'proceso', 'calidad', 'contrato', 'impuestos', 'flujo', 'inventario',
+            'proveedores', 'estrategia', 'crecimiento', 'local', 'artesanal', 'orgánico', 'servicio']
+ESTADOS_PRODUCTO = ('publicado', 'publicado', 'publicado', 'borrador', 'pausado', 'agotado')
+ESTADOS_VITRINA = ESTADOS_PRODUCTO + ('pendiente', 'rechazado')
+# Como el seed original: dos productos por moderar y uno rechazado entre los primeros
+ESTADOS_VITRINA_FIJOS = ('publicado', 'pendiente', 'publicado', 'pendiente', 'publicado', 'rechazado')
+NOMBRES = ['María', 'José', 'Guadalupe', 'Juan', 'Ana', 'Luis', 'Carmen', 'Carlos', 'Rosa', 'Miguel',
+           'Laura', 'Jorge', 'Sofía', 'Pedro', 'Elena', 'Fernando', 'Lucía', 'Ricardo', 'Patricia', 'Diego']
+APELLIDOS = ['Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+             'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez']
+CIUDADES = ['Ciudad de México', 'Guadalajara', 'Monterrey', 'Puebla', 'Querétaro', 'Mérida', 'León',
+            'Oaxaca', 'Tijuana', 'Morelia']
+
+
+# ----------------------------------------------------------------------
+# Distribuciones
+# ----------------------------------------------------------------------
+
+def skewed_index(rng, n, alpha=2.0):
+    """Índice en [0, n) sesgado hacia los primeros (alpha > 1: más concentrado)"""
+    return min(n - 1, int(n * rng.random() ** alpha))
+
+
+def skewed_count(rng, mean, cap):
+    """Conteo de cola larga (exponencial) con media aproximada `mean`"""
+    return min(cap, int(rng.expovariate(1.0 / mean)))
+
+
+def past(rng, days, skew=2.0):
+    """Fecha en los últimos `days` días, concentrada cerca de la referencia"""
+    return REFERENCE_DATE - timedelta(seconds=int(days * 86400 * rng.random() ** skew))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(PALABRAS) for _ in range(words)).capitalize()
+
+
+# ----------------------------------------------------------------------
+# Tablas
+# ----------------------------------------------------------------------
+
+class TableSpec:
+    """Columnas que genera una tabla, sus padres de datos y su método generador"""
+
+    def __init__(self, name, columns, parents=(), catalog=False):
+        self.name = name
+        self.columns = columns
+        self.parents = parents
+        self.catalog = catalog
+
+
+TABLES = [
+    TableSpec('usuarios', ['id_usuario', 'nombre', 'apellido', 'email', 'password_hash', 'tipo_usuario',
+                           'estado', 'ciudad', 'pais', 'fecha_registro', 'ultimo_acceso']),
+    TableSpec('categorias_cursos', ['id_categoria', 'nombre', 'slug', 'orden', 'activo'], catalog=True),
+    TableSpec('cursos', ['id_curso', 'id_categoria', 'id_instructor', 'titulo', 'slug', 'descripcion', 'nivel',
+                         'duracion_estimada', 'precio', 'estado', 'fecha_publicacion', 'fecha_creacion'],
+              parents=('usuarios', 'categorias_cursos')),
+    TableSpec('modulos', ['id_modulo', 'id_curso', 'titulo', 'orden', 'fecha_creacion'], parents=('cursos',)),
+    TableSpec('lecciones', ['id_leccion', 'id_modulo', 'titulo', 'contenido', 'tipo_contenido', 'orden',
+                            'duracion_minutos', 'fecha_creacion'], parents=('modulos',)),
+    TableSpec('inscripciones', ['id_inscripcion', 'id_usuario', 'id_curso', 'porcentaje_avance',
+                                'lecciones_completadas', 'tiempo_dedicado', 'fecha_inscripcion', 'fecha_inicio',
+                                'fecha_finalizacion', 'fecha_ultima_actividad'],
+              parents=('usuarios', 'cursos', 'lecciones')),
+    TableSpec('progreso_lecciones', ['id_progreso', 'id_inscripcion', 'id_leccion', 'completada', 'tiempo_dedicado',
+                                     'fecha_inicio', 'fecha_completado'], parents=('inscripciones',)),
+    TableSpec('conversaciones', ['id_conversacion', 'id_curso', 'id_alumno', 'id_instructor', 'tipo_conversacion',
+                                 'estado', 'ultimo_mensaje_fecha', 'fecha_creacion'], parents=('inscripciones',)),
+    TableSpec('mensajes', ['id_mensaje', 'id_conversacion', 'id_remitente', 'remitente_tipo', 'contenido',
+                           'tipo_mensaje', 'leido', 'fecha_envio'], parents=('conversaciones',)),
+    TableSpec('puntos_usuario', ['id_puntos', 'id_usuario', 'puntos_totales', 'puntos_disponibles',
+                                 'puntos_gastados', 'nivel', 'experiencia'], parents=('usuarios',)),
+    TableSpec('categorias_recursos', ['id_categoria', 'nombre', 'slug', 'orden', 'activa'], catalog=True),
+    TableSpec('recursos', ['id_recurso', 'id_categoria', 'id_autor', 'titulo', 'slug', 'descripcion',
+                           'tipo_recurso', 'tipo_acceso', 'nivel', 'total_descargas', 'total_vistas', 'estado',
+                           'fecha_publicacion'], parents=('usuarios', 'categorias_recursos')),
+    # Ambos esquemas: id_categoria (dump) / id_categoria_producto (nyd_db, producción)
+    TableSpec('categorias_productos', ['id_categoria', 'id_categoria_producto', 'nombre', 'slug', 'descripcion',
+                                       'orden', 'activo'], catalog=True),
+    TableSpec('productos', ['id_producto', 'id_usuario', 'id_categoria', 'titulo', 'slug', 'descripcion_corta',
+                            'descripcion_completa', 'precio', 'estado', 'destacado', 'total_vistas',
+                            'fecha_publicacion'], parents=('usuarios', 'categorias_productos')),
+    TableSpec('productos_vitrina', ['id_producto', 'id_usuario', 'id_categoria_producto', 'nombre', 'descripcion',
+                                    'descripcion_corta', 'precio', 'estado', 'destacado', 'vistas',
+                                    'fecha_creacion', 'fecha_publicacion'], parents=('usuarios', 'categorias_productos')),
+]
+SPECS = {spec.name: spec for spec in TABLES}
+
+
+def fk_order(names, schema):
+    """Orden topológico de las tablas según las FKs del esquema y los padres de datos"""
+    parents = {}
+    for name in names:
+        deps = set(SPECS[name].parents)
+        for fk in schema['tables'][name]['foreign_keys'].values():
+            deps.add(fk['ref_table'])
+        parents[name] = {p for p in deps if p in names and p != name}
+
+    order, done = [], set()
+    while len(order) < len(names):
+        ready = [n for n in names if n not in done and parents[n] <= done]
+        if not ready:
+            raise ValueError(f"Ciclo de llaves foráneas entre: {sorted(set(names) - done)}")
+        order += ready
+        done.update(ready)
+    return order
+
+
+def fill_value(column):
+    """Valor para una columna NOT NULL sin default que el generador no conoce"""
+    kind = column['type'].lower()
+    if kind.startswith('enum('):
+        return kind[5:].split(',')[0].strip(" '\")")
+    if kind.startswith(('int', 'bigint', 'smallint', 'tinyint', 'mediumint', 'decimal', 'float', 'double', 'bool')):
+        return 0
+    if kind.startswith(('datetime', 'timestamp', 'date')):
+        return REFERENCE_DATE
+    if kind.startswith('json'):
+        return '{}'
+    return ''
+
+
+class Layout:
+    """Proyección de las filas del generador a las columnas reales de la tabla"""
+
+    def __init__(self, spec, table):
+        columns = table['columns']
+        self.keep = [i for i, c in enumerate(spec.columns) if c in columns]
+        self.columns = [spec.columns[i] for i in self.keep]
+        missing = [
+            c for c, info in columns.items()
+            if c not in spec.columns and not info['nullable'] and info['default'] is None
+            and 'auto_increment' not in (info['extra'] or '')
+        ]
+        self.fill = tuple(fill_value(columns[c]) for c in missing)
+        # Valores de ENUM que este esquema no tiene (p. ej. pendiente/rechazado
+        # antes de fix_productos_estados.py): se usa el default de la columna
+        self.enums = []
+        for position, c in enumerate(self.columns):
+            if columns[c]['type'].lower().startswith('enum('):
+                allowed = set(re.findall(r"'((?:[^']|'')*)'", columns[c]['type']))
+                default = str(columns[c]['default'] or '').strip("'")  # MariaDB lo devuelve entre comillas
+                self.enums.append((position, allowed, default if default in allowed else fill_value(columns[c])))
+        self.columns += missing
+
+    def project(self, row):
+        values = tuple(row[i] for i in self.keep) + self.fill
+        for position, allowed, fallback in self.enums:
+            if values[position] is not None and values[position] not in allowed:
+                values = values[:position] + (fallback,) + values[position + 1:]
+        return values
+
+
+# ----------------------------------------------------------------------
+# Generación
+# ----------------------------------------------------------------------
+
+class Dataset:
+    """
+    Estado compartido entre tablas: rangos de ids generados o existentes y
+    lo que una tabla hija necesita de su padre (lecciones por curso, cursos
+    de cada inscripción...). Cada tabla usa su propio Random derivado de la
+    semilla, así que el resultado no depende de qué otras tablas se generen.
+    """
+
+    def __init__(self, users, seed=42, start_ids=None, existing_ids=None, counts=None):
+        self.users = users
+        self.seed = seed
+        self.counts = counts or {}      # filas fijas por tabla (cursos, recursos, productos)
+        self.start_ids = start_ids or {}
+        self.ids = dict(existing_ids or {})
+        self.instructors = None
+        self.course_modules = {}        # id_curso -> (primer id_modulo, total)
+        self.course_lessons = {}        # id_curso -> (primer id_leccion, total)
+        self.course_instructor = {}
+        self.insc_user = array('l')
+        self.insc_course = array('l')
+        self.insc_done = array('h')
+        self.insc_start = {}
+        self.conversations = array('l')  # id_usuario del alumno por conversación
+        self.conversation_instructor = array('l')
+
+    def rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def start(self, table):
+        return self.start_ids.get(table, 1)
+
+    def count(self, table, default):
+        return self.counts.get(table, default)
+
+    def pick(self, table, rng, alpha=1.0):
+        ids = self.ids[table]
+        return ids[skewed_index(rng, len(ids), alpha)]
+
+    def rows(self, table):
+        return getattr(self, f"gen_{table}")(self.rng(table), self.start(table))
+
+    def _catalog(self, table, names, start):
+        self.ids[table] = range(start, start + len(names))
+        for i, nombre in enumerate(names):
+            yield (start + i, nombre, f"{nombre.lower().replace(' ', '-')}-{start + i}", i + 1, 1)
+
+    # --- usuarios y catálogos -------------------------------------------
+
+    def gen_usuarios(self, rng, start):
+        self.ids['usuarios'] = range(start, start + self.users)
+        for i in range(start, start + self.users):
+            # 4% mentores (instructores/autores), 1% admin, 10% empresarios
+            tipo = ('mentor' if i % 25 == 0 else 'administrador' if i % 100 == 1
+                    else 'empresario' if i % 10 == 3 else 'emprendedor')
+            registro = past(rng, 1095, skew=1.5)
+            yield (i, rng.choice(NOMBRES), rng.choice(APELLIDOS), f"usuario{i}@seed.test", PASSWORD_HASH, tipo,
+                   'activo' if rng.random() < 0.93 else rng.choice(('inactivo', 'suspendido')),
+                   rng.choice(CIUDADES), 'México', registro,
+                   registro + timedelta(seconds=int((REFERENCE_DATE - registro).total_seconds() * rng.random()))
+                   if rng.random() < 0.8 else None)
+
+    def _instructors(self):
+        if self.instructors is None:
+            users = self.ids['usuarios']
+            mentors = [u for u in users if u % 25 == 0] if isinstance(users, range) else []
+            self.instructors = mentors or list(users)
+        return self.instructors
+
+    def gen_categorias_cursos(self, rng, start):
+        return self._catalog('categorias_cursos', CATEGORIAS_CURSOS, start)
+
+    def gen_categorias_recursos(self, rng, start):
+        return self._catalog('categorias_recursos', CATEGORIAS_RECURSOS, start)
+
+    def gen_categorias_productos(self, rng, start):
+        self.ids['categorias_productos'] = range(start, start + len(CATEGORIAS_PRODUCTOS))
+        for i, nombre in enumerate(CATEGORIAS_PRODUCTOS):
+            yield (start + i, start + i, nombre, f"{nombre.lower().replace(' ', '-')}-{start + i}",
+                   f"Productos de {nombre.lower()}", i + 1, 1)
+
+    # --- cursos ----------------------------------------------------------
+
+    def gen_cursos(self, rng, start):
+        count = self.count('cursos', max(20, self.users // 500))
+        self.ids['cursos'] = range(start, start + count)
+        instructors = self._instructors()
+        for i in range(start, start + count):
+            instructor = instructors[skewed_index(rng, len(instructors), 1.5)]
+            self.course_instructor[i] = instructor
+            creado = past(rng, 1095, skew=1.2)
+            estado = 'publicado' if rng.random() < 0.85 else rng.choice(('borrador', 'archivado'))
+            yield (i, self.pick('categorias_cursos', rng, 1.5), instructor, f"Curso {i}: {sentence(rng, 3)}",
+                   f"curso-{i}", sentence(rng, 20), rng.choice(('principiante', 'principiante', 'intermedio', 'avanzado')),
+                   rng.randint(60, 1200), 0 if rng.random() < 0.7 else rng.choice((199, 499, 999)), estado,
+                   creado + timedelta(days=rng.randint(1, 30)) if estado == 'publicado' else None, creado)
+
+    def gen_modulos(self, rng, start):
+        i = start
+        for curso in self.ids['cursos']:
+            count = rng.randint(3, 8)
+            self.course_modules[curso] = (i, count)
+            for orden in range(1, count + 1):
+                yield (i, curso, f"Módulo {orden}: {sentence(rng, 3)}", orden, REFERENCE_DATE)
+                i += 1
+        self.ids['modulos'] = range(start, i)
+
+    def gen_lecciones(self, rng, start):
+        i = start
+        for curso, (first_module, modules) in self.course_modules.items():
+            course_first = i
+            for modulo in range(first_module, first_module + modules):
+                for orden in range(1, rng.randint(3, 10) + 1):
+                    yield (i, modulo, f"Lección {orden}: {sentence(rng, 4)}", sentence(rng, 60),
+                           rng.choice(('texto', 'video', 'video', 'documento')), orden, rng.randint(5, 45),
+                           REFERENCE_DATE)
+                    i += 1
+            self.course_lessons[curso] = (course_first, i - course_first)
+        self.ids['lecciones'] = range(start, i)
+
+    # --- actividad de alumnos ---------------------------------------------
+
+    def gen_inscripciones(self, rng, start):
+        courses = self.ids['cursos']
+        i = start
+        for usuario in self.ids['usuarios']:
+            taken = set()
+            for _ in range(skewed_count(rng, 2.0, 12)):
+                # Pocos cursos concentran la mayoría de las inscripciones
+                curso = courses[skewed_index(rng, len(courses), 2.5)]
+                if curso in taken:
+                    continue
+                taken.add(curso)
+                lessons = self.course_lessons.get(curso, (0, 0))[1]
+                # La mayoría abandona pronto; ~15% termina
+                avance = 100.0 if rng.random() < 0.15 else round(100 * rng.random() ** 2.5, 2)
+                done = int(lessons * avance / 100)
+                inscrito = past(rng, 730)
+                actividad = inscrito + timedelta(days=rng.randint(0, 60))
+                self.insc_user.append(usuario)
+                self.insc_course.append(curso)
+                self.insc_done.append(done)
+                self.insc_start[i] = inscrito
+                yield (i, usuario, curso, avance, done, done * rng.randint(5, 30), inscrito, inscrito,
+                       actividad if avance == 100.0 else None, actividad)
+                i += 1
+        self.ids['inscripciones'] = range(start, i)
+
+    def gen_progreso_lecciones(self, rng, start):
+        i = start
+        for k, inscripcion in enumerate(self.ids['inscripciones']):
+            first, lessons = self.course_lessons.get(self.insc_course[k], (0, 0))
+            if not lessons:
+                continue
+            fecha = self.insc_start.get(inscripcion, REFERENCE_DATE)
+            done = self.insc_done[k]
+            # Lecciones completadas y, si no terminó, la siguiente en curso.
+            # Es la tabla más grande: random() en lugar de randint() por fila
+            for leccion in range(first, first + min(lessons, done + 1)):
+                completada = leccion - first < done
+                fin = fecha + timedelta(seconds=300 + int(rng.random() * 5100))
+                yield (i, inscripcion, leccion, int(completada), 60 + int(rng.random() * 2640), fecha,
+                       fin if completada else None)
+                fecha = fin
+                i += 1
+        self.ids['progreso_lecciones'] = range(start, i)
+
+    def gen_conversaciones(self, rng, start):
+        i = start
+        for k in range(len(self.insc_user)):
+            if rng.random() >= 0.1:
+                continue
+            curso = self.insc_course[k]
+            instructor = self.course_instructor.get(curso) or self._instructors()[0]
+            self.conversations.append(self.insc_user[k])
+            self.conversation_instructor.append(instructor)
+            creada = past(rng, 365)
+            yield (i, curso, self.insc_user[k], instructor, 'instructor',
+                   'activa' if rng.random() < 0.8 else 'archivada', creada + timedelta(days=rng.randint(0, 30)),
+                   creada)
+            i += 1
+        self.ids['conversaciones'] = range(start, i)
+
+    def gen_mensajes(self, rng, start):
+        i = start
+        for k, conversacion in enumerate(self.ids['conversaciones']):
+            fecha = past(rng, 365)
+            for n in range(1 + skewed_count(rng, 5.0, 60)):
+                alumno = n % 2 == 0
+                yield (i, conversacion, self.conversations[k] if alumno else self.conversation_instructor[k],
+                       'alumno' if alumno else 'instructor', sentence(rng, rng.randint(4, 30)), 'texto',
+                       int(rng.random() < 0.85), fecha)
+                fecha += timedelta(minutes=rng.randint(1, 2880))
+                i += 1
+        self.ids['mensajes'] = range(start, i)
+
+    def gen_puntos_usuario(self, rng, start):
+        i = start
+        for usuario in self.ids['usuarios']:
+            if rng.random() >= 0.6:
+                continue
+            # Cola larga: pocos usuarios muy activos
+            totales = int(rng.paretovariate(1.2) * 50)
+            gastados = int(totales * rng.random() * 0.5)
+            yield (i, usuario, totales, totales - gastados, gastados, 1 + totales // 500, totales)
+            i += 1
+        self.ids['puntos_usuario'] = range(start, i)
+
+    # --- contenido ---------------------------------------------------------
+
+    def gen_recursos(self, rng, start):
+        count = self.count('recursos', max(20, self.users // 200))
+        self.ids['recursos'] = range(start, start + count)
+        authors = self._instructors()
+        for i in range(start, start + count):
+            vistas = int(rng.paretovariate(1.1) * 20)
+            estado = 'publicado' if rng.random() < 0.9 else 'borrador'
+            yield (i, self.pick('categorias_recursos', rng, 1.5), authors[skewed_index(rng, len(authors), 1.5)],
+                   f"Recurso {i}: {sentence(rng, 4)}", f"recurso-{i}", sentence(rng, 25),
+                   rng.choice(('articulo', 'ebook', 'plantilla', 'herramienta', 'video', 'infografia', 'podcast')),
+                   'gratuito' if rng.random() < 0.8 else 'premium',
+                   rng.choice(('principiante', 'intermedio', 'avanzado')), vistas // 4, vistas, estado,
+                   past(rng, 730) if estado == 'publicado' else None)
+
+    def _productos(self, rng, start, table, estados=ESTADOS_PRODUCTO, fijos=()):
+        count = self.count(table, max(6, self.users // 20))
+        self.ids[table] = range(start, start + count)
+        users = self.ids['usuarios']
+        for i in range(start, start + count):
+            estado = rng.choice(estados)
+            if i - start < len(fijos):
+                estado = fijos[i - start]
+            creado = past(rng, 730)
+            yield (i, users[skewed_index(rng, len(users), 1.2)], self.pick('categorias_productos', rng, 1.5),
+                   f"Producto {i}: {sentence(rng, 3)}", sentence(rng, 40), sentence(rng, 8),
+                   round(rng.lognormvariate(5.5, 0.8), 2), estado, int(rng.random() < 0.05),
+                   int(rng.paretovariate(1.1) * 10), creado,
+                   min(REFERENCE_DATE, creado + timedelta(days=rng.randint(0, 30))) if estado == 'publicado' else None)
+
+    def gen_productos(self, rng, start):
+        for row in self._productos(rng, start, 'productos'):
+            # (id, usuario, categoría, titulo, slug, corta, completa, precio, estado, destacado, vistas, publicación)
+            yield row[:4] + (f"producto-{row[0]}", row[5], row[4]) + row[6:10] + row[11:]
+
+    def gen_productos_vitrina(self, rng, start):
+        # Los primeros siempre cubren los estados de moderación (cola del admin)
+        return self._productos(rng, start, 'productos_vitrina', ESTADOS_VITRINA, ESTADOS_VITRINA_FIJOS)
+
+
+# ----------------------------------------------------------------------
+# Escritura
+# ----------------------------------------------------------------------
+
+def _tsv(value):
+    """Campo para LOAD DATA con las opciones por defecto"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return str(int(value))
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class Pipeline:
+    """
+    Productor (generación, en orden de FKs) → cola acotada → consumidores.
+    En modo insert cada consumidor tiene su propia conexión y escribe lotes
+    con executemany; en modo load-data un único consumidor anexa a un archivo
+    por tabla y al final se cargan en paralelo con LOAD DATA LOCAL INFILE.
+    FOREIGN_KEY_CHECKS/UNIQUE_CHECKS solo se desactivan si la base destino no
+    tenía filas en las tablas del plan; si ya hay datos se dejan activos y se
+    escribe con un solo consumidor, para que los padres lleguen antes que los hijos.
+    """
+
+    def __init__(self, dataset, plan, mode='insert', config=None, writers=4, output_dir=None,
+                 batch_rows=BATCH_ROWS):
+        self.dataset = dataset
+        self.plan = plan                  # [(nombre, Layout)]
+        self.layouts = dict(plan)
+        self.mode = mode
+        self.config = config
+        self.relax_checks = not dataset.ids and all(start <= 1 for start in dataset.start_ids.values())
+        self.writers = writers if mode == 'insert' and self.relax_checks else 1
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.batch_rows = batch_rows
+        self.queue = queue.Queue(maxsize=QUEUE_BATCHES)
+        self.counts = {name: 0 for name, _ in plan}
+        self.errors = []
+        self.failed = threading.Event()
+        self._files = {}
+
+    def connect(self, **options):
+        connection = connect(self.config, **options)
+        if self.relax_checks:
+            with connection.cursor() as cursor:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                cursor.execute("SET UNIQUE_CHECKS = 0")
+        return connection
+
+    def produce(self):
+        for name, layout in self.plan:
+            start = time.perf_counter()
+            batch = []
+            for row in self.dataset.rows(name):
+                batch.append(layout.project(row))
+                if len(batch) >= self.batch_rows:
+                    if self.failed.is_set():
+                        return
+                    self.queue.put((name, batch))
+                    self.counts[name] += len(batch)
+                    batch = []
+            if batch:
+                self.queue.put((name, batch))
+                self.counts[name] += len(batch)
+            print(f"  ✓ {name}: {self.counts[name]:,} filas generadas ({time.perf_counter() - start:.1f}s)")
+
+    def consume_insert(self):
+        try:
+            connection = self.connect()
+        except pymysql.Error as e:
+            self._fail(f"conexión: {e}")
+            return
+        try:
+            with connection.cursor() as cursor:
+                while True:
+                    item = self.queue.get()
+                    if item is None:
+                        return
+                    if self.failed.is_set():
+                        continue  # vaciar la cola para que el productor no se bloquee
+                    name, rows = item
+                    columns = self.layouts[name].columns
+                    sql = (f"INSERT INTO `{name}` ({', '.join(f'`{c}`' for c in columns)}) "
+                           f"VALUES ({', '.join(['%s'] * len(columns))})")
+                    try:
+                        cursor.executemany(sql, rows)
+                        connection.commit()
+                    except pymysql.Error as e:
+                        self._fail(f"{name}: {e}")
+        finally:
+            connection.close()
+
+    def consume_files(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                name, rows = item
+                f = self._files.get(name)
+                if f is None:
+                    f = self._files[name] = open(self.output_dir / f"{name}.tsv", 'w', encoding='utf-8', newline='\n')
+                f.write(''.join('\t'.join(_tsv(v) for v in row) + '\n' for row in rows))
+        finally:
+            for f in self._files.values():
+                f.close()
+
+    def _fail(self, message):
+        self.errors.append(message)
+        self.failed.set()
+
+    def load_files(self):
+        """Carga los archivos generados, varias tablas a la vez"""
+        names = [name for name, _ in self.plan if self.counts[name]]
+        pending = queue.Queue()
+        for name in names:
+            pending.put(name)
+
+        def worker():
+            connection = self.connect(local_infile=True)
+            try:
+                with connection.cursor() as cursor:
+                    while not self.failed.is_set():
+                        try:
+                            name = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        path = (self.output_dir / f"{name}.tsv").resolve().as_posix()
+                        columns = ', '.join(f'`{c}`' for c in self.layouts[name].columns)
+                        start = time.perf_counter()
+                        try:
+                            cursor.execute(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE `{name}` "
+                                           f"CHARACTER SET utf8mb4 ({columns})")
+                            connection.commit()
+                            print(f"  ✓ {name}: cargada en {time.perf_counter() - start:.1f}s")
+                        except pymysql.Error as e:
+                            self._fail(f"{name}: {e}")
+            finally:
+                connection.close()
+
+        # Con las FKs activas las tablas se cargan de a una, en orden de FKs
+        parallel = min(4, len(names)) if self.relax_checks else 1
+        threads = [threading.Thread(target=worker) for _ in range(parallel or 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self, load=True):
+        if self.mode == 'load-data':
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        target = self.consume_insert if self.mode == 'insert' else self.consume_files
+        consumers = [threading.Thread(target=target) for _ in range(self.writers)]
+        for consumer in consumers:
+            consumer.start()
+        try:
+            self.produce()
+        finally:
+            for _ in consumers:
+                self.queue.put(None)
+            for consumer in consumers:
+                consumer.join()
+        if self.mode == 'load-data' and load and not self.failed.is_set():
+            print("\n📥 Cargando archivos con LOAD DATA LOCAL INFILE...")
+            self.load_files()
+        return not self.errors
+
+
+# ----------------------------------------------------------------------
+# Planeación
+# ----------------------------------------------------------------------
+
+def primary_key(table):
+    primary = table['indexes'].get('PRIMARY')
+    return primary['columns'][0] if primary and len(primary['columns']) == 1 else None
+
+
+def next_ids(connection, schema, names):
+    """Siguiente id libre por tabla, para no chocar con filas existentes"""
+    start_ids = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            pk = primary_key(schema['tables'][name])
+            if not pk:
+                continue
+            cursor.execute(f"SELECT COALESCE(MAX(`{pk}`), 0) FROM `{name}`")
+            start_ids[name] = cursor.fetchone()[0] + 1
+    return start_ids
+
+
+def load_ids(connection, schema, name):
+    pk = primary_key(schema['tables'][name])
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT `{pk}` FROM `{name}` ORDER BY `{pk}`")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def build_plan(schema, tables=None, connection=None):
+    """
+    Tablas a generar (en orden de FKs) con su Layout, más los ids
+    existentes que usarán como padres. Sin conexión todo se genera desde 1.
+    """
+    requested = tables or [spec.name for spec in TABLES]
+    names = []
+    for name in requested:
+        if name not in SPECS:
+            raise ValueError(f"Tabla sin generador: {name}")
+        if name not in schema['tables'] or schema['tables'][name]['type'] != 'BASE TABLE':
+            print(f"⚠️  {name} no existe en el esquema destino, se omite")
+            continue
+        names.append(name)
+
+    start_ids, existing = {}, {}
+    if connection is not None:
+        start_ids = next_ids(connection, schema, names)
+        for name in list(names):
+            if SPECS[name].catalog and start_ids.get(name, 1) > 1:
+                existing[name] = load_ids(connection, schema, name)
+                names.remove(name)
+                print(f"  • {name}: se reutilizan {len(existing[name])} filas existentes")
+
+    # Padres no generados: sus ids se leen de la base
+    for name in names:
+        for parent in SPECS[name].parents:
+            if parent in names or parent in existing or SPECS.get(parent) is None:
+                continue
+            if parent in ('modulos', 'lecciones', 'inscripciones', 'conversaciones'):
+                raise ValueError(f"{name} requiere generar también {parent}")
+            if connection is None or parent not in schema['tables']:
+                raise ValueError(f"{name} requiere {parent}: inclúyela o usa una base con datos")
+            existing[parent] = load_ids(connection, schema, parent)
+            if not existing[parent]:
+                raise ValueError(f"{name} requiere filas en {parent}")
+
+    plan = [(name, Layout(SPECS[name], schema['tables'][name])) for name in fk_order(names, schema)]
+    return plan, start_ids, existing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos deterministas recorriendo las FKs")
+    parser.add_argument('--users', type=int, default=10000, help="Usuarios; el resto escala a partir de aquí")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tables', help="Solo estas tablas, separadas por coma")
+    parser.add_argument('--count', action='append', default=[], metavar='TABLA=N',
+                        help="Filas fijas para cursos, recursos, productos o productos_vitrina")
+    parser.add_argument('--mode', choices=['insert', 'load-data'], default='insert')
+    parser.add_argument('--output-dir', help="Directorio de archivos para --mode load-data")
+    parser.add_argument('--no-load', action='store_true',
+                        help="Solo generar los archivos (sin conexión; esquema del modelo offline)")
+    parser.add_argument('--base', default=DEFAULT_BASE, help="Dump base del modelo offline (--no-load)")
+    parser.add_argument('--writers', type=int, default=4, help="Conexiones escritoras en modo insert")
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='formacion_empresarial')
+    args = parser.parse_args()
+
+    if args.mode == 'load-data' and not args.output_dir:
+        parser.error("--mode load-data requiere --output-dir")
+    if args.no_load and args.mode != 'load-data':
+        parser.error("--no-load solo aplica a --mode load-data")
+
+    tables = [t.strip() for t in args.tables.split(',')] if args.tables else None
+    counts = {}
+    for item in args.count:
+        table, _, value = item.partition('=')
+        if not value.isdigit():
+            parser.error(f"--count espera TABLA=N: {item}")
+        counts[table.strip()] = int(value)
+    config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'charset': 'utf8mb4',
+    }
+
+    connection = None
+    if args.no_load:
+        schema = load_model(args.base)
+        print(f"📐 Esquema del modelo offline ({args.base})")
+    else:
+        connection = connect(config)
+        schema = take_snapshot(connection)
+        print(f"📐 Esquema de {args.database} en {args.host}:{args.port}")
+
+    try:
+        plan, start_ids, existing = build_plan(schema, tables, connection)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if connection is not None:
+            connection.close()
+
+    dataset = Dataset(args.users, args.seed, start_ids, existing, counts)
+    pipeline = Pipeline(dataset, plan, args.mode, config, args.writers, args.output_dir, args.batch_rows)
+    print(f"\n🏭 Generando {len(plan)} tablas para {args.users:,} usuarios (semilla {args.seed})...")
+    start = time.perf_counter()
+    ok = pipeline.run(load=not args.no_load)
+    elapsed = time.perf_counter() - start
+
+    total = sum(pipeline.counts.values())
+    print(f"\n📊 {total:,} filas en {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} filas/s)")
+    if not ok:
+        print(f"❌ {len(pipeline.errors)} errores:")
+        for error in pipeline.errors[:20]:
+            print(f"  - {error}")
+        sys.exit(1)
+    if args.no_load:
+        print(f"✅ Archivos en {args.output_dir} (cargar con LOAD DATA LOCAL INFILE, FOREIGN_KEY_CHECKS=0)")
+    else:
+        print("✅ Datos cargados")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,33 @@ Genera y verifica hashes de contraseñas compatibles con PHP password_hash()
 ============================================================================
 """
 
-import bcrypt
+import argparse
+import csv
+import json
+import os
+import re
+import statistics
 import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+DEFAULT_ROUNDS = 10
+# Costo con el que hashea el backend: Security::hashPassword() usa ['cost' => 12]
+BACKEND_COST = 12
 
-def generate_hash(password):
+# Columnas de usuarios que produce el modo bulk (mismas que batch_mode)
+BULK_COLUMNS = ['nombre', 'apellido', 'email', 'password_hash', 'tipo_usuario', 'estado']
+BULK_CHUNK = 64          # contraseñas por tarea enviada al pool
+BULK_INFLIGHT = 4        # tareas pendientes por worker (acota la memoria)
+BULK_INSERT_ROWS = 500   # filas por INSERT multi-fila
+
+def generate_hash(password, rounds=DEFAULT_ROUNDS):
     """Genera un hash bcrypt de la contraseña"""
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(rounds=10)
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -130,23 +150,330 @@ def batch_mode():
         print(f"VALUES ('Usuario', 'Prueba {i}', '{email}', '{hash_result}', 'emprendedor', 'activo');")
         print()
 
+# ============================================================================
+# MODO BULK - Hashing paralelo de archivos grandes
+# ============================================================================
+
+def read_rows(path, input_format):
+    """
+    Itera filas (dict) de un CSV con encabezado, un JSONL o texto plano
+    (una contraseña por línea). '-' lee de stdin. Nunca carga el archivo
+    completo en memoria.
+    """
+    if input_format == 'auto':
+        ext = os.path.splitext(path)[1].lower()
+        input_format = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(ext, 'lines')
+
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', newline='')
+    try:
+        if input_format == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+        elif input_format == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for line in f:
+                password = line.rstrip('\r\n')
+                if password:
+                    yield {'password': password}
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def user_row(i, row):
+    """Completa los campos de usuario con los mismos valores por defecto que batch_mode"""
+    return {
+        'nombre': row.get('nombre') or 'Usuario',
+        'apellido': row.get('apellido') or f'Prueba {i}',
+        'email': row.get('email') or f'usuario{i}@test.com',
+        'tipo_usuario': row.get('tipo_usuario') or 'emprendedor',
+        'estado': row.get('estado') or 'activo',
+    }
+
+def _hash_chunk(passwords, rounds):
+    """Tarea del pool: hashea un bloque de contraseñas"""
+    return [generate_hash(password, rounds) for password in passwords]
+
+def _chunks(rows, size):
+    chunk = []
+    for i, row in enumerate(rows, 1):
+        password = row.get('password')
+        if not password:
+            print(f"⚠️  Fila {i} sin contraseña, omitida", file=sys.stderr)
+            continue
+        chunk.append((user_row(i, row), password))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def hash_rows(rows, workers=None, rounds=DEFAULT_ROUNDS, chunk_size=BULK_CHUNK):
+    """
+    Hashea las filas en un pool de procesos y las entrega en el orden de
+    entrada, con password_hash en lugar de la contraseña. Solo mantiene
+    workers * BULK_INFLIGHT bloques en vuelo a la vez.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in _chunks(rows, chunk_size):
+            pending.append((chunk, pool.submit(_hash_chunk, [p for _, p in chunk], rounds)))
+            if len(pending) >= workers * BULK_INFLIGHT:
+                yield from _collect(*pending.popleft())
+        while pending:
+            yield from _collect(*pending.popleft())
+
+def _collect(chunk, future):
+    for (user, _), hashed in zip(chunk, future.result()):
+        user['password_hash'] = hashed
+        yield user
+
+def _load_data_field(value):
+    """Escapa un campo para LOAD DATA con las opciones por defecto (TAB, \\n, \\)"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def _sql_literal(value):
+    if value is None:
+        return 'NULL'
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "''") + "'"
+
+def write_csv(users, out):
+    writer = csv.DictWriter(out, fieldnames=BULK_COLUMNS, lineterminator='\n')
+    writer.writeheader()
+    count = 0
+    for user in users:
+        writer.writerow(user)
+        count += 1
+    return count
+
+def write_load_data(users, out):
+    count = 0
+    for user in users:
+        out.write('\t'.join(_load_data_field(user[c]) for c in BULK_COLUMNS) + '\n')
+        count += 1
+    return count
+
+def write_sql(users, out, rows_per_insert=BULK_INSERT_ROWS):
+    head = f"INSERT INTO usuarios ({', '.join(BULK_COLUMNS)}) VALUES\n"
+    count, batch = 0, []
+    for user in users:
+        batch.append('(' + ', '.join(_sql_literal(user[c]) for c in BULK_COLUMNS) + ')')
+        count += 1
+        if len(batch) >= rows_per_insert:
+            out.write(head + ',\n'.join(batch) + ';\n')
+            batch = []
+    if batch:
+        out.write(head + ',\n'.join(batch) + ';\n')
+    return count
+
+BULK_WRITERS = {
+    'csv': write_csv,
+    'load-data': write_load_data,
+    'sql': write_sql,
+}
+
+def bulk_mode(args):
+    """Modo: hashing paralelo desde archivo/stdin hacia CSV, LOAD DATA o SQL"""
+    workers = args.workers or os.cpu_count() or 1
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    print(f"⏳ Hasheando con {workers} procesos (rounds={args.rounds})...", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        users = hash_rows(read_rows(args.input, args.input_format), workers, args.rounds, args.chunk_size)
+        if args.format == 'sql':
+            count = write_sql(users, out, args.rows_per_insert)
+        else:
+            count = BULK_WRITERS[args.format](users, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"✅ {count:,} hashes en {elapsed:.1f}s ({rate:,.1f} hashes/s)", file=sys.stderr)
+    if args.format == 'load-data' and args.output != '-':
+        print("\n📋 Para cargar el archivo:", file=sys.stderr)
+        print(f"LOAD DATA LOCAL INFILE '{args.output}' INTO TABLE usuarios "
+              f"CHARACTER SET utf8mb4 ({', '.join(BULK_COLUMNS)});", file=sys.stderr)
+
+# ============================================================================
+# CALIBRACIÓN Y AUDITORÍA DE COSTOS
+# ============================================================================
+
+BCRYPT_HASH = re.compile(r'^\$(2[abxy]?)\$(\d{2})\$')
+SCAN_FETCH = 5000
+
+def time_verify(rounds, samples):
+    """Mediana de latencia (ms) de verificar un hash con el costo dado"""
+    hashed = generate_hash('calibracion-password', rounds)
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        verify_hash('calibracion-password', hashed)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def calibrate(min_rounds, max_rounds, budget_ms, samples):
+    """
+    Mide la verificación por costo y retorna (resultados, costo recomendado):
+    el costo más alto cuya mediana entra en el presupuesto de login.
+    Se detiene al pasar el doble del presupuesto (cada costo duplica el tiempo).
+    """
+    results = []
+    recommended = None
+    for rounds in range(min_rounds, max_rounds + 1):
+        ms = time_verify(rounds, samples)
+        results.append((rounds, ms))
+        if ms <= budget_ms:
+            recommended = rounds
+        elif ms > budget_ms * 2:
+            break
+    return results, recommended
+
+def calibrate_mode(args):
+    """Modo: benchmark de costo bcrypt en esta máquina"""
+    print(f"⏱️  Calibrando bcrypt (presupuesto de login: {args.budget_ms:.0f} ms, "
+          f"{args.samples} verificaciones por costo)")
+    print("-"*60)
+    results, recommended = calibrate(args.min_rounds, args.max_rounds, args.budget_ms, args.samples)
+    for rounds, ms in results:
+        mark = '✓' if ms <= args.budget_ms else '✗'
+        current = '  ← actual' if rounds == BACKEND_COST else ''
+        print(f"  cost={rounds:2d}  {ms:9.1f} ms  {1000 / ms:8.1f} verif/s/núcleo  {mark}{current}")
+    print("-"*60)
+    if recommended is None:
+        print(f"❌ Ningún costo >= {args.min_rounds} entra en {args.budget_ms:.0f} ms")
+    else:
+        print(f"✅ Costo recomendado: {recommended} (actual del backend: {BACKEND_COST})")
+    return recommended
+
+def hash_cost(hash_string):
+    """(prefijo, costo) de un hash bcrypt, o None si no es bcrypt"""
+    match = BCRYPT_HASH.match(hash_string or '')
+    if not match:
+        return None
+    return f"${match.group(1)}$", int(match.group(2))
+
+def scan_hashes(cursor, table='usuarios', column='password_hash'):
+    """
+    Recorre los hashes con un cursor de servidor (sin cargar la tabla en
+    memoria) y retorna (prefijos, costos, no_bcrypt) como Counters.
+    """
+    prefixes, costs, other = Counter(), Counter(), Counter()
+    cursor.execute(f"SELECT {column} FROM {table}")
+    while True:
+        rows = cursor.fetchmany(SCAN_FETCH)
+        if not rows:
+            break
+        for (hash_string,) in rows:
+            parsed = hash_cost(hash_string)
+            if parsed is None:
+                other['vacío' if not hash_string else hash_string[:4]] += 1
+            else:
+                prefixes[parsed[0]] += 1
+                costs[parsed[1]] += 1
+    return prefixes, costs, other
+
+def _histogram(counter, total, label):
+    width = 40
+    for key, count in sorted(counter.items()):
+        bar = '█' * max(1, round(width * count / total))
+        print(f"  {label}{key!s:<6} {count:8,} {100 * count / total:5.1f}%  {bar}")
+
+def scan_mode(args):
+    """Modo: histograma de costos y prefijos de usuarios.password_hash"""
+    import pymysql.cursors
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db_pool import connect
+
+    connection = connect(cursorclass=pymysql.cursors.SSCursor)
+    try:
+        with connection.cursor() as cursor:
+            prefixes, costs, other = scan_hashes(cursor)
+    finally:
+        connection.close()
+
+    total = sum(costs.values()) + sum(other.values())
+    if not total:
+        print("⚠️  La tabla usuarios no tiene filas")
+        return
+    print(f"\n🔎 {total:,} hashes en usuarios.password_hash")
+    print("-"*60)
+    print("Prefijos:")
+    _histogram(prefixes, total, '')
+    print("Costos:")
+    _histogram(costs, total, 'cost=')
+    if other:
+        print("No bcrypt:")
+        _histogram(other, total, '')
+
+    below = sum(count for cost, count in costs.items() if cost < args.target)
+    above = sum(count for cost, count in costs.items() if cost > args.target)
+    print("-"*60)
+    print(f"📋 Objetivo cost={args.target}: {below:,} por debajo (requieren rehash), "
+          f"{above:,} por encima, {sum(other.values()):,} no bcrypt")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Genera y verifica hashes bcrypt compatibles con PHP")
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('generate', help="Hash de una contraseña")
+    p.add_argument('password')
+    p.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+
+    p = sub.add_parser('verify', help="Verificar una contraseña contra un hash")
+    p.add_argument('password')
+    p.add_argument('hash')
+
+    p = sub.add_parser('bulk', help="Hashear en paralelo un archivo de usuarios/contraseñas")
+    p.add_argument('input', help="CSV/JSONL con columna password (y opcionales nombre, apellido, "
+                                 "email, tipo_usuario, estado), o '-' para stdin")
+    p.add_argument('--input-format', choices=['auto', 'csv', 'jsonl', 'lines'], default='auto',
+                   help="Por defecto según la extensión; 'lines' es una contraseña por línea")
+    p.add_argument('-o', '--output', default='-', help="Archivo de salida ('-' = stdout)")
+    p.add_argument('-f', '--format', choices=sorted(BULK_WRITERS), default='csv')
+    p.add_argument('-w', '--workers', type=int, help="Procesos (por defecto, todos los núcleos)")
+    p.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    p.add_argument('--chunk-size', type=int, default=BULK_CHUNK, help="Contraseñas por tarea")
+    p.add_argument('--rows-per-insert', type=int, default=BULK_INSERT_ROWS, help="Filas por INSERT (formato sql)")
+    p = sub.add_parser('calibrate', help="Medir verificación por costo y recomendar uno")
+    p.add_argument('--budget-ms', type=float, default=100.0, help="Latencia máxima de verificación en login")
+    p.add_argument('--min-rounds', type=int, default=8)
+    p.add_argument('--max-rounds', type=int, default=15)
+    p.add_argument('--samples', type=int, default=5, help="Verificaciones por costo")
+
+    p = sub.add_parser('scan', help="Histograma de costos y prefijos en usuarios.password_hash")
+    p.add_argument('--target', type=int, default=BACKEND_COST,
+                   help="Costo objetivo para planear rehash (default: el de Security.php)")
+    return parser
+
 def main():
     """Función principal"""
-    print("\n🚀 Iniciando Password Hasher...")
-    
     # Si se pasan argumentos por línea de comandos
     if len(sys.argv) > 1:
-        if sys.argv[1] == "generate" and len(sys.argv) > 2:
-            password = sys.argv[2]
-            hash_result = generate_hash(password)
-            print(hash_result)
-            return
-        elif sys.argv[1] == "verify" and len(sys.argv) > 3:
-            password = sys.argv[2]
-            hash_string = sys.argv[3]
-            is_valid = verify_hash(password, hash_string)
+        args = build_parser().parse_args()
+        if args.command == "generate":
+            print(generate_hash(args.password, args.rounds))
+        elif args.command == "verify":
+            is_valid = verify_hash(args.password, args.hash)
             print("VÁLIDO" if is_valid else "INVÁLIDO")
-            return
+        elif args.command == "bulk":
+            bulk_mode(args)
+        elif args.command == "calibrate":
+            calibrate_mode(args)
+        elif args.command == "scan":
+            scan_mode(args)
+        return
+    
+    print("\n🚀 Iniciando Password Hasher...")
     
     # Modo interactivo
     while True: